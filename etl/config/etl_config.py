@@ -27,11 +27,50 @@ DB_CONFIG = {
 
 # Game data source
 GAME_DATA_PATH = os.environ.get("OOTP_GAME_DATA_PATH", "")
+# Export files copied concurrently by fetch-data
+FETCH_MAX_WORKERS = int(os.environ.get("FETCH_MAX_WORKERS", 4))
 
 # ETL Settings
 BATCH_SIZE = 1000
 ENABLE_CHANGE_DETECTION = True
 ARCHIVE_AFTER_DATYS = 3650
+# Loader processes run concurrently by the load-stats / load-reference scheduler
+ETL_MAX_WORKERS = int(os.environ.get("ETL_MAX_WORKERS", 4))
+# Rows per chunk when streaming the game-level stats files
+GAME_STATS_CHUNK_ROWS = 250000
+# Optional per-loader memory budget in MB (None = fixed chunk size)
+ETL_MAX_MEMORY_MB = int(os.environ["ETL_MAX_MEMORY_MB"]) if os.environ.get("ETL_MAX_MEMORY_MB") else None
+# Game-level stats: 'append' inserts only the games past the stored (year, game_id) watermark,
+# 'incremental' reconciles every season of the file against its digest
+GAME_STATS_LOAD_STRATEGY = os.environ.get("GAME_STATS_LOAD_STRATEGY", "append")
+
+# Full loads: 'swap' builds a shadow table and renames it into place, 'truncate' reloads
+# the live table with TRUNCATE ... CASCADE
+FULL_LOAD_MODE = os.environ.get("FULL_LOAD_MODE", "swap")
+# Lock wait per attempt for the rename that swaps a shadow table in, and attempts before failing
+SWAP_LOCK_TIMEOUT_MS = 5000
+SWAP_LOCK_RETRIES = 3
+
+# Seasons recalculated concurrently by the league constants transformer (one connection each)
+CONSTANTS_MAX_WORKERS = int(os.environ.get("CONSTANTS_MAX_WORKERS", 4))
+
+# Materialized views refreshed concurrently after a load (one connection each)
+VIEW_REFRESH_MAX_WORKERS = int(os.environ.get("VIEW_REFRESH_MAX_WORKERS", 3))
+
+# Rows whose foreign keys reference missing parents, found before staging: 'fail' the file,
+# 'drop' the rows, only 'report' them (the load then fails in the database), or 'off'
+FK_VALIDATION_MODE = os.environ.get("FK_VALIDATION_MODE", "fail")
+
+# Tables whose deferred indexes and foreign keys are rebuilt concurrently (one connection each)
+INDEX_REBUILD_MAX_WORKERS = int(os.environ.get("INDEX_REBUILD_MAX_WORKERS", 4))
+# maintenance_work_mem of the rebuild connections
+INDEX_REBUILD_MAINTENANCE_WORK_MEM = os.environ.get("INDEX_REBUILD_MAINTENANCE_WORK_MEM", "1GB")
+
+# Memory cap in MB for parsed CSV frames shared by the loaders of a batch
+CSV_CACHE_MAX_MB = int(os.environ.get("CSV_CACHE_MAX_MB", 1024))
+
+# pandas parser for source CSVs: 'c' or 'pyarrow' (used only when pyarrow is installed)
+CSV_PARSE_ENGINE = os.environ.get("CSV_PARSE_ENGINE", "c")
 
 # Message Filtering Configuration
 # Messages will be excluded from loading if they match these criteria
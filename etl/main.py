@@ -11,6 +11,7 @@ import sys
 from pathlib import Path
 from src.utils.batch import generate_batch_id
 from src.database.schema import db
+from config.etl_config import ETL_MAX_WORKERS, VIEW_REFRESH_MAX_WORKERS
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
@@ -39,21 +40,70 @@ def cli(debug):
 
 @cli.command()
 @click.option('--dry-run', is_flag=True, help='Show what would be done without executing')
-def fetch_data(dry_run):
-    """Fetch latest data from OOTP game machine"""
-    from src.utils.fetch import fetch_game_data
+@click.option('--source', type=click.Path(exists=True, file_okay=False, path_type=Path),
+              help='Local export directory to fetch from instead of the game machine')
+@click.option('--workers', '-w', type=int, default=None, help='Files copied concurrently (default FETCH_MAX_WORKERS)')
+@click.option('--images/--no-images', default=True, help='Also sync player pictures and logos')
+def fetch_data(dry_run, source, workers, images):
+    """Fetch the export files that changed since the last fetch from the OOTP game machine"""
+    from src.utils.fetch import LocalSource, fetch_game_data
     logger.info(f"Fetching game data (dry_run={dry_run})")
-    fetch_game_data(dry_run=dry_run)
+    result = fetch_game_data(dry_run=dry_run, source=LocalSource(source) if source else None,
+                             workers=workers, images=images and not source)
+    if result is None:
+        click.echo("✗ Fetch failed")
+        return
 
+    for name in (result.copied if dry_run else result.changed):
+        click.echo(f"{'~' if dry_run else '✓'} {name}")
+    for name in result.removed:
+        click.echo(f"- {name} removed")
+    for name, error in result.failed.items():
+        click.echo(f"✗ {name}: {error}")
+    click.echo(f"{len(result.changed)} changed, {len(result.copied) - len(result.changed)} re-exported unchanged")
 
-@cli.command()
-@click.option('--tables', '-t', multiple=True, help='Specific tables to load')
+
+@cli.command('load-data')
+@click.option('--resume', 'resume_batch', metavar='BATCH_ID', help="Resume a failed batch at its first incomplete stage")
 @click.option('--full/--incremental', default=False, help='Full reload vs incremental')
-def load_data(tables, full):
-    """Load CSV data into PostreSQL"""
-    logger.info(f"Loading data - Tables: {tables or 'all'}, Mode: {'full' if full else 'incremental'}")
-    # TODO Implement data loading
-    click.echo("Data loading not yet implemented.")
+@click.option('--fetch/--no-fetch', default=True, help='Fetch changed files from the game machine first')
+@click.option('--workers', '-w', default=ETL_MAX_WORKERS, show_default=True, help="Parallel loader processes")
+@click.option('--max-memory', type=int, default=None, help="Memory budget in MB for streaming loaders (game stats)")
+@click.option('--constants-workers', type=int, default=None,
+              help="Seasons recalculated concurrently by league constants (default CONSTANTS_MAX_WORKERS)")
+@click.option('--defer-indexes', is_flag=True,
+              help="Drop secondary indexes and foreign keys of the loaded tables and rebuild them after the load")
+@click.option('--reconcile', is_flag=True,
+              help="Reload the game-level stats files whole instead of appending games past their watermark")
+def load_data(resume_batch, full, fetch, workers, max_memory, constants_workers, defer_indexes, reconcile):
+    """Fetch and load everything: fetch, reference, players, stats, constants, history, views"""
+    from src.loaders.pipeline import STAGES, LoadPipeline
+
+    batch_id = resume_batch or generate_batch_id()
+    data_dir = Path(__file__).parent / "data" / "incoming" / "csv"
+    logger.info(f"{'Resuming' if resume_batch else 'Starting'} load-data batch {batch_id} "
+                f"(mode: {'full' if full else 'incremental'})")
+
+    pipeline = LoadPipeline(batch_id, data_dir, fetch=fetch, force=full, max_workers=workers,
+                            max_memory_mb=max_memory, constants_workers=constants_workers,
+                            defer_indexes=defer_indexes, reconcile=reconcile)
+    try:
+        results = pipeline.run(resume=bool(resume_batch))
+    except ValueError as e:
+        click.echo(f"✗ {e}")
+        sys.exit(1)
+
+    for stage in STAGES:
+        result = results.get(stage)
+        if result is None:
+            continue
+        if result['status'] == 'success':
+            click.echo(f"✓ {stage} ({result['duration_seconds']:.1f}s)")
+        else:
+            click.echo(f"✗ {stage}: {result['error']}")
+            click.echo(f"Fix the problem and run: python main.py load-data --resume {batch_id}")
+            sys.exit(1)
+    click.echo(f"Batch {batch_id} completed" if results else f"Batch {batch_id} has no incomplete stages")
 
 
 @cli.command()
@@ -93,41 +143,81 @@ def init_database(metadata_only):
             click.echo("✗ Failed to create all tables")
 
 
-@cli.command('refresh-views')
-def refresh_materialized_views():
-    """Refresh all materialized views (run after loading stats)"""
-    from pathlib import Path
-    from sqlalchemy import text
-
-    logger.info('Refreshing materialized views...')
-
-    sql_path = Path(__file__).parent / "sql" / "maintenance" / "refresh_materialized_views.sql"
+@cli.command('rebuild-indexes')
+@click.option('--workers', '-w', type=int, default=None,
+              help="Tables rebuilt concurrently (default INDEX_REBUILD_MAX_WORKERS)")
+def rebuild_indexes(workers):
+    """Rebuild indexes and foreign keys left deferred by load-data --defer-indexes"""
+    from src.database.deferred_indexes import rebuild_deferred
 
-    if not sql_path.exists():
-        logger.error(f"SQL file not found: {sql_path}")
-        click.echo("✗ Refresh script not found")
+    results = rebuild_deferred(max_workers=workers)
+    if not results:
+        click.echo("No deferred indexes or foreign keys")
         return
+    for table, result in sorted(results.items()):
+        for name, error in result['failed'].items():
+            click.echo(f"✗ {table}.{name}: {error}")
+        if result['restored']:
+            click.echo(f"✓ {table}: {len(result['restored'])} rebuilt")
+    if any(result['failed'] for result in results.values()):
+        sys.exit(1)
 
-    try:
-        with open(sql_path, 'r') as f:
-            sql_content = f.read()
-
-        db.execute_sql(text(sql_content))
 
-        logger.success("All materialized views refreshed successfully!")
-        click.echo("✓ Materialized views refreshed")
+@cli.command('refresh-views')
+@click.option('--all', 'refresh_all', is_flag=True, help="Refresh every view, not only those whose tables changed")
+@click.option('--workers', '-w', default=VIEW_REFRESH_MAX_WORKERS, show_default=True,
+              help="Views refreshed concurrently")
+def refresh_materialized_views(refresh_all, workers):
+    """Refresh the materialized views whose input tables changed (run after loading stats)"""
+    from src.database.view_refresh import refresh_materialized_views as refresh_views
 
+    logger.info('Refreshing materialized views...')
+    try:
+        results = refresh_views(force=refresh_all, max_workers=workers)
     except Exception as e:
         logger.error(f"Error refreshing views: {e}")
         click.echo(f"✗ Failed to refresh views: {e}")
+        return
+
+    for view, result in sorted(results.items()):
+        if result['status'] == 'success':
+            click.echo(f"✓ {view} ({result['mode']}, {result['duration_seconds']:.1f}s)")
+        elif result['status'] == 'skipped':
+            click.echo(f"- {view} unchanged")
+        else:
+            click.echo(f"✗ {view}: {result['error']}")
+
+
+@cli.command('batch-report')
+@click.option('--batch-id', '-b', help="Batch to report (default: the latest)")
+@click.option('--top', default=10, show_default=True, help="Slowest phases to list")
+def batch_report(batch_id, top):
+    """Show the slowest phases and rows/sec per table of a batch, compared with the previous batch"""
+    from src.utils.batch_report import format_report, get_batches, get_phase_totals
+
+    with db.engine.connect() as conn:
+        batch, previous = get_batches(conn, batch_id)
+        if batch is None:
+            click.echo(f"✗ No timed batch {batch_id or 'found'}")
+            return
+        phases = get_phase_totals(conn, batch['batch_id'])
+        previous_phases = get_phase_totals(conn, previous['batch_id']) if previous else []
+
+    click.echo("\n".join(format_report(batch, phases, previous, previous_phases, top)))
 
 
 @cli.command('load-reference')
 @click.option('--file', '-f', help="Specific CSV file to load")
 @click.option('--force', is_flag=True, help="Force reload even if unchanged")
-def load_reference_data(file, force):
+@click.option('--workers', '-w', default=ETL_MAX_WORKERS, show_default=True, help="Parallel loader processes")
+@click.option('--changed-only', is_flag=True, help="Only load files fetch-data found changed")
+def load_reference_data(file, force, workers, changed_only):
     """Load reference data tables"""
     from src.loaders.reference_loader import ReferenceLoader
+    from src.loaders.base_loader import BaseLoader
+    from src.loaders.load_graph import build_reference_graph
+    from src.utils.checksum import FileManifest
+    from src.utils.fetch import mark_files_loaded, read_changed_files
     from src.database.connection import db
     from pathlib import Path
     import uuid
@@ -158,142 +248,82 @@ def load_reference_data(file, force):
         # Load all reference files in order
         csv_files = ReferenceLoader.get_load_order()
 
-    logger.info(f"Loading reference tables: {csv_files}")
+    changed = read_changed_files(data_dir) if changed_only else None
+    if changed is not None:
+        csv_files = [csv_file for csv_file in csv_files if csv_file in changed]
+    elif changed_only:
+        logger.warning("No fetch manifest found, loading every file")
 
-    for csv_file in csv_files:
-        csv_path = data_dir / csv_file
-
-        if not csv_path.exists():
-            logger.warning(f"File {csv_path} not found.")
-            continue
-
-        try:
-            loader = ReferenceLoader(csv_path.name, batch_id)
-            if force:
-                # Temporarily override load strategy to full
-                loader.get_load_strategy = lambda: 'full'
+    logger.info(f"Loading reference tables: {csv_files}")
 
-            success = loader.load_csv(csv_path)
+    # Hash every incoming file once, up front, so unchanged files are skipped cheaply
+    manifest = FileManifest.build(
+        [data_dir / csv_file for csv_file in csv_files],
+        stored_metadata=BaseLoader.get_stored_file_metadata()
+    )
 
-            if success:
-                click.echo(f"Successfully loaded {csv_path}")
-            else:
-                click.echo(f"Failed to load {csv_path}")
+    # Independent tables load concurrently; REFERENCE_TABLES depends_on keeps FK parents first
+    scheduler = build_reference_graph(data_dir, csv_files, batch_id, manifest=manifest,
+                                      force=force, max_workers=workers)
+    results = scheduler.run()
 
-        except Exception as e:
-            logger.error(f"Error loading {csv_path}: {e}")
-            click.echo(f"Error loading {csv_path}: {e}")
+    for csv_file, result in results.items():
+        if result['status'] == 'success':
+            click.echo(f"Successfully loaded {data_dir / csv_file}")
+        else:
+            click.echo(f"Failed to load {data_dir / csv_file} ({result['status']}: {result.get('error')})")
+    mark_files_loaded([csv_file for csv_file, result in results.items() if result['status'] == 'success'],
+                      data_dir)
 
 
 @cli.command('load-stats')
 @click.option('--force-all-constants', is_flag=True, help="Recalculate constants for all years")
-def load_stats(force_all_constants):
+@click.option('--force', is_flag=True, help="Reload files even if unchanged since the last successful load")
+@click.option('--workers', '-w', default=ETL_MAX_WORKERS, show_default=True, help="Parallel loader processes")
+@click.option('--max-memory', type=int, default=None, help="Memory budget in MB for streaming loaders (game stats)")
+@click.option('--constants-workers', type=int, default=None,
+              help="Seasons recalculated concurrently by league constants (default CONSTANTS_MAX_WORKERS)")
+@click.option('--changed-only', is_flag=True, help="Only load files fetch-data found changed")
+@click.option('--reconcile', is_flag=True,
+              help="Reload the game-level stats files whole instead of appending games past their watermark")
+def load_stats(force_all_constants, force, workers, max_memory, constants_workers, changed_only, reconcile):
   """Load all player statistics"""
-  from src.loaders.players_loader import PlayersLoader
-  from src.loaders.batting_stats_loader import BattingStatsLoader
-  from src.loaders.pitching_stats_loader import PitchingStatsLoader
-  from src.transformers.league_constants_transformer import LeagueConstantsTransformer
-  from sqlalchemy import text
+  from src.loaders.base_loader import BaseLoader
+  from src.loaders.load_graph import build_stats_graph
+  from src.utils.checksum import FileManifest
+  from src.utils.fetch import mark_files_loaded, read_changed_files
 
   batch_id = generate_batch_id()
-
-  # Phase 1 - Load raw data
-  logger.info('Loading players...')
-  players_loader = PlayersLoader(batch_id)
-  players_loader.load_csv(Path("data/incoming/csv/players.csv"))
-
-  logger.info('Loading batting stats...')
-  batting_loader = BattingStatsLoader(batch_id=generate_batch_id())
-  batting_loader.load_csv(Path("data/incoming/csv/players_career_batting_stats.csv"))
-
-  logger.info('Loading pitching stats...')
-  pitching_loader = PitchingStatsLoader(batch_id=generate_batch_id())
-  pitching_loader.load_csv(Path("data/incoming/csv/players_career_pitching_stats.csv"))
-
-  # Load game-level stats for newspaper article generation
-  logger.info('Loading game batting stats...')
-  from src.loaders.game_stats_loader import GameBattingStatsLoader, GamePitchingStatsLoader
-  game_batting_loader = GameBattingStatsLoader(batch_id=generate_batch_id())
-  game_batting_loader.load_csv(Path("data/incoming/csv/players_game_batting.csv"))
-  click.echo("✓ Game batting stats loaded")
-
-  logger.info('Loading game pitching stats...')
-  game_pitching_loader = GamePitchingStatsLoader(batch_id=generate_batch_id())
-  game_pitching_loader.load_csv(Path("data/incoming/csv/players_game_pitching_stats.csv"))
-  click.echo("✓ Game pitching stats loaded")
-
-  # Phase 2 - Calculate league constants
-  logger.info('Calculating league constants...')
-  constants_transformer = LeagueConstantsTransformer(
-      batch_id=batch_id,
-      force_all=force_all_constants
+  data_dir = Path("data/incoming/csv")
+  changed = read_changed_files(data_dir) if changed_only else None
+  if changed_only and changed is None:
+      logger.warning("No fetch manifest found, loading every file")
+
+  # Hash all incoming CSVs in parallel once; loaders skip files unchanged since their last successful load
+  manifest = FileManifest.from_directory(
+      data_dir,
+      stored_metadata=BaseLoader.get_stored_file_metadata()
   )
-  if not constants_transformer.transform_constants():
-      logger.error("Constants calculation failed")
-      return
-
-  logger.info("Stats loading complete!")
-
-  # Load history tables with player FKs (must be loaded after players)
-  logger.info('Loading league history...')
-  try:
-      from src.loaders.reference_loader import ReferenceLoader
-      league_history_loader = ReferenceLoader('league_history.csv', batch_id)
-      league_history_loader.load_csv(Path("data/incoming/csv/league_history.csv"))
-      click.echo("✓ League history loaded successfully")
-  except Exception as e:
-      logger.error(f"Error loading league history: {e}")
-      click.echo(f"Error loading league history: {e}")
-
-  logger.info('Loading team history...')
-  try:
-      team_history_loader = ReferenceLoader('team_history.csv', batch_id)
-      team_history_loader.load_csv(Path("data/incoming/csv/team_history.csv"))
-      click.echo("✓ Team history loaded successfully")
-  except Exception as e:
-      logger.error(f"Error loading team history: {e}")
-      click.echo(f"Error loading team history: {e}")
-
-  # Load coaches and rosters after players are loaded
-  logger.info('Loading coaches...')
-  try:
-      coaches_loader = ReferenceLoader('coaches.csv', batch_id)
-      coaches_loader.load_csv(Path("data/incoming/csv/coaches.csv"))
-      click.echo("✓ Coaches loaded successfully")
-  except Exception as e:
-      logger.error(f"Error loading coaches: {e}")
-      click.echo(f"Error loading coaches: {e}")
-
-  logger.info('Loading team rosters...')
-  try:
-      roster_loader = ReferenceLoader('team_roster.csv', batch_id)
-      roster_loader.load_csv(Path("data/incoming/csv/team_roster.csv"))
-      click.echo("✓ Rosters loaded successfully")
-  except Exception as e:
-      logger.error(f"Error loading rosters: {e}")
-      click.echo(f"Error loading rosters: {e}")
-
-  logger.info('Loading team roster staff...')
-  try:
-      staff_loader = ReferenceLoader('team_roster_staff.csv', batch_id)
-      staff_loader.load_csv(Path("data/incoming/csv/team_roster_staff.csv"))
-      click.echo("✓ Roster staff loaded successfully")
-  except Exception as e:
-      logger.error(f"Error loading staff: {e}")
-      click.echo(f"Error loading staff: {e}")
-
-  # Phase 3 - Refresh materialized views for web performance
-  logger.info('Refreshing materialized views...')
-  try:
-      sql_path = Path(__file__).parent / "sql" / "maintenance" / "refresh_materialized_views.sql"
-      with open(sql_path, 'r') as f:
-          sql_content = f.read()
-      db.execute_sql(text(sql_content))
-      logger.success("Materialized views refreshed successfully!")
-      click.echo("✓ Materialized views refreshed")
-  except Exception as e:
-      logger.error(f"Error refreshing views: {e}")
-      click.echo(f"⚠ Warning: Failed to refresh materialized views - leaderboards may be stale")
+
+  # Players first; career/game stats, history, coaches and rosters then run side by side.
+  # Constants wait for career stats, and views wait for constants.
+  scheduler = build_stats_graph(data_dir, batch_id, manifest=manifest, force=force,
+                                force_all_constants=force_all_constants, max_workers=workers,
+                                max_memory_mb=max_memory, constants_workers=constants_workers,
+                                only_files=changed, reconcile=reconcile)
+  results = scheduler.run()
+  mark_files_loaded([name for name, result in results.items()
+                     if name.endswith('.csv') and result['status'] == 'success'], data_dir)
+
+  for name, result in results.items():
+      if result['status'] == 'success':
+          peak = result.get('stats', {}).get('peak_memory_mb')
+          click.echo(f"✓ {name} ({result.get('duration_seconds', 0):.1f}s"
+                     f"{f', peak {peak:.0f} MB' if peak else ''})")
+      elif name == 'materialized_views':
+          click.echo(f"⚠ Warning: Failed to refresh materialized views - leaderboards may be stale")
+      else:
+          click.echo(f"✗ {name} {result['status']}: {result.get('error')}")
 
   logger.info('All stats, coaches, and rosters loaded!')
 
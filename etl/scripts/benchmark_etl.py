@@ -0,0 +1,237 @@
+#! /usr/bin/env python3
+"""
+Scaled ETL benchmark on synthetic OOTP exports.
+
+`generate` writes a deterministic synthetic export (src/utils/synthetic_export.py).
+`run` loads it with the real loaders into a throwaway PostgreSQL database that
+is dropped and recreated for every scale factor, and stores wall time,
+throughput and peak memory per loader plus every loader phase (from
+etl_performance_metrics) as JSON. `compare` prints the change between two
+result files.
+
+The database is created on the server configured in .env (DB_HOST, DB_USER_ETL,
+OOTP_ETL_PASSWORD), so the ETL user needs CREATEDB. The dev and staging
+databases are refused.
+
+    python scripts/benchmark_etl.py generate --scale 10 --out data/benchmark/scale_10
+    python scripts/benchmark_etl.py run --database ootp_bench --scale 1 --scale 10 --reload
+    python scripts/benchmark_etl.py compare logs/benchmarks/old.json logs/benchmarks/new.json
+"""
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+import click
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+load_dotenv()
+
+from src.utils.synthetic_export import SyntheticExport
+
+ETL_DIR = Path(__file__).parent.parent
+REFERENCE_FILES = ['continents.csv', 'nations.csv', 'languages.csv', 'cities.csv', 'parks.csv', 'leagues.csv',
+                   'sub_leagues.csv', 'divisions.csv', 'teams.csv', 'team_relations.csv']
+
+
+def _use_database(database):
+    """Point the ETL's global connection at the benchmark database (before it is imported)"""
+    if database in (os.getenv('DB_NAME_DEV'), os.getenv('DB_NAME_STAGING')):
+        raise click.UsageError(f"{database} is a configured ETL database; benchmarks need a throwaway one")
+    if 'src.database.connection' in sys.modules:
+        raise RuntimeError("The database connection was imported before the benchmark database was set")
+    os.environ['FLASK_ENV'] = 'dev'
+    os.environ['DB_NAME_DEV'] = database
+
+
+def _recreate_database(database):
+    """Drop and create the benchmark database, then build the schema"""
+    from sqlalchemy import create_engine, text
+    from src.database.connection import db
+    from src.database.schema import SchemaManager
+
+    db.engine.dispose()
+    admin = create_engine(db.engine.url.set(database='postgres'), isolation_level='AUTOCOMMIT')
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+        conn.execute(text(f'CREATE DATABASE "{database}"'))
+    admin.dispose()
+    if not SchemaManager().create_all_tables():
+        raise click.ClickException(f"Could not create the schema in {database}")
+
+
+def _drop_database(database):
+    from sqlalchemy import create_engine, text
+    from src.database.connection import db
+
+    db.engine.dispose()
+    admin = create_engine(db.engine.url.set(database='postgres'), isolation_level='AUTOCOMMIT')
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+    admin.dispose()
+
+
+def _summarize(batch_id, results, wall_seconds):
+    """Per-loader and per-phase measurements of one scheduler run"""
+    from src.database.connection import db
+    from src.utils.batch_report import get_phase_totals
+
+    nodes = {}
+    for name, result in results.items():
+        stats = result.get('stats') or {}
+        seconds = result.get('duration_seconds') or 0
+        rows = stats.get('rows_read') or stats.get('rows_inserted') or 0
+        nodes[name] = {
+            'status': result['status'],
+            'seconds': seconds,
+            'rows': rows,
+            'rows_per_second': round(rows / seconds) if seconds and rows else None,
+            'peak_memory_mb': stats.get('peak_memory_mb'),
+            'phases': stats.get('phases'),
+        }
+    with db.engine.connect() as conn:
+        phases = [asdict(phase) for phase in get_phase_totals(conn, batch_id)]
+    return {'batch_id': batch_id, 'wall_seconds': round(wall_seconds, 3), 'nodes': nodes, 'phases': phases}
+
+
+def _run_stage(build, data_dir, workers, force=False):
+    from src.loaders.base_loader import BaseLoader
+    from src.utils.batch import generate_batch_id
+    from src.utils.checksum import FileManifest
+
+    batch_id = generate_batch_id()
+    manifest = FileManifest.from_directory(data_dir, stored_metadata=BaseLoader.get_stored_file_metadata())
+    start = time.perf_counter()
+    results = build(data_dir, batch_id, manifest, force, workers).run()
+    return _summarize(batch_id, results, time.perf_counter() - start)
+
+
+def _reference_graph(data_dir, batch_id, manifest, force, workers):
+    from src.loaders.load_graph import build_reference_graph
+    return build_reference_graph(data_dir, REFERENCE_FILES, batch_id, manifest=manifest, force=force,
+                                 max_workers=workers)
+
+
+def _stats_graph(data_dir, batch_id, manifest, force, workers):
+    from src.loaders.load_graph import build_stats_graph
+    return build_stats_graph(data_dir, batch_id, manifest=manifest, force=force, max_workers=workers)
+
+
+def _print_run(run):
+    print(f"\nScale {run['scale']}: {run['files']['players.csv']} players, "
+          f"{sum(run['files'].values())} generated rows in {run['generate_seconds']:.1f}s")
+    print(f"{'stage':<14}{'node':<36}{'seconds':>10}{'rows':>10}{'rows/s':>10}{'peak MB':>9}")
+    for stage, measured in run['stages'].items():
+        for name, node in measured['nodes'].items():
+            print(f"{stage:<14}{name:<36}{node['seconds']:>10.2f}{node['rows']:>10}"
+                  f"{node['rows_per_second'] or '':>10}{node['peak_memory_mb'] or '':>9}")
+        print(f"{stage:<14}{'(wall time)':<36}{measured['wall_seconds']:>10.2f}")
+
+
+@click.group()
+def cli():
+    """Synthetic exports and scaled ETL benchmarks"""
+
+
+@cli.command()
+@click.option('--scale', type=int, default=1, show_default=True, help='Teams and players multiplier')
+@click.option('--seasons', type=int, default=3, show_default=True)
+@click.option('--games-per-team', type=int, default=40, show_default=True)
+@click.option('--seed', type=int, default=2024, show_default=True)
+@click.option('--out', type=click.Path(path_type=Path), required=True, help='Directory for the CSV files')
+def generate(scale, seasons, games_per_team, seed, out):
+    """Write a synthetic OOTP export"""
+    export = SyntheticExport(scale=scale, seasons=seasons, games_per_team=games_per_team, seed=seed)
+    for filename, rows in export.write(out).items():
+        print(f"{filename:<40}{rows:>10}")
+
+
+@cli.command()
+@click.option('--database', required=True, help='Throwaway database, dropped and recreated per scale')
+@click.option('--scale', 'scales', type=int, multiple=True, default=[1], show_default=True)
+@click.option('--seasons', type=int, default=3, show_default=True)
+@click.option('--games-per-team', type=int, default=40, show_default=True)
+@click.option('--seed', type=int, default=2024, show_default=True)
+@click.option('--workers', type=int, default=4, show_default=True, help='Parallel loader processes')
+@click.option('--reload', is_flag=True, help='Also time a forced reload of the unchanged stats files')
+@click.option('--data-dir', type=click.Path(path_type=Path), default=ETL_DIR / 'data' / 'benchmark',
+              show_default=True)
+@click.option('--output', type=click.Path(path_type=Path), default=None,
+              help='Result file (default logs/benchmarks/etl_<timestamp>.json)')
+@click.option('--keep-database', is_flag=True, help='Leave the last scale loaded for inspection')
+def run(database, scales, seasons, games_per_team, seed, workers, reload, data_dir, output, keep_database):
+    """Load synthetic exports at each scale and record throughput and memory"""
+    _use_database(database)
+    import numpy as np
+    import pandas as pd
+    from sqlalchemy import text
+    from src.database.connection import db
+
+    started_at = datetime.now()
+    results = {
+        'started_at': started_at.isoformat(),
+        'settings': {'seasons': seasons, 'games_per_team': games_per_team, 'seed': seed, 'workers': workers},
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                        'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'runs': [],
+    }
+    try:
+        for scale in scales:
+            scale_dir = data_dir / f'scale_{scale}'
+            export = SyntheticExport(scale=scale, seasons=seasons, games_per_team=games_per_team, seed=seed)
+            start = time.perf_counter()
+            files = export.write(scale_dir)
+            generate_seconds = time.perf_counter() - start
+
+            _recreate_database(database)
+            with db.engine.connect() as conn:
+                results['environment']['postgres'] = conn.execute(text("SHOW server_version")).scalar()
+
+            stages = {'reference': _run_stage(_reference_graph, scale_dir, workers),
+                      'stats': _run_stage(_stats_graph, scale_dir, workers)}
+            if reload:
+                stages['stats_reload'] = _run_stage(_stats_graph, scale_dir, workers, force=True)
+
+            run_result = {'scale': scale, 'files': files, 'generate_seconds': round(generate_seconds, 3),
+                          'stages': stages}
+            results['runs'].append(run_result)
+            _print_run(run_result)
+    finally:
+        if not keep_database:
+            _drop_database(database)
+
+    output = output or ETL_DIR / 'logs' / 'benchmarks' / f"etl_{started_at:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str))
+    print(f"\nResults written to {output}")
+
+
+@cli.command()
+@click.argument('baseline', type=click.Path(exists=True, path_type=Path))
+@click.argument('current', type=click.Path(exists=True, path_type=Path))
+def compare(baseline, current):
+    """Seconds per loader in CURRENT against BASELINE, for the scales both ran"""
+    before = {run['scale']: run for run in json.loads(baseline.read_text())['runs']}
+    print(f"{'scale':<7}{'stage':<14}{'node':<36}{'baseline':>10}{'current':>10}{'change':>9}")
+    for run in json.loads(current.read_text())['runs']:
+        old = before.get(run['scale'])
+        if old is None:
+            continue
+        for stage, measured in run['stages'].items():
+            old_stage = old['stages'].get(stage, {'nodes': {}, 'wall_seconds': None})
+            rows = [(name, node['seconds'], old_stage['nodes'].get(name, {}).get('seconds'))
+                    for name, node in measured['nodes'].items()]
+            rows.append(('(wall time)', measured['wall_seconds'], old_stage['wall_seconds']))
+            for name, seconds, old_seconds in rows:
+                change = f"{(seconds - old_seconds) / old_seconds * 100:+.0f}%" if old_seconds else ''
+                print(f"{run['scale']:<7}{stage:<14}{name:<36}{old_seconds if old_seconds is not None else '':>10}"
+                      f"{seconds:>10.2f}{change:>9}")
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,110 @@
+#! /usr/bin/env python3
+"""
+Benchmark the sequential single-metric refresh against the fused refresh (migration 013).
+
+Each path runs in its own transaction that is rolled back, so the database is
+left unchanged and both paths start from the same rows. For each path the
+script reports the wall time, the row versions it wrote (from
+pg_stat_xact_user_tables) and a checksum of the metric columns, which must
+match between the two paths.
+
+    python scripts/benchmark_player_metrics.py --year 2023 --repeat 3
+    python scripts/benchmark_player_metrics.py --reset   # metrics cleared first, i.e. a first calculation
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+load_dotenv()
+
+from src.database.connection import db
+
+SEQUENTIAL = {
+    'players_career_batting_stats': [
+        'refresh_player_woba', 'refresh_player_wraa', 'refresh_player_wrc', 'refresh_player_wrc_plus',
+    ],
+    'players_career_pitching_stats': [
+        'refresh_player_fip', 'refresh_player_xfip', 'refresh_player_era_plus',
+        'refresh_player_era_minus', 'refresh_player_fip_minus',
+    ],
+}
+FUSED = {
+    'players_career_batting_stats': ['refresh_player_batting_metrics'],
+    'players_career_pitching_stats': ['refresh_player_pitching_metrics'],
+}
+METRICS = {
+    'players_career_batting_stats': ['woba', 'wraa', 'wrc', 'wrc_plus', 'constants_version'],
+    'players_career_pitching_stats': ['fip', 'xfip', 'era_plus', 'era_minus', 'fip_minus', 'constants_version'],
+}
+KEY = 'player_id, year, team_id, split_id, stint'
+
+
+def _year_filter(year):
+    return "" if year is None else "AND year = :year"
+
+
+def _written_rows(conn, table):
+    return conn.execute(text(
+        "SELECT n_tup_upd FROM pg_stat_xact_user_tables WHERE relname = :table"
+    ), {'table': table}).scalar() or 0
+
+
+def _checksum(conn, table, year):
+    columns = ', '.join(METRICS[table])
+    return conn.execute(text(f"""
+        SELECT md5(string_agg(ROW({columns})::text, '|' ORDER BY {KEY}))
+        FROM {table} WHERE split_id = 1 {_year_filter(year)}
+    """), {'year': year}).scalar()
+
+
+def run_path(functions, table, year, reset):
+    """Run one path in a rolled-back transaction; return (seconds, rows written, checksum)"""
+    with db.engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            if reset:
+                cleared = ', '.join(f"{col} = NULL" for col in METRICS[table])
+                conn.execute(text(f"UPDATE {table} SET {cleared} WHERE split_id = 1 {_year_filter(year)}"),
+                             {'year': year})
+            written_before = _written_rows(conn, table)
+            start = time.perf_counter()
+            for function in functions:
+                conn.execute(text(f"SELECT {function}(:year)"), {'year': year})
+            elapsed = time.perf_counter() - start
+            written = _written_rows(conn, table) - written_before
+            return elapsed, written, _checksum(conn, table, year)
+        finally:
+            trans.rollback()
+
+
+@click.command()
+@click.option('--year', type=int, default=None, help='Season to refresh (default: all seasons)')
+@click.option('--repeat', type=int, default=3, help='Runs per path; the fastest is reported')
+@click.option('--reset/--no-reset', default=False, help='Clear the metric columns first (first-calculation cost)')
+def main(year, repeat, reset):
+    print(f"Player metric refresh, year {year if year is not None else 'ALL'}, "
+          f"{'metrics cleared' if reset else 'metrics current'}, best of {repeat}\n")
+    print(f"{'table':<32}{'path':<12}{'seconds':>10}{'rows written':>15}")
+    ok = True
+    for table in SEQUENTIAL:
+        checksums = {}
+        for name, paths in (('sequential', SEQUENTIAL), ('fused', FUSED)):
+            runs = [run_path(paths[table], table, year, reset) for _ in range(repeat)]
+            elapsed = min(run[0] for run in runs)
+            written, checksum = runs[-1][1], runs[-1][2]
+            checksums[name] = checksum
+            print(f"{table:<32}{name:<12}{elapsed:>10.3f}{written:>15}")
+        if checksums['sequential'] != checksums['fused']:
+            ok = False
+            print(f"  metric values differ between paths for {table}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -62,16 +62,19 @@ check_rsync_result() {
     esac
 }
 
-# Sync CSV files (always fresh export, delete removed files)
-echo "Syncing OOTP CSV data from game machine..."
-echo "Source: ${GAME_MACHINE}:\"${REMOTE_DATA_PATH}/\""
-echo "Target: ${LOCAL_DATA}/"
-
-rsync -avz --delete --progress --stats \
-    "${GAME_MACHINE}:${REMOTE_DATA_PATH}/" \
-    "${LOCAL_DATA}/"
-
-check_rsync_result $? "CSV data sync"
+# Sync CSV files (always fresh export, delete removed files).
+# fetch-data copies the CSVs itself (only changed files) and sets SKIP_CSV_SYNC=1.
+if [ "${SKIP_CSV_SYNC}" != "1" ]; then
+    echo "Syncing OOTP CSV data from game machine..."
+    echo "Source: ${GAME_MACHINE}:\"${REMOTE_DATA_PATH}/\""
+    echo "Target: ${LOCAL_DATA}/"
+
+    rsync -avz --delete --progress --stats \
+        "${GAME_MACHINE}:${REMOTE_DATA_PATH}/" \
+        "${LOCAL_DATA}/"
+
+    check_rsync_result $? "CSV data sync"
+fi
 
 # Sync player pictures (incremental, preserve newer local files)
 echo ""
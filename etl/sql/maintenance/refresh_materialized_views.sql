@@ -7,8 +7,10 @@
 -- Usage:
 --   psql -h 192.168.10.94 -U ootp_etl -d ootp_dev -f refresh_materialized_views.sql
 --
--- Or via Python:
---   python main.py refresh-views
+-- This is a full, blocking refresh of every view. The ETL uses
+--   python main.py refresh-views [--all]
+-- instead, which only refreshes views whose tables changed, CONCURRENTLY and in parallel
+-- (src/database/view_refresh.py).
 -- ============================================================================
 
 DO $$
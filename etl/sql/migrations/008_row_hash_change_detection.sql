@@ -0,0 +1,25 @@
+-- Migration 008: Row hash columns for incremental change detection
+-- Created: 2026-10-16
+-- Purpose: Let incremental loads skip rows whose content has not changed
+--
+-- BaseLoader._upsert_from_staging computes md5(ROW(<updatable columns>)::text) for
+-- every staged row and only rewrites target rows when the stored hash differs:
+--
+--   ON CONFLICT (...) DO UPDATE SET ..., row_hash = EXCLUDED.row_hash
+--   WHERE t.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+--
+-- Existing rows start with a NULL hash, so the first incremental load after this
+-- migration rewrites each row once; later loads only touch changed rows.
+-- Tables without a row_hash column keep the previous always-update behaviour.
+
+ALTER TABLE players_career_batting_stats ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+ALTER TABLE players_career_pitching_stats ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+ALTER TABLE players_game_batting_stats ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+ALTER TABLE players_game_pitching_stats ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+
+COMMENT ON COLUMN players_career_batting_stats.row_hash IS 'md5 of loaded values, used to skip unchanged rows on incremental loads';
+COMMENT ON COLUMN players_career_pitching_stats.row_hash IS 'md5 of loaded values, used to skip unchanged rows on incremental loads';
+COMMENT ON COLUMN players_game_batting_stats.row_hash IS 'md5 of loaded values, used to skip unchanged rows on incremental loads';
+COMMENT ON COLUMN players_game_pitching_stats.row_hash IS 'md5 of loaded values, used to skip unchanged rows on incremental loads';
+COMMENT ON COLUMN messages.row_hash IS 'md5 of loaded values, used to skip unchanged rows on incremental loads';
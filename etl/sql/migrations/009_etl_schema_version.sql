@@ -0,0 +1,51 @@
+-- Migration 009: Schema version for the ETL catalog cache
+-- Created: 2026-10-16
+-- Purpose: Let loaders cache table column metadata and compiled load SQL per process
+--
+-- src/database/catalog.py reads etl_schema_version.version once per file and
+-- drops its cached column types (and with them every compiled load plan) when
+-- the version changed. The version is bumped by an event trigger on CREATE TABLE /
+-- ALTER TABLE of non-staging tables; where event triggers cannot be created
+-- (they need superuser) migrations should call bump_etl_schema_version() instead.
+
+CREATE TABLE IF NOT EXISTS etl_schema_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO etl_schema_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_etl_schema_version() RETURNS VOID AS $$
+BEGIN
+    UPDATE etl_schema_version
+    SET version = version + 1,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION etl_schema_version_on_ddl() RETURNS event_trigger AS $$
+DECLARE
+    cmd RECORD;
+BEGIN
+    FOR cmd IN SELECT * FROM pg_event_trigger_ddl_commands() LOOP
+        -- Staging tables are created and altered on every load
+        IF cmd.object_identity NOT LIKE 'public.staging\_%' THEN
+            PERFORM bump_etl_schema_version();
+            RETURN;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    DROP EVENT TRIGGER IF EXISTS etl_schema_version_ddl;
+    CREATE EVENT TRIGGER etl_schema_version_ddl ON ddl_command_end
+        WHEN TAG IN ('CREATE TABLE', 'ALTER TABLE')
+        EXECUTE PROCEDURE etl_schema_version_on_ddl();
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'Not allowed to create event triggers; call bump_etl_schema_version() after schema changes';
+END;
+$$;
+
+SELECT bump_etl_schema_version();
@@ -0,0 +1,24 @@
+-- Migration 010: Ignore shadow-table DDL in the schema version trigger
+-- Created: 2026-10-16
+-- Purpose: Keep full loads that swap in a shadow table from clearing the catalog cache
+--
+-- Full loads build {table}_shadow and rename it over the live table
+-- (src/database/table_swap.py). The columns do not change, so those transactions
+-- SET LOCAL etl.skip_schema_version = 'on' and the trigger leaves the version alone.
+
+CREATE OR REPLACE FUNCTION etl_schema_version_on_ddl() RETURNS event_trigger AS $$
+DECLARE
+    cmd RECORD;
+BEGIN
+    IF current_setting('etl.skip_schema_version', true) = 'on' THEN
+        RETURN;
+    END IF;
+    FOR cmd IN SELECT * FROM pg_event_trigger_ddl_commands() LOOP
+        -- Staging tables are created and altered on every load
+        IF cmd.object_identity NOT LIKE 'public.staging\_%' THEN
+            PERFORM bump_etl_schema_version();
+            RETURN;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
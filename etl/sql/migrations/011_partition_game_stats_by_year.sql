@@ -0,0 +1,66 @@
+-- Migration 011: Partition the game-level stats tables by season
+-- Created: 2026-10-16
+-- Purpose: Keep game stats upserts proportional to the seasons in the file, not league age
+--
+-- players_game_batting_stats and players_game_pitching_stats become RANGE (year)
+-- partitioned tables with one partition per season ({table}_y{year}). Existing rows
+-- are copied into the new partitions. GameStatsLoader creates partitions for new
+-- seasons itself and records a digest of every loaded season in
+-- etl_partition_digests; seasons whose rows did not change are not reloaded.
+--
+-- A closed season can be archived with
+--   ALTER TABLE players_game_batting_stats DETACH PARTITION players_game_batting_stats_y2019;
+-- (delete its etl_partition_digests row so a later load re-attaches it by reloading).
+
+CREATE TABLE IF NOT EXISTS etl_partition_digests (
+    table_name VARCHAR(100) NOT NULL,
+    partition_key INTEGER NOT NULL,
+    digest VARCHAR(40) NOT NULL,
+    row_count INTEGER NOT NULL,
+    batch_id UUID,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, partition_key)
+);
+
+DO $$
+DECLARE
+    t TEXT;
+    legacy TEXT;
+    y INTEGER;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['players_game_batting_stats', 'players_game_pitching_stats'] LOOP
+        IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = t::regclass) THEN
+            CONTINUE;
+        END IF;
+        legacy := t || '_unpartitioned';
+
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', t, legacy);
+        EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I', legacy, t || '_pkey', legacy || '_pkey');
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS) '
+                       'PARTITION BY RANGE (year)', t, legacy);
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (player_id, year, game_id)', t);
+        EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (player_id) REFERENCES players_core(player_id)', t);
+        EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (team_id) REFERENCES teams(team_id)', t);
+
+        FOR y IN EXECUTE format('SELECT DISTINCT year FROM %I ORDER BY 1', legacy) LOOP
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%s) TO (%s)',
+                           t || '_y' || y, t, y, y + 1);
+        END LOOP;
+
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I', t, legacy);
+        EXECUTE format('DROP TABLE %I', legacy);
+    END LOOP;
+END;
+$$;
+
+-- Indexes were dropped with the unpartitioned tables; on the parent they cascade to every partition
+CREATE INDEX IF NOT EXISTS idx_game_batting_player ON players_game_batting_stats(player_id);
+CREATE INDEX IF NOT EXISTS idx_game_batting_game ON players_game_batting_stats(game_id);
+CREATE INDEX IF NOT EXISTS idx_game_batting_hr ON players_game_batting_stats(hr) WHERE hr > 0;
+CREATE INDEX IF NOT EXISTS idx_game_pitching_player ON players_game_pitching_stats(player_id);
+CREATE INDEX IF NOT EXISTS idx_game_pitching_game ON players_game_pitching_stats(game_id);
+CREATE INDEX IF NOT EXISTS idx_game_pitching_k ON players_game_pitching_stats(k) WHERE k >= 10;
+CREATE INDEX IF NOT EXISTS idx_game_pitching_cg ON players_game_pitching_stats(cg) WHERE cg = 1;
+
+ANALYZE players_game_batting_stats;
+ANALYZE players_game_pitching_stats;
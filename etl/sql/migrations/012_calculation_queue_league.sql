@@ -0,0 +1,14 @@
+-- Migration 012: Dirty (year, league_id) tracking for league constants
+-- Created: 2026-10-16
+-- Purpose: Recalculate constants and advanced metrics only for seasons whose stats changed
+--
+-- The career stats upserts add one 'league_constants' row per changed (year, league_id)
+-- to etl_calculation_queue in the same statement. LeagueConstantsTransformer claims the
+-- pending rows, recalculates the affected years in parallel and marks them completed.
+-- The partial unique index keeps a single pending row per pair across batches.
+
+ALTER TABLE etl_calculation_queue ADD COLUMN IF NOT EXISTS league_id INTEGER;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_calc_queue_pending_year_league
+    ON etl_calculation_queue (calculation_type, year, league_id)
+    WHERE status = 'pending';
@@ -0,0 +1,238 @@
+-- Migration 013: Fused player metric refresh
+-- Created: 2026-10-16
+-- Purpose: Compute all advanced batting metrics in one UPDATE and all pitching metrics in another
+--
+-- refresh_all_calculations used to call refresh_player_woba, _wraa, _wrc, _wrc_plus, _fip,
+-- _xfip, _era_plus, _era_minus and _fip_minus in sequence, each a full UPDATE of the career
+-- stats table, so every row was rewritten up to five times per run. The fused functions join
+-- run_values / fip_constants and the sub-league environments once, compute the metrics that
+-- depend on each other in LATERAL steps and write a row only when one of its values changes.
+-- Rows each single-metric function would skip keep their old value for that metric, so the
+-- results match the sequential path. The single-metric functions are kept (see
+-- scripts/benchmark_player_metrics.py).
+
+CREATE OR REPLACE FUNCTION refresh_player_batting_metrics(target_year INTEGER DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_rows INTEGER;
+BEGIN
+    UPDATE players_career_batting_stats b
+    SET
+        woba = m.woba,
+        wraa = m.wraa,
+        wrc = m.wrc,
+        wrc_plus = m.wrc_plus,
+        constants_version = m.constants_version,
+        last_updated = CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            s.player_id, s.year, s.team_id, s.split_id, s.stint,
+            w.woba,
+            r.wraa,
+            CASE
+                WHEN w.woba IS NOT NULL AND lro.year IS NOT NULL THEN
+                    ROUND((((w.woba - rv.woba) / rv.woba_scale) + (lro.runs_per_pa)) * s.pa, 0)::INTEGER
+                ELSE s.wrc
+            END AS wrc,
+            CASE
+                WHEN p.ready THEN
+                    ROUND(
+                        (((r.wraa / NULLIF(s.pa, 0) + lro.runs_per_pa) +
+                          (lro.runs_per_pa - tp.park_avg * lro.runs_per_pa)) /
+                         NULLIF(slg.runs_per_pa, 0)) * 100,
+                        0
+                    )::INTEGER
+                ELSE s.wrc_plus
+            END AS wrc_plus,
+            CASE WHEN p.ready THEN 1 ELSE s.constants_version END AS constants_version
+        FROM players_career_batting_stats s
+        JOIN run_values rv
+            ON rv.year = s.year
+            AND rv.league_id = s.league_id
+            AND rv.sub_league_id = s.sub_league_id
+        LEFT JOIN league_runs_per_out lro
+            ON lro.year = rv.year
+            AND lro.league_id = rv.league_id
+            AND lro.sub_league_id = rv.sub_league_id
+        LEFT JOIN sub_league_batting_environment slg
+            ON slg.year = rv.year
+            AND slg.league_id = rv.league_id
+            AND slg.sub_league_id = rv.sub_league_id
+        LEFT JOIN (SELECT t.team_id, pk.avg AS park_avg
+                   FROM teams t
+                   JOIN parks pk ON pk.park_id = t.park_id
+                  ) tp ON tp.team_id = s.team_id
+        CROSS JOIN LATERAL (
+            SELECT ROUND(
+                (rv.woba_bb * (s.bb - s.ibb) +
+                 rv.woba_hbp * s.hp +
+                 rv.woba_1b * (s.h - s.d - s.t - s.hr) +
+                 rv.woba_2b * s.d +
+                 rv.woba_3b * s.t +
+                 rv.woba_hr * s.hr) /
+                NULLIF(s.ab + s.bb - s.ibb + s.sf + s.hp, 0),
+                3
+            ) AS woba
+        ) w
+        -- wRAA keeps its old value when wOBA cannot be calculated
+        CROSS JOIN LATERAL (
+            SELECT CASE
+                WHEN w.woba IS NOT NULL THEN ROUND(((w.woba - rv.woba) / rv.woba_scale) * s.pa, 1)
+                ELSE s.wraa
+            END AS wraa
+        ) r
+        CROSS JOIN LATERAL (
+            SELECT (r.wraa IS NOT NULL AND s.pa > 0 AND lro.year IS NOT NULL
+                    AND slg.year IS NOT NULL AND tp.team_id IS NOT NULL) AS ready
+        ) p
+        WHERE s.split_id = 1
+          AND s.league_id <> 0  -- FILTER: Exclude league_id=0 (free agents/invalid records)
+          AND (target_year IS NULL OR s.year = target_year)
+    ) m
+    WHERE b.player_id = m.player_id
+      AND b.year = m.year
+      AND b.team_id = m.team_id
+      AND b.split_id = m.split_id
+      AND b.stint = m.stint
+      -- Skip rows whose metrics would not change
+      AND (b.woba, b.wraa, b.wrc, b.wrc_plus, b.constants_version)
+          IS DISTINCT FROM (m.woba, m.wraa, m.wrc, m.wrc_plus, m.constants_version);
+
+    GET DIAGNOSTICS updated_rows = ROW_COUNT;
+    RAISE NOTICE 'Batting metrics updated for % rows in year %', updated_rows, COALESCE(target_year::text, 'ALL');
+    RETURN updated_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION refresh_player_pitching_metrics(target_year INTEGER DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_rows INTEGER;
+BEGIN
+    UPDATE players_career_pitching_stats p
+    SET
+        fip = m.fip,
+        xfip = m.xfip,
+        era_plus = m.era_plus,
+        era_minus = m.era_minus,
+        fip_minus = m.fip_minus,
+        constants_version = m.constants_version,
+        last_updated = CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            s.player_id, s.year, s.team_id, s.split_id, s.stint,
+            f.fip,
+            CASE
+                WHEN fc.year IS NULL THEN s.xfip
+                WHEN s.outs > 0 THEN
+                    ROUND(
+                        ((13.0 * (s.fb * fc.hr_fb_pct)) + (3.0 * (s.bb + s.hp)) - (2.0 * s.k))
+                        / (s.outs / 3.0)
+                        + fc.fip_constant,
+                        2
+                    )::DECIMAL(5,2)
+                ELSE 0::DECIMAL(5,2)
+            END AS xfip,
+            CASE
+                WHEN NOT e.ready OR s.era IS NULL THEN s.era_plus
+                WHEN s.era > 0 THEN ROUND((slpe.league_era / s.era) * tp.park_avg * 100, 0)::INTEGER
+                ELSE 0::INTEGER
+            END AS era_plus,
+            CASE
+                WHEN NOT e.ready OR s.era IS NULL THEN s.era_minus
+                WHEN slpe.league_era > 0 THEN
+                    ROUND(((s.era + (s.era - s.era * tp.park_avg)) / slpe.league_era) * 100, 0)::INTEGER
+                ELSE 0::INTEGER
+            END AS era_minus,
+            CASE
+                WHEN NOT e.ready OR f.fip IS NULL THEN s.fip_minus
+                WHEN slpe.league_fip > 0 THEN
+                    ROUND(((f.fip + (f.fip - f.fip * tp.park_avg)) / slpe.league_fip) * 100, 0)::INTEGER
+                ELSE 0::INTEGER
+            END AS fip_minus,
+            CASE
+                WHEN e.ready AND (s.era IS NOT NULL OR f.fip IS NOT NULL) THEN 1
+                ELSE s.constants_version
+            END AS constants_version
+        FROM players_career_pitching_stats s
+        LEFT JOIN fip_constants fc
+            ON fc.year = s.year
+            AND fc.league_id = s.league_id
+        LEFT JOIN sub_league_pitching_environment slpe
+            ON slpe.year = s.year
+            AND slpe.league_id = s.league_id
+            AND slpe.sub_league_id = s.sub_league_id
+        LEFT JOIN (SELECT t.team_id, pk.avg AS park_avg
+                   FROM teams t
+                   JOIN parks pk ON pk.park_id = t.park_id
+                  ) tp ON tp.team_id = s.team_id
+        -- FIP keeps its old value when the season has no FIP constant
+        CROSS JOIN LATERAL (
+            SELECT CASE
+                WHEN fc.year IS NULL THEN s.fip
+                WHEN s.outs > 0 THEN
+                    ROUND(
+                        ((13.0 * s.hra) + (3.0 * (s.bb + s.hp)) - (2.0 * s.k))
+                        / (s.outs / 3.0)
+                        + fc.fip_constant,
+                        2
+                    )::DECIMAL(5,2)
+                ELSE 0::DECIMAL(5,2)
+            END AS fip
+        ) f
+        CROSS JOIN LATERAL (
+            SELECT (slpe.year IS NOT NULL AND tp.team_id IS NOT NULL) AS ready
+        ) e
+        WHERE s.split_id = 1
+          AND s.league_id <> 0  -- FILTER: Exclude free agents/invalid records
+          AND (target_year IS NULL OR s.year = target_year)
+    ) m
+    WHERE p.player_id = m.player_id
+      AND p.year = m.year
+      AND p.team_id = m.team_id
+      AND p.split_id = m.split_id
+      AND p.stint = m.stint
+      -- Skip rows whose metrics would not change
+      AND (p.fip, p.xfip, p.era_plus, p.era_minus, p.fip_minus, p.constants_version)
+          IS DISTINCT FROM (m.fip, m.xfip, m.era_plus, m.era_minus, m.fip_minus, m.constants_version);
+
+    GET DIAGNOSTICS updated_rows = ROW_COUNT;
+    RAISE NOTICE 'Pitching metrics updated for % rows in year %', updated_rows, COALESCE(target_year::text, 'ALL');
+    RETURN updated_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION refresh_all_calculations(target_year INTEGER DEFAULT NULL)
+RETURNS void AS $$
+BEGIN
+    -- Phase B: League Constants
+    RAISE NOTICE 'Refreshing league runs per out...';
+    PERFORM refresh_league_runs_per_out(target_year);
+
+    RAISE NOTICE 'Refreshing run values...';
+    PERFORM refresh_run_values(target_year);
+
+    RAISE NOTICE 'Refreshing FIP constants...';
+    PERFORM refresh_fip_constants(target_year);
+
+    RAISE NOTICE 'Refreshing sub-league batting environment...';
+    PERFORM refresh_sub_league_batting_environment(target_year);
+
+    RAISE NOTICE 'Refreshing sub-league pitching environment...';
+    PERFORM refresh_sub_league_pitching_environment(target_year);
+
+    -- Phase C: Apply to Player Stats (wOBA, wRAA, wRC, wRC+ in one pass)
+    RAISE NOTICE 'Calculating player batting metrics...';
+    PERFORM refresh_player_batting_metrics(target_year);
+
+    -- Phase C: Apply to Player Stats (FIP, xFIP, ERA+, ERA-, FIP- in one pass)
+    RAISE NOTICE 'Calculating player pitching metrics...';
+    PERFORM refresh_player_pitching_metrics(target_year);
+
+    IF target_year IS NOT NULL THEN
+        RAISE NOTICE 'All calculations complete for year %', target_year;
+    ELSE
+        RAISE NOTICE 'All calculations complete for all years';
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
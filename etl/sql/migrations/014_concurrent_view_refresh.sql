@@ -0,0 +1,258 @@
+-- Migration 014: Concurrent, change-driven materialized view refresh
+-- Created: 2026-10-16
+-- Purpose: Give every leaderboard view a unique key and track which tables each batch changed
+--
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY needs a unique index on plain columns. The career
+-- views are keyed by player_id; the single-season and yearly views gain stint (and team_id)
+-- so that rows are unique per (player_id, year, team_id, stint), and are recreated.
+-- Loaders record the tables whose rows changed in etl_table_changes, and the refresh
+-- orchestrator (src/database/view_refresh.py) only refreshes views that read from a table
+-- changed since their last refresh. Refresh timings go to etl_performance_metrics.
+
+CREATE TABLE IF NOT EXISTS etl_table_changes (
+    table_name VARCHAR(100) PRIMARY KEY,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    batch_id UUID
+);
+
+CREATE INDEX IF NOT EXISTS idx_perf_metrics_view_refresh
+    ON etl_performance_metrics (table_name, start_time DESC)
+    WHERE metric_type = 'view_refresh';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_career_bat_key ON leaderboard_career_batting(player_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_career_pit_key ON leaderboard_career_pitching(player_id);
+
+DROP MATERIALIZED VIEW IF EXISTS leaderboard_single_season_batting CASCADE;
+DROP MATERIALIZED VIEW IF EXISTS leaderboard_single_season_pitching CASCADE;
+DROP MATERIALIZED VIEW IF EXISTS leaderboard_yearly_batting CASCADE;
+DROP MATERIALIZED VIEW IF EXISTS leaderboard_yearly_pitching CASCADE;
+
+-- Single-Season Batting Records (all players, with active status)
+CREATE MATERIALIZED VIEW leaderboard_single_season_batting AS
+SELECT
+    s.player_id,
+    p.first_name,
+    p.last_name,
+    s.year,
+    s.league_id,
+    l.abbr as league_abbr,
+    s.team_id,
+    t.abbr as team_abbr,
+    s.stint,
+    s.g,
+    s.pa,
+    s.ab,
+    s.r,
+    s.h,
+    s.d as doubles,
+    s.t as triples,
+    s.hr,
+    s.rbi,
+    s.sb,
+    s.bb,
+    s.k as so,
+    -- Calculated stats
+    CASE WHEN s.ab > 0 THEN ROUND(s.h::NUMERIC / s.ab::NUMERIC, 3) ELSE 0 END as avg,
+    CASE WHEN s.ab > 0
+         THEN ROUND((s.h + s.bb + s.hp)::NUMERIC /
+                    (s.ab + s.bb + s.hp + s.sf)::NUMERIC, 3)
+         ELSE 0 END as obp,
+    CASE WHEN s.ab > 0
+         THEN ROUND((s.h + s.d + s.t*2 + s.hr*3)::NUMERIC / s.ab::NUMERIC, 3)
+         ELSE 0 END as slg,
+    s.war,
+    -- Active status flag
+    COALESCE(ps.retired, 1) = 0 as is_active
+FROM players_career_batting_stats s
+INNER JOIN players_core p ON s.player_id = p.player_id
+LEFT JOIN players_current_status ps ON s.player_id = ps.player_id
+LEFT JOIN leagues l ON s.league_id = l.league_id
+LEFT JOIN teams t ON s.team_id = t.team_id
+WHERE s.split_id = 1  -- Only regular season stats
+  AND s.pa >= 100     -- Minimum PA threshold for meaningful stats
+  AND s.team_id != 0; -- Exclude college/HS players (team_id=0 stats don't count)
+
+-- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_ss_bat_key ON leaderboard_single_season_batting(player_id, year, team_id, stint);
+
+-- Indexes for fast lookups
+CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_year ON leaderboard_single_season_batting(year DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_hr ON leaderboard_single_season_batting(hr DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_avg ON leaderboard_single_season_batting(avg DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_war ON leaderboard_single_season_batting(war DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_league ON leaderboard_single_season_batting(league_id, year);
+
+COMMENT ON MATERIALIZED VIEW leaderboard_single_season_batting IS 'Single-season batting records with active status indicator';
+
+-- Single-Season Pitching Records (all players, with active status)
+CREATE MATERIALIZED VIEW leaderboard_single_season_pitching AS
+SELECT
+    s.player_id,
+    p.first_name,
+    p.last_name,
+    s.year,
+    s.league_id,
+    l.abbr as league_abbr,
+    s.team_id,
+    t.abbr as team_abbr,
+    s.stint,
+    s.w,
+    s.l,
+    s.g,
+    s.gs,
+    s.cg,
+    s.sho,
+    s.s as sv,
+    s.ip,
+    s.ha as h,
+    s.er,
+    s.bb,
+    s.k as so,
+    -- Calculated stats
+    CASE WHEN s.ip > 0 THEN ROUND((s.er * 9.0) / s.ip, 2) ELSE 0 END as era,
+    CASE WHEN s.ip > 0 THEN ROUND((s.bb + s.ha) / s.ip, 2) ELSE 0 END as whip,
+    CASE WHEN s.ip > 0 THEN ROUND((s.k * 9.0) / s.ip, 2) ELSE 0 END as k_per_9,
+    s.war,
+    -- Active status flag
+    COALESCE(ps.retired, 1) = 0 as is_active
+FROM players_career_pitching_stats s
+INNER JOIN players_core p ON s.player_id = p.player_id
+LEFT JOIN players_current_status ps ON s.player_id = ps.player_id
+LEFT JOIN leagues l ON s.league_id = l.league_id
+LEFT JOIN teams t ON s.team_id = t.team_id
+WHERE s.split_id = 1  -- Only regular season stats
+  AND s.ip >= 50      -- Minimum IP threshold for meaningful stats
+  AND s.team_id != 0; -- Exclude college/HS players (team_id=0 stats don't count)
+
+-- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_ss_pit_key ON leaderboard_single_season_pitching(player_id, year, team_id, stint);
+
+-- Indexes for fast lookups
+CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_year ON leaderboard_single_season_pitching(year DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_w ON leaderboard_single_season_pitching(w DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_so ON leaderboard_single_season_pitching(so DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_era ON leaderboard_single_season_pitching(era ASC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_war ON leaderboard_single_season_pitching(war DESC);
+CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_league ON leaderboard_single_season_pitching(league_id, year);
+
+COMMENT ON MATERIALIZED VIEW leaderboard_single_season_pitching IS 'Single-season pitching records with active status indicator';
+
+-- =====================================================
+-- Yearly League Leaders (Top 10 per year/league)
+-- =====================================================
+
+-- Yearly Batting Leaders by League
+CREATE MATERIALIZED VIEW leaderboard_yearly_batting AS
+WITH ranked_stats AS (
+    SELECT
+        s.player_id,
+        p.first_name,
+        p.last_name,
+        s.year,
+        s.league_id,
+        l.abbr as league_abbr,
+        s.team_id,
+        s.stint,
+        s.hr,
+        s.rbi,
+        s.sb,
+        s.h,
+        CASE WHEN s.ab >= 300 AND s.ab > 0
+             THEN ROUND(s.h::NUMERIC / s.ab::NUMERIC, 3)
+             ELSE NULL END as avg,
+        s.war,
+        COALESCE(ps.retired, 1) = 0 as is_active,
+        -- Rank by each stat
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.hr DESC) as hr_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.rbi DESC) as rbi_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.sb DESC) as sb_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.h DESC) as h_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id
+                          ORDER BY CASE WHEN s.ab >= 300 AND s.ab > 0
+                                        THEN s.h::NUMERIC / s.ab::NUMERIC
+                                        ELSE 0 END DESC) as avg_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.war DESC) as war_rank
+    FROM players_career_batting_stats s
+    INNER JOIN players_core p ON s.player_id = p.player_id
+    LEFT JOIN players_current_status ps ON s.player_id = ps.player_id
+    LEFT JOIN leagues l ON s.league_id = l.league_id
+    WHERE s.split_id = 1
+      AND s.pa >= 100
+      AND s.team_id != 0  -- Exclude college/HS players
+)
+SELECT * FROM ranked_stats
+WHERE hr_rank <= 10
+   OR rbi_rank <= 10
+   OR sb_rank <= 10
+   OR h_rank <= 10
+   OR avg_rank <= 10
+   OR war_rank <= 10;
+
+-- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_yearly_bat_key ON leaderboard_yearly_batting(player_id, year, team_id, stint);
+CREATE INDEX IF NOT EXISTS idx_lb_yearly_bat_year_league ON leaderboard_yearly_batting(year, league_id);
+CREATE INDEX IF NOT EXISTS idx_lb_yearly_bat_hr_rank ON leaderboard_yearly_batting(year, league_id, hr_rank);
+CREATE INDEX IF NOT EXISTS idx_lb_yearly_bat_avg_rank ON leaderboard_yearly_batting(year, league_id, avg_rank);
+
+COMMENT ON MATERIALIZED VIEW leaderboard_yearly_batting IS 'Top 10 batting leaders per year/league for key statistics';
+
+-- Yearly Pitching Leaders by League
+CREATE MATERIALIZED VIEW leaderboard_yearly_pitching AS
+WITH ranked_stats AS (
+    SELECT
+        s.player_id,
+        p.first_name,
+        p.last_name,
+        s.year,
+        s.league_id,
+        l.abbr as league_abbr,
+        s.team_id,
+        s.stint,
+        s.w,
+        s.s as sv,
+        s.k as so,
+        CASE WHEN s.ip >= 100 THEN ROUND((s.er * 9.0) / s.ip, 2) ELSE NULL END as era,
+        CASE WHEN s.ip >= 100 THEN ROUND((s.bb + s.ha) / s.ip, 2) ELSE NULL END as whip,
+        s.war,
+        COALESCE(ps.retired, 1) = 0 as is_active,
+        -- Rank by each stat
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.w DESC) as w_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.s DESC) as sv_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.k DESC) as so_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id
+                          ORDER BY CASE WHEN s.ip >= 100
+                                        THEN (s.er * 9.0) / s.ip
+                                        ELSE 999 END ASC) as era_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id
+                          ORDER BY CASE WHEN s.ip >= 100
+                                        THEN (s.bb + s.ha) / s.ip
+                                        ELSE 999 END ASC) as whip_rank,
+        ROW_NUMBER() OVER (PARTITION BY s.year, s.league_id ORDER BY s.war DESC) as war_rank
+    FROM players_career_pitching_stats s
+    INNER JOIN players_core p ON s.player_id = p.player_id
+    LEFT JOIN players_current_status ps ON s.player_id = ps.player_id
+    LEFT JOIN leagues l ON s.league_id = l.league_id
+    WHERE s.split_id = 1
+      AND s.ip >= 50
+      AND s.team_id != 0  -- Exclude college/HS players
+)
+SELECT * FROM ranked_stats
+WHERE w_rank <= 10
+   OR sv_rank <= 10
+   OR so_rank <= 10
+   OR era_rank <= 10
+   OR whip_rank <= 10
+   OR war_rank <= 10;
+
+-- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_yearly_pit_key ON leaderboard_yearly_pitching(player_id, year, team_id, stint);
+CREATE INDEX IF NOT EXISTS idx_lb_yearly_pit_year_league ON leaderboard_yearly_pitching(year, league_id);
+CREATE INDEX IF NOT EXISTS idx_lb_yearly_pit_w_rank ON leaderboard_yearly_pitching(year, league_id, w_rank);
+CREATE INDEX IF NOT EXISTS idx_lb_yearly_pit_era_rank ON leaderboard_yearly_pitching(year, league_id, era_rank);
+
+COMMENT ON MATERIALIZED VIEW leaderboard_yearly_pitching IS 'Top 10 pitching leaders per year/league for key statistics';
+
+ANALYZE leaderboard_single_season_batting;
+ANALYZE leaderboard_single_season_pitching;
+ANALYZE leaderboard_yearly_batting;
+ANALYZE leaderboard_yearly_pitching;
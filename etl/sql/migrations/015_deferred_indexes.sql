@@ -0,0 +1,20 @@
+-- Migration 015: Deferred index and foreign key maintenance for bulk loads
+-- Created: 2026-10-16
+-- Purpose: Let large initial and full loads drop secondary indexes and foreign keys and rebuild them afterwards
+--
+-- load-data --defer-indexes records the non-unique indexes and outbound foreign keys of
+-- every loaded table here and drops them (src/database/deferred_indexes.py). Primary keys
+-- and unique indexes stay, as upserts need them. The rebuild_indexes stage (or
+-- python main.py rebuild-indexes) recreates them in parallel, adds foreign keys NOT VALID
+-- and validates them, and deletes each row once its object is back and valid, so a load
+-- that failed half way still knows what to restore.
+
+CREATE TABLE IF NOT EXISTS etl_deferred_objects (
+    table_name VARCHAR(100) NOT NULL,
+    object_type VARCHAR(20) NOT NULL,     -- 'index' or 'foreign_key'
+    object_name VARCHAR(100) NOT NULL,
+    definition TEXT NOT NULL,             -- pg_get_indexdef() / pg_get_constraintdef()
+    batch_id UUID,
+    deferred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, object_type, object_name)
+);
@@ -104,6 +104,7 @@ CREATE TABLE IF NOT EXISTS etl_calculation_queue (
     player_id INTEGER,
     year INTEGER,
     team_id INTEGER,
+    league_id INTEGER,
     calculation_type VARCHAR(50) NOT NULL, -- woba, war, wrc_plus, etc.
     dependencies TEXT[], -- Other calculations that must be completed first
     priority INTEGER DEFAULT 5 CHECK (priority BETWEEN 1 AND 10),
@@ -117,6 +118,9 @@ CREATE TABLE IF NOT EXISTS etl_calculation_queue (
   CREATE INDEX IF NOT EXISTS idx_calc_queue_status_priority ON etl_calculation_queue(status, priority DESC, created_at);
   CREATE INDEX IF NOT EXISTS idx_calc_queue_player ON etl_calculation_queue(player_id, year) WHERE player_id IS NOT NULL;
   CREATE INDEX IF NOT EXISTS idx_calc_queue_batch ON etl_calculation_queue(batch_id);
+  -- One pending row per changed (year, league_id), see LeagueConstantsTransformer
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_calc_queue_pending_year_league
+      ON etl_calculation_queue (calculation_type, year, league_id) WHERE status = 'pending';
 
 -- Table Load Strategies Configuration
 CREATE TABLE IF NOT EXISTS etl_table_config (
@@ -147,6 +151,54 @@ CREATE TABLE IF NOT EXISTS etl_performance_metrics (
 );
 CREATE INDEX IF NOT EXISTS idx_perf_metrics_batch ON etl_performance_metrics(batch_id);
 CREATE INDEX IF NOT EXISTS idx_perf_metrics_type_table ON etl_performance_metrics(metric_type, table_name);
+CREATE INDEX IF NOT EXISTS idx_perf_metrics_view_refresh
+    ON etl_performance_metrics (table_name, start_time DESC)
+    WHERE metric_type = 'view_refresh';
+
+-- Per-season content digests of partitioned stats tables (unchanged seasons are not reloaded)
+CREATE TABLE IF NOT EXISTS etl_partition_digests (
+    table_name VARCHAR(100) NOT NULL,
+    partition_key INTEGER NOT NULL,
+    digest VARCHAR(40) NOT NULL,
+    row_count INTEGER NOT NULL,
+    batch_id UUID,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, partition_key)
+);
+
+-- Indexes and foreign keys dropped for a bulk load and not rebuilt yet (see migration 015)
+CREATE TABLE IF NOT EXISTS etl_deferred_objects (
+    table_name VARCHAR(100) NOT NULL,
+    object_type VARCHAR(20) NOT NULL,
+    object_name VARCHAR(100) NOT NULL,
+    definition TEXT NOT NULL,
+    batch_id UUID,
+    deferred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, object_type, object_name)
+);
+
+-- Last time a load changed rows of each table (decides which materialized views are refreshed)
+CREATE TABLE IF NOT EXISTS etl_table_changes (
+    table_name VARCHAR(100) PRIMARY KEY,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    batch_id UUID
+);
+
+-- Schema version for the loaders' catalog cache (see migration 009 for the DDL event trigger)
+CREATE TABLE IF NOT EXISTS etl_schema_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO etl_schema_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+  CREATE OR REPLACE FUNCTION bump_etl_schema_version() RETURNS VOID AS $$
+  BEGIN
+      UPDATE etl_schema_version
+      SET version = version + 1,
+          updated_at = CURRENT_TIMESTAMP;
+  END;
+  $$ LANGUAGE plpgsql;
 
 -- Helper views for Monitoring
 CREATE OR REPLACE VIEW v_etl_recent_runs AS
@@ -56,7 +56,8 @@ ALTER TABLE players_career_batting_stats
 ADD COLUMN IF NOT EXISTS sub_league_id INTEGER,
 ADD COLUMN IF NOT EXISTS constants_version INTEGER,
 ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-ADD COLUMN IF NOT EXISTS wraa DECIMAL(6,1);
+ADD COLUMN IF NOT EXISTS wraa DECIMAL(6,1),
+ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
 
 -- Players career pitching stats (from players_career_pitching_stats.csv)
 CREATE TABLE IF NOT EXISTS players_career_pitching_stats (
@@ -138,7 +139,8 @@ ADD COLUMN IF NOT EXISTS constants_version INTEGER,
 ADD COLUMN IF NOT EXISTS xfip DECIMAL(5,2),
 ADD COLUMN IF NOT EXISTS era_minus INTEGER,
 ADD COLUMN IF NOT EXISTS fip_minus INTEGER,
-ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
 
 -- Players career fielding stats (from players_career_fielding_stats.csv)
 CREATE TABLE IF NOT EXISTS players_career_fielding_stats (
@@ -422,14 +424,14 @@ CREATE TABLE IF NOT EXISTS players_game_batting_stats (
     sh SMALLINT,
     hp SMALLINT,
     gdp SMALLINT,
+    row_hash CHAR(32),  -- md5 of loaded values, used to skip unchanged rows on incremental loads
     PRIMARY KEY (player_id, year, game_id),
     FOREIGN KEY (player_id) REFERENCES players_core(player_id),
     FOREIGN KEY (team_id) REFERENCES teams(team_id)
-);
+) PARTITION BY RANGE (year);  -- one partition per season, created by the loader
 
 CREATE INDEX IF NOT EXISTS idx_game_batting_player ON players_game_batting_stats(player_id);
 CREATE INDEX IF NOT EXISTS idx_game_batting_game ON players_game_batting_stats(game_id);
-CREATE INDEX IF NOT EXISTS idx_game_batting_year ON players_game_batting_stats(year);
 CREATE INDEX IF NOT EXISTS idx_game_batting_hr ON players_game_batting_stats(hr) WHERE hr > 0;
 
 COMMENT ON TABLE players_game_batting_stats IS 'Individual batting performance for each game';
@@ -459,14 +461,14 @@ CREATE TABLE IF NOT EXISTS players_game_pitching_stats (
     cg SMALLINT,      -- Complete game (1 or 0)
     sho SMALLINT,     -- Shutout (1 or 0)
     qs SMALLINT,      -- Quality start (1 or 0)
+    row_hash CHAR(32),  -- md5 of loaded values, used to skip unchanged rows on incremental loads
     PRIMARY KEY (player_id, year, game_id),
     FOREIGN KEY (player_id) REFERENCES players_core(player_id),
     FOREIGN KEY (team_id) REFERENCES teams(team_id)
-);
+) PARTITION BY RANGE (year);  -- one partition per season, created by the loader
 
 CREATE INDEX IF NOT EXISTS idx_game_pitching_player ON players_game_pitching_stats(player_id);
 CREATE INDEX IF NOT EXISTS idx_game_pitching_game ON players_game_pitching_stats(game_id);
-CREATE INDEX IF NOT EXISTS idx_game_pitching_year ON players_game_pitching_stats(year);
 CREATE INDEX IF NOT EXISTS idx_game_pitching_k ON players_game_pitching_stats(k) WHERE k >= 10;
 CREATE INDEX IF NOT EXISTS idx_game_pitching_cg ON players_game_pitching_stats(cg) WHERE cg = 1;
 
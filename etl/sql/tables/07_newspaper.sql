@@ -392,6 +392,7 @@ CREATE TABLE IF NOT EXISTS messages (
     -- which don't correspond to our auto-generated trade_history.trade_id values.
     -- The proper relationship is: trade_history.message_id -> messages.message_id
 );
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
 
 CREATE INDEX IF NOT EXISTS idx_messages_date ON messages(date DESC);
 CREATE INDEX IF NOT EXISTS idx_messages_type ON messages(message_type);
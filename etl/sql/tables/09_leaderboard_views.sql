@@ -67,6 +67,9 @@
   WHERE s.split_id = 1  -- Only regular season stats
   GROUP BY s.player_id, p.first_name, p.last_name, ps.retired;
 
+  -- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_career_bat_key ON leaderboard_career_batting(player_id);
+
   -- Indexes for fast lookups
   CREATE INDEX IF NOT EXISTS idx_lb_career_bat_hr ON leaderboard_career_batting(hr DESC);
   CREATE INDEX IF NOT EXISTS idx_lb_career_bat_avg ON leaderboard_career_batting(avg DESC);
@@ -124,6 +127,9 @@
   WHERE s.split_id = 1  -- Only regular season stats
   GROUP BY s.player_id, p.first_name, p.last_name, ps.retired;
 
+  -- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_career_pit_key ON leaderboard_career_pitching(player_id);
+
   -- Indexes for fast lookups
   CREATE INDEX IF NOT EXISTS idx_lb_career_pit_w ON leaderboard_career_pitching(w DESC);
   CREATE INDEX IF NOT EXISTS idx_lb_career_pit_sv ON leaderboard_career_pitching(sv DESC);
@@ -150,6 +156,7 @@
       l.abbr as league_abbr,
       s.team_id,
       t.abbr as team_abbr,
+      s.stint,
       s.g,
       s.pa,
       s.ab,
@@ -183,6 +190,9 @@
     AND s.pa >= 100     -- Minimum PA threshold for meaningful stats
     AND s.team_id != 0; -- Exclude college/HS players (team_id=0 stats don't count)
 
+  -- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_ss_bat_key ON leaderboard_single_season_batting(player_id, year, team_id, stint);
+
   -- Indexes for fast lookups
   CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_year ON leaderboard_single_season_batting(year DESC);
   CREATE INDEX IF NOT EXISTS idx_lb_ss_bat_hr ON leaderboard_single_season_batting(hr DESC);
@@ -203,6 +213,7 @@
       l.abbr as league_abbr,
       s.team_id,
       t.abbr as team_abbr,
+      s.stint,
       s.w,
       s.l,
       s.g,
@@ -231,6 +242,9 @@
     AND s.ip >= 50      -- Minimum IP threshold for meaningful stats
     AND s.team_id != 0; -- Exclude college/HS players (team_id=0 stats don't count)
 
+  -- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_ss_pit_key ON leaderboard_single_season_pitching(player_id, year, team_id, stint);
+
   -- Indexes for fast lookups
   CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_year ON leaderboard_single_season_pitching(year DESC);
   CREATE INDEX IF NOT EXISTS idx_lb_ss_pit_w ON leaderboard_single_season_pitching(w DESC);
@@ -255,6 +269,8 @@
           s.year,
           s.league_id,
           l.abbr as league_abbr,
+          s.team_id,
+          s.stint,
           s.hr,
           s.rbi,
           s.sb,
@@ -290,6 +306,8 @@
      OR avg_rank <= 10
      OR war_rank <= 10;
 
+  -- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_yearly_bat_key ON leaderboard_yearly_batting(player_id, year, team_id, stint);
   CREATE INDEX IF NOT EXISTS idx_lb_yearly_bat_year_league ON leaderboard_yearly_batting(year, league_id);
   CREATE INDEX IF NOT EXISTS idx_lb_yearly_bat_hr_rank ON leaderboard_yearly_batting(year, league_id, hr_rank);
   CREATE INDEX IF NOT EXISTS idx_lb_yearly_bat_avg_rank ON leaderboard_yearly_batting(year, league_id, avg_rank);
@@ -306,6 +324,8 @@
           s.year,
           s.league_id,
           l.abbr as league_abbr,
+          s.team_id,
+          s.stint,
           s.w,
           s.s as sv,
           s.k as so,
@@ -342,6 +362,8 @@
      OR whip_rank <= 10
      OR war_rank <= 10;
 
+  -- Unique key (required by REFRESH MATERIALIZED VIEW CONCURRENTLY)
+  CREATE UNIQUE INDEX IF NOT EXISTS idx_lb_yearly_pit_key ON leaderboard_yearly_pitching(player_id, year, team_id, stint);
   CREATE INDEX IF NOT EXISTS idx_lb_yearly_pit_year_league ON leaderboard_yearly_pitching(year, league_id);
   CREATE INDEX IF NOT EXISTS idx_lb_yearly_pit_w_rank ON leaderboard_yearly_pitching(year, league_id, w_rank);
   CREATE INDEX IF NOT EXISTS idx_lb_yearly_pit_era_rank ON leaderboard_yearly_pitching(year, league_id, era_rank);
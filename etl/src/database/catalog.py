@@ -0,0 +1,75 @@
+"""Per-process cache of target table column metadata"""
+from typing import Dict, Optional
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from .connection import db
+
+COLUMN_TYPES_SQL = text("""
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_name = :table_name
+    ORDER BY ordinal_position
+""")
+
+# Bumped by migrations and by the DDL event trigger from migration 009
+SCHEMA_VERSION_SQL = text("SELECT version FROM etl_schema_version")
+# Run inside a transaction whose DDL leaves columns unchanged (shadow swaps, new partitions)
+# so the event trigger does not bump the version (migration 010)
+SKIP_SCHEMA_VERSION_SQL = "SET LOCAL etl.skip_schema_version = 'on'"
+
+
+class CatalogCache:
+    """Column names and information_schema types per table, cached for the process.
+
+    refresh() re-reads the schema version (one single-row query) and drops
+    every cached entry when it changed. Loaders call it once per file, so a
+    migration applied between files is picked up by the next load. Without
+    the etl_schema_version table the cache lives for the whole process.
+    """
+
+    def __init__(self, connection=None):
+        self.db = connection or db
+        self.version: Optional[int] = None
+        self._tables: Dict[str, Dict[str, str]] = {}
+        self._versioned = True
+
+    def refresh(self) -> Optional[int]:
+        """Invalidate cached metadata if the schema version changed"""
+        if not self._versioned:
+            return self.version
+        try:
+            if self.version is None:
+                # Until the table is known to exist, a missing one must not abort a load transaction
+                with self.db.savepoint():
+                    version = self.db.execute_sql(SCHEMA_VERSION_SQL).scalar()
+            else:
+                version = self.db.execute_sql(SCHEMA_VERSION_SQL).scalar()
+        except ProgrammingError as e:
+            logger.debug(f"No schema version table ({e.orig}), catalog cache kept for the process")
+            self._versioned = False
+            return self.version
+
+        if version != self.version:
+            if self._tables:
+                logger.info(f"Schema version changed ({self.version} -> {version}), clearing catalog cache")
+            self._tables.clear()
+            self.version = version
+        return self.version
+
+    def get_column_types(self, table_name: str) -> Dict[str, str]:
+        """Column name -> information_schema data_type, in ordinal order"""
+        if table_name not in self._tables:
+            result = self.db.execute_sql(COLUMN_TYPES_SQL, {'table_name': table_name})
+            self._tables[table_name] = {row[0]: row[1] for row in result}
+        return self._tables[table_name]
+
+    def invalidate(self, table_name: str = None):
+        """Forget one table (or all tables)"""
+        if table_name is None:
+            self._tables.clear()
+        else:
+            self._tables.pop(table_name, None)
+
+
+catalog = CatalogCache()
@@ -1,14 +1,64 @@
 """Database connection management"""
 import os
+import threading
 from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker
 from loguru import logger
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
+
+def compile_statement(dialect, sql, params=None) -> Tuple[str, dict]:
+    """DBAPI query string and parameters of a text() statement for dialect"""
+    if isinstance(sql, str):
+        sql = text(sql)
+    compiled = sql.compile(dialect=dialect)
+    return compiled.string, compiled.construct_params(params or {})
+
+
+def execute_pipelined(connection, statements: Iterable[Tuple]):
+    """Run (sql, params) statements in one round trip; params may be a list for an executemany.
+
+    psycopg2 has no pipeline mode, so every statement is bound client-side with
+    mogrify and the batch is sent as one multi-statement query. Other drivers
+    run the statements one by one.
+    """
+    if isinstance(connection, Session):
+        connection = connection.connection()
+    expanded = [(sql, params) for sql, param_sets in statements
+                for params in (param_sets if isinstance(param_sets, list) else [param_sets])]
+    if not expanded:
+        return
+    if connection.dialect.driver != 'psycopg2':
+        for sql, params in expanded:
+            connection.execute(text(sql) if isinstance(sql, str) else sql, params or {})
+        return
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(b';\n'.join(cursor.mogrify(*compile_statement(connection.dialect, sql, params))
+                                    for sql, params in expanded))
+    finally:
+        cursor.close()
+
+
+class LoadTransaction:
+    """One connection and transaction shared by everything a thread does during a file load"""
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.pending: List[Tuple] = []  # Deferred metadata writes, sent together before COMMIT
+
+    def flush(self):
+        statements, self.pending = self.pending, []
+        execute_pipelined(self.connection, statements)
+
+
 class DatabaseConnection:
     """Manager PostgreSQL database connections"""
     def __init__(self, environment=None):
@@ -18,6 +68,7 @@ class DatabaseConnection:
         self.environment = environment
         self.engine = None
         self.SessionLocal = None
+        self._local = threading.local()  # LoadTransaction of the current thread, if any
         self._init_connection()
 
 
@@ -56,10 +107,78 @@ class DatabaseConnection:
             raise
 
 
+    @property
+    def load_transaction(self) -> Optional[LoadTransaction]:
+        return getattr(self._local, 'transaction', None)
+
+    def active_connection(self) -> Optional[Connection]:
+        """Connection of the load transaction open in this thread, if any"""
+        transaction = self.load_transaction
+        return transaction.connection if transaction else None
+
+    @contextmanager
+    def load_context(self):
+        """Run everything this thread sends through db in one connection and transaction.
+
+        execute_sql and COPYs use the shared connection without committing,
+        get_session() blocks become savepoints, and writes queued with defer()
+        go out in one round trip right before the final COMMIT. Any exception
+        rolls the load back to its last commit_load(). Nested contexts join the
+        outer one.
+        """
+        if self.load_transaction is not None:
+            yield self.load_transaction
+            return
+
+        with self.engine.connect() as conn:
+            transaction = LoadTransaction(conn)
+            self._local.transaction = transaction
+            try:
+                yield transaction
+                transaction.flush()
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.transaction = None
+
+    def commit_load(self):
+        """Commit the load transaction's work so far and continue in a new transaction (no-op outside one).
+
+        For statements whose locks must not be held for the rest of the load,
+        e.g. the rename of a table swap. Writes queued with defer() stay queued.
+        """
+        conn = self.active_connection()
+        if conn is not None:
+            conn.commit()
+
+    def defer(self, sql, params=None):
+        """Queue a write for the end of the load transaction (run immediately outside one)"""
+        transaction = self.load_transaction
+        if transaction is None:
+            self.execute_sql(text(sql) if isinstance(sql, str) else sql, params)
+        else:
+            transaction.pending.append((sql, params))
+
+    @contextmanager
+    def savepoint(self):
+        """Savepoint inside a load transaction, so an expected error does not abort it (no-op outside)"""
+        conn = self.active_connection()
+        if conn is None:
+            yield
+            return
+        with conn.begin_nested():
+            yield
+
     @contextmanager
     def get_session(self):
-        """Get a database session"""
-        session = self.SessionLocal()
+        """Get a database session (a savepoint of the load transaction when one is open)"""
+        conn = self.active_connection()
+        if conn is not None:
+            session = Session(bind=conn, join_transaction_mode='create_savepoint')
+        else:
+            session = self.SessionLocal()
         try:
             yield session
             session.commit()
@@ -73,7 +192,10 @@ class DatabaseConnection:
 
 
     def execute_sql(self, sql, params=None):
-        """Execute raw SQL query"""
+        """Execute raw SQL query (committed at the end of the load transaction when one is open)"""
+        conn = self.active_connection()
+        if conn is not None:
+            return conn.execute(sql, params or {})
         with self.engine.connect() as conn:
             # Assume sql is already properly formatted (either as text or string)
             result = conn.execute(sql, params or {})
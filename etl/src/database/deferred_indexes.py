@@ -0,0 +1,189 @@
+"""
+Deferred index and foreign key maintenance for bulk loads.
+
+Every row a bulk load inserts updates every index of the table and is checked
+against every foreign key. defer_indexes() records the non-unique indexes and
+the outbound foreign keys of the tables about to be loaded in
+etl_deferred_objects and drops them; primary keys and unique indexes stay, as
+the upserts' ON CONFLICT needs them. rebuild_deferred() recreates them once the
+data is in: several tables at once on their own connections with a raised
+maintenance_work_mem, foreign keys added NOT VALID and then validated. Each
+object is checked in the catalog and only then forgotten, so a load that failed
+half way is restored by the next rebuild.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+from loguru import logger
+from sqlalchemy import text
+from config.etl_config import INDEX_REBUILD_MAINTENANCE_WORK_MEM, INDEX_REBUILD_MAX_WORKERS
+from .catalog import SKIP_SCHEMA_VERSION_SQL
+from .connection import db
+from .table_swap import IndexSpec, get_foreign_keys, get_index_specs
+
+INDEX = 'index'
+FOREIGN_KEY = 'foreign_key'
+
+RECORD_SQL = text("""
+    INSERT INTO etl_deferred_objects (table_name, object_type, object_name, definition, batch_id)
+    VALUES (:table_name, :object_type, :object_name, :definition, CAST(:batch_id AS UUID))
+    ON CONFLICT (table_name, object_type, object_name) DO NOTHING
+""")
+FORGET_SQL = text("""
+    DELETE FROM etl_deferred_objects
+    WHERE table_name = :table_name AND object_type = :object_type AND object_name = :object_name
+""")
+INDEX_VALID_SQL = text("""
+    SELECT x.indisvalid AND x.indisready FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    WHERE x.indrelid = CAST(:table_name AS regclass) AND i.relname = :object_name
+""")
+FOREIGN_KEY_VALID_SQL = text("""
+    SELECT convalidated FROM pg_constraint
+    WHERE contype = 'f' AND conrelid = CAST(:table_name AS regclass) AND conname = :object_name
+""")
+
+
+@dataclass(frozen=True)
+class DeferredObject:
+    """An index or foreign key dropped for a bulk load"""
+    table_name: str
+    object_type: str   # INDEX or FOREIGN_KEY
+    object_name: str
+    definition: str    # pg_get_indexdef() / pg_get_constraintdef()
+
+    def drop_sql(self) -> str:
+        if self.object_type == INDEX:
+            return f"DROP INDEX IF EXISTS {self.object_name}"
+        return f"ALTER TABLE {self.table_name} DROP CONSTRAINT IF EXISTS {self.object_name}"
+
+    def rebuild_sql(self) -> List[str]:
+        if self.object_type == INDEX:
+            # The definition of a partitioned table's index says ON ONLY, which would skip the partitions
+            return [self.definition.replace(' ON ONLY ', ' ON ', 1)]
+        return [f"ALTER TABLE {self.table_name} ADD CONSTRAINT {self.object_name} {self.definition} NOT VALID",
+                f"ALTER TABLE {self.table_name} VALIDATE CONSTRAINT {self.object_name}"]
+
+
+def deferrable_indexes(specs: Iterable[IndexSpec]) -> List[IndexSpec]:
+    """Indexes a bulk load can do without: not a constraint's and not unique"""
+    return [spec for spec in specs
+            if spec.constraint_type is None and not spec.definition.startswith('CREATE UNIQUE')]
+
+
+def _deferred_table_exists(connection) -> bool:
+    return connection.execute(text("SELECT to_regclass('etl_deferred_objects') IS NOT NULL")).scalar()
+
+
+def defer_indexes(tables: Iterable[str], batch_id: str = None) -> Dict[str, int]:
+    """Record and drop the secondary indexes and foreign keys of tables; objects dropped per table"""
+    deferred = {}
+    with db.engine.connect() as conn:
+        if not _deferred_table_exists(conn):
+            raise RuntimeError("etl_deferred_objects does not exist, apply migration 015 first")
+        for table in tables:
+            if conn.execute(text("SELECT to_regclass(:table)"), {'table': table}).scalar() is None:
+                continue
+            objects = [DeferredObject(table, FOREIGN_KEY, name, definition)
+                       for name, definition in get_foreign_keys(conn, table)]
+            objects += [DeferredObject(table, INDEX, spec.name, spec.definition)
+                        for spec in deferrable_indexes(get_index_specs(conn, table))]
+            if not objects:
+                continue
+
+            # Recorded and dropped together, so nothing is ever dropped without its definition
+            conn.execute(text(SKIP_SCHEMA_VERSION_SQL))
+            conn.execute(RECORD_SQL, [{**vars(obj), 'batch_id': batch_id} for obj in objects])
+            for obj in objects:
+                conn.execute(text(obj.drop_sql()))
+            conn.commit()
+            deferred[table] = len(objects)
+            logger.info(f"Deferred {len(objects)} indexes and foreign keys of {table}")
+    return deferred
+
+
+def get_deferred_objects(connection) -> List[DeferredObject]:
+    if not _deferred_table_exists(connection):
+        return []
+    result = connection.execute(text("""
+        SELECT table_name, object_type, object_name, definition FROM etl_deferred_objects
+        ORDER BY table_name, object_name
+    """))
+    return [DeferredObject(*row) for row in result]
+
+
+def _rebuild_objects(objects: List[DeferredObject], maintenance_work_mem: str) -> Dict[str, str]:
+    """Rebuild objects of one table in order on one connection; errors keyed by object name"""
+    errors = {}
+    with db.engine.connect() as conn:
+        conn.execute(text(f"SET maintenance_work_mem = '{maintenance_work_mem}'"))
+        conn.commit()
+        for obj in objects:
+            params = {'table_name': obj.table_name, 'object_type': obj.object_type, 'object_name': obj.object_name}
+            try:
+                conn.execute(text(SKIP_SCHEMA_VERSION_SQL))
+                for sql in obj.rebuild_sql():
+                    conn.execute(text(sql))
+                valid_sql = INDEX_VALID_SQL if obj.object_type == INDEX else FOREIGN_KEY_VALID_SQL
+                if not conn.execute(valid_sql, params).scalar():
+                    raise RuntimeError(f"{obj.object_name} is not valid after the rebuild")
+                conn.execute(FORGET_SQL, params)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                errors[obj.object_name] = str(e)
+                logger.error(f"Could not rebuild {obj.object_type} {obj.object_name} of {obj.table_name}: {e}")
+    return errors
+
+
+def _rebuild_in_parallel(objects: List[DeferredObject], workers: int,
+                         maintenance_work_mem: str) -> Dict[str, Dict[str, str]]:
+    by_table = defaultdict(list)
+    for obj in objects:
+        by_table[obj.table_name].append(obj)
+    if not by_table:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(by_table))) as pool:
+        errors = pool.map(lambda table: _rebuild_objects(by_table[table], maintenance_work_mem), by_table)
+        return dict(zip(by_table, errors))
+
+
+def rebuild_deferred(max_workers: int = None, maintenance_work_mem: str = None) -> Dict[str, Dict]:
+    """Rebuild every recorded index, then every foreign key; results keyed by table.
+
+    Foreign keys that failed (e.g. on a lock cycle between two tables validated
+    at once) are retried one at a time before they are reported.
+    """
+    workers = max(1, max_workers or INDEX_REBUILD_MAX_WORKERS)
+    maintenance_work_mem = maintenance_work_mem or INDEX_REBUILD_MAINTENANCE_WORK_MEM
+    with db.engine.connect() as conn:
+        objects = get_deferred_objects(conn)
+    if not objects:
+        return {}
+    logger.info(f"Rebuilding {len(objects)} deferred indexes and foreign keys "
+                f"({workers} tables at a time, maintenance_work_mem {maintenance_work_mem})")
+
+    indexes = [obj for obj in objects if obj.object_type == INDEX]
+    foreign_keys = [obj for obj in objects if obj.object_type == FOREIGN_KEY]
+    errors = defaultdict(dict)
+    for table, failed in _rebuild_in_parallel(indexes, workers, maintenance_work_mem).items():
+        errors[table].update(failed)
+    retry = []
+    for table, failed in _rebuild_in_parallel(foreign_keys, workers, maintenance_work_mem).items():
+        retry += [obj for obj in foreign_keys if obj.table_name == table and obj.object_name in failed]
+    if retry:
+        logger.info(f"Retrying {len(retry)} foreign keys one at a time")
+        for obj in retry:
+            errors[obj.table_name].update(_rebuild_objects([obj], maintenance_work_mem))
+
+    results = {}
+    for obj in objects:
+        result = results.setdefault(obj.table_name, {'restored': [], 'failed': {}})
+        if obj.object_name in errors[obj.table_name]:
+            result['failed'][obj.object_name] = errors[obj.table_name][obj.object_name]
+        else:
+            result['restored'].append(obj.object_name)
+    restored = sum(len(result['restored']) for result in results.values())
+    logger.info(f"Rebuilt {restored} of {len(objects)} deferred indexes and foreign keys")
+    return results
@@ -0,0 +1,116 @@
+"""
+Set-based creation of stub parent rows for orphaned foreign key references.
+
+OOTP exports sometimes reference nations, leagues or teams that are not in
+their own files (special negative league states, free agents, removed
+nations). repair_foreign_keys inserts a stub for every such ID straight from
+a staging table, one INSERT ... SELECT per parent table, so the load that
+follows does not fail with a foreign key violation.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+from loguru import logger
+from sqlalchemy import text
+
+
+@dataclass(frozen=True)
+class ParentStub:
+    """How to build a stub row for a parent table.
+
+    columns maps each non-key column to a SQL expression over ``id``,
+    the missing key value. IDs in exclude are never stubbed.
+    """
+    table: str
+    key: str
+    columns: Dict[str, str]
+    exclude: Tuple[int, ...] = field(default=())
+
+
+PARENT_STUBS = {
+    # nation_id=0 ("Unknown") is added by the nations load itself
+    'nations': ParentStub('nations', 'nation_id', {
+        'name': "'Nation ' || id",
+        'abbreviation': "'N' || id",
+        'continent_id': '1',
+    }, exclude=(0,)),
+    # OOTP uses negative league_ids for special states
+    'leagues': ParentStub('leagues', 'league_id', {
+        'name': "CASE WHEN id = 0 THEN 'No League' ELSE 'SPECIAL_' || id END",
+        'abbr': "CASE WHEN id = 0 THEN 'NONE' ELSE 'SP' || id END",
+        'nation_id': '0',
+        'language_id': 'NULL',
+        'logo_file_name': 'NULL',
+        'parent_league_id': 'NULL',
+        'league_state': '0',
+        'season_year': '0',
+        'league_level': '0',
+        'game_date': 'NULL',
+        'current_date_year': '0',
+    }),
+    'teams': ParentStub('teams', 'team_id', {
+        'name': "CASE WHEN id = 0 THEN 'Free Agents' ELSE 'SPECIAL_' || id END",
+        'abbr': "CASE WHEN id = 0 THEN 'FA' ELSE 'SP' || id END",
+        'nickname': 'NULL',
+        'logo_file_name': 'NULL',
+        'city_id': 'NULL',
+        'park_id': 'NULL',
+        'league_id': 'NULL',
+        'sub_league_id': 'NULL',
+        'division_id': 'NULL',
+        'nation_id': '0',
+        'parent_team_id': 'NULL',
+        'level': '0',
+        'prevent_any_moves': '0',
+        'human_team': '0',
+        'human_id': 'NULL',
+        'gender': '0',
+        'allstar_team': '0',
+    }),
+}
+
+
+def build_repair_sql(source_table: str, columns: List[str], stub: ParentStub) -> str:
+    """INSERT ... SELECT creating stubs for IDs in source_table.columns missing from the parent"""
+    ids = ' UNION '.join(f"SELECT {col}::BIGINT AS id FROM {source_table} WHERE {col} IS NOT NULL"
+                         for col in columns)
+    exclude = f"AND k.id NOT IN ({', '.join(str(i) for i in stub.exclude)})" if stub.exclude else ''
+    stub_columns = ', '.join(stub.columns)
+    stub_values = ', '.join(stub.columns.values())
+    return f"""
+        INSERT INTO {stub.table} ({stub.key}, {stub_columns})
+        SELECT k.id, {stub_values}
+        FROM ({ids}) AS k (id)
+        WHERE NOT EXISTS (SELECT 1 FROM {stub.table} p WHERE p.{stub.key} = k.id)
+        {exclude}
+        ON CONFLICT ({stub.key}) DO NOTHING
+        RETURNING {stub.key}
+    """
+
+
+def repair_foreign_keys(connection, source_table: str, references: Iterable[Tuple[str, str]],
+                        stubs: Dict[str, ParentStub] = None) -> Dict[str, List[int]]:
+    """Create stub parent rows for every orphaned reference in source_table.
+
+    Args:
+        connection: Session or Connection; statements join its transaction
+        source_table: Staging table holding the referencing columns
+        references: (column, parent table) pairs, e.g. ('last_team_id', 'teams')
+        stubs: Stub definitions per parent table (defaults to PARENT_STUBS)
+
+    Returns:
+        Parent table -> sorted list of stubbed IDs
+    """
+    stubs = stubs or PARENT_STUBS
+    columns_by_parent: Dict[str, List[str]] = {}
+    for column, parent in references:
+        columns_by_parent.setdefault(parent, []).append(column)
+
+    repaired = {}
+    for parent, columns in columns_by_parent.items():
+        stub = stubs[parent]
+        ids = sorted(row[0] for row in connection.execute(text(build_repair_sql(source_table, columns, stub))))
+        if ids:
+            logger.warning(f"Created {len(ids)} stub {parent} rows for orphaned "
+                           f"{', '.join(columns)} references in {source_table}: {ids}")
+        repaired[parent] = ids
+    return repaired
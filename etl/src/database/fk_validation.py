@@ -0,0 +1,156 @@
+"""
+Pre-flight foreign key checks of incoming rows.
+
+Before a loader stages anything, the foreign key columns of its frame are
+checked against the key sets of the parent tables: one sorted NumPy array per
+(parent table, key column), read once per process and shared by every loader
+that runs there. A key set is re-read only when etl_table_changes shows its
+table changed since (a parent loaded earlier in the batch, stub rows), so a
+check costs one small query plus an np.isin per column.
+
+The foreign keys come from pg_constraint, plus the ones load-data
+--defer-indexes dropped for the load (etl_deferred_objects), so rows are still
+checked while the database does not enforce them.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import text
+from .catalog import catalog
+from .connection import db
+
+FOREIGN_KEYS_SQL = text("""
+    SELECT a.attname, c.confrelid::regclass::text, pa.attname
+    FROM pg_constraint c
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+    JOIN pg_attribute pa ON pa.attrelid = c.confrelid AND pa.attnum = c.confkey[1]
+    WHERE c.contype = 'f' AND c.conrelid = CAST(:table AS regclass) AND cardinality(c.conkey) = 1
+    ORDER BY c.conname
+""")
+DEFERRED_FOREIGN_KEYS_SQL = text("""
+    SELECT definition FROM etl_deferred_objects
+    WHERE table_name = :table AND object_type = 'foreign_key'
+    ORDER BY object_name
+""")
+_FOREIGN_KEY_DEF = re.compile(r'^FOREIGN KEY \((\w+)\) REFERENCES (\w+)\((\w+)\)')
+
+# Rows shown per violation in the log
+SAMPLE_SIZE = 10
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    """A single-column foreign key: column references parent(parent_column)"""
+    column: str
+    parent: str
+    parent_column: str
+
+
+@dataclass
+class Violation:
+    """Rows of a frame whose foreign key value is missing from the parent"""
+    foreign_key: ForeignKey
+    mask: np.ndarray                       # True for the orphaned rows
+    missing: List = field(default_factory=list)  # distinct missing values, sorted
+
+    @property
+    def rows(self) -> int:
+        return int(self.mask.sum())
+
+    def describe(self, table: str) -> str:
+        sample = ', '.join(str(v) for v in self.missing[:SAMPLE_SIZE])
+        more = f" (+{len(self.missing) - SAMPLE_SIZE} more)" if len(self.missing) > SAMPLE_SIZE else ''
+        return (f"{self.rows} rows of {table} reference {self.foreign_key.parent}.{self.foreign_key.parent_column} "
+                f"values missing from it via {self.foreign_key.column}: {sample}{more}")
+
+
+def parse_foreign_key(definition: str) -> Optional[Tuple[str, str, str]]:
+    """(column, parent, parent column) of a single-column pg_get_constraintdef(), else None"""
+    match = _FOREIGN_KEY_DEF.match(definition)
+    return match.groups() if match else None
+
+
+def orphan_mask(values: pd.Series, keys: np.ndarray) -> np.ndarray:
+    """True where a value is present but not one of keys"""
+    present = values.notna().to_numpy()
+    orphaned = np.zeros(len(values), dtype=bool)
+    if present.any():
+        known = values[present].to_numpy(dtype=keys.dtype) if keys.dtype.kind in 'iu' else values[present].to_numpy()
+        orphaned[present] = ~np.isin(known, keys)
+    return orphaned
+
+
+def find_violations(df: pd.DataFrame, foreign_keys: Iterable[ForeignKey], key_sets) -> List[Violation]:
+    """Violations of df's foreign key columns; key_sets(parent, column) returns the parent's keys"""
+    violations = []
+    for fk in foreign_keys:
+        if fk.column not in df.columns:
+            continue
+        mask = orphan_mask(df[fk.column], key_sets(fk.parent, fk.parent_column))
+        if mask.any():
+            missing = sorted(pd.unique(df[fk.column].to_numpy()[mask]).tolist())
+            violations.append(Violation(fk, mask, missing))
+    return violations
+
+
+class ParentKeyCache:
+    """Foreign keys per child table and key sets per parent column, kept for the process"""
+
+    def __init__(self, connection=None):
+        self.db = connection or db
+        self._foreign_keys: Dict[Tuple[str, Optional[int]], List[ForeignKey]] = {}
+        self._keys: Dict[Tuple[str, str], Tuple[object, np.ndarray]] = {}
+
+    def foreign_keys(self, table: str) -> List[ForeignKey]:
+        """Single-column foreign keys of table, enforced or deferred"""
+        cache_key = (table, catalog.version)
+        if cache_key not in self._foreign_keys:
+            rows = [tuple(row) for row in self.db.execute_sql(FOREIGN_KEYS_SQL, {'table': table})]
+            if catalog.get_column_types('etl_deferred_objects'):
+                result = self.db.execute_sql(DEFERRED_FOREIGN_KEYS_SQL, {'table': table})
+                rows += [parsed for (definition,) in result if (parsed := parse_foreign_key(definition))]
+            self._foreign_keys[cache_key] = list(dict.fromkeys(ForeignKey(*row) for row in rows))
+        return self._foreign_keys[cache_key]
+
+    def _changed_at(self, tables: List[str]) -> Dict[str, object]:
+        if not tables or not catalog.get_column_types('etl_table_changes'):
+            return {}
+        result = self.db.execute_sql(text("""
+            SELECT table_name, changed_at FROM etl_table_changes WHERE table_name = ANY(:tables)
+        """), {'tables': tables})
+        return {row[0]: row[1] for row in result}
+
+    def key_sets(self, foreign_keys: List[ForeignKey]):
+        """key_sets(parent, column) for find_violations, re-reading only parents changed since cached"""
+        parents = sorted({fk.parent for fk in foreign_keys})
+        changed_at = self._changed_at(parents)
+
+        def keys(parent: str, column: str) -> np.ndarray:
+            cached = self._keys.get((parent, column))
+            if cached is None or cached[0] != changed_at.get(parent):
+                result = self.db.execute_sql(text(f"SELECT DISTINCT {column} FROM {parent} WHERE {column} IS NOT NULL"))
+                values = [row[0] for row in result]
+                array = np.unique(np.asarray(values, dtype=np.int64 if all(isinstance(v, int) for v in values)
+                                             else object))
+                cached = (changed_at.get(parent), array)
+                self._keys[(parent, column)] = cached
+                logger.debug(f"Loaded {len(array)} {parent}.{column} keys")
+            return cached[1]
+        return keys
+
+    def check(self, df: pd.DataFrame, table: str, skip_columns: Iterable[str] = (),
+              skip_parents: Iterable[str] = ()) -> List[Violation]:
+        """Violations of df against table's foreign keys, except the skipped columns and parents"""
+        skip_columns, skip_parents = set(skip_columns), set(skip_parents)
+        foreign_keys = [fk for fk in self.foreign_keys(table)
+                        if fk.column in df.columns and fk.column not in skip_columns
+                        and fk.parent not in skip_parents]
+        if not foreign_keys or df.empty:
+            return []
+        return find_violations(df, foreign_keys, self.key_sets(foreign_keys))
+
+
+parent_keys = ParentKeyCache()
@@ -0,0 +1,51 @@
+"""
+Season partitions of the game-level stats tables.
+
+players_game_batting_stats and players_game_pitching_stats are partitioned by
+RANGE (year), one partition per season (migration 011). Loaders create the
+partitions a file needs before upserting into them; the upsert then only
+probes the indexes of those seasons, however many seasons the table holds.
+"""
+from typing import Iterable, List
+from loguru import logger
+from sqlalchemy import text
+from .catalog import SKIP_SCHEMA_VERSION_SQL
+
+
+def year_partition_name(table: str, year: int) -> str:
+    return f"{table}_y{int(year)}"
+
+
+def is_partitioned(connection, table: str) -> bool:
+    """Whether the table is a partitioned (parent) table"""
+    return bool(connection.execute(text("""
+        SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:table AS regclass))
+    """), {'table': table}).scalar())
+
+
+def get_year_partitions(connection, table: str) -> List[str]:
+    result = connection.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        ORDER BY c.relname
+    """), {'table': table})
+    return [row[0] for row in result]
+
+
+def ensure_year_partitions(connection, table: str, years: Iterable[int]) -> List[str]:
+    """Create the missing season partitions of a partitioned table and return their names"""
+    existing = set(get_year_partitions(connection, table))
+    created = []
+    connection.execute(text(SKIP_SCHEMA_VERSION_SQL))
+    for year in sorted({int(y) for y in years}):
+        partition = year_partition_name(table, year)
+        if partition in existing:
+            continue
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} FOR VALUES FROM ({year}) TO ({year + 1})"
+        ))
+        created.append(partition)
+    if created:
+        logger.info(f"Created partitions {', '.join(created)}")
+    return created
@@ -1,14 +1,80 @@
 """Staging table management for ETL pipeline"""
-from pandas.core.interchange.dataframe_protocol import DataFrame
+import csv
+import time
 from sqlalchemy import text, inspect
+from sqlalchemy.orm import Session
 from loguru import logger
 from .connection import db
 import pandas as pd
 
+# NULL marker used for COPY buffers so that empty strings and NULLs stay distinct
+COPY_NULL_MARKER = r'\N'
+# Rows serialized per slice when streaming a DataFrame into COPY
+COPY_SLICE_ROWS = 50000
+
+
+def catalog_type(column_type: str) -> str:
+    """information_schema data_type name for a column type written in DDL"""
+    base = column_type.split('(')[0].strip().lower()
+    return {
+        'timestamp': 'timestamp without time zone',
+        'decimal': 'numeric',
+        'varchar': 'character varying',
+        'int': 'integer',
+    }.get(base, base)
+
+
+class DataFrameCSVStream:
+    """File-like reader that serializes a DataFrame to CSV lazily, slice by slice.
+
+    psycopg2's copy_expert pulls data through read(), so only one slice of the
+    frame is ever held as text in memory regardless of the frame size.
+    """
+
+    def __init__(self, df: pd.DataFrame, delimiter: str = ',', slice_rows: int = COPY_SLICE_ROWS):
+        self.df = df
+        self.delimiter = delimiter
+        self.slice_rows = slice_rows
+        self._offset = 0
+        self._buffer = ''
+
+    def _next_slice(self) -> bool:
+        if self._offset >= len(self.df):
+            return False
+        chunk = self.df.iloc[self._offset:self._offset + self.slice_rows]
+        self._offset += self.slice_rows
+        self._buffer += chunk.to_csv(
+            index=False,
+            header=False,
+            sep=self.delimiter,
+            na_rep=COPY_NULL_MARKER,
+            float_format='%.15g'
+        )
+        return True
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            while self._next_slice():
+                pass
+        else:
+            while len(self._buffer) < size and self._next_slice():
+                pass
+            if len(self._buffer) > size:
+                data, self._buffer = self._buffer[:size], self._buffer[size:]
+                return data
+        data, self._buffer = self._buffer, ''
+        return data
+
+    readline = read
+
+
 class StagingTableManager:
     def __init__(self, connection=None):
         self.db = connection or db
         self.inspector = inspect(self.db.engine)
+        # Column -> information_schema type per staging table created or altered here,
+        # so load plans never have to query the catalog for staging tables
+        self.column_types = {}
 
     def create_staging_table(self, source_table: str, staging_prefix: str = "staging_"):
         """Create a staging table with the same structure as the source table"""
@@ -51,6 +117,7 @@ class StagingTableManager:
                     {', '.join(column_defs)}
                 )""")
             self.db.execute_sql(sql)
+            self.column_types[staging_table] = {col: catalog_type(col_type) for col, col_type in columns.items()}
             logger.success(f"Successfully created staging table: {staging_table}")
             return staging_table
 
@@ -58,6 +125,37 @@ class StagingTableManager:
             logger.error(f"Error creating staging table {staging_table}: {e}")
             raise
 
+    def add_columns(self, staging_table: str, columns: dict):
+        """Add columns (name -> type) to a staging table in one ALTER TABLE"""
+        if not columns:
+            return
+        add_defs = ', '.join(f"ADD COLUMN IF NOT EXISTS {col} {col_type}" for col, col_type in columns.items())
+        self.db.execute_sql(text(f"ALTER TABLE {staging_table} {add_defs}"))
+        tracked = self.column_types.get(staging_table)
+        if tracked is not None:
+            for col, col_type in columns.items():
+                tracked.setdefault(col, catalog_type(col_type))
+
+    def alter_column_type(self, staging_table: str, column: str, column_type: str):
+        """Change a staging column's type, converting existing values"""
+        self.db.execute_sql(text(
+            f"ALTER TABLE {staging_table} ALTER COLUMN {column} TYPE {column_type} USING {column}::{column_type}"
+        ))
+        if staging_table in self.column_types:
+            self.column_types[staging_table][column] = catalog_type(column_type)
+
+    def get_column_types(self, staging_table: str) -> dict:
+        """Column -> information_schema type, from tracking or (for untracked tables) the catalog"""
+        if staging_table not in self.column_types:
+            result = self.db.execute_sql(text("""
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_name = :table_name
+                ORDER BY ordinal_position
+            """), {'table_name': staging_table})
+            return {row[0]: row[1] for row in result}
+        return self.column_types[staging_table]
+
 
     def analyze_staging_changes(self, staging_table: str, target_table: str, key_columns: list):
         """Analyze differences between staging and target tables"""
@@ -115,33 +213,72 @@ class StagingTableManager:
     def drop_staging_table(self, staging_table: str):
         """Drop staging table if exists"""
         try:
+            self.column_types.pop(staging_table, None)
             sql = text(f"DROP TABLE IF EXISTS {staging_table} CASCADE")
-            self.db.execute_sql(sql)
+            with self.db.savepoint():
+                self.db.execute_sql(sql)
             logger.debug(f"Dropped staging table: {staging_table}")
         except Exception as e:
             logger.warning(f"Error dropping staging table {staging_table}: {e}")
 
-    def copy_csv_to_staging(self, csv_path: str, staging_table: str, delimiter: str = ',', df: DataFrame = None):
-        """Copy CSV data into staging table using pandas"""
+    def copy_csv_to_staging(self, csv_path: str, staging_table: str, delimiter: str = ',',
+                            df: pd.DataFrame = None, connection=None) -> int:
+        """Bulk load rows into an existing staging table with COPY FROM STDIN.
+
+        If df is provided the cleaned frame is streamed through an in-memory CSV
+        buffer; otherwise the raw CSV file is streamed to the server as-is.
+        Pass a SQLAlchemy connection/session to run the COPY inside its transaction.
+        """
         logger.info(f"Loading CSV data from {csv_path} into {staging_table}")
+        start = time.perf_counter()
         try:
-            # Use provided df or read from CSV
-            if df is None:
-                df = pd.read_csv(csv_path, delimiter=delimiter)
-
-            # Use pandas to_sql for bulk insert
-            with self.db.engine.connect() as conn:
-                rows_affected = df.to_sql(
-                    staging_table,
-                    conn,
-                    if_exists='append',
-                    index=False,
-                    method='multi',
-                    chunksize=1000
-                )
-            logger.success(f"Loaded {len(df)} rows into {staging_table}")
-            return len(df)
+            if df is not None:
+                columns = ', '.join(df.columns)
+                copy_sql = (f"COPY {staging_table} ({columns}) FROM STDIN "
+                            f"WITH (FORMAT csv, DELIMITER '{delimiter}', NULL '{COPY_NULL_MARKER}')")
+                row_count = self._copy_expert(copy_sql, DataFrameCSVStream(df, delimiter), connection)
+            else:
+                with open(csv_path, 'r', newline='') as f:
+                    header = next(csv.reader(f, delimiter=delimiter))
+                    f.seek(0)
+                    columns = ', '.join(col.strip() for col in header)
+                    copy_sql = (f"COPY {staging_table} ({columns}) FROM STDIN "
+                                f"WITH (FORMAT csv, HEADER true, DELIMITER '{delimiter}')")
+                    row_count = self._copy_expert(copy_sql, f, connection)
+
+            elapsed = time.perf_counter() - start
+            rate = row_count / elapsed if elapsed > 0 else float(row_count)
+            logger.success(f"Loaded {row_count} rows into {staging_table} in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+            return row_count
 
         except Exception as e:
             logger.error(f"Error loading CSV into {staging_table}: {e}")
             raise
+
+    def _copy_expert(self, copy_sql: str, source, connection=None) -> int:
+        """Run a COPY statement on the DBAPI connection and return the row count"""
+        # Reuse the caller's (or the load transaction's) Session or Connection - commit is left to it
+        connection = connection if connection is not None else self.db.active_connection()
+        if connection is not None:
+            if isinstance(connection, Session):
+                connection = connection.connection()
+            cursor = connection.connection.cursor()
+            try:
+                cursor.copy_expert(copy_sql, source)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+        raw_conn = self.db.engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            cursor.copy_expert(copy_sql, source)
+            row_count = cursor.rowcount
+            cursor.close()
+            raw_conn.commit()
+            return row_count
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
@@ -0,0 +1,223 @@
+"""
+Shadow-table swap for full loads.
+
+Instead of TRUNCATE ... CASCADE followed by INSERT ... SELECT on the live table,
+a full load builds {table}_shadow (LIKE {table}, without indexes), bulk inserts
+into it, builds the indexes and foreign keys once and ANALYZEs it. A short
+transaction then renames the shadow over the live table, and the old copy is
+dropped afterwards. Readers keep seeing the previous rows until the rename
+commits and never wait on the bulk insert.
+
+Views and foreign keys follow a table by OID, not by name, so tables with
+dependent views, inbound (or self-referencing) foreign keys, triggers, identity
+columns or inheritance cannot be swapped; swap_blockers() reports why.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import text
+from .catalog import SKIP_SCHEMA_VERSION_SQL
+
+SHADOW_SUFFIX = '_shadow'
+OLD_SUFFIX = '_old'
+MAX_IDENTIFIER_LENGTH = 63
+
+_INDEX_DEF = re.compile(r'^(CREATE (?:UNIQUE )?INDEX )(\S+)( ON (?:ONLY )?)(\S+)')
+_FOREIGN_KEY_DEF = re.compile(r'^FOREIGN KEY \(([^)]+)\) REFERENCES (\w+)\(([^)]+)\)')
+
+
+def suffixed(name: str, suffix: str) -> str:
+    """name + suffix, truncated to PostgreSQL's identifier length"""
+    return name[:MAX_IDENTIFIER_LENGTH - len(suffix)] + suffix
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """An index of the live table, rebuilt on the shadow under a temporary name"""
+    name: str
+    definition: str                        # pg_get_indexdef()
+    constraint_type: Optional[str] = None  # 'p' (primary key), 'u' (unique) or None
+
+    @property
+    def shadow_name(self) -> str:
+        return suffixed(self.name, SHADOW_SUFFIX)
+
+    def create_sql(self, table: str) -> str:
+        return _INDEX_DEF.sub(lambda m: f"{m.group(1)}{self.shadow_name}{m.group(3)}{table}", self.definition, count=1)
+
+    def attach_sql(self, table: str) -> Optional[str]:
+        """Turn the unique index into the table's PRIMARY KEY / UNIQUE constraint"""
+        kind = {'p': 'PRIMARY KEY', 'u': 'UNIQUE'}.get(self.constraint_type)
+        if kind is None:
+            return None
+        return f"ALTER TABLE {table} ADD CONSTRAINT {self.shadow_name} {kind} USING INDEX {self.shadow_name}"
+
+
+@dataclass(frozen=True)
+class InboundForeignKey:
+    """A foreign key of another table (or the table itself) pointing at the table"""
+    table: str                        # referencing table
+    columns: Tuple[str, ...]          # its columns
+    referenced_columns: Tuple[str, ...]
+
+    def referenced_sql(self, alias: str) -> str:
+        """EXISTS condition that is true while a referencing row points at row alias"""
+        conditions = ' AND '.join(f"r.{column} = {alias}.{referenced}"
+                                  for column, referenced in zip(self.columns, self.referenced_columns))
+        return f"EXISTS (SELECT 1 FROM {self.table} r WHERE {conditions})"
+
+
+def parse_inbound_foreign_key(table: str, definition: str, parent: str) -> Optional[InboundForeignKey]:
+    """The foreign key of table defined by pg_get_constraintdef() definition if it references parent"""
+    match = _FOREIGN_KEY_DEF.match(definition)
+    if match is None or match.group(2) != parent:
+        return None
+    split = lambda columns: tuple(column.strip() for column in columns.split(','))
+    return InboundForeignKey(table, split(match.group(1)), split(match.group(3)))
+
+
+def get_referencing_keys(connection, table: str) -> List[InboundForeignKey]:
+    """Foreign keys pointing at table, including those load-data --defer-indexes dropped for the load"""
+    rows = [(row[0], row[1]) for row in connection.execute(text("""
+        SELECT conrelid::regclass::text, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = CAST(:table AS regclass)
+        ORDER BY conname
+    """), {'table': table})]
+    if connection.execute(text("SELECT to_regclass('etl_deferred_objects') IS NOT NULL")).scalar():
+        rows += [(row[0], row[1]) for row in connection.execute(text("""
+            SELECT table_name, definition FROM etl_deferred_objects
+            WHERE object_type = 'foreign_key' ORDER BY table_name, object_name
+        """))]
+    keys = [parse_inbound_foreign_key(referencing, definition, table) for referencing, definition in rows]
+    return list(dict.fromkeys(key for key in keys if key is not None))
+
+
+def swap_blockers(connection, table: str) -> List[str]:
+    """Reasons the table cannot be replaced by a rename (empty if it can)"""
+    params = {'table': table}
+    checks = [
+        ("referenced by foreign key", """
+            SELECT conname || ' on ' || conrelid::regclass::text FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = CAST(:table AS regclass)
+        """),
+        ("used by view", """
+            SELECT DISTINCT v.relname FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            JOIN pg_class v ON v.oid = r.ev_class
+            WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = CAST(:table AS regclass)
+              AND v.oid <> CAST(:table AS regclass)
+        """),
+        ("has trigger", """
+            SELECT tgname FROM pg_trigger WHERE tgrelid = CAST(:table AS regclass) AND NOT tgisinternal
+        """),
+        ("has identity column", """
+            SELECT attname FROM pg_attribute
+            WHERE attrelid = CAST(:table AS regclass) AND attidentity <> '' AND NOT attisdropped
+        """),
+        ("has exclusion constraint", """
+            SELECT conname FROM pg_constraint WHERE contype = 'x' AND conrelid = CAST(:table AS regclass)
+        """),
+        ("is partitioned or inherited", """
+            SELECT c.relname FROM pg_class c WHERE c.oid = CAST(:table AS regclass) AND c.relkind = 'p'
+            UNION
+            SELECT inhparent::regclass::text FROM pg_inherits
+            WHERE inhrelid = CAST(:table AS regclass) OR inhparent = CAST(:table AS regclass)
+        """),
+    ]
+    blockers = []
+    for reason, sql in checks:
+        names = [row[0] for row in connection.execute(text(sql), params)]
+        if names:
+            blockers.append(f"{reason} {', '.join(names)}")
+    return blockers
+
+
+def get_index_specs(connection, table: str) -> List[IndexSpec]:
+    result = connection.execute(text("""
+        SELECT i.relname, pg_get_indexdef(x.indexrelid), c.contype
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+        WHERE x.indrelid = CAST(:table AS regclass)
+        ORDER BY i.relname
+    """), {'table': table})
+    return [IndexSpec(row[0], row[1], row[2]) for row in result]
+
+
+def get_foreign_keys(connection, table: str) -> List[Tuple[str, str]]:
+    """(constraint name, definition) of the table's outbound foreign keys"""
+    result = connection.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE contype = 'f' AND conrelid = CAST(:table AS regclass)
+        ORDER BY conname
+    """), {'table': table})
+    return [(row[0], row[1]) for row in result]
+
+
+def create_shadow_table(connection, table: str) -> str:
+    """Create an empty, index-less copy of the table (with its grants) and return its name"""
+    shadow = suffixed(table, SHADOW_SUFFIX)
+    connection.execute(text(SKIP_SCHEMA_VERSION_SQL))
+    # Leftovers of an interrupted swap
+    connection.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+    connection.execute(text(f"DROP TABLE IF EXISTS {suffixed(table, OLD_SUFFIX)}"))
+    connection.execute(text(f"CREATE TABLE {shadow} (LIKE {table} INCLUDING ALL EXCLUDING INDEXES)"))
+
+    grants = connection.execute(text("""
+        SELECT grantee, privilege_type FROM information_schema.role_table_grants
+        WHERE table_schema = current_schema() AND table_name = :table
+          AND grantee <> (SELECT tableowner FROM pg_tables
+                          WHERE schemaname = current_schema() AND tablename = :table)
+    """), {'table': table})
+    for grantee, privilege in grants:
+        grantee = grantee if grantee == 'PUBLIC' else f'"{grantee}"'
+        connection.execute(text(f"GRANT {privilege} ON {shadow} TO {grantee}"))
+    return shadow
+
+
+def finish_shadow_table(connection, table: str, shadow: str):
+    """Build the live table's indexes, keys and foreign keys on the loaded shadow, then ANALYZE it"""
+    connection.execute(text(SKIP_SCHEMA_VERSION_SQL))
+    for spec in get_index_specs(connection, table):
+        connection.execute(text(spec.create_sql(shadow)))
+        attach = spec.attach_sql(shadow)
+        if attach:
+            connection.execute(text(attach))
+    # Foreign key names are per table, so the shadow can use the final names
+    for name, definition in get_foreign_keys(connection, table):
+        connection.execute(text(f"ALTER TABLE {shadow} ADD CONSTRAINT {name} {definition}"))
+    connection.execute(text(f"ANALYZE {shadow}"))
+
+
+def swap_in_shadow_table(connection, table: str, shadow: str, lock_timeout_ms: int):
+    """Rename the shadow over the live table; commit promptly, the caller holds an exclusive lock.
+
+    Index (and constraint) names are schema-wide, so the old table's indexes
+    are moved aside and the shadow's take over their names. Sequences owned by
+    the old table's serial columns are re-owned so dropping it keeps them.
+    """
+    old = suffixed(table, OLD_SUFFIX)
+    connection.execute(text(SKIP_SCHEMA_VERSION_SQL))
+    connection.execute(text(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'"))
+
+    specs = get_index_specs(connection, table)
+    sequences = [(row[0], row[1]) for row in connection.execute(text("""
+        SELECT attname, pg_get_serial_sequence(:table, attname) FROM pg_attribute
+        WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped
+          AND pg_get_serial_sequence(:table, attname) IS NOT NULL
+    """), {'table': table})]
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    connection.execute(text(f"ALTER TABLE {shadow} RENAME TO {table}"))
+    for spec in specs:
+        connection.execute(text(f"ALTER INDEX {spec.name} RENAME TO {suffixed(spec.name, OLD_SUFFIX)}"))
+        connection.execute(text(f"ALTER INDEX {spec.shadow_name} RENAME TO {spec.name}"))
+    for column, sequence in sequences:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{column}"))
+    logger.debug(f"Swapped {shadow} in as {table}")
+    return old
+
+
+def drop_old_table(connection, table: str):
+    connection.execute(text(f"DROP TABLE IF EXISTS {suffixed(table, OLD_SUFFIX)}"))
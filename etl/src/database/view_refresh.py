@@ -0,0 +1,185 @@
+"""
+Change-driven refresh of the leaderboard materialized views.
+
+Loaders record every table whose rows they changed in etl_table_changes. A
+materialized view is stale when one of the tables it reads (looked up in
+pg_depend, through plain views) changed after its last successful refresh, or
+when it has never been refreshed by the ETL. Only stale views are refreshed,
+with REFRESH MATERIALIZED VIEW CONCURRENTLY when the view is populated and has
+a unique index (migration 014), so readers are never blocked. Views that do not
+depend on each other are refreshed in parallel, each on its own connection, and
+every refresh is timed in etl_performance_metrics (metric_type 'view_refresh').
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+from loguru import logger
+from sqlalchemy import text
+from config.etl_config import VIEW_REFRESH_MAX_WORKERS
+from .connection import db
+
+METRIC_TYPE = 'view_refresh'
+
+# Tables (and materialized views) each materialized view reads, following plain views
+VIEW_DEPENDENCIES_SQL = text("""
+    WITH RECURSIVE deps (view_name, rel_oid) AS (
+        SELECT v.relname::text, d.refobjid
+        FROM pg_class v
+        JOIN pg_rewrite r ON r.ev_class = v.oid
+        JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+        WHERE v.relkind = 'm'
+          AND v.relnamespace = CAST(current_schema() AS regnamespace)
+          AND d.refclassid = 'pg_class'::regclass
+          AND d.refobjid <> v.oid
+        UNION
+        SELECT deps.view_name, d.refobjid
+        FROM deps
+        JOIN pg_class c ON c.oid = deps.rel_oid AND c.relkind = 'v'
+        JOIN pg_rewrite r ON r.ev_class = c.oid
+        JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+        WHERE d.refclassid = 'pg_class'::regclass
+          AND d.refobjid <> c.oid
+    )
+    SELECT DISTINCT deps.view_name, c.relname
+    FROM deps
+    JOIN pg_class c ON c.oid = deps.rel_oid
+    WHERE c.relkind IN ('r', 'p', 'm')
+    ORDER BY 1, 2
+""")
+
+# CONCURRENTLY needs a populated view with a unique index on plain columns and no WHERE clause
+REFRESH_MODE_SQL = text("""
+    SELECT m.ispopulated AND EXISTS (
+        SELECT 1 FROM pg_index x
+        WHERE x.indrelid = CAST(:view AS regclass)
+          AND x.indisunique AND x.indpred IS NULL AND x.indexprs IS NULL
+    )
+    FROM pg_matviews m
+    WHERE m.schemaname = current_schema() AND m.matviewname = :view
+""")
+
+
+def record_table_changes(connection, tables: Iterable[str], batch_id: str = None):
+    """Mark tables as changed now, so the views reading them are refreshed"""
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    connection.execute(text("""
+        INSERT INTO etl_table_changes (table_name, changed_at, batch_id)
+        SELECT table_name, CURRENT_TIMESTAMP, CAST(:batch_id AS UUID)
+        FROM unnest(CAST(:tables AS TEXT[])) AS table_name
+        ON CONFLICT (table_name) DO UPDATE SET
+            changed_at = EXCLUDED.changed_at,
+            batch_id = EXCLUDED.batch_id
+    """), {'tables': tables, 'batch_id': batch_id})
+
+
+def get_view_dependencies(connection) -> Dict[str, Set[str]]:
+    dependencies = {}
+    for view, relation in connection.execute(VIEW_DEPENDENCIES_SQL):
+        dependencies.setdefault(view, set()).add(relation)
+    return dependencies
+
+
+def get_table_changes(connection) -> Dict[str, datetime]:
+    result = connection.execute(text("SELECT table_name, changed_at FROM etl_table_changes"))
+    return {row[0]: row[1] for row in result}
+
+
+def get_last_refreshes(connection) -> Dict[str, datetime]:
+    """Start time of each view's last successful refresh"""
+    result = connection.execute(text("""
+        SELECT table_name, MAX(start_time) FROM etl_performance_metrics
+        WHERE metric_type = :metric_type
+        GROUP BY table_name
+    """), {'metric_type': METRIC_TYPE})
+    return {row[0]: row[1] for row in result}
+
+
+def stale_views(dependencies: Dict[str, Set[str]], changes: Dict[str, datetime],
+                refreshed: Dict[str, datetime]) -> List[str]:
+    """Views to refresh: never refreshed, reading a table changed since, or reading a stale view.
+
+    A change recorded after a refresh started may have missed it, so it counts as newer.
+    """
+    stale = set()
+    for view, relations in dependencies.items():
+        last = refreshed.get(view)
+        if last is None or any(changes.get(rel) is not None and changes[rel] >= last for rel in relations):
+            stale.add(view)
+
+    # A view reading a stale view is stale too
+    added = True
+    while added:
+        added = False
+        for view, relations in dependencies.items():
+            if view not in stale and relations & stale:
+                stale.add(view)
+                added = True
+    return sorted(stale)
+
+
+def refresh_waves(views: List[str], dependencies: Dict[str, Set[str]]) -> List[List[str]]:
+    """Group views so each wave only depends on views refreshed in earlier waves"""
+    remaining = set(views)
+    waves = []
+    while remaining:
+        wave = sorted(view for view in remaining if not (dependencies.get(view, set()) & remaining))
+        if not wave:
+            raise ValueError(f"Materialized view dependency cycle: {sorted(remaining)}")
+        waves.append(wave)
+        remaining -= set(wave)
+    return waves
+
+
+def refresh_view(view: str, batch_id: str = None) -> Dict:
+    """Refresh one view on its own connection and record the timing"""
+    with db.engine.connect() as conn:
+        concurrently = bool(conn.execute(REFRESH_MODE_SQL, {'view': view}).scalar())
+        mode = 'concurrent' if concurrently else 'full'
+
+        started_at = datetime.now()
+        start = time.perf_counter()
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{view}"))
+        conn.commit()
+        duration = time.perf_counter() - start
+
+        conn.execute(text("""
+            INSERT INTO etl_performance_metrics (batch_id, metric_type, table_name, start_time, end_time, notes)
+            VALUES (CAST(:batch_id AS UUID), :metric_type, :view, :start_time, :end_time, :mode)
+        """), {'batch_id': batch_id, 'metric_type': METRIC_TYPE, 'view': view,
+               'start_time': started_at, 'end_time': datetime.now(), 'mode': mode})
+        conn.commit()
+
+    logger.info(f"Refreshed {view} ({mode}) in {duration:.1f}s")
+    return {'status': 'success', 'mode': mode, 'duration_seconds': round(duration, 3)}
+
+
+def refresh_materialized_views(batch_id: str = None, force: bool = False,
+                               max_workers: int = None) -> Dict[str, Dict]:
+    """Refresh the stale materialized views (all of them with force); results keyed by view"""
+    with db.engine.connect() as conn:
+        dependencies = get_view_dependencies(conn)
+        if force:
+            views = sorted(dependencies)
+        else:
+            views = stale_views(dependencies, get_table_changes(conn), get_last_refreshes(conn))
+
+    results = {view: {'status': 'skipped', 'reason': 'inputs unchanged'}
+               for view in dependencies if view not in views}
+    if results:
+        logger.info(f"Materialized views unchanged: {', '.join(sorted(results))}")
+
+    workers = max(1, max_workers or VIEW_REFRESH_MAX_WORKERS)
+    for wave in refresh_waves(views, dependencies):
+        def run(view):
+            try:
+                return refresh_view(view, batch_id)
+            except Exception as e:
+                logger.error(f"Failed to refresh {view}: {e}")
+                return {'status': 'failed', 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(wave))) as pool:
+            results.update(zip(wave, pool.map(run, wave)))
+    return results
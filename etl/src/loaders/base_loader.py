@@ -1,18 +1,44 @@
 """Base loader class for ETL process."""
+import time
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 from ..database.connection import db
 from ..database.staging import StagingTableManager
+from ..database.catalog import catalog
+from ..database.fk_repair import repair_foreign_keys
+from ..database.fk_validation import parent_keys
+from ..database import table_swap
+from ..database.view_refresh import record_table_changes
 from ..utils.csv_preprocessor import CSVPreprocessor
+from ..utils.checksum import FileManifest
+from ..utils.csv_cache import csv_cache
+from ..utils.csv_schema import CSVSchema, cast_expression, resolve_engine, staging_column_types
+from ..utils.phase_timer import PhaseTimer
+from ..utils.watermark import KeyWatermark, WatermarkProgress
+from .load_plan import LoadPlan, get_load_plan
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from config.etl_config import (CSV_PARSE_ENGINE, FK_VALIDATION_MODE, FULL_LOAD_MODE, SWAP_LOCK_TIMEOUT_MS,
+                               SWAP_LOCK_RETRIES)
+
+# Target column holding an md5 of the row's loaded values (see _upsert_from_staging)
+ROW_HASH_COLUMN = 'row_hash'
+# Tries at pruning a replaced table's missing rows before keeping them all (see _delete_unreferenced_missing_rows)
+PRUNE_ATTEMPTS = 2
+
 
 class BaseLoader(ABC):
     """Base class for all data loaders"""
 
+    # Key columns (same name in the CSV and the target) of the append strategy's watermark,
+    # compared in order; loaders without them cannot use 'append'
+    WATERMARK_COLUMNS: Tuple[str, ...] = ()
+
     def __init__(self, batch_id: str = None):
         self.db = db
         self.staging_mgr = StagingTableManager()
@@ -24,6 +50,13 @@ class BaseLoader(ABC):
             'rows_deleted': 0,
             'errors': []
         }
+        self._file_entry = None  # Manifest entry (checksum, size, mtime) of the file being loaded
+        self._csv_schemas = {}  # CSVSchema per file path
+        self.force = False  # Reload even what looks unchanged (set by load_csv)
+        self.reconcile = False  # Append loads reload the whole file instead of the rows past the watermark
+        self.timer = PhaseTimer()  # Per-phase timings, saved with the file's completion record
+        self._file_started = None  # perf_counter() at _record_file_start
+        self._batch_run_created = False
 
     @abstractmethod
     def get_load_strategy(self) -> str:
@@ -63,26 +96,39 @@ class BaseLoader(ABC):
         """Return list of columns to update on conflict during UPSERT."""
         pass
 
-    def load_csv(self, csv_path: Path) -> bool:
-        """Load data from a CSV file."""
+    def load_csv(self, csv_path: Path, manifest: FileManifest = None, force: bool = False) -> bool:
+        """Load data from a CSV file.
+
+        Files whose checksum matches the last successful load are skipped unless
+        force is set. Pass a FileManifest to reuse checksums computed for the batch.
+        """
         target_table = self.get_target_table()
         strategy = self.get_load_strategy()
 
         logger.info(f"Loading {csv_path} into {target_table} using {strategy} strategy")
+        self.force = force
+        self.timer.table_name = target_table
         try:
             self._create_batch_run()
-            self._record_file_start(csv_path)
-
-            if strategy == 'skip':
-                return self._handle_skip_strategy(csv_path)
-            elif strategy == 'full':
-                return self._handle_full_load(csv_path)
-            elif strategy == 'incremental':
-                return self._handle_incremental_load(csv_path)
-            elif strategy == 'append':
-                return self._handle_append_load(csv_path)
-            else:
-                raise ValueError(f"Unknown load strategy: {strategy}")
+            # One connection and transaction for the whole file: committed once, rolled back on error
+            with self.db.load_context():
+                catalog.refresh()
+
+                if not force and self._is_file_unchanged(csv_path, manifest):
+                    return True
+
+                self._record_file_start(csv_path)
+
+                if strategy == 'skip':
+                    return self._handle_skip_strategy(csv_path)
+                elif strategy == 'full':
+                    return self._handle_full_load(csv_path)
+                elif strategy == 'incremental':
+                    return self._handle_incremental_load(csv_path)
+                elif strategy == 'append':
+                    return self._handle_append_load(csv_path)
+                else:
+                    raise ValueError(f"Unknown load strategy: {strategy}")
         except Exception as e:
             import traceback
             from psycopg2.errors import ForeignKeyViolation, NotNullViolation
@@ -107,6 +153,7 @@ class BaseLoader(ABC):
                 logger.error(f"Traceback: {traceback.format_exc()}")
 
             self.stats['errors'].append(str(e))
+            # The load transaction was rolled back, so the failure is recorded in a transaction of its own
             self._record_file_completion(csv_path, 'failed', str(e))
 
             # Log but continue - don't stop the entire ETL process
@@ -116,213 +163,476 @@ class BaseLoader(ABC):
 
     def _handle_skip_strategy(self, csv_path: Path) -> bool:
         """Handle skip strategy - only load if checksum changed"""
-        # TODO - implement checksum comparison
-        logger.info(f"Skipping {csv_path.name} - skip strategy")
+        # Unchanged files never get here (see _is_file_unchanged), so this is a new or changed file
+        logger.info(f"File {csv_path.name} has changed, performing full load")
+        return self._handle_full_load(csv_path)
+
+    def _is_file_unchanged(self, csv_path: Path, manifest: FileManifest = None) -> bool:
+        """Skip the file (and record it as skipped) if its content matches the last successful load"""
+        self._file_entry = (manifest or FileManifest()).get(csv_path)
+        current_checksum = self._file_entry['checksum']
+        stored_checksum = self._get_stored_checksum(csv_path.name)
+
+        if not stored_checksum or stored_checksum != current_checksum:
+            return False
+
+        # A TRUNCATE ... CASCADE from a parent table can empty the target while the file is unchanged
+        if not self._target_has_rows():
+            logger.warning(f"File {csv_path.name} unchanged but {self.get_target_table()} is empty, reloading")
+            return False
+
+        logger.info(f"Skipping {csv_path.name} - unchanged since last successful load (checksum: {current_checksum[:8]}...)")
+        self._record_file_start(csv_path)
         self._record_file_completion(csv_path, 'skipped')
         return True
 
+    def _target_has_rows(self) -> bool:
+        """Check whether the target table contains any rows"""
+        sql = text(f"SELECT EXISTS (SELECT 1 FROM {self.get_target_table()})")
+        with self.db.get_session() as session:
+            return bool(session.execute(sql).scalar())
+
+    def _get_stored_checksum(self, filename: str) -> str:
+        """Get stored checksum from metadata table"""
+        sql = text("""
+        SELECT checksum
+        FROM etl_file_metadata
+        WHERE filename = :filename
+        """)
+
+        with self.db.get_session() as session:
+            result = session.execute(sql, {'filename': filename}).scalar()
+            return result
+
+    @staticmethod
+    def get_stored_file_metadata() -> Dict[str, Dict]:
+        """Return stored checksum, size and mtime per file, for FileManifest size+mtime pre-checks"""
+        sql = text("""
+        SELECT filename, checksum, file_size, last_modified
+        FROM etl_file_metadata
+        WHERE checksum IS NOT NULL
+        """)
+        result = db.execute_sql(sql)
+        return {
+            row[0]: {'checksum': row[1], 'file_size': row[2], 'last_modified': row[3]}
+            for row in result
+        }
+
     def _handle_full_load(self, csv_path: Path) -> bool:
-        """Handle full load - truncate and reload"""
+        """Handle full load - replace the target's rows with the file's (see _replace_target)"""
         target_table = self.get_target_table()
         staging_table = f"staging_{target_table}"
-        column_mapping = self.get_column_mapping()
 
-        # Read CSV with error handling for malformed rows
+        with self.timer.phase('read') as phase:
+            df = self._read_csv(csv_path)
+            phase.add_rows(len(df))
+
+        with self.timer.phase('preprocess') as phase:
+            # Clean quoted strings, deduplicate on PK and keep only mapped columns in one pass
+            df_to_load = self._preprocess(df)
+            phase.add_rows(len(df_to_load))
+
+        # Derived columns are staged with the data; SQL calculated fields are evaluated by the load plan
+        with self.timer.phase('derived_fields'):
+            df_to_load = self._add_derived_columns(df_to_load)
+
+        with self.timer.phase('fk_check') as phase:
+            df_to_load = self._validate_foreign_keys(df_to_load)
+            phase.add_rows(len(df_to_load))
+
+        with self.timer.phase('staging_copy') as phase:
+            # Create staging table based on filtered columns
+            columns = self._infer_column_types(df_to_load)
+            self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
+
+            # Load data into staging table - pass the filtered df
+            row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df_to_load)
+            self.stats['rows_read'] = row_count
+            phase.add_rows(row_count)
+
+        # Replace the target's rows with the staged ones
+        with self.timer.phase('replace') as phase:
+            self._replace_target(staging_table, target_table, row_count)
+            phase.add_rows(row_count)
+
+        # Cleanup staging table
+        self.staging_mgr.drop_staging_table(staging_table)
+        self._record_file_completion(csv_path, 'success')
+        return True
+
+    def get_full_load_mode(self) -> str:
+        """'swap' (shadow table renamed into place) or 'truncate' (TRUNCATE ... CASCADE and reload)"""
+        return FULL_LOAD_MODE
+
+    def _replace_target(self, staging_table: str, target_table: str, row_count: int):
+        """Replace the target's contents with the staging table's.
+
+        In swap mode the target is rebuilt as a shadow table and renamed into
+        place, so readers never see it empty. Tables that cannot be renamed
+        (inbound foreign keys, dependent views, ...) are instead upserted and
+        pruned in one transaction, which also leaves referencing rows alone.
+        TRUNCATE ... CASCADE is the last resort for tables whose keys are not staged.
+        """
+        if self.get_full_load_mode() == 'swap':
+            with self.db.get_session() as session:
+                blockers = table_swap.swap_blockers(session, target_table)
+            if not blockers:
+                self._swap_from_staging(staging_table, target_table, row_count)
+                return
+            if self._upsert_keys_staged(staging_table):
+                logger.info(f"{target_table} cannot be swapped ({'; '.join(blockers)}), "
+                            f"replacing its rows in one transaction")
+                self._upsert_from_staging(staging_table, target_table, replace=True)
+                return
+            logger.warning(f"{target_table} cannot be swapped ({'; '.join(blockers)}) and its keys "
+                           f"are not staged, falling back to TRUNCATE ... CASCADE")
+        self._truncate_from_staging(staging_table, target_table, row_count)
+
+    def _truncate_from_staging(self, staging_table: str, target_table: str, row_count: int):
+        """Truncate target and insert from staging"""
+        with self.db.get_session() as session:
+            self._repair_foreign_keys(session, staging_table)
+            session.execute(text(f"TRUNCATE TABLE {target_table} CASCADE"))
+            session.execute(self._get_full_load_plan(staging_table, target_table).statement)
+            self.stats['rows_inserted'] = row_count
+
+    def _swap_from_staging(self, staging_table: str, target_table: str, row_count: int):
+        """Load a shadow copy of the target, index and ANALYZE it, then rename it into place"""
+        start = time.perf_counter()
+        with self.db.get_session() as session:
+            shadow = table_swap.create_shadow_table(session, target_table)
+            self._repair_foreign_keys(session, staging_table)
+            session.execute(self._get_full_load_plan(staging_table, target_table, into=shadow).statement)
+            table_swap.finish_shadow_table(session, target_table, shadow)
+        built = time.perf_counter() - start
+
+        from psycopg2.errors import LockNotAvailable
+        for attempt in range(1, SWAP_LOCK_RETRIES + 1):
+            try:
+                with self.db.get_session() as session:
+                    table_swap.swap_in_shadow_table(session, target_table, shadow, SWAP_LOCK_TIMEOUT_MS)
+                # Readers wait on the rename's exclusive lock until its transaction ends, so commit
+                # it now rather than with the rest of the file; lock_timeout ends with it
+                self.db.commit_load()
+                break
+            except OperationalError as e:
+                if not isinstance(e.orig, LockNotAvailable) or attempt == SWAP_LOCK_RETRIES:
+                    raise
+                logger.warning(f"Readers held {target_table} past {SWAP_LOCK_TIMEOUT_MS} ms, "
+                               f"retrying swap ({attempt}/{SWAP_LOCK_RETRIES})")
+                time.sleep(attempt)
+
+        # Dropped in the next transaction; nothing reads the old table any more
+        with self.db.get_session() as session:
+            table_swap.drop_old_table(session, target_table)
+        self.stats['rows_inserted'] = row_count
+        logger.info(f"Swapped in {row_count} rows for {target_table} "
+                    f"(shadow built in {built:.2f}s, {time.perf_counter() - start:.2f}s total)")
+
+    def _upsert_keys_staged(self, staging_table: str) -> bool:
+        """Whether every upsert key can be read from the staging table"""
+        staging_types = self.staging_mgr.get_column_types(staging_table)
+        reverse_mapping = {v: k for k, v in (self.get_column_mapping() or {}).items()}
+        keys = self.get_upsert_keys()
+        return bool(keys) and all(reverse_mapping.get(key, key) in staging_types or key in staging_types
+                                  for key in keys)
+
+    def _handle_incremental_load(self, csv_path: Path, watermark: KeyWatermark = None) -> bool:
+        """Handle incremental load - only insert/update changed records.
+
+        With a watermark (append loads) only the rows past it are loaded, and
+        only inserted. Loaders with WATERMARK_COLUMNS move their watermark either way.
+        """
+        target_table = self.get_target_table()
+        staging_table = f"staging_{target_table}"
+        progress = WatermarkProgress(watermark or KeyWatermark(self.WATERMARK_COLUMNS, ()))
+
+        logger.info(f"Performing {'append' if watermark else 'incremental'} load for {target_table}")
+
+        with self.timer.phase('read') as phase:
+            df = self._read_csv(csv_path)
+            phase.add_rows(len(df))
+
+        with self.timer.phase('preprocess') as phase:
+            keep = self._get_row_filter(df)
+            if watermark is not None:
+                past = watermark.past(df)
+                logger.info(f"{int((~past).sum())} rows at or before the watermark ({watermark}) skipped")
+                keep = past if keep is None else keep & past
+            df_to_load = self._preprocess(df, keep=keep)
+            phase.add_rows(len(df_to_load))
+
+        with self.timer.phase('derived_fields'):
+            df_to_load = self._add_derived_columns(df_to_load)
+
+        with self.timer.phase('fk_check') as phase:
+            checked = self._validate_foreign_keys(df_to_load)
+            if self.WATERMARK_COLUMNS:
+                progress.add(df_to_load, checked)
+            df_to_load = checked
+            phase.add_rows(len(df_to_load))
+
+        # Create staging table and load data
+        with self.timer.phase('staging_copy') as phase:
+            columns = self._infer_column_types(df_to_load)
+            self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
+            row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df_to_load)
+            self.stats['rows_read'] = row_count
+            phase.add_rows(row_count)
+
+        # Insert new keys / update changed rows (and optionally delete vanished keys)
+        with self.timer.phase('append' if watermark else 'upsert') as phase:
+            self._upsert_from_staging(staging_table, target_table, insert_only=watermark is not None)
+            phase.add_rows(row_count)
+        self._update_watermark(target_table, progress)
+
+        # Cleanup staging table
+        self.staging_mgr.drop_staging_table(staging_table)
+        self._record_file_completion(csv_path, 'success')
+
+        logger.info(f"Incremental load complete for {target_table}: "
+                    f"{self.stats['rows_inserted']} inserted, {self.stats['rows_updated']} updated, "
+                    f"{self.stats['rows_deleted']} deleted, "
+                    f"{row_count - self.stats['rows_inserted'] - self.stats['rows_updated']} unchanged")
+        return True
+
+    def _read_csv(self, csv_path: Path) -> pd.DataFrame:
+        """Parse a CSV through the batch's shared frame cache.
+
+        Only the columns and dtypes of get_csv_schema() are parsed. The frame is
+        shared with every other reader of the same file and must not be modified
+        in place.
+        """
+        checksum = None
+        if self._file_entry and Path(self._file_entry['file_path']).resolve() == Path(csv_path).resolve():
+            checksum = self._file_entry['checksum']
+        schema = self.get_csv_schema(csv_path)
+        return csv_cache.read(csv_path, checksum, reader=lambda path: self._parse_csv(path, schema),
+                              variant=schema.key if schema else None)
+
+    @staticmethod
+    def _parse_csv(csv_path: Path, schema: Optional[CSVSchema] = None) -> pd.DataFrame:
+        """Read CSV with error handling for malformed rows"""
+        read = schema.read_csv if schema else pd.read_csv
         try:
-            df = pd.read_csv(csv_path)
+            return read(csv_path, engine=resolve_engine(CSV_PARSE_ENGINE))
         except pd.errors.ParserError as e:
             logger.warning(f"Malformed CSV detected, attempting to skip bad lines: {e}")
             try:
-                df = pd.read_csv(csv_path, on_bad_lines='skip', engine='python')
+                df = read(csv_path, on_bad_lines='skip', engine='python')
                 logger.info(f"Successfully loaded CSV with {len(df)} rows (skipped bad lines)")
+                return df
             except Exception as e2:
                 logger.error(f"Could not parse CSV even with error handling: {e2}")
                 raise
 
-        # Apply CSV preprocessing (clean quoted strings, deduplicate on PK, etc.)
+    def get_csv_schema(self, csv_path: Path) -> Optional[CSVSchema]:
+        """Columns and compact dtypes to parse, derived from the target table's column types.
+
+        Loaders whose CSV feeds something other than the target table's columns
+        return None to parse every column with inferred dtypes.
+        """
+        key = str(Path(csv_path).resolve())
+        if key not in self._csv_schemas:
+            target_types = catalog.get_column_types(self.get_target_table())
+            if not target_types:
+                return None
+            header = pd.read_csv(csv_path, nrows=0).columns
+            extra_columns = list(self.get_required_csv_columns()) + list(self._get_dedup_subset() or [])
+            self._csv_schemas[key] = CSVSchema.from_target(
+                header,
+                target_types,
+                column_mapping=self.get_column_mapping(),
+                extra_columns=extra_columns,
+                expressions=self.get_calculated_fields().values(),
+                dtype_overrides=self.get_dtype_overrides()
+            )
+            schema = self._csv_schemas[key]
+            logger.debug(f"{Path(csv_path).name}: parsing {len(schema.usecols)} of {len(header)} columns, "
+                         f"{len(schema.dtypes)} with declared dtypes")
+        return self._csv_schemas[key]
+
+    def get_fk_repairs(self) -> List[Tuple[str, str]]:
+        """(staging column, parent table) pairs whose orphaned IDs get stub parent rows"""
+        return []
+
+    def _repair_foreign_keys(self, session, staging_table: str, references: List[Tuple[str, str]] = None):
+        """Stub missing parents for the staged rows inside the load transaction.
+
+        Runs in a savepoint: if stubbing fails the load continues and reports
+        the foreign key violation itself.
+        """
+        references = self.get_fk_repairs() if references is None else references
+        if not references:
+            return
+        try:
+            with session.begin_nested():
+                repaired = repair_foreign_keys(session, staging_table, references)
+        except Exception as e:
+            logger.error(f"Error creating stub parent records from {staging_table}: {e}")
+            return
+        for parent, ids in repaired.items():
+            if ids:
+                created = self.stats.setdefault('stubs_created', {})
+                created[parent] = created.get(parent, 0) + len(ids)
+
+    def get_fk_validation_mode(self) -> str:
+        """'fail', 'drop', 'report' or 'off' for rows referencing missing parents (see _validate_foreign_keys)"""
+        return FK_VALIDATION_MODE
+
+    def _validate_foreign_keys(self, df: pd.DataFrame, table: str = None) -> pd.DataFrame:
+        """Check df's foreign key columns against the parents' key sets before anything is staged.
+
+        Columns in get_fk_repairs() get stub parents during the load and parents
+        this loader writes itself are loaded with it, so neither is checked.
+        Returns df, without the orphaned rows in 'drop' mode; raises in 'fail' mode.
+        """
+        mode = self.get_fk_validation_mode()
+        if mode == 'off':
+            return df
+        table = table or self.get_target_table()
+        violations = parent_keys.check(df, table, skip_columns=[col for col, _ in self.get_fk_repairs()],
+                                       skip_parents=self.get_written_tables())
+        if not violations:
+            return df
+
+        counts = self.stats.setdefault('fk_violations', {})
+        for violation in violations:
+            counts[f"{table}.{violation.foreign_key.column}"] = violation.rows
+            logger.warning(violation.describe(table))
+        if mode == 'fail':
+            raise ValueError(f"Foreign key check failed for {table}: "
+                             f"{'; '.join(violation.describe(table) for violation in violations)}")
+        if mode == 'drop':
+            orphaned = np.logical_or.reduce([violation.mask for violation in violations])
+            logger.warning(f"Dropping {int(orphaned.sum())} rows of {table} with missing parents")
+            self.stats['rows_dropped_fk'] = self.stats.get('rows_dropped_fk', 0) + int(orphaned.sum())
+            return df.take(np.flatnonzero(~orphaned))
+        return df
+
+    def get_calculation_type(self) -> Optional[str]:
+        """etl_calculation_queue type to enqueue for every (year, league_id) whose rows changed, if any"""
+        return None
+
+    def get_written_tables(self) -> List[str]:
+        """Tables a load writes; they are recorded in etl_table_changes when rows changed"""
+        return [self.get_target_table()]
+
+    def get_required_csv_columns(self) -> List[str]:
+        """CSV columns needed besides the target table's (e.g. filter columns)"""
+        return []
+
+    def get_dtype_overrides(self) -> Dict[str, str]:
+        """Explicit pandas dtypes for CSV columns (e.g. 'category'), overriding the target-derived ones"""
+        return {}
+
+    def _get_row_filter(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Boolean mask of the rows to load on incremental loads, or None for every row"""
+        return None
+
+    def _preprocess(self, df: pd.DataFrame, keep: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Filter, deduplicate and clean df into one new frame of the mapped (renamed) columns"""
+        column_mapping = self.get_column_mapping()
+        df_to_load = CSVPreprocessor.preprocess(df, config={
+            'clean_quoted_strings': True,
+            'deduplicate': True,
+            'dedup_subset': self._get_dedup_subset()
+        }, keep=keep, columns=list(column_mapping) if column_mapping else None)
+        if column_mapping:
+            # The frame is new, so it is renamed in place
+            df_to_load.columns = [column_mapping[col] for col in df_to_load.columns]
+        return df_to_load
+
+    def _add_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add columns computed in pandas before COPY (target column names; returns a new frame).
+
+        Expressions in get_calculated_fields() are instead evaluated inline by
+        the load plan's INSERT ... SELECT, so the staging table is never rewritten.
+        """
+        return df
+
+    def should_delete_missing_rows(self) -> bool:
+        """
+        Whether incremental loads should delete target rows whose keys are
+        no longer present in the CSV. Off by default so history is preserved.
+        """
+        return False
+
+    def _get_dedup_subset(self) -> Optional[List[str]]:
+        """Return the CSV columns to deduplicate on (primary keys), or None for all columns"""
         primary_keys = self.get_primary_keys()
+        column_mapping = self.get_column_mapping()
 
         # If there's a column mapping, we need to find the CSV column names for the PKs
         # Otherwise the PKs won't exist yet (e.g., trade_id is auto-generated)
-        dedup_subset = None
         if primary_keys and column_mapping:
             # Reverse map to find CSV columns that map to PK columns
             reverse_mapping = {v: k for k, v in column_mapping.items()}
             dedup_subset = [reverse_mapping.get(pk) for pk in primary_keys if reverse_mapping.get(pk)]
             # Only use subset if all PKs are mapped (otherwise use all columns)
             if not dedup_subset or len(dedup_subset) != len(primary_keys):
-                dedup_subset = None
+                return None
+            return dedup_subset
         elif primary_keys:
             # No mapping, use PKs directly
-            dedup_subset = primary_keys
-
-        df = CSVPreprocessor.preprocess(df, config={
-            'clean_quoted_strings': True,
-            'deduplicate': True,
-            'dedup_subset': dedup_subset
-        })
-
-        # Filter columns based on column mapping
-        if column_mapping:
-            # Only keep columns that are in the mapping
-            csv_columns = list(column_mapping.keys())
-            df_to_load = df[csv_columns].copy()
-            # Rename columns according to mapping
-            df_to_load = df_to_load.rename(columns=column_mapping)
-        else:
-            df_to_load = df
-
-        # Create staging table based on filtered columns
-        columns = self._infer_column_types(df_to_load)
-        self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
-
-        # Load data into staging table - pass the filtered df
-        row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df_to_load)
-        self.stats['rows_read'] = row_count
-
-        # Calculate derived fields (like current_date_year and parent_league_id transformations)
-        self._calculate_derived_fields(staging_table)
-
-        # Truncate target and insert from staging
-        with self.db.get_session() as session:
-            session.execute(text(f"TRUNCATE TABLE {target_table} CASCADE"))
-
-            if column_mapping:
-                # Build explicit column list for mapped tables
-                target_cols = list(column_mapping.values())
-
-                # Get column types for both staging and target tables
-                cols_with_types_sql = text("""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_name = :table_name
-                    ORDER BY ordinal_position
-                """)
-
-                # Get staging column types
-                result = self.db.execute_sql(cols_with_types_sql, {'table_name': staging_table})
-                staging_column_types = {row[0]: row[1] for row in result}
-
-                # Get target column types
-                result = self.db.execute_sql(cols_with_types_sql, {'table_name': target_table})
-                target_column_types = {row[0]: row[1] for row in result}
-
-                # Build SELECT clause with type casting only when staging is TEXT
-                select_parts = []
-                for col in target_cols:
-                    staging_type = staging_column_types.get(col, 'text')
-                    target_type = target_column_types.get(col, 'text')
-
-                    # Only cast if staging column is text and target needs it
-                    if staging_type == 'text':
-                        if target_type in ('date', 'timestamp without time zone', 'timestamp with time zone'):
-                            select_parts.append(f"NULLIF({col}, '')::DATE" if target_type == 'date'
-                                              else f"NULLIF({col}, '')::TIMESTAMP")
-                        elif target_type == 'numeric':
-                            select_parts.append(f"NULLIF({col}, '')::NUMERIC")
-                        elif target_type in ('integer', 'bigint', 'smallint'):
-                            select_parts.append(f"NULLIF({col}, '')::INTEGER")
-                        else:
-                            select_parts.append(col)
-                    else:
-                        # Staging column is already correct type, no cast needed
-                        select_parts.append(col)
-
-                cols_str = ', '.join(target_cols)
-                select_str = ', '.join(select_parts)
-
-                session.execute(text(f"""
-                    INSERT INTO {target_table} ({cols_str})
-                    SELECT {select_str} FROM {staging_table}
-                """))
-            else:
-                # Get column types for both staging and target tables
-                cols_with_types_sql = text("""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_name = :table_name
-                    ORDER BY ordinal_position
-                """)
-
-                # Get staging column types
-                result = self.db.execute_sql(cols_with_types_sql, {'table_name': staging_table})
-                staging_column_types = {row[0]: row[1] for row in result}
-                staging_columns = list(staging_column_types.keys())
-
-                # Get target column types
-                result = self.db.execute_sql(cols_with_types_sql, {'table_name': target_table})
-                target_column_types = {row[0]: row[1] for row in result}
-
-                # Find common columns
-                common_columns = [col for col in staging_columns if col in target_column_types]
-
-                # Build SELECT clause with type casting only when staging is TEXT
-                select_parts = []
-                for col in common_columns:
-                    staging_type = staging_column_types.get(col, 'text')
-                    target_type = target_column_types[col]
-
-                    # Only cast if staging column is text and target needs it
-                    if staging_type == 'text':
-                        if target_type in ('date', 'timestamp without time zone', 'timestamp with time zone'):
-                            select_parts.append(f"NULLIF({col}, '')::DATE" if target_type == 'date'
-                                              else f"NULLIF({col}, '')::TIMESTAMP")
-                        elif target_type == 'numeric':
-                            select_parts.append(f"NULLIF({col}, '')::NUMERIC")
-                        elif target_type in ('integer', 'bigint', 'smallint'):
-                            select_parts.append(f"NULLIF({col}, '')::INTEGER")
-                        else:
-                            select_parts.append(col)
-                    else:
-                        # Staging column is already correct type, no cast needed
-                        select_parts.append(col)
-
-                cols_str = ', '.join(common_columns)
-                select_str = ', '.join(select_parts)
-
-                session.execute(text(f"""
-                                      INSERT INTO {target_table} ({cols_str})
-                                      SELECT {select_str} FROM {staging_table}
-                                  """))
-
-            self.stats['rows_inserted'] = row_count
-
-        # Cleanup staging table
-        self.staging_mgr.drop_staging_table(staging_table)
-        self._record_file_completion(csv_path, 'success')
-        return True
-
-    def _handle_incremental_load(self, csv_path: Path) -> bool:
-        """Handle incremental load - only insert/update changed records"""
-        # TODO Implement incremental logic with UPSERT
-        logger.warning("Incremental load not yet implemented, using full load")
-        return self._handle_full_load(csv_path)
+            return primary_keys
+        return None
 
 
     def _handle_append_load(self, csv_path: Path) -> bool:
-        """Handle append load - only insert new records"""
-        # TODO implement append logic with watermark
-        logger.warning("Append load not yet implemented, using full load")
-        return self._handle_full_load(csv_path)
+        """Handle append load - only insert the rows past the table's WATERMARK_COLUMNS watermark.
+
+        Without a stored watermark, with force or with reconcile the whole file
+        is loaded incrementally instead (catching edits to old rows), which
+        resets the watermark. Either way _handle_incremental_load(csv_path,
+        watermark) does the load.
+        """
+        if not self.WATERMARK_COLUMNS:
+            raise ValueError(f"{type(self).__name__} has no WATERMARK_COLUMNS, it cannot use the append strategy")
+        target_table = self.get_target_table()
+        watermark = None if self.force or self.reconcile else self._get_watermark(target_table)
+        if watermark is None:
+            logger.info(f"Reconciling every row of {target_table}")
+        else:
+            logger.info(f"Appending rows of {target_table} past ({', '.join(self.WATERMARK_COLUMNS)}) ({watermark})")
+        return self._handle_incremental_load(csv_path, watermark)
+
+    def _get_watermark(self, target_table: str) -> Optional[KeyWatermark]:
+        """The stored watermark of target_table, None before its first load"""
+        if not catalog.get_column_types('etl_watermarks'):
+            return None
+        row = self.db.execute_sql(text("""
+            SELECT watermark_column, watermark_value FROM etl_watermarks WHERE table_name = :table_name
+        """), {'table_name': target_table}).fetchone()
+        if row is None:
+            return None
+        watermark = KeyWatermark.parse(row[0], row[1])
+        return watermark if watermark.columns == tuple(self.WATERMARK_COLUMNS) else None
+
+    def _update_watermark(self, target_table: str, progress: WatermarkProgress):
+        """Store the watermark the load moved to, in the load transaction so it never runs ahead of the rows"""
+        if not self.WATERMARK_COLUMNS or not progress.moved or not catalog.get_column_types('etl_watermarks'):
+            return
+        watermark = progress.watermark
+        self.db.execute_sql(text("""
+            INSERT INTO etl_watermarks (table_name, watermark_column, watermark_value, watermark_type,
+                                        last_updated, last_batch_id)
+            VALUES (:table_name, :watermark_column, :watermark_value, 'integer',
+                    CURRENT_TIMESTAMP, CAST(:batch_id AS UUID))
+            ON CONFLICT (table_name) DO UPDATE SET
+                watermark_column = EXCLUDED.watermark_column,
+                watermark_value = EXCLUDED.watermark_value,
+                watermark_type = EXCLUDED.watermark_type,
+                last_updated = EXCLUDED.last_updated,
+                last_batch_id = EXCLUDED.last_batch_id
+        """), {'table_name': target_table, 'watermark_column': watermark.column_spec,
+               'watermark_value': str(watermark), 'batch_id': self.batch_id})
+        logger.info(f"Watermark of {target_table} now ({watermark})")
 
 
     def _infer_column_types(self, df: pd.DataFrame) -> Dict[str, str]:
-        """Infer PostgreSQL column types from DataFrame dtypes"""
-        type_mapping = {
-            'int64': 'BIGINT',
-            'float64': 'DOUBLE PRECISION',
-            'bool': 'BOOLEAN',
-            'datetime64[ns]': 'TIMESTAMP',
-            'object': 'TEXT'
-        }
-
-        columns = {}
-        for col in df.columns:
-            # Get dtype using dtypes Series (guaranteed to return scalar dtype)
-            dtype_str = str(df.dtypes[col])
-            pg_type = type_mapping.get(dtype_str, 'TEXT')
-            columns[col] = pg_type
-        return columns
+        """Staging column types from DataFrame dtypes (compact when the frame was read with a CSVSchema)"""
+        return staging_column_types(df)
 
 
     def _record_file_start(self, csv_path: Path):
@@ -336,37 +646,112 @@ class BaseLoader(ABC):
         last_processed = CURRENT_TIMESTAMP
         """)
 
-        self.db.execute_sql(sql, {
+        self._file_started = time.perf_counter()
+        self.db.defer(sql, {
             'batch_id': self.batch_id,
             'filename': csv_path.name
         })
 
 
     def _record_file_completion(self, csv_path: Path, status: str, error: str = None):
-        """Record file processing completion in metadata"""
+        """Record file processing completion in metadata.
+
+        The file checksum/size/mtime are only stored on success, and the checksum is
+        cleared on failure, so a file is only ever skipped after a successful load.
+        Inside a load transaction the phase timings and changed tables are written
+        in savepoints, and the metadata row goes out with the other deferred writes
+        right before the commit.
+        """
+        file_entry = {'file_path': None, 'file_size': None, 'last_modified': None, 'checksum': None}
+        if status == 'success':
+            if self._file_entry is None:
+                self._file_entry = FileManifest().get(csv_path)
+            file_entry = self._file_entry
+
         sql = text("""
-            INSERT INTO etl_file_metadata (filename, last_status, rows_processed, rows_updated, rows_deleted, error_message, processing_time_seconds)
-            VALUES (:filename, :status, :rows_processed, :rows_updated, :rows_deleted, :error_message, 0)
+            INSERT INTO etl_file_metadata (filename, last_status, rows_processed, rows_updated, rows_deleted, error_message, processing_time_seconds,
+                                           file_path, file_size, last_modified, checksum, row_count)
+            VALUES (:filename, :status, :rows_processed, :rows_updated, :rows_deleted, :error_message, :processing_time,
+                    :file_path, :file_size, :last_modified, :checksum, :row_count)
             ON CONFLICT (filename) DO UPDATE SET
             last_status = :status,
             rows_processed = :rows_processed,
             rows_updated = :rows_updated,
             rows_deleted = :rows_deleted,
             error_message = :error_message,
-            processing_time_seconds = EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - etl_file_metadata.last_processed))         
+            processing_time_seconds = :processing_time,
+            file_path = CASE WHEN :status = 'success' THEN :file_path ELSE etl_file_metadata.file_path END,
+            file_size = CASE WHEN :status = 'success' THEN :file_size ELSE etl_file_metadata.file_size END,
+            last_modified = CASE WHEN :status = 'success' THEN :last_modified ELSE etl_file_metadata.last_modified END,
+            row_count = CASE WHEN :status = 'success' THEN :row_count ELSE etl_file_metadata.row_count END,
+            checksum = CASE
+                WHEN :status = 'success' THEN :checksum
+                WHEN :status = 'failed' THEN NULL
+                ELSE etl_file_metadata.checksum
+            END
             """)
-        self.db.execute_sql(sql, {
+        processing_time = time.perf_counter() - self._file_started if self._file_started else 0
+        self.stats['phases'] = self.timer.summary()
+        self.db.defer(sql, {
             'filename': csv_path.name,
             'status': status,
             'rows_processed': self.stats['rows_inserted'],
             'rows_updated': self.stats['rows_updated'],
             'rows_deleted': self.stats['rows_deleted'],
-            'error_message': error
+            'error_message': error,
+            'processing_time': round(processing_time),
+            'file_path': file_entry['file_path'],
+            'file_size': file_entry['file_size'],
+            'last_modified': file_entry['last_modified'],
+            'checksum': file_entry['checksum'],
+            'row_count': self.stats['rows_read'] if status == 'success' else None
         })
+        with self.db.get_session() as session:
+            if self.batch_id:
+                self._record_optional(session, 'phase timings', lambda conn: self.timer.save(conn, self.batch_id))
+            tables = self._changed_tables() if status == 'success' else []
+            if tables:
+                self._record_optional(session, f"changed tables {tables}",
+                                      lambda conn: record_table_changes(conn, tables, self.batch_id))
+        self.timer.clear()
+
+    def _save_phases(self):
+        """Store the phase timings of work done outside a file load (e.g. transformers)"""
+        if not self.batch_id:
+            return
+        with self.db.get_session() as session:
+            self._record_optional(session, 'phase timings', lambda conn: self.timer.save(conn, self.batch_id))
+        self.timer.clear()
+
+    @staticmethod
+    def _record_optional(session, what: str, write):
+        """Run an auxiliary metadata write in a savepoint, so a failure only loses that record"""
+        try:
+            with session.begin_nested():
+                write(session)
+        except Exception as e:
+            logger.warning(f"Could not record {what}: {e}")
+
+    def _changed_tables(self) -> List[str]:
+        """Tables this load changed rows of, including parents that received stub rows"""
+        changed = list(self.stats.get('stubs_created', {}))
+        if self.stats['rows_inserted'] or self.stats['rows_updated'] or self.stats['rows_deleted']:
+            changed += self.get_written_tables()
+        return changed
+
+    def _record_table_changes(self, tables: List[str]):
+        """Mark tables as changed so the materialized views reading them are refreshed"""
+        if not tables:
+            return
+        try:
+            with self.db.get_session() as session:
+                record_table_changes(session, tables, self.batch_id)
+        except Exception as e:
+            logger.warning(f"Could not record changed tables {tables}: {e}")
 
     def _create_batch_run(self):
-        """Create a batch run record if batch_id is provided"""
-        if not self.batch_id:
+        """Create a batch run record if batch_id is provided (once per loader, outside the load transaction)"""
+        if not self.batch_id or self._batch_run_created:
             return
 
         sql = text("""
@@ -381,76 +766,68 @@ class BaseLoader(ABC):
             'environment': 'dev',  # could be from config
             'triggered_by': 'etl_pipeline'
         })
-
-    def _calculate_derived_fields(self, staging_table: str):
-        """Calculate derived fields based on loader's get_calculated_fields"""
+        self._batch_run_created = True
+
+    def _plan_key(self, kind: str, staging_table: str, target_table: str,
+                  staging_types: Dict[str, str]) -> tuple:
+        """Cache key for a load plan: loader, tables, staging column signature and schema version"""
+        return (type(self).__qualname__, kind, target_table, staging_table,
+                tuple(staging_types.items()), catalog.version)
+
+    def _get_full_load_plan(self, staging_table: str, target_table: str, into: str = None) -> LoadPlan:
+        """Plan inserting the staged rows into target_table (or into its shadow copy)"""
+        into = into or target_table
+        staging_types = self.staging_mgr.get_column_types(staging_table)
+        key = self._plan_key('full', staging_table, target_table, staging_types) + (into,)
+        return get_load_plan(key, lambda: self._build_full_load_plan(staging_table, target_table,
+                                                                      staging_types, into))
+
+    def _get_upsert_plan(self, staging_table: str, target_table: str, replace: bool = False,
+                         insert_only: bool = False) -> LoadPlan:
+        """Plan upserting the staged rows; replace updates every column, not just get_update_columns(),
+        and insert_only leaves existing keys alone"""
+        staging_types = self.staging_mgr.get_column_types(staging_table)
+        kind = 'replace' if replace else 'insert' if insert_only else 'upsert'
+        return get_load_plan(self._plan_key(kind, staging_table, target_table, staging_types),
+                             lambda: self._build_upsert_plan(staging_table, target_table, staging_types,
+                                                             ['*'] if replace else None, insert_only))
+
+    def _build_full_load_plan(self, staging_table: str, target_table: str,
+                              staging_types: Dict[str, str], into: str = None) -> LoadPlan:
+        """INSERT ... SELECT of every staged target column (mapped columns only when there is a mapping)
+        plus the calculated fields, evaluated inline"""
+        target_types = catalog.get_column_types(target_table)
+        column_mapping = self.get_column_mapping()
         calculated_fields = self.get_calculated_fields()
 
-        if not calculated_fields:
-            return
-
-        logger.info(f"Calculating derived fields for {staging_table}")
-
-        # First, add columns if they don't exist
-        for field, expression in calculated_fields.items():
-            # Determine column type based on expression
-            if 'CURRENT_TIMESTAMP' in expression:
-                col_type = 'TIMESTAMP'
-            elif 'INTEGER' in expression:
-                col_type = 'INTEGER'
-            elif 'DECIMAL' in expression or 'ROUND' in expression:
-                col_type = 'DECIMAL(4,3)'
-            elif 'TO_DATE' in expression:
-                col_type = 'DATE'
-            else:
-                col_type = 'DECIMAL(8,3)'
-
-            add_col_sql = text(f"""
-                ALTER TABLE {staging_table}
-                ADD COLUMN IF NOT EXISTS {field} {col_type}
-            """)
-            self.db.execute_sql(add_col_sql)
-
-        # Build UPDATE statement for calculated fields
-        set_clauses = []
-        for field, expression in calculated_fields.items():
-            set_clauses.append(f"{field} = {expression}")
-
-        if set_clauses:
-            update_sql = text(f"""
-                UPDATE {staging_table}
-                SET {', '.join(set_clauses)}
-            """)
-
-            self.db.execute_sql(update_sql)
-            logger.info(f"Calculated fields updated in {staging_table}")
+        if column_mapping:
+            columns = list(column_mapping.values())
+        else:
+            columns = [col for col in staging_types if col in target_types]
+            columns += [col for col in calculated_fields if col in target_types and col not in columns]
+
+        select_parts = [f"({calculated_fields[col]})" if col in calculated_fields
+                        else cast_expression(col, staging_types.get(col, 'text'), target_types.get(col, 'text'))
+                        for col in columns]
+        return LoadPlan(f"""
+            INSERT INTO {into or target_table} ({', '.join(columns)})
+            SELECT {', '.join(select_parts)} FROM {staging_table}
+        """)
 
-    def _upsert_from_staging(self, staging_table: str, target_table: str):
-        """Perform UPSERT from staging to target table"""
+    def _build_upsert_plan(self, staging_table: str, target_table: str, staging_types: Dict[str, str],
+                           update_columns: List[str] = None, insert_only: bool = False) -> LoadPlan:
+        """UPSERT (plus delete-missing) SQL from staging to target (ON CONFLICT DO NOTHING with insert_only)"""
         upsert_keys = self.get_upsert_keys()
-        update_columns = self.get_update_columns()
+        update_columns = update_columns or self.get_update_columns()
         calculated_fields = self.get_calculated_fields()
 
-        # Get columns from both staging and target tables with types
-        cols_with_types_sql = text("""
-            SELECT column_name, data_type
-            FROM information_schema.columns
-            WHERE table_name = :table_name
-            ORDER BY ordinal_position
-        """)
-
-        # Get target columns and types
-        result = self.db.execute_sql(cols_with_types_sql, {'table_name': target_table})
-        target_column_types = {row[0]: row[1] for row in result}
+        target_column_types = catalog.get_column_types(target_table)
         target_columns = list(target_column_types.keys())
 
-        # Get staging columns and types
-        result = self.db.execute_sql(cols_with_types_sql, {'table_name': staging_table})
-        staging_column_types = {row[0]: row[1] for row in result}
-
         # Handle '*' wildcard in update_columns (means all non-key columns)
         if update_columns == ['*']:
-            update_columns = [col for col in target_columns if col not in upsert_keys]
+            update_columns = [col for col in target_columns
+                              if col not in upsert_keys and col != ROW_HASH_COLUMN]
 
         # Build SELECT clause with calculated expressions where needed
         select_clauses = []
@@ -459,69 +836,148 @@ class BaseLoader(ABC):
         reverse_mapping = {v: k for k, v in column_mapping.items()}
 
         for col in target_columns:
-            # Determine the staging column name
+            if col == ROW_HASH_COLUMN:
+                continue
+            # Determine the staging column name (CSV name, or the target name once renamed)
             staging_col = reverse_mapping.get(col, col)
+            if staging_col not in staging_types:
+                staging_col = col
 
             # Check if column exists in staging or is calculated
             if col in calculated_fields:
                 # Use the calculated expression
                 select_clauses.append(f"({calculated_fields[col]}) AS {col}")
                 insert_columns.append(col)
-            elif staging_col in staging_column_types:
-                # Column exists in staging - add with type casting if needed
-                staging_type = staging_column_types[staging_col]
-                target_type = target_column_types[col]
-
-                # Apply type casting when staging is TEXT and target needs conversion
-                if staging_type == 'text' and target_type != 'text':
-                    if target_type in ('date', 'timestamp without time zone', 'timestamp with time zone'):
-                        cast_expr = f"NULLIF(s.{staging_col}, '')::DATE" if target_type == 'date' else f"NULLIF(s.{staging_col}, '')::TIMESTAMP"
-                        select_clauses.append(f"{cast_expr} AS {col}")
-                    elif target_type == 'numeric':
-                        select_clauses.append(f"NULLIF(s.{staging_col}, '')::NUMERIC AS {col}")
-                    elif target_type in ('integer', 'bigint', 'smallint'):
-                        select_clauses.append(f"NULLIF(s.{staging_col}, '')::INTEGER AS {col}")
-                    else:
-                        select_clauses.append(f"s.{staging_col} AS {col}")
-                else:
-                    # No casting needed
-                    select_clauses.append(f"s.{staging_col} AS {col}")
+            elif staging_col in staging_types:
+                # Column exists in staging - cast only if staging holds it as TEXT
+                cast_expr = cast_expression(f"s.{staging_col}", staging_types[staging_col],
+                                            target_column_types[col])
+                select_clauses.append(f"{cast_expr} AS {col}")
                 insert_columns.append(col)
             # else: Skip columns that don't exist in staging (e.g., auto-generated SERIAL columns)
 
+        # Build UPDATE SET clause for conflicts (only for columns in staging)
+        update_set_columns = [col for col in update_columns
+                              if col in insert_columns and col not in upsert_keys]
+        update_set_clauses = [f"{col} = EXCLUDED.{col}" for col in update_set_columns]
+
+        # Per-row content hash so unchanged rows are never rewritten
+        change_filter = ''
+        if ROW_HASH_COLUMN in target_column_types:
+            hash_columns = update_set_columns or [col for col in insert_columns if col not in upsert_keys]
+            # Volatile expressions (e.g. last_updated) would make every row look changed
+            hash_columns = [col for col in hash_columns
+                            if 'CURRENT_TIMESTAMP' not in calculated_fields.get(col, '')]
+            hash_exprs = [select_clauses[insert_columns.index(col)].rsplit(' AS ', 1)[0]
+                          for col in hash_columns]
+            select_clauses.append(f"md5(ROW({', '.join(hash_exprs)})::text) AS {ROW_HASH_COLUMN}")
+            insert_columns.append(ROW_HASH_COLUMN)
+            if update_set_clauses:
+                update_set_clauses.append(f"{ROW_HASH_COLUMN} = EXCLUDED.{ROW_HASH_COLUMN}")
+                change_filter = f"WHERE t.{ROW_HASH_COLUMN} IS DISTINCT FROM EXCLUDED.{ROW_HASH_COLUMN}"
+
         # Build INSERT statement
         insert_cols = ', '.join(insert_columns)
         select_cols = ', '.join(select_clauses)
         conflict_keys = ', '.join(upsert_keys)
 
-        # Build UPDATE SET clause for conflicts (only for columns in staging)
-        update_set_clauses = []
-        for col in update_columns:
-            if col in insert_columns and col not in upsert_keys:
-                update_set_clauses.append(f"{col} = EXCLUDED.{col}")
-
-        if update_set_clauses:
-            upsert_sql = text(f"""
-                INSERT INTO {target_table} ({insert_cols})
-                SELECT {select_cols}
-                FROM {staging_table} s
-                ON CONFLICT ({conflict_keys}) DO UPDATE SET
-                {', '.join(update_set_clauses)}
-            """)
+        # insert_only still hashes the update columns, so a later upsert sees the rows as unchanged
+        if update_set_clauses and not insert_only:
+            conflict_action = f"DO UPDATE SET {', '.join(update_set_clauses)} {change_filter}"
         else:
-            upsert_sql = text(f"""
-                INSERT INTO {target_table} ({insert_cols})
+            conflict_action = "DO NOTHING"
+
+        # Changed (year, league_id) pairs are queued for dependent calculations in the same statement
+        calculation_type = self.get_calculation_type()
+        returning = '(xmax = 0) AS inserted'
+        queue_cte = ''
+        if calculation_type and {'year', 'league_id'} <= set(insert_columns):
+            returning += ', year, league_id'
+            queue_cte = f""",
+            queued AS (
+                INSERT INTO etl_calculation_queue (batch_id, table_name, year, league_id, calculation_type)
+                SELECT DISTINCT CAST(:batch_id AS UUID), '{target_table}', year, league_id, '{calculation_type}'
+                FROM upserted
+                ON CONFLICT (calculation_type, year, league_id) WHERE status = 'pending' DO NOTHING
+            )"""
+
+        # xmax = 0 only for freshly inserted tuples, which lets one statement report both counts
+        upsert_sql = f"""
+            WITH upserted AS (
+                INSERT INTO {target_table} AS t ({insert_cols})
                 SELECT {select_cols}
                 FROM {staging_table} s
-                ON CONFLICT ({conflict_keys}) DO NOTHING
-            """)
+                ON CONFLICT ({conflict_keys}) {conflict_action}
+                RETURNING {returning}
+            ){queue_cte}
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+            FROM upserted
+        """
+
+        key_conditions = []
+        for key in upsert_keys:
+            staging_key = reverse_mapping.get(key, key)
+            if staging_key not in staging_types:
+                staging_key = key
+            key_conditions.append(f"s.{staging_key} = t.{key}")
+        missing = f"NOT EXISTS (SELECT 1 FROM {staging_table} s WHERE {' AND '.join(key_conditions)})"
+        delete_sql = f"""
+            DELETE FROM {target_table} t
+            WHERE {missing}
+        """
+        count_missing_sql = f"SELECT COUNT(*) FROM {target_table} t WHERE {missing}"
+        return LoadPlan(upsert_sql, delete_sql, count_missing_sql)
+
+    def _delete_unreferenced_missing_rows(self, session, plan: LoadPlan, target_table: str) -> int:
+        """Delete the target rows missing from staging that no referencing row points at"""
+        inbound = table_swap.get_referencing_keys(session, target_table)
+        still_referenced = ''.join(f"\n              AND NOT {fk.referenced_sql('t')}" for fk in inbound)
+        deleted = 0
+        for attempt in range(1, PRUNE_ATTEMPTS + 1):
+            try:
+                with session.begin_nested():
+                    deleted = session.execute(text(plan.delete_sql + still_referenced)).rowcount
+                break
+            except IntegrityError as e:
+                # A referencing row written concurrently; once it has committed the retry skips its parent
+                if attempt == PRUNE_ATTEMPTS:
+                    logger.warning(f"Rows of {target_table} missing from the file are still referenced, "
+                                   f"keeping them: {e.orig}")
+                else:
+                    logger.info(f"Rows of {target_table} became referenced while pruning, retrying")
+        if inbound:
+            # The rows still missing from staging after the delete are the referenced ones
+            kept = session.execute(plan.count_missing_statement).scalar()
+            if kept:
+                logger.info(f"Kept {kept} rows of {target_table} missing from the file, still referenced")
+            self.stats['rows_kept_referenced'] = kept
+        return deleted
+
+    def _upsert_from_staging(self, staging_table: str, target_table: str, replace: bool = False,
+                             insert_only: bool = False):
+        """Perform UPSERT from staging to target table.
+
+        With replace (full loads of tables that cannot be swapped) every column
+        is updated and target rows missing from staging are deleted, except rows
+        still referenced through a foreign key (enforced or deferred). With
+        insert_only (append loads) only new keys are inserted.
+        """
+        plan = self._get_upsert_plan(staging_table, target_table, replace, insert_only)
 
         with self.db.get_session() as session:
-            result = session.execute(upsert_sql)
-            row_count = result.rowcount
+            self._repair_foreign_keys(session, staging_table)
+            inserted, updated = session.execute(plan.statement, {'batch_id': self.batch_id}).one()
+            deleted = 0
+            if replace:
+                deleted = self._delete_unreferenced_missing_rows(session, plan, target_table)
+            elif self.should_delete_missing_rows() and not insert_only:
+                deleted = session.execute(plan.delete_statement).rowcount
             session.commit()
 
-        logger.info(f"Upserted {row_count} rows from {staging_table} to {target_table}")
-        return row_count
-
+        self.stats['rows_inserted'] = inserted
+        self.stats['rows_updated'] = updated
+        self.stats['rows_deleted'] = deleted
 
+        logger.info(f"Upserted {inserted + updated} rows from {staging_table} to {target_table} "
+                    f"({inserted} new, {updated} changed, {deleted} deleted)")
+        return inserted + updated
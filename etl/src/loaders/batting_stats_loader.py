@@ -4,6 +4,7 @@ from loguru import logger
 import pandas as pd
 from sqlalchemy import text
 from .stats_loader import StatsLoader
+from ..transformers.rate_stats import batting_rates
 from ..utils.batch import generate_batch_id
 
 class BattingStatsLoader(StatsLoader):
@@ -22,15 +23,8 @@ class BattingStatsLoader(StatsLoader):
         return None
 
     def get_calculated_fields(self) -> Dict[str, str]:
-        # Basic rate stats - always recalculated
+        # Basic rate stats are computed in _add_derived_columns
         return {
-            # Traditional stats
-            'batting_average': 'CASE WHEN ab > 0 THEN ROUND(h::numeric / ab, 3) ELSE 0 END',
-            'on_base_percentage': 'CASE WHEN (ab + bb + hp + sf) > 0 THEN ROUND((h + bb + hp)::numeric / (ab + bb + hp + sf), 3) ELSE 0 END',
-            'slugging_percentage': 'CASE WHEN ab > 0 THEN ROUND(((h - d - t - hr) + (2 * d) + (3 * t) + (4 * hr))::numeric / ab, 3) ELSE 0 END',
-            'ops': 'ROUND(on_base_percentage + slugging_percentage, 3)',
-            'iso': 'ROUND(slugging_percentage - batting_average, 3)',
-            'babip': 'CASE WHEN (ab - k - hr + sf) > 0 THEN ROUND((h - hr)::numeric / (ab - k - hr + sf), 3 ) ELSE 0 END',
             # Advanced stats placeholders - these are calculated post-load
             'woba': 'NULL::DECIMAL(4,3)',
             'wraa': 'NULL::DECIMAL(4,3)',
@@ -42,6 +36,11 @@ class BattingStatsLoader(StatsLoader):
             'last_updated': 'CURRENT_TIMESTAMP'
         }
 
+    def _add_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """sub_league_id plus AVG/OBP/SLG/OPS/ISO/BABIP, computed before COPY"""
+        df = super()._add_derived_columns(df)
+        return df.assign(**batting_rates(df))
+
     def get_update_columns(self) -> List[str]:
         """What to update on UPSERT - counting stats only"""
         # Calculated fields are managed by Phase C (refresh_player_* functions)
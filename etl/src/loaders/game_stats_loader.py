@@ -8,24 +8,298 @@ game-by-game player performance context.
 from typing import List, Dict, Optional
 from pathlib import Path
 from loguru import logger
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
 from .stats_loader import StatsLoader
+from ..database.catalog import catalog
+from ..database.partitions import ensure_year_partitions, is_partitioned
 from ..utils.csv_preprocessor import CSVPreprocessor
+from ..utils.keyset import CompositeKeySet
+from ..utils.memory import MemoryTracker
+from ..utils.partition_digest import PartitionDigests
+from ..utils.watermark import KeyWatermark, WatermarkProgress
+from config.etl_config import GAME_STATS_CHUNK_ROWS, GAME_STATS_LOAD_STRATEGY, ETL_MAX_MEMORY_MB
+
+# Staging column types ordered from narrowest to widest
+STAGING_TYPE_RANK = {'SMALLINT': 0, 'INTEGER': 1, 'BIGINT': 2, 'REAL': 3, 'DOUBLE PRECISION': 4, 'TEXT': 5}
+# Smallest chunk the memory budget may shrink reads to
+MIN_CHUNK_ROWS = 10000
+
+
+class GameStatsLoader(StatsLoader):
+    """
+    Shared streaming load for the game-level stats files.
+
+    The files are read in bounded chunks. Each chunk is deduplicated on
+    (player_id, year, game_id) against every earlier chunk using a packed key
+    set, then COPYed into staging straight away. Memory therefore stays flat
+    however many seasons the file holds. With a memory budget (max_memory_mb)
+    the chunk size is derived from the measured bytes per row and the current RSS.
+
+    The target tables are partitioned by season. A digest of every season's
+    rows is kept in etl_partition_digests; seasons whose rows are unchanged
+    since their last load are dropped from staging, so each run only upserts
+    into the partitions of seasons that actually changed.
+
+    Games only ever get added, so the default append strategy keeps the highest
+    (year, game_id) loaded in etl_watermarks and stages and inserts only the
+    rows past it. A reconcile (reconcile=True, force, or no watermark yet) runs
+    the digest-based incremental load over the whole file instead, catching
+    edits to old games, and resets the watermark.
+    """
+
+    PARTITION_COLUMN = 'year'
+
+    KEY_COLUMNS = ['player_id', 'year', 'game_id']
+
+    # Games are ordered by (year, game_id); the watermark is the highest pair loaded
+    WATERMARK_COLUMNS = ('year', 'game_id')
+
+    def __init__(self, batch_id: str = None, chunk_rows: int = None, max_memory_mb: int = None,
+                 reconcile: bool = False):
+        super().__init__(batch_id)
+        self.chunk_rows = chunk_rows or GAME_STATS_CHUNK_ROWS
+        self.max_memory_mb = max_memory_mb or ETL_MAX_MEMORY_MB
+        self.reconcile = reconcile
+        self._track_digests = False  # etl_partition_digests exists (migration 011)
+
+    def get_load_strategy(self) -> str:
+        return GAME_STATS_LOAD_STRATEGY
 
+    def get_primary_keys(self) -> List[str]:
+        return self.KEY_COLUMNS
+
+    def get_upsert_keys(self) -> List[str]:
+        return self.KEY_COLUMNS
 
-class GameBattingStatsLoader(StatsLoader):
+    def _handle_incremental_load(self, csv_path: Path, watermark: KeyWatermark = None) -> bool:
+        """
+        Game stats use incremental loading strategy.
+
+        Strategy:
+        - Stream all game stats chunk by chunk (no split_id filtering like career stats)
+        - With a watermark, keep only rows past it (append)
+        - Drop keys already seen in earlier chunks (keep first occurrence)
+        - Upsert based on (player_id, year, game_id), or only insert when appending
+        """
+        target_table = self.get_target_table()
+        staging_table = f"staging_{target_table}"
+        logger.info(f"Streaming {csv_path.name} into {staging_table} ({self.chunk_rows} rows per chunk"
+                    f"{f', {self.max_memory_mb} MB budget' if self.max_memory_mb else ''})")
+        progress = WatermarkProgress(watermark or KeyWatermark(self.WATERMARK_COLUMNS, ()))
+
+        # Chunks are parsed with inferred dtypes and then coerced to the schema's compact
+        # dtypes, so a stray value late in the file cannot abort the stream
+        schema = self.get_csv_schema(csv_path)
+        seen_keys = CompositeKeySet()
+        digests = PartitionDigests(self.PARTITION_COLUMN)
+        staging_types = None
+        rows_staged = 0
+        duplicates = 0
+        behind = 0
+        chunk_rows = self.chunk_rows if not self.max_memory_mb else min(self.chunk_rows, MIN_CHUNK_ROWS)
+
+        with MemoryTracker(csv_path.name) as tracker:
+            with pd.read_csv(csv_path, iterator=True, usecols=schema.usecols if schema else None) as reader:
+                while True:
+                    with self.timer.phase('read') as phase:
+                        try:
+                            chunk = reader.get_chunk(chunk_rows)
+                        except StopIteration:
+                            chunk = None
+                        else:
+                            if schema:
+                                chunk = schema.coerce(chunk)
+                            phase.add_rows(len(chunk))
+                    if chunk is None:
+                        break
+
+                    with self.timer.phase('preprocess') as phase:
+                        # Rows without a complete key can never be loaded (PK columns are NOT NULL)
+                        null_keys = chunk[self.KEY_COLUMNS].isna().any(axis=1).to_numpy()
+                        if null_keys.any():
+                            logger.warning(f"Dropping {int(null_keys.sum())} rows with NULL key columns")
+
+                        # One mask for NULL keys, games at or before the watermark and keys
+                        # seen in this or earlier chunks, one copy
+                        keep = ~null_keys
+                        if watermark is not None:
+                            past = watermark.past(chunk)
+                            behind += int((keep & ~past).sum())
+                            keep &= past
+                        candidates = int(keep.sum())
+                        chunk = CSVPreprocessor.preprocess(chunk, config={
+                            'clean_quoted_strings': False,
+                            'dedup_subset': self.KEY_COLUMNS
+                        }, keep=keep, seen_keys=seen_keys)
+                        duplicates += candidates - len(chunk)
+                        checked = self._validate_foreign_keys(chunk)
+                        progress.add(chunk, checked)
+                        chunk = checked
+                        digests.add(chunk)
+                        phase.add_rows(len(chunk))
+
+                    with self.timer.phase('staging_copy') as phase:
+                        if staging_types is None:
+                            staging_types = self._infer_column_types(chunk)
+                            self.staging_mgr.create_staging_from_csv_structure(target_table, staging_types)
+                        else:
+                            self._widen_staging_columns(staging_table, staging_types, chunk)
+
+                        if len(chunk):
+                            staged = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=chunk)
+                            rows_staged += staged
+                            phase.add_rows(staged)
+
+                    chunk_rows = self._next_chunk_rows(chunk, tracker)
+                    del chunk
+
+            if duplicates:
+                logger.warning(f"Removed {duplicates} duplicate rows")
+            if behind:
+                logger.info(f"Skipped {behind} rows at or before the watermark")
+            logger.info(f"Staged {rows_staged} rows; key set holds {len(seen_keys)} keys "
+                        f"({seen_keys.nbytes / (1024 * 1024):.1f} MB)")
+            self.stats['rows_read'] = rows_staged
+
+            if staging_types is None:
+                logger.warning(f"{csv_path.name} has no rows")
+                self._record_file_completion(csv_path, 'success')
+                return True
+
+            if watermark is not None:
+                # Only new games: insert them into their (possibly new) season partitions.
+                # The season digests are left alone; the next reconcile reloads those seasons.
+                if rows_staged:
+                    with self.db.get_session() as session:
+                        if is_partitioned(session, target_table):
+                            ensure_year_partitions(session, target_table, list(digests.keys))
+                    with self.timer.phase('append') as phase:
+                        self._upsert_from_staging(staging_table, target_table, insert_only=True)
+                        phase.add_rows(rows_staged)
+                    self.stats['partitions_loaded'] = list(digests.keys)
+                else:
+                    logger.info(f"No new games for {target_table}")
+            else:
+                with self.timer.phase('partition_diff'):
+                    changed = self._stage_changed_partitions(staging_table, target_table, digests)
+                if changed:
+                    # Upsert from staging to target (calculated fields, if any, are evaluated inline)
+                    with self.timer.phase('upsert') as phase:
+                        self._upsert_from_staging(staging_table, target_table)
+                        phase.add_rows(sum(digests.row_count(year) for year in changed))
+                    if self._track_digests:
+                        self._save_partition_digests(target_table, digests, changed)
+
+            self._update_watermark(target_table, progress)
+
+        self.stats['peak_memory_mb'] = round(tracker.peak_mb, 1)
+
+        # Cleanup
+        self.staging_mgr.drop_staging_table(staging_table)
+        self._record_file_completion(csv_path, 'success')
+        return True
+
+    def _stage_changed_partitions(self, staging_table: str, target_table: str,
+                                  digests: PartitionDigests) -> List[int]:
+        """Drop unchanged seasons from staging and create partitions for the rest; return the changed seasons"""
+        tracked = bool(catalog.get_column_types('etl_partition_digests'))
+        stored = self._get_partition_digests(target_table) if tracked and not self.force else {}
+        unchanged = [year for year in digests.keys if stored.get(year) == digests.digest(year)]
+        # A season emptied behind our back (dropped partition, manual delete) is reloaded
+        if unchanged:
+            present = self.db.execute_sql(text(
+                f"SELECT DISTINCT {self.PARTITION_COLUMN} FROM {target_table} "
+                f"WHERE {self.PARTITION_COLUMN} = ANY(:years)"
+            ), {'years': unchanged})
+            present = {int(row[0]) for row in present}
+            unchanged = [year for year in unchanged if year in present]
+        changed = [year for year in digests.keys if year not in unchanged]
+
+        if unchanged:
+            self.db.execute_sql(text(
+                f"DELETE FROM {staging_table} WHERE {self.PARTITION_COLUMN} = ANY(:years)"
+            ), {'years': unchanged})
+            logger.info(f"{len(unchanged)} unchanged seasons ({unchanged[0]}-{unchanged[-1]}) not reloaded")
+        if not changed:
+            logger.info(f"No season of {target_table} changed")
+            return []
+
+        logger.info(f"Reloading seasons {', '.join(str(year) for year in changed)} of {target_table}")
+        with self.db.get_session() as session:
+            if is_partitioned(session, target_table):
+                ensure_year_partitions(session, target_table, changed)
+        self.stats['partitions_loaded'] = changed
+        self._track_digests = tracked
+        return changed
+
+    def _get_partition_digests(self, target_table: str) -> Dict[int, str]:
+        result = self.db.execute_sql(text("""
+            SELECT partition_key, digest FROM etl_partition_digests WHERE table_name = :table_name
+        """), {'table_name': target_table})
+        return {int(row[0]): row[1] for row in result}
+
+    def _save_partition_digests(self, target_table: str, digests: PartitionDigests, years: List[int]):
+        """Store the digests of the seasons just loaded"""
+        self.db.execute_sql(text("""
+            INSERT INTO etl_partition_digests (table_name, partition_key, digest, row_count, batch_id, updated_at)
+            SELECT :table_name, d.partition_key, d.digest, d.row_count, :batch_id, CURRENT_TIMESTAMP
+            FROM unnest(CAST(:keys AS INTEGER[]), CAST(:digests AS TEXT[]), CAST(:row_counts AS INTEGER[]))
+                 AS d (partition_key, digest, row_count)
+            ON CONFLICT (table_name, partition_key) DO UPDATE SET
+                digest = EXCLUDED.digest,
+                row_count = EXCLUDED.row_count,
+                batch_id = EXCLUDED.batch_id,
+                updated_at = EXCLUDED.updated_at
+        """), {
+            'table_name': target_table,
+            'keys': years,
+            'digests': [digests.digest(year) for year in years],
+            'row_counts': [digests.row_count(year) for year in years],
+            'batch_id': self.batch_id,
+        })
+
+    def _next_chunk_rows(self, chunk: pd.DataFrame, tracker: MemoryTracker) -> int:
+        """Size the next chunk so parsing it stays within the memory budget"""
+        if not self.max_memory_mb or not len(chunk):
+            return self.chunk_rows
+
+        rss = tracker.sample()
+        if rss > self.max_memory_mb:
+            logger.warning(f"RSS {rss:.0f} MB exceeds the {self.max_memory_mb} MB budget")
+
+        # A chunk costs roughly 3x its frame size in flight (parser buffers + frame + COPY text)
+        bytes_per_row = chunk.memory_usage(deep=True).sum() / len(chunk)
+        headroom_mb = max(self.max_memory_mb - rss, self.max_memory_mb * 0.1)
+        rows = int(headroom_mb * 1024 * 1024 / (3 * bytes_per_row))
+        return max(MIN_CHUNK_ROWS, min(self.chunk_rows, rows))
+
+    def _widen_staging_columns(self, staging_table: str, staging_types: Dict[str, str], chunk: pd.DataFrame):
+        """Widen staging columns when a later chunk holds wider values than the first one did"""
+        for col, chunk_type in self._infer_column_types(chunk).items():
+            current = staging_types.get(col)
+            if current is None or chunk_type == current:
+                continue
+            # Floats that are all integral (NaN-upcast ints) still COPY into BIGINT. Schema
+            # columns only arrive as floats when they did not fit their compact dtype.
+            if current == 'BIGINT' and chunk_type == 'DOUBLE PRECISION':
+                values = chunk[col].dropna().to_numpy()
+                if np.array_equal(values, np.floor(values)):
+                    continue
+            if STAGING_TYPE_RANK.get(chunk_type, 5) <= STAGING_TYPE_RANK.get(current, 5):
+                continue
+            logger.info(f"Widening {staging_table}.{col} from {current} to {chunk_type}")
+            self.staging_mgr.alter_column_type(staging_table, col, chunk_type)
+            staging_types[col] = chunk_type
+
+
+class GameBattingStatsLoader(GameStatsLoader):
     """Loader for game-level batting statistics"""
 
     def get_target_table(self) -> str:
         return 'players_game_batting_stats'
 
-    def get_primary_keys(self) -> List[str]:
-        return ['player_id', 'year', 'game_id']
-
-    def get_upsert_keys(self) -> List[str]:
-        return ['player_id', 'year', 'game_id']
-
     def get_column_mapping(self) -> Optional[Dict[str, str]]:
         """Map CSV columns to database columns if needed"""
         # CSV has all the columns we need, no mapping required
@@ -42,64 +316,13 @@ class GameBattingStatsLoader(StatsLoader):
             'bb', 'k', 'sb', 'cs', 'sf', 'sh', 'hp', 'gdp'
         ]
 
-    def _handle_incremental_load(self, csv_path: Path) -> bool:
-        """
-        Game stats use incremental loading strategy.
-
-        Strategy:
-        - Load all game stats (no split_id filtering like career stats)
-        - Upsert based on (player_id, year, game_id)
-        - Replace existing game records if they exist
-        """
-        logger.info(f"Loading game batting stats from: {csv_path}")
-
-        # Read full CSV and deduplicate based on upsert keys
-        df = pd.read_csv(csv_path, low_memory=False)
-
-        # Deduplicate using upsert keys (player_id, year, game_id)
-        df = CSVPreprocessor.deduplicate_rows(df, subset=['player_id', 'year', 'game_id'])
-
-        # Infer column types from deduplicated data
-        columns = self._infer_column_types(df.head(1))
-
-        # Create staging table from CSV structure
-        staging_table = f"staging_{self.get_target_table()}"
-
-        if not self.staging_mgr.create_staging_from_csv_structure(
-            table_name=self.get_target_table(),
-            columns=columns,
-            staging_prefix="staging_"
-        ):
-            logger.error(f"Failed to create staging table: {staging_table}")
-            return False
-
-        # Load deduplicated CSV into staging
-        if not self.staging_mgr.copy_csv_to_staging(csv_path, staging_table, df=df):
-            logger.error(f"Failed to load CSV into staging: {staging_table}")
-            return False
 
-        # Populate calculated fields (if any)
-        self._calculate_derived_fields(staging_table)
-
-        # Upsert from staging to target
-        upserted = self._upsert_from_staging(staging_table, self.get_target_table())
-        logger.info(f"Upserted {upserted} rows from {staging_table} to {self.get_target_table()}")
-
-        return True
-
-
-class GamePitchingStatsLoader(StatsLoader):
+class GamePitchingStatsLoader(GameStatsLoader):
     """Loader for game-level pitching statistics"""
 
     def get_target_table(self) -> str:
         return 'players_game_pitching_stats'
 
-    def get_primary_keys(self) -> List[str]:
-        return ['player_id', 'year', 'game_id']
-
-    def get_upsert_keys(self) -> List[str]:
-        return ['player_id', 'year', 'game_id']
-
     def get_column_mapping(self) -> Optional[Dict[str, str]]:
         """Map CSV columns to database columns"""
         # The CSV might have different column names
@@ -123,48 +346,3 @@ class GamePitchingStatsLoader(StatsLoader):
             'team_id', 'ip', 'h', 'r', 'er', 'bb', 'k', 'hr', 'bf', 'pc',
             'w', 'l', 'sv', 'hld', 'bs', 'cg', 'sho', 'qs'
         ]
-
-    def _handle_incremental_load(self, csv_path: Path) -> bool:
-        """
-        Game stats use incremental loading strategy.
-
-        Strategy:
-        - Load all game stats
-        - Upsert based on (player_id, year, game_id)
-        - Replace existing game records if they exist
-        """
-        logger.info(f"Loading game pitching stats from: {csv_path}")
-
-        # Read full CSV and deduplicate based on upsert keys
-        df = pd.read_csv(csv_path, low_memory=False)
-
-        # Deduplicate using upsert keys (player_id, year, game_id)
-        df = CSVPreprocessor.deduplicate_rows(df, subset=['player_id', 'year', 'game_id'])
-
-        # Infer column types from deduplicated data
-        columns = self._infer_column_types(df.head(1))
-
-        # Create staging table from CSV structure
-        staging_table = f"staging_{self.get_target_table()}"
-
-        if not self.staging_mgr.create_staging_from_csv_structure(
-            table_name=self.get_target_table(),
-            columns=columns,
-            staging_prefix="staging_"
-        ):
-            logger.error(f"Failed to create staging table: {staging_table}")
-            return False
-
-        # Load deduplicated CSV into staging
-        if not self.staging_mgr.copy_csv_to_staging(csv_path, staging_table, df=df):
-            logger.error(f"Failed to load CSV into staging: {staging_table}")
-            return False
-
-        # Populate calculated fields (if any)
-        self._calculate_derived_fields(staging_table)
-
-        # Upsert from staging to target
-        upserted = self._upsert_from_staging(staging_table, self.get_target_table())
-        logger.info(f"Upserted {upserted} rows from {staging_table} to {self.get_target_table()}")
-
-        return True
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""Dependency graphs for the load-reference and load-stats commands.
+
+Every node function runs inside a DependencyScheduler worker process, so it
+must be module-level (picklable) and build its own loader there.
+"""
+from pathlib import Path
+from typing import Collection, Dict, List
+from loguru import logger
+from ..database import view_refresh
+from ..utils.checksum import FileManifest
+from ..utils.memory import MemoryTracker
+from ..utils.scheduler import DependencyScheduler
+from .reference_loader import ReferenceLoader
+
+# Nodes sharing this resource never run concurrently. TRUNCATE ... CASCADE on a parent
+# table locks every descendant, so two parents reloading at once can deadlock.
+TRUNCATE_CASCADE_RESOURCE = 'truncate_cascade'
+
+# load-stats files (besides the REFERENCE_TABLES entries) and what they depend on
+STATS_FILES = {
+    'players.csv': [],
+    'players_career_batting_stats.csv': ['players.csv'],
+    'players_career_pitching_stats.csv': ['players.csv'],
+    'players_game_batting.csv': ['players.csv'],
+    'players_game_pitching_stats.csv': ['players.csv'],
+}
+STATS_REFERENCE_FILES = ['league_history.csv', 'team_history.csv', 'coaches.csv',
+                         'team_roster.csv', 'team_roster_staff.csv']
+# Tables written by the load-stats loaders (the REFERENCE_TABLES entries name their own)
+STATS_TABLES = ['players_core', 'players_current_status', 'players_contracts', 'players_ratings',
+                'players_career_batting_stats', 'players_career_pitching_stats',
+                'players_game_batting_stats', 'players_game_pitching_stats']
+
+
+def loaded_tables() -> List[str]:
+    """Every table load-reference and load-stats write, e.g. for deferring their indexes"""
+    tables = [config['table'] for config in ReferenceLoader.REFERENCE_TABLES.values()
+              if config['load_order'] < 99]
+    return list(dict.fromkeys(tables + STATS_TABLES))
+
+
+def run_loader(loader_cls, csv_path: str, batch_id: str, *loader_args,
+               manifest: FileManifest = None, force: bool = False, load_strategy: str = None,
+               loader_kwargs: Dict = None) -> Dict:
+    """Scheduler node: build a loader in the worker and load one CSV file"""
+    loader = loader_cls(*loader_args, batch_id=batch_id, **(loader_kwargs or {}))
+    if load_strategy:
+        loader.get_load_strategy = lambda: load_strategy
+
+    with MemoryTracker(Path(csv_path).name) as tracker:
+        success = loader.load_csv(Path(csv_path), manifest=manifest, force=force)
+    stats = {k: v for k, v in loader.stats.items() if k != 'errors'}
+    stats.setdefault('peak_memory_mb', round(tracker.peak_mb, 1))
+    return {
+        'success': success,
+        'error': '; '.join(loader.stats['errors']) or None,
+        'stats': stats
+    }
+
+
+def calculate_league_constants(batch_id: str, force_all: bool = False, max_workers: int = None) -> Dict:
+    """Scheduler node: league constants and advanced metrics for the seasons that changed"""
+    from ..transformers.league_constants_transformer import LeagueConstantsTransformer
+    transformer = LeagueConstantsTransformer(batch_id=batch_id, force_all=force_all, max_workers=max_workers)
+    return {'success': transformer.transform_constants()}
+
+
+def refresh_materialized_views(batch_id: str = None, force: bool = False, max_workers: int = None) -> Dict:
+    """Scheduler node: refresh the leaderboard materialized views whose input tables changed"""
+    results = view_refresh.refresh_materialized_views(batch_id, force=force, max_workers=max_workers)
+    failed = sorted(view for view, result in results.items() if result['status'] == 'failed')
+    return {
+        'success': not failed,
+        'error': f"failed views: {', '.join(failed)}" if failed else None,
+        'stats': {'views': results}
+    }
+
+
+def _reference_parents() -> set:
+    """CSV files that some other file depends on (their full loads TRUNCATE ... CASCADE)"""
+    parents = set()
+    for config in ReferenceLoader.REFERENCE_TABLES.values():
+        parents.update(config.get('depends_on', []))
+    return parents
+
+
+def _add_reference_node(scheduler: DependencyScheduler, csv_file: str, data_dir: Path, batch_id: str,
+                        manifest: FileManifest, force: bool, parents: set):
+    """Add one ReferenceLoader node with its declared dependencies"""
+    config = ReferenceLoader.REFERENCE_TABLES[csv_file]
+    load_strategy = 'full' if force else None
+    truncates = (load_strategy or config.get('load_strategy', 'skip')) in ('full', 'skip')
+    scheduler.add_node(
+        csv_file, run_loader, ReferenceLoader, str(data_dir / csv_file), batch_id, csv_file,
+        manifest=manifest, force=force, load_strategy=load_strategy,
+        depends_on=config.get('depends_on', []),
+        resources=[TRUNCATE_CASCADE_RESOURCE] if truncates and csv_file in parents else []
+    )
+
+
+def build_reference_graph(data_dir: Path, csv_files: List[str], batch_id: str, manifest: FileManifest = None,
+                          force: bool = False, max_workers: int = 4) -> DependencyScheduler:
+    """Graph for load-reference: one node per reference CSV, edges from REFERENCE_TABLES depends_on"""
+    scheduler = DependencyScheduler(batch_id, max_workers)
+    parents = _reference_parents()
+
+    for csv_file in csv_files:
+        if not (data_dir / csv_file).exists():
+            logger.warning(f"File {data_dir / csv_file} not found.")
+            continue
+        _add_reference_node(scheduler, csv_file, data_dir, batch_id, manifest, force, parents)
+    return scheduler
+
+
+def build_stats_graph(data_dir: Path, batch_id: str, manifest: FileManifest = None, force: bool = False,
+                      force_all_constants: bool = False, max_workers: int = 4,
+                      max_memory_mb: int = None, constants_workers: int = None,
+                      only_files: Collection[str] = None, reconcile: bool = False) -> DependencyScheduler:
+    """Graph for load-stats.
+
+    players -> {career batting, career pitching, game batting, game pitching, history, coaches, rosters}
+    career batting + pitching -> league constants -> materialized views
+
+    With only_files (e.g. the files fetch-data found changed) other files get no node;
+    constants and views still run and only recalculate what changed.
+    With reconcile the game-level files are reloaded whole instead of appended past their watermark.
+    """
+    from .players_loader import PlayersLoader
+    from .batting_stats_loader import BattingStatsLoader
+    from .pitching_stats_loader import PitchingStatsLoader
+    from .game_stats_loader import GameStatsLoader, GameBattingStatsLoader, GamePitchingStatsLoader
+
+    loader_classes = {
+        'players.csv': PlayersLoader,
+        'players_career_batting_stats.csv': BattingStatsLoader,
+        'players_career_pitching_stats.csv': PitchingStatsLoader,
+        'players_game_batting.csv': GameBattingStatsLoader,
+        'players_game_pitching_stats.csv': GamePitchingStatsLoader,
+    }
+
+    # Game-level files are streamed in chunks sized to the memory budget
+    streaming_kwargs = {'max_memory_mb': max_memory_mb} if max_memory_mb else {}
+    if reconcile:
+        streaming_kwargs['reconcile'] = True
+
+    def wanted(csv_file):
+        if only_files is not None and csv_file not in only_files:
+            logger.info(f"{csv_file} unchanged since the last fetch, not loading")
+            return False
+        if not (data_dir / csv_file).exists():
+            logger.warning(f"File {data_dir / csv_file} not found.")
+            return False
+        return True
+
+    scheduler = DependencyScheduler(batch_id, max_workers)
+    for csv_file, depends_on in STATS_FILES.items():
+        if not wanted(csv_file):
+            continue
+        loader_cls = loader_classes[csv_file]
+        scheduler.add_node(csv_file, run_loader, loader_cls, str(data_dir / csv_file), batch_id,
+                           manifest=manifest, force=force, depends_on=depends_on,
+                           loader_kwargs=(streaming_kwargs or None) if issubclass(loader_cls, GameStatsLoader) else None)
+
+    scheduler.add_node('league_constants', calculate_league_constants, batch_id, force_all=force_all_constants,
+                       max_workers=constants_workers,
+                       depends_on=['players_career_batting_stats.csv', 'players_career_pitching_stats.csv'])
+
+    parents = _reference_parents()
+    for csv_file in STATS_REFERENCE_FILES:
+        if not wanted(csv_file):
+            continue
+        _add_reference_node(scheduler, csv_file, data_dir, batch_id, manifest, False, parents)
+
+    scheduler.add_node('materialized_views', refresh_materialized_views, batch_id,
+                       depends_on=['players.csv', 'players_career_batting_stats.csv',
+                                   'players_career_pitching_stats.csv', 'league_constants'])
+    return scheduler
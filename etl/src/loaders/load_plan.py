@@ -0,0 +1,49 @@
+"""
+Compiled staging -> target SQL, cached per process.
+
+A LoadPlan holds the final INSERT / UPSERT (and optional delete-missing) SQL
+for one loader, target table and staging column signature. Loading the same
+export again, another season's file or the next chunk of a streamed file
+reuses the plan instead of re-reading the catalog and rebuilding the
+NULLIF(...)::TYPE select list. Keys include the catalog schema version, so a
+migration invalidates every plan built against the old columns.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+@dataclass(frozen=True)
+class LoadPlan:
+    """Final SQL for moving a staging table into its target"""
+    sql: str
+    delete_sql: Optional[str] = None
+    count_missing_sql: Optional[str] = None  # target rows delete_sql would consider missing from staging
+
+    @property
+    def statement(self) -> TextClause:
+        return text(self.sql)
+
+    @property
+    def delete_statement(self) -> Optional[TextClause]:
+        return text(self.delete_sql) if self.delete_sql else None
+
+    @property
+    def count_missing_statement(self) -> Optional[TextClause]:
+        return text(self.count_missing_sql) if self.count_missing_sql else None
+
+
+_plans: Dict[Hashable, LoadPlan] = {}
+
+
+def get_load_plan(key: Hashable, build: Callable[[], LoadPlan]) -> LoadPlan:
+    """Return the cached plan for key, building it on first use"""
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = build()
+    return plan
+
+
+def clear_load_plans():
+    _plans.clear()
@@ -0,0 +1,245 @@
+"""Checkpointed load-data pipeline.
+
+fetch -> defer_indexes -> reference -> players -> stats -> history ->
+rebuild_indexes -> constants -> views run in order as named stages of one
+batch. Every finished stage is checkpointed under stats->'stages' of the
+batch's etl_batch_runs row, and resuming the batch starts again at the first
+stage that did not succeed. Loaders skip files whose checksum matches their
+last successful load, so rerunning a failed stage only reloads the files that
+did not make it. defer_indexes only drops indexes when asked to, and
+rebuild_indexes restores whatever etl_deferred_objects still lists.
+"""
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Collection, Dict, List, Optional
+from loguru import logger
+from sqlalchemy import text
+from ..database.connection import db
+from ..utils.checksum import FileManifest
+from .load_graph import STATS_FILES, STATS_REFERENCE_FILES, build_reference_graph, build_stats_graph, loaded_tables
+from .reference_loader import ReferenceLoader
+
+STAGES = ['fetch', 'defer_indexes', 'reference', 'players', 'stats', 'history', 'rebuild_indexes',
+          'constants', 'views']
+
+# Scheduler nodes of the load-stats graph that make up each stage
+STATS_STAGE_NODES = {
+    'players': ['players.csv'],
+    'stats': [csv_file for csv_file in STATS_FILES if csv_file != 'players.csv'],
+    'constants': ['league_constants'],
+    'history': STATS_REFERENCE_FILES,
+    'views': ['materialized_views'],
+}
+
+
+def run_stages(stages: Dict[str, Callable[[], Dict]], completed: Collection[str] = (),
+               on_stage_done: Callable[[str, Dict], None] = None) -> Dict[str, Dict]:
+    """Run stages in order, skipping those in completed and stopping at the first failure.
+
+    Stage functions return {'success': bool, 'error': ..., 'stats': {...}} like scheduler nodes.
+    """
+    results = {}
+    for name, func in stages.items():
+        if name in completed:
+            logger.info(f"Stage {name} already completed, skipping")
+            continue
+        logger.info(f"Stage {name} starting")
+        start = time.perf_counter()
+        try:
+            outcome = func() or {}
+            success, error = bool(outcome.get('success', True)), outcome.get('error')
+        except Exception as e:
+            logger.error(f"Stage {name} raised: {e}")
+            outcome, success, error = {}, False, str(e)
+
+        results[name] = {
+            'status': 'success' if success else 'failed',
+            'completed_at': datetime.now().isoformat(),
+            'duration_seconds': round(time.perf_counter() - start, 3),
+            'error': error,
+            'stats': outcome.get('stats', {}),
+        }
+        if on_stage_done:
+            on_stage_done(name, results[name])
+        if not success:
+            logger.error(f"Stage {name} failed: {error}")
+            break
+        logger.success(f"Stage {name} completed ({results[name]['duration_seconds']:.1f}s)")
+    return results
+
+
+def completed_stages(checkpoints: Dict[str, Dict]) -> List[str]:
+    """Stages checkpointed as successful"""
+    return [name for name, checkpoint in checkpoints.items() if checkpoint.get('status') == 'success']
+
+
+def read_batch_stats(batch_id: str) -> Optional[Dict]:
+    """stats of a batch run (stage checkpoints under 'stages'), or None if the batch does not exist"""
+    with db.engine.connect() as conn:
+        row = conn.execute(text("SELECT stats FROM etl_batch_runs WHERE batch_id = :batch_id"),
+                           {'batch_id': batch_id}).first()
+    if row is None:
+        return None
+    return row[0] or {}
+
+
+def write_checkpoint(batch_id: str, stage: str, result: Dict):
+    """Store a stage result under stats->'stages' of the batch run"""
+    sql = text("""
+        UPDATE etl_batch_runs
+        SET stats = COALESCE(stats, '{}'::jsonb) || jsonb_build_object(
+            'stages', COALESCE(stats->'stages', '{}'::jsonb) || jsonb_build_object(:stage, CAST(:result AS jsonb))
+        )
+        WHERE batch_id = :batch_id
+    """)
+    db.execute_sql(sql, {'batch_id': batch_id, 'stage': stage, 'result': json.dumps(result, default=str)})
+
+
+class LoadPipeline:
+    """The load-data stages for one batch"""
+
+    def __init__(self, batch_id: str, data_dir: Path, fetch: bool = True, force: bool = False,
+                 max_workers: int = 4, max_memory_mb: int = None, constants_workers: int = None,
+                 defer_indexes: bool = False, reconcile: bool = False):
+        self.batch_id = batch_id
+        self.data_dir = Path(data_dir)
+        self.fetch = fetch
+        self.force = force
+        self.defer_indexes = defer_indexes
+        self.reconcile = reconcile
+        self.max_workers = max_workers
+        self.max_memory_mb = max_memory_mb
+        self.constants_workers = constants_workers
+        self._manifest = None
+
+    @property
+    def manifest(self) -> FileManifest:
+        """Checksums of the incoming files, computed once after the fetch stage"""
+        if self._manifest is None:
+            from .base_loader import BaseLoader
+            self._manifest = FileManifest.from_directory(
+                self.data_dir, stored_metadata=BaseLoader.get_stored_file_metadata())
+        return self._manifest
+
+    def stages(self) -> Dict[str, Callable[[], Dict]]:
+        stages = {'fetch': self._fetch, 'defer_indexes': self._defer_indexes, 'reference': self._reference,
+                  'rebuild_indexes': self._rebuild_indexes}
+        for stage in STATS_STAGE_NODES:
+            stages[stage] = lambda nodes=STATS_STAGE_NODES[stage]: self._stats_nodes(nodes)
+        return {stage: stages[stage] for stage in STAGES}
+
+    def start(self, resume: bool = False) -> List[str]:
+        """Open (or reopen) the batch run and return the stages already completed.
+
+        A resumed batch keeps the fetch/force/defer_indexes/reconcile options it was started with.
+        """
+        if resume:
+            stats = read_batch_stats(self.batch_id)
+            if stats is None:
+                raise ValueError(f"Batch {self.batch_id} not found in etl_batch_runs")
+            options = stats.get('pipeline', {})
+            self.fetch = options.get('fetch', self.fetch)
+            self.force = options.get('force', self.force)
+            self.defer_indexes = options.get('defer_indexes', self.defer_indexes)
+            self.reconcile = options.get('reconcile', self.reconcile)
+            db.execute_sql(text("""
+                UPDATE etl_batch_runs
+                SET status = 'running', completed_at = NULL, error_message = NULL
+                WHERE batch_id = :batch_id
+            """), {'batch_id': self.batch_id})
+            return completed_stages(stats.get('stages', {}))
+
+        db.execute_sql(text("""
+            INSERT INTO etl_batch_runs (batch_id, batch_type, triggered_by, environment, status, stats)
+            VALUES (:batch_id, :batch_type, 'load-data', 'dev', 'running',
+                    jsonb_build_object('pipeline', CAST(:options AS jsonb)))
+        """), {'batch_id': self.batch_id, 'batch_type': 'full' if self.force else 'incremental',
+               'options': json.dumps({'fetch': self.fetch, 'force': self.force,
+                                      'defer_indexes': self.defer_indexes, 'reconcile': self.reconcile})})
+        return []
+
+    def run(self, resume: bool = False) -> Dict[str, Dict]:
+        """Run the stages not yet completed in this batch and close the batch run"""
+        completed = self.start(resume)
+        results = run_stages(self.stages(), completed,
+                             on_stage_done=lambda stage, result: write_checkpoint(self.batch_id, stage, result))
+        self._finish()
+        return results
+
+    def _finish(self):
+        checkpoints = (read_batch_stats(self.batch_id) or {}).get('stages', {})
+        done = completed_stages(checkpoints)
+        incomplete = [stage for stage in STAGES if stage not in done]
+        db.execute_sql(text("""
+            UPDATE etl_batch_runs
+            SET status = :status,
+                completed_at = CURRENT_TIMESTAMP,
+                error_message = :error_message,
+                stats = COALESCE(stats, '{}'::jsonb) || jsonb_build_object(
+                    'wall_time_seconds', CAST(:wall_time AS numeric),
+                    'workers', CAST(:workers AS integer)
+                )
+            WHERE batch_id = :batch_id
+        """), {
+            'batch_id': self.batch_id,
+            'status': 'failed' if incomplete else 'completed',
+            'error_message': f"Stages not completed: {incomplete}" if incomplete else None,
+            'wall_time': round(sum(c.get('duration_seconds') or 0 for c in checkpoints.values()), 3),
+            'workers': self.max_workers,
+        })
+
+    def _fetch(self) -> Dict:
+        if not self.fetch:
+            logger.info("Fetch disabled, loading the files already in place")
+            return {'success': True}
+        from ..utils.fetch import fetch_game_data
+        result = fetch_game_data()
+        if result is None:
+            return {'success': False, 'error': 'fetch failed'}
+        return {'success': result.success, 'error': '; '.join(f"{k}: {v}" for k, v in result.failed.items()) or None,
+                'stats': {'changed': result.changed, 'removed': result.removed}}
+
+    def _defer_indexes(self) -> Dict:
+        if not self.defer_indexes:
+            return {'success': True}
+        from ..database.deferred_indexes import defer_indexes
+        return {'success': True, 'stats': {'deferred': defer_indexes(loaded_tables(), self.batch_id)}}
+
+    def _rebuild_indexes(self) -> Dict:
+        """Rebuild what this or an earlier failed batch deferred (nothing recorded, nothing to do)"""
+        from ..database.deferred_indexes import rebuild_deferred
+        results = rebuild_deferred()
+        failed = {table: result['failed'] for table, result in results.items() if result['failed']}
+        return {
+            'success': not failed,
+            'error': f"Not rebuilt: {failed}" if failed else None,
+            'stats': {'restored': {table: len(result['restored']) for table, result in results.items()}},
+        }
+
+    def _reference(self) -> Dict:
+        return self._run_graph(build_reference_graph(
+            self.data_dir, ReferenceLoader.get_load_order(), self.batch_id, manifest=self.manifest,
+            force=self.force, max_workers=self.max_workers))
+
+    def _stats_nodes(self, nodes: List[str]) -> Dict:
+        scheduler = build_stats_graph(self.data_dir, self.batch_id, manifest=self.manifest, force=self.force,
+                                      force_all_constants=self.force, max_workers=self.max_workers,
+                                      max_memory_mb=self.max_memory_mb, constants_workers=self.constants_workers,
+                                      reconcile=self.reconcile)
+        scheduler.keep_nodes(nodes)
+        return self._run_graph(scheduler)
+
+    def _run_graph(self, scheduler) -> Dict:
+        from ..utils.fetch import mark_files_loaded
+        scheduler.complete_batch = False
+        results = scheduler.run()
+        mark_files_loaded([name for name, result in results.items()
+                           if name.endswith('.csv') and result['status'] == 'success'], self.data_dir)
+        failed = sorted(name for name, result in results.items() if result['status'] != 'success')
+        return {
+            'success': not failed,
+            'error': f"Nodes not successful: {failed}" if failed else None,
+            'stats': {'nodes': {name: result['status'] for name, result in results.items()}},
+        }
@@ -1,9 +1,7 @@
 from typing import List, Dict, Optional
-from pathlib import Path
-from loguru import logger
 import pandas as pd
-from sqlalchemy import text
 from .stats_loader import StatsLoader
+from ..transformers.rate_stats import pitching_rates
 
 class PitchingStatsLoader(StatsLoader):
     """Loader for pitching statistics"""
@@ -21,19 +19,7 @@ class PitchingStatsLoader(StatsLoader):
 
     def get_calculated_fields(self) -> Dict[str, str]:
         return {
-            # Cast to proper target types to avoid staging table precision issues
-            'era': 'CASE WHEN outs > 0 THEN (ROUND((er * 9.0) / (outs / 3.0), 2))::DECIMAL(5,2) ELSE 0::DECIMAL(5,2) END',
-            'whip': 'CASE WHEN outs > 0 THEN (ROUND((bb + ha) / (outs / 3.0), 2))::DECIMAL(4,2) ELSE 0::DECIMAL(4,2) END',
-            'k9': 'CASE WHEN outs > 0 THEN (ROUND((k * 9.0) / (outs / 3.0), 1))::DECIMAL(4,1) ELSE 0::DECIMAL(4,1) END',
-            'bb9': 'CASE WHEN outs > 0 THEN (ROUND((bb * 9.0) / (outs / 3.0), 1))::DECIMAL(4,1) ELSE 0::DECIMAL(4,1) END',
-            'hr9': 'CASE WHEN outs > 0 THEN (ROUND((hra * 9.0) / (outs / 3.0), 1))::DECIMAL(4,1) ELSE 0::DECIMAL(4,1) END',
-            'h9': 'CASE WHEN outs > 0 THEN (ROUND((ha * 9.0) / (outs / 3.0), 1))::DECIMAL(4,1) ELSE 0::DECIMAL(4,1) END',
-            'babip': '''CASE 
-          WHEN (ab - k - hra + sf) > 0 AND (ha - hra) >= 0 
-          THEN (LEAST(0.999, ROUND((ha - hra)::numeric / (ab - k - hra + sf), 3)))::DECIMAL(4,3)
-          ELSE 0::DECIMAL(4,3)
-          END''',
-
+            # Basic rate stats are computed in _add_derived_columns
             'fip': 'NULL::DECIMAL(4,2)',
             'xfip': 'NULL::DECIMAL(4,2)',
             'era_plus': 'NULL::INTEGER',
@@ -44,31 +30,10 @@ class PitchingStatsLoader(StatsLoader):
             'last_updated': 'CURRENT_TIMESTAMP'
         }
 
-    def _add_calculated_columns(self, staging_table: str):
-        """Add calculated columns to staging table with proper types"""
-        from sqlalchemy import text
-
-        # ADD columns first (they don't exist in CSV)
-        alter_sql = text(f"""
-            ALTER TABLE {staging_table}
-            ADD COLUMN IF NOT EXISTS era DECIMAL(5,2),
-            ADD COLUMN IF NOT EXISTS whip DECIMAL(4,2),
-            ADD COLUMN IF NOT EXISTS k9 DECIMAL(4,1),
-            ADD COLUMN IF NOT EXISTS bb9 DECIMAL(4,1), 
-            ADD COLUMN IF NOT EXISTS hr9 DECIMAL(4,1),
-            ADD COLUMN IF NOT EXISTS h9 DECIMAL(4,1),
-            ADD COLUMN IF NOT EXISTS babip DECIMAL(4,3),
-            ADD COLUMN IF NOT EXISTS fip DECIMAL(4,2),
-            ADD COLUMN IF NOT EXISTS xfip DECIMAL(4,2),
-            ADD COLUMN IF NOT EXISTS era_plus INTEGER,
-            ADD COLUMN IF NOT EXISTS era_minus INTEGER,
-            ADD COLUMN IF NOT EXISTS fip_plus INTEGER,
-            ADD COLUMN IF NOT EXISTS fip_minus INTEGER,
-            ADD COLUMN IF NOT EXISTS constants_version INTEGER,
-            ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP;
-        """)
-
-        self.db.execute_sql(alter_sql)
+    def _add_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """sub_league_id plus ERA/WHIP/K9/BB9/HR9/H9/BABIP, computed before COPY"""
+        df = super()._add_derived_columns(df)
+        return df.assign(**pitching_rates(df))
 
     def get_update_columns(self) -> List[str]:
         """What to update on UPSERT - counting stats only"""
@@ -84,39 +49,3 @@ class PitchingStatsLoader(StatsLoader):
     def should_update_calculated_fields(self) -> bool:
         """Calculated fields are NEVER updated during UPSERT"""
         return False
-
-    def _handle_incremental_load(self, csv_path: Path) -> bool:
-        """Handle incremental load with staging table column fix"""
-        staging_table = f"staging_{self.get_target_table()}"
-
-        # Create staging and load data
-        df = pd.read_csv(csv_path)
-
-        # FILTER TO ONLY SPLIT_ID=1
-        df = df[df['split_id'] == 1]
-        logger.info(f"Filtered to split_id=1: {len(df)} rows remaining from {len(pd.read_csv(csv_path))} total")
-        # CREATE FRESH STAGING TABLE - This was missing!
-        target_table = self.get_target_table()
-        columns = self._infer_column_types(df)
-        self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
-
-        row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df)
-
-        # Populate sub_league_id
-        self._populate_subleague_id(staging_table)
-
-        # Fix column types BEFORE calculating derived fields
-        self._add_calculated_columns(staging_table)
-
-        # Now calculate derived fields with proper column types
-        self._calculate_derived_fields(staging_table)
-
-        # Complete the UPSERT
-        upserted = self._upsert_from_staging(staging_table, target_table)
-
-        self.stats["rows_inserted"] = upserted
-        logger.info(f"Upserted {upserted} rows from {staging_table} to {target_table}")
-
-        return True
-
-
@@ -1,9 +1,9 @@
 """Multi-target loader for normalized players tables"""
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from loguru import logger
+import numpy as np
 import pandas as pd
-import json
 from sqlalchemy import text
 from .base_loader import BaseLoader
 from ..utils.batch import generate_batch_id
@@ -11,6 +11,81 @@ from ..utils.batch import generate_batch_id
 class PlayersLoader(BaseLoader):
     """Loader for normalized players tables"""
 
+    # players.csv columns whose orphaned IDs get stub parent rows before the load
+    FK_REPAIRS = [
+        ('nation_id', 'nations'),
+        ('second_nation_id', 'nations'),
+        ('league_id', 'leagues'),
+        ('last_league_id', 'leagues'),
+        ('loan_league_id', 'leagues'),
+        ('team_id', 'teams'),
+        ('last_team_id', 'teams'),
+        ('organization_id', 'teams'),
+        ('last_organization_id', 'teams'),
+    ]
+
+    # players_ratings JSONB payloads: rating_type -> {json key: players.csv column}
+    RATING_TYPES = {
+        'personality': {
+            'greed': 'personality_greed',
+            'loyalty': 'personality_loyalty',
+            'play_for_winner': 'personality_play_for_winner',
+            'work_ethic': 'personality_work_ethic',
+            'intelligence': 'personality_intelligence',
+            'leader': 'personality_leader',
+        },
+        'injury': {
+            'is_injured': 'injury_is_injured',
+            'dtd_injury': 'injury_dtd_injury',
+            'career_ending': 'injury_career_ending',
+            'dl_left': 'injury_dl_left',
+            'dl_playoff_round': 'injury_dl_playoff_round',
+            'injury_left': 'injury_left',
+            'dtd_injury_effect': 'dtd_injury_effect',
+            'dtd_injury_effect_hit': 'dtd_injury_effect_hit',
+            'dtd_injury_effect_throw': 'dtd_injury_effect_throw',
+            'dtd_injury_effect_run': 'dtd_injury_effect_run',
+            'injury_id': 'injury_id',
+            'injury_id2': 'injury_id2',
+            'injury_dtd_injury2': 'injury_dtd_injury2',
+            'injury_left2': 'injury_left2',
+            'dtd_injury_effect2': 'dtd_injury_effect2',
+            'dtd_injury_effect_hit2': 'dtd_injury_effect_hit2',
+            'dtd_injury_effect_throw2': 'dtd_injury_effect_throw2',
+            'dtd_injury_effect_run2': 'dtd_injury_effect_run2',
+            'prone_overall': 'prone_overall',
+            'prone_leg': 'prone_leg',
+            'prone_back': 'prone_back',
+            'prone_arm': 'prone_arm',
+        },
+        'fatigue': {
+            'pitches0': 'fatigue_pitches0',
+            'pitches1': 'fatigue_pitches1',
+            'pitches2': 'fatigue_pitches2',
+            'pitches3': 'fatigue_pitches3',
+            'pitches4': 'fatigue_pitches4',
+            'pitches5': 'fatigue_pitches5',
+            'fatigue_points': 'fatigue_points',
+            'played_today': 'fatigue_played_today',
+        },
+        'strategy': {
+            'override_team': 'strategy_override_team',
+            'stealing': 'strategy_stealing',
+            'running': 'strategy_running',
+            'bunt_for_hit': 'strategy_bunt_for_hit',
+            'sac_bunt': 'strategy_sac_bunt',
+            'hit_run': 'strategy_hit_run',
+            'hook_start': 'strategy_hook_start',
+            'hook_relief': 'strategy_hook_relief',
+            'pitch_count': 'strategy_pitch_count',
+            'pitch_around': 'strategy_pitch_around',
+            'never_pinch_hit': 'strategy_never_pinch_hit',
+            'defensive_sub': 'strategy_defensive_sub',
+            'dtd_sit_min': 'strategy_dtd_sit_min',
+            'dtd_allow_ph': 'strategy_dtd_allow_ph',
+        },
+    }
+
     def __init__(self, batch_id: str = None):
         super().__init__(batch_id)
         self.current_season = 2024
@@ -18,6 +93,9 @@ class PlayersLoader(BaseLoader):
     def get_target_table(self) -> str:
         return 'players_core'
 
+    def get_written_tables(self) -> List[str]:
+        return ['players_core', 'players_current_status', 'players_contracts', 'players_ratings']
+
     def get_primary_keys(self) -> List[str]:
         return ['player_id']
 
@@ -39,48 +117,76 @@ class PlayersLoader(BaseLoader):
     def should_update_calculated_fields(self) -> bool:
         return True
 
+    def get_fk_repairs(self) -> List[Tuple[str, str]]:
+        return self.FK_REPAIRS
+
+    def get_csv_schema(self, csv_path: Path):
+        """players.csv is split across several tables, so every column is parsed"""
+        return None
+
     def _handle_incremental_load(self, csv_path: Path) -> bool:
         """Handle  multi-table incremental load"""
         logger.info(f"Loading players CSV into normalized tables: {csv_path}")
 
-        # Pre-load operations: Create stub records for missing references
-        self._create_missing_nations(csv_path)
-        self._create_missing_leagues(csv_path)
-        self._create_missing_teams(csv_path)
-
         try:
             # Read and prepare data
-            df = pd.read_csv(csv_path)
-            self.stats["rows_read"] = len(df)
+            with self.timer.phase('read') as phase:
+                df = self._read_csv(csv_path)
+                self.stats["rows_read"] = len(df)
+                phase.add_rows(len(df))
 
             # Split data for each target table
-            core_data = self._prepare_core_data(df)
-            status_data = self._prepare_status_data(df)
-            contracts_data = self._prepare_contracts_data(df)
-            ratings_data = self._prepare_ratings_data(df)
+            with self.timer.phase('preprocess') as phase:
+                # Checked before the split, so a dropped player is dropped from every table
+                for table in self.get_written_tables():
+                    df = self._validate_foreign_keys(df, table)
+                core_data = self._prepare_core_data(df)
+                status_data = self._prepare_status_data(df)
+                contracts_data = self._prepare_contracts_data(df)
+                ratings_data = self._prepare_ratings_data(df)
+                phase.add_rows(len(df))
+            references = [(col, parent) for col, parent in self.get_fk_repairs() if col in df.columns]
+            with self.timer.phase('staging_copy') as phase:
+                refs_table = self._stage_fk_references(df, [col for col, _ in references])
+                phase.add_rows(len(df))
 
             # Laod each table in dependency order
             with self.db.get_session() as session:
+                # 0. Create stub records for missing nation/league/team references
+                self._repair_foreign_keys(session, refs_table, references)
+
                 # 1. Load core data first
-                core_count = self._load_core_table(core_data, session)
+                core_count = self._timed_table_load('players_core', self._load_core_table, core_data, session)
 
                 # 2. Load dependent tables
-                status_count = self._load_status_table(status_data, session)
-                contracts_count = self._load_contracts_table(contracts_data, session)
-                ratings_count = self._load_ratings_table(ratings_data, session)
+                status_count = self._timed_table_load('players_current_status', self._load_status_table,
+                                                      status_data, session)
+                contracts_count = self._timed_table_load('players_contracts', self._load_contracts_table,
+                                                         contracts_data, session)
+                ratings_count = self._timed_table_load('players_ratings', self._load_ratings_table,
+                                                       ratings_data, session)
 
                 session.commit()
 
                 total_rows = core_count + status_count + contracts_count + ratings_count
                 self.stats["rows_inserted"] = total_rows
                 logger.info(f"Successfully loaded players data: core={core_count}, status={status_count}, contracts={contracts_count}, ratings={ratings_count}")
+            if refs_table:
+                self.staging_mgr.drop_staging_table(refs_table)
             self._record_file_completion(csv_path, 'success')
             return True
         except Exception as e:
+            # load_csv rolls the load back and records the failure
             logger.error(f"Error in multi-table players load: {e}")
-            self._record_file_completion(csv_path, 'failed', str(e))
             raise
 
+    def _timed_table_load(self, table: str, load, df: pd.DataFrame, session) -> int:
+        """Run one table's staging + upsert as that table's 'upsert' phase"""
+        with self.timer.phase('upsert', table_name=table) as phase:
+            count = load(df, session)
+            phase.add_rows(len(df))
+        return count
+
     def _prepare_core_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepare data for players_core table"""
         core_columns = [
@@ -93,7 +199,7 @@ class PlayersLoader(BaseLoader):
             'commit_school', 'draft_league_id', 'draft_team_id'
         ]
 
-        core_df = df[core_columns].copy()
+        core_df = df.loc[:, core_columns]  # a single copy of just these columns
 
         # Handle date conversions
         core_df['date_of_birth'] = pd.to_datetime(core_df['date_of_birth'], errors='coerce')
@@ -115,7 +221,7 @@ class PlayersLoader(BaseLoader):
             'on_loan', 'loan_league_id', 'loan_team_id'
         ]
 
-        status_df = df[status_columns].copy()
+        status_df = df.loc[:, status_columns]
         status_df['season_year'] = self.current_season
         status_df['last_updated'] = pd.Timestamp.now()
 
@@ -129,110 +235,32 @@ class PlayersLoader(BaseLoader):
             'morale_team_chemistry', 'morale_player_role', 'expectation'
         ]
 
-        contracts_df = df[contracts_columns].copy()
+        contracts_df = df.loc[:, contracts_columns]
         contracts_df['season_year'] = self.current_season
         contracts_df['team_id'] = df['team_id']  # Add team_id for context
 
         return contracts_df
 
-    def _prepare_ratings_data(self, df: pd.DataFrame) -> List[Dict]:
-        """Prepare JSONB ratings data for players_ratings table"""
-        ratings_records = []
-
-        for _, row in df.iterrows():
-            player_id = row['player_id']
-
-            # Personality ratings
-            personality_data = {
-                'greed': row['personality_greed'],
-                'loyalty': row['personality_loyalty'],
-                'play_for_winner': row['personality_play_for_winner'],
-                'work_ethic': row['personality_work_ethic'],
-                'intelligence': row['personality_intelligence'],
-                'leader': row['personality_leader']
-            }
-            ratings_records.append({
-                'player_id': player_id,
-                'season_year': self.current_season,
-                'rating_type': 'personality',
-                'ratings': json.dumps(personality_data)
-            })
-
-            # Injury ratings
-            injury_data = {
-                'is_injured': row['injury_is_injured'],
-                'dtd_injury': row['injury_dtd_injury'],
-                'career_ending': row['injury_career_ending'],
-                'dl_left': row['injury_dl_left'],
-                'dl_playoff_round': row['injury_dl_playoff_round'],
-                'injury_left': row['injury_left'],
-                'dtd_injury_effect': row['dtd_injury_effect'],
-                'dtd_injury_effect_hit': row['dtd_injury_effect_hit'],
-                'dtd_injury_effect_throw': row['dtd_injury_effect_throw'],
-                'dtd_injury_effect_run': row['dtd_injury_effect_run'],
-                'injury_id': row['injury_id'],
-                'injury_id2': row['injury_id2'],
-                'injury_dtd_injury2': row['injury_dtd_injury2'],
-                'injury_left2': row['injury_left2'],
-                'dtd_injury_effect2': row['dtd_injury_effect2'],
-                'dtd_injury_effect_hit2': row['dtd_injury_effect_hit2'],
-                'dtd_injury_effect_throw2': row['dtd_injury_effect_throw2'],
-                'dtd_injury_effect_run2': row['dtd_injury_effect_run2'],
-                'prone_overall': row['prone_overall'],
-                'prone_leg': row['prone_leg'],
-                'prone_back': row['prone_back'],
-                'prone_arm': row['prone_arm']
-            }
-            ratings_records.append({
-                'player_id': player_id,
-                'season_year': self.current_season,
-                'rating_type': 'injury',
-                'ratings': json.dumps(injury_data)
-            })
-
-            # Fatigue ratings
-            fatigue_data = {
-                'pitches0': row['fatigue_pitches0'],
-                'pitches1': row['fatigue_pitches1'],
-                'pitches2': row['fatigue_pitches2'],
-                'pitches3': row['fatigue_pitches3'],
-                'pitches4': row['fatigue_pitches4'],
-                'pitches5': row['fatigue_pitches5'],
-                'fatigue_points': row['fatigue_points'],
-                'played_today': row['fatigue_played_today']
-            }
-            ratings_records.append({
-                'player_id': player_id,
-                'season_year': self.current_season,
-                'rating_type': 'fatigue',
-                'ratings': json.dumps(fatigue_data)
-            })
-
-            # Strategy ratings
-            strategy_data = {
-                'override_team': row['strategy_override_team'],
-                'stealing': row['strategy_stealing'],
-                'running': row['strategy_running'],
-                'bunt_for_hit': row['strategy_bunt_for_hit'],
-                'sac_bunt': row['strategy_sac_bunt'],
-                'hit_run': row['strategy_hit_run'],
-                'hook_start': row['strategy_hook_start'],
-                'hook_relief': row['strategy_hook_relief'],
-                'pitch_count': row['strategy_pitch_count'],
-                'pitch_around': row['strategy_pitch_around'],
-                'never_pinch_hit': row['strategy_never_pinch_hit'],
-                'defensive_sub': row['strategy_defensive_sub'],
-                'dtd_sit_min': row['strategy_dtd_sit_min'],
-                'dtd_allow_ph': row['strategy_dtd_allow_ph']
-            }
-            ratings_records.append({
-                'player_id': player_id,
+    def _prepare_ratings_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Prepare JSONB ratings data for players_ratings table (one row per player and rating type)"""
+        frames = []
+        for rating_type, fields in self.RATING_TYPES.items():
+            ratings = df[list(fields.values())].rename(columns={v: k for k, v in fields.items()})
+            # NaN-upcast integer columns serialize as integers again; NaN becomes JSON null
+            for col in ratings.columns:
+                values = ratings[col]
+                if values.dtype.kind == 'f' and np.array_equal(values.dropna(), np.floor(values.dropna())):
+                    ratings[col] = values.astype('Int64')
+            frames.append(pd.DataFrame({
+                'player_id': df['player_id'].to_numpy(),
                 'season_year': self.current_season,
-                'rating_type': 'strategy',
-                'ratings': json.dumps(strategy_data)
-            })
+                'rating_type': rating_type,
+                'ratings': ratings.to_json(orient='records', lines=True).splitlines()
+            }))
 
-        return ratings_records
+        ratings_df = pd.concat(frames, ignore_index=True)
+        # Later rows win, as they did when each record was upserted in turn
+        return ratings_df.drop_duplicates(subset=['player_id', 'season_year', 'rating_type'], keep='last')
 
     def _load_core_table(self, core_df: pd.DataFrame, session) -> int:
         """Load data into players_core table"""
@@ -240,7 +268,8 @@ class PlayersLoader(BaseLoader):
 
         # Create temporary staging table
         staging_table = "staging_players_core"
-        core_df.to_sql(staging_table, self.db.engine, if_exists='replace', index=False, method='multi')
+        self.staging_mgr.create_staging_from_csv_structure('players_core', self._infer_column_types(core_df))
+        self.staging_mgr.copy_csv_to_staging(staging_table, staging_table, df=core_df)
 
         # Perform UPSERT from staging to target
         upsert_sql = text(f"""
@@ -272,7 +301,8 @@ class PlayersLoader(BaseLoader):
 
         # Create temporary staging table
         staging_table = "staging_players_current_status"
-        status_df.to_sql(staging_table, self.db.engine, if_exists='replace', index=False, method='multi')
+        self.staging_mgr.create_staging_from_csv_structure('players_current_status', self._infer_column_types(status_df))
+        self.staging_mgr.copy_csv_to_staging(staging_table, staging_table, df=status_df)
 
         # Perform UPSERT from staging to target
         upsert_sql = text(f"""
@@ -317,7 +347,8 @@ class PlayersLoader(BaseLoader):
 
         # Create temporary staging table
         staging_table = "staging_players_contracts"
-        contracts_df.to_sql(staging_table, self.db.engine, if_exists='replace', index=False, method='multi')
+        self.staging_mgr.create_staging_from_csv_structure('players_contracts', self._infer_column_types(contracts_df))
+        self.staging_mgr.copy_csv_to_staging(staging_table, staging_table, df=contracts_df)
 
         # Perform UPSERT from staging to target
         upsert_sql = text(f"""
@@ -342,38 +373,44 @@ class PlayersLoader(BaseLoader):
         return len(contracts_df)
 
     def _load_ratings_table(self, ratings_df: pd.DataFrame, session) -> int:
-        """Load data into players_ratings table"""
-        logger.info("Loading players_ratings table")
+        """Load data into players_ratings table.
 
-        # Convert DataFrame to list of dicts if it's a DataFrame
-        if isinstance(ratings_df, pd.DataFrame):
-            ratings_records = ratings_df.to_dict('records')
-        else:
-            # It's already a list of dicts from _prepare_ratings_data
-            ratings_records = ratings_df
+        All ratings are COPYed into staging as JSON text and merged with one
+        INSERT ... SELECT. Rows whose JSON is unchanged are not rewritten.
+        Returns the number of inserted or changed rows.
+        """
+        logger.info("Loading players_ratings table")
 
-        if not ratings_records:
+        if ratings_df.empty:
             logger.warning("No ratings data to load")
             return 0
 
-        # Insert directly without staging table due to JSONB complexity
-        import json
-        for record in ratings_records:
-            insert_sql = text("""
-                INSERT INTO players_ratings (player_id, season_year, rating_type, ratings)
-                VALUES (:player_id, :season_year, :rating_type, :ratings)
+        staging_table = "staging_players_ratings"
+        self.staging_mgr.create_staging_from_csv_structure('players_ratings', {
+            'player_id': 'INTEGER',
+            'season_year': 'INTEGER',
+            'rating_type': 'VARCHAR(20)',
+            'ratings': 'TEXT'
+        })
+        self.staging_mgr.copy_csv_to_staging(staging_table, staging_table, df=ratings_df)
+
+        upsert_sql = text(f"""
+            WITH upserted AS (
+                INSERT INTO players_ratings AS t (player_id, season_year, rating_type, ratings)
+                SELECT player_id, season_year, rating_type, ratings::jsonb
+                FROM {staging_table}
                 ON CONFLICT (player_id, season_year, rating_type) DO UPDATE SET
                     ratings = EXCLUDED.ratings
-            """)
-
-            session.execute(insert_sql, {
-                'player_id': record['player_id'],
-                'season_year': record['season_year'],
-                'rating_type': record['rating_type'],
-                'ratings': json.dumps(record['ratings'])
-            })
+                WHERE t.ratings IS DISTINCT FROM EXCLUDED.ratings
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM upserted
+        """)
 
-        return len(ratings_records)
+        written = session.execute(upsert_sql).scalar()
+        session.execute(text(f"DROP TABLE {staging_table}"))
+        logger.info(f"players_ratings: {written} rows inserted or changed, {len(ratings_df) - written} unchanged")
+        return written
 
     def _get_current_season(self) -> int:
         """Get current season from leagues table"""
@@ -387,217 +424,11 @@ class PlayersLoader(BaseLoader):
             logger.warning(f"Could not detect season from leagues, using default 2024: {e}")
             return 2024
 
-    def _create_missing_nations(self, csv_path: Path):
-        """Create stub nation records for any nation_ids in players.csv that don't exist in nations table"""
-        logger.info("Checking for missing nations referenced in players.csv")
-
-        try:
-            # Read players.csv to get all nation_ids
-            df = pd.read_csv(csv_path)
-
-            # Collect all nation_id columns (birth nation and second nation)
-            nation_id_columns = ['nation_id', 'second_nation_id']
-            all_nation_ids = set()
-
-            for col in nation_id_columns:
-                if col in df.columns:
-                    nation_ids = set(df[col].dropna().unique())
-                    all_nation_ids.update(nation_ids)
-
-            # Convert to integers and exclude 0 (which is reserved for "Unknown")
-            all_nation_ids = {int(nid) for nid in all_nation_ids if int(nid) != 0}
-
-            if not all_nation_ids:
-                logger.info("No nation_ids found in players.csv")
-                return
-
-            logger.info(f"Found {len(all_nation_ids)} unique nation_ids in players.csv")
-
-            # Get existing nation_ids from database
-            existing_nations_sql = text("SELECT nation_id FROM nations")
-            result = self.db.execute_sql(existing_nations_sql)
-            existing_nation_ids = {row[0] for row in result}
-
-            # Find missing nation_ids
-            missing_nation_ids = all_nation_ids - existing_nation_ids
-
-            if not missing_nation_ids:
-                logger.info("All nation_ids already exist in nations table")
-                return
-
-            logger.warning(f"Found {len(missing_nation_ids)} missing nation_ids: {sorted(missing_nation_ids)}")
-            logger.info("Creating stub nation records for orphaned nation references")
-
-            # Create stub records for missing nations
-            for nation_id in sorted(missing_nation_ids):
-                name = f"Nation {nation_id}"
-                abbr = f"N{nation_id}"
-
-                insert_sql = text("""
-                    INSERT INTO nations (
-                        nation_id, name, abbreviation, continent_id
-                    )
-                    VALUES (
-                        :nation_id, :name, :abbr, 1
-                    )
-                    ON CONFLICT (nation_id) DO NOTHING
-                """)
-
-                self.db.execute_sql(insert_sql, {'nation_id': int(nation_id), 'name': name, 'abbr': abbr})
-                logger.info(f"Created stub nation record for nation_id={nation_id} ('{name}')")
-
-            logger.success(f"Successfully created {len(missing_nation_ids)} stub nation records")
-
-        except Exception as e:
-            logger.error(f"Error creating missing nations: {e}")
-            # Don't raise - allow load to continue and fail with FK violation if needed
-
-    def _create_missing_leagues(self, csv_path: Path):
-        """Create stub league records for any league_ids in players.csv that don't exist in leagues table"""
-        logger.info("Checking for missing leagues referenced in players.csv")
-
-        try:
-            # Read players.csv to get all league_ids
-            df = pd.read_csv(csv_path)
-
-            # Collect all league_id columns
-            league_id_columns = ['league_id', 'last_league_id', 'loan_league_id']
-            all_league_ids = set()
-
-            for col in league_id_columns:
-                if col in df.columns:
-                    league_ids = set(df[col].dropna().unique())
-                    all_league_ids.update(league_ids)
-
-            # Convert to integers (keep ALL values including negatives - OOTP uses negative league_ids for special states)
-            all_league_ids = {int(lid) for lid in all_league_ids}
-
-            if not all_league_ids:
-                logger.info("No league_ids found in players.csv")
-                return
-
-            logger.info(f"Found {len(all_league_ids)} unique league_ids in players.csv")
-
-            # Get existing league_ids from database
-            existing_leagues_sql = text("SELECT league_id FROM leagues")
-            result = self.db.execute_sql(existing_leagues_sql)
-            existing_league_ids = {row[0] for row in result}
-
-            # Find missing league_ids
-            missing_league_ids = all_league_ids - existing_league_ids
-
-            if not missing_league_ids:
-                logger.info("All league_ids already exist in leagues table")
-                return
-
-            logger.warning(f"Found {len(missing_league_ids)} missing league_ids: {sorted(missing_league_ids)}")
-            logger.info("Creating stub league records for missing leagues")
-
-            # Create stub records for missing leagues
-            for league_id in sorted(missing_league_ids):
-                # Determine the league name based on league_id
-                if league_id == 0:
-                    name = "No League"
-                    abbr = "NONE"
-                else:
-                    name = f"SPECIAL_{league_id}"
-                    abbr = f"SP{league_id}"
-
-                insert_sql = text("""
-                    INSERT INTO leagues (
-                        league_id, name, abbr, nation_id, language_id, logo_file_name,
-                        parent_league_id, league_state, season_year, league_level,
-                        game_date, current_date_year
-                    )
-                    VALUES (
-                        :league_id, :name, :abbr, 0, NULL, NULL,
-                        NULL, 0, 0, 0,
-                        NULL, 0
-                    )
-                    ON CONFLICT (league_id) DO NOTHING
-                """)
-
-                self.db.execute_sql(insert_sql, {'league_id': int(league_id), 'name': name, 'abbr': abbr})
-                logger.info(f"Created stub league record for league_id={league_id} ('{name}')")
-
-            logger.success(f"Successfully created {len(missing_league_ids)} stub league records")
-
-        except Exception as e:
-            logger.error(f"Error creating missing leagues: {e}")
-            # Don't raise - allow load to continue and fail with FK violation if needed
-
-    def _create_missing_teams(self, csv_path: Path):
-        """Create stub team records for any team_ids in players.csv that don't exist in teams table"""
-        logger.info("Checking for missing teams referenced in players.csv")
-
-        try:
-            # Read players.csv to get all team_ids
-            df = pd.read_csv(csv_path)
-
-            # Collect all team_id columns
-            team_id_columns = ['team_id', 'last_team_id', 'organization_id', 'last_organization_id']
-            all_team_ids = set()
-
-            for col in team_id_columns:
-                if col in df.columns:
-                    team_ids = set(df[col].dropna().unique())
-                    all_team_ids.update(team_ids)
-
-            # Convert to integers (keep ALL values including negatives - OOTP may use negative team_ids)
-            all_team_ids = {int(tid) for tid in all_team_ids}
-
-            if not all_team_ids:
-                logger.info("No team_ids found in players.csv")
-                return
-
-            logger.info(f"Found {len(all_team_ids)} unique team_ids in players.csv")
-
-            # Get existing team_ids from database
-            existing_teams_sql = text("SELECT team_id FROM teams")
-            result = self.db.execute_sql(existing_teams_sql)
-            existing_team_ids = {row[0] for row in result}
-
-            # Find missing team_ids
-            missing_team_ids = all_team_ids - existing_team_ids
-
-            if not missing_team_ids:
-                logger.info("All team_ids already exist in teams table")
-                return
-
-            logger.warning(f"Found {len(missing_team_ids)} missing team_ids: {sorted(missing_team_ids)}")
-            logger.info("Creating stub team records for missing teams")
-
-            # Create stub records for missing teams
-            for team_id in sorted(missing_team_ids):
-                # Determine the team name based on team_id
-                if team_id == 0:
-                    name = "Free Agents"
-                    abbr = "FA"
-                else:
-                    name = f"SPECIAL_{team_id}"
-                    abbr = f"SP{team_id}"
-
-                insert_sql = text("""
-                    INSERT INTO teams (
-                        team_id, name, abbr, nickname, logo_file_name, city_id,
-                        park_id, league_id, sub_league_id, division_id, nation_id,
-                        parent_team_id, level, prevent_any_moves, human_team, human_id,
-                        gender, allstar_team
-                    )
-                    VALUES (
-                        :team_id, :name, :abbr, NULL, NULL, NULL,
-                        NULL, NULL, NULL, NULL, 0,
-                        NULL, 0, 0, 0, NULL,
-                        0, 0
-                    )
-                    ON CONFLICT (team_id) DO NOTHING
-                """)
-
-                self.db.execute_sql(insert_sql, {'team_id': int(team_id), 'name': name, 'abbr': abbr})
-                logger.info(f"Created stub team record for team_id={team_id} ('{name}')")
-
-            logger.success(f"Successfully created {len(missing_team_ids)} stub team records")
-
-        except Exception as e:
-            logger.error(f"Error creating missing teams: {e}")
-            # Don't raise - allow load to continue and fail with FK violation if needed
\ No newline at end of file
+    def _stage_fk_references(self, df: pd.DataFrame, columns: List[str]) -> str:
+        """COPY the referencing ID columns into a staging table for the FK repair"""
+        if not columns:
+            return None
+        staging_table = "staging_players_fk_refs"
+        self.staging_mgr.create_staging_from_csv_structure('players_fk_refs', {col: 'BIGINT' for col in columns})
+        self.staging_mgr.copy_csv_to_staging(staging_table, staging_table, df=df[columns])
+        return staging_table
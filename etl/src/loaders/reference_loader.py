@@ -3,10 +3,10 @@ from typing import List
 from pathlib import Path
 from loguru import logger
 from .base_loader import BaseLoader
-from ..utils.checksum import calculate_file_checksum
 from ..utils.message_filter import MessageFilter
 from sqlalchemy import text
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+import numpy as np
 import pandas as pd
 
 
@@ -19,22 +19,26 @@ class ReferenceLoader(BaseLoader):
         'continents.csv': {
             'table': 'continents',
             'primary_keys': ['continent_id'],
-            'load_order': 1
+            'load_order': 1,
+            'depends_on': [],
         },
         'nations.csv': {
             'table': 'nations',
             'primary_keys': ['nation_id'],
-            'load_order': 2
+            'load_order': 2,
+            'depends_on': ['continents.csv'],
         },
         'states.csv': {
             'table': 'states',
             'primary_keys': ['state_id', 'nation_id'],
-            'load_order': 3
+            'load_order': 3,
+            'depends_on': ['nations.csv'],
         },
         'cities.csv': {
             'table': 'cities',
             'primary_keys': ['city_id'],
             'load_order': 4,
+            'depends_on': ['nations.csv', 'states.csv'],
             'column_mapping': {
                 'city_id': 'city_id',
                 'nation_id': 'nation_id',
@@ -55,12 +59,14 @@ class ReferenceLoader(BaseLoader):
         'languages.csv': {
             'table': 'languages',
             'primary_keys': ['language_id'],
-            'load_order': 5
+            'load_order': 5,
+            'depends_on': [],
         },
         'parks.csv': {
             'table': 'parks',
             'primary_keys': ['park_id'],
             'load_order': 6,
+            'depends_on': ['nations.csv'],
             'column_mapping': {
                 'park_id': 'park_id',
                 'name': 'name',
@@ -93,6 +99,7 @@ class ReferenceLoader(BaseLoader):
               'table': 'leagues',
               'primary_keys': ['league_id'],
               'load_order': 7,
+              'depends_on': ['nations.csv', 'languages.csv'],
               'column_mapping': {
                   'league_id': 'league_id',
                   'name': 'name',
@@ -115,6 +122,9 @@ class ReferenceLoader(BaseLoader):
             'table': 'teams',
             'primary_keys': ['team_id'],
             'load_order': 8,
+            'depends_on': ['nations.csv', 'cities.csv', 'parks.csv', 'leagues.csv'],
+            # Stub leagues referenced by teams but missing from leagues.csv
+            'fk_repairs': [('league_id', 'leagues')],
             'calculated_fields': {
                 'parent_team_id': 'NULLIF(parent_team_id, 0)',
                 'city_id': 'NULLIF(city_id, 0)',
@@ -130,11 +140,13 @@ class ReferenceLoader(BaseLoader):
             'table': 'sub_leagues',
             'primary_keys': ['league_id', 'sub_league_id'],
             'load_order': 9,
+            'depends_on': ['leagues.csv'],
         },
         'divisions.csv': {
             'table': 'divisions',
             'primary_keys': ['league_id', 'sub_league_id', 'division_id'],
             'load_order': 10,
+            'depends_on': ['sub_leagues.csv'],
             'calculated_fields': {
                 'name': "CASE WHEN name = '' OR name IS NULL THEN 'No Division' ELSE name END"
             }
@@ -142,18 +154,21 @@ class ReferenceLoader(BaseLoader):
         'team_relations.csv': {
             'table': 'team_relations',
             'primary_keys': ['team_id'],
-            'load_order': 11
+            'load_order': 11,
+            'depends_on': ['teams.csv', 'divisions.csv'],
         },
         'team_record.csv': {
             'table': 'team_record',
             'primary_keys': ['team_id'],
             'load_order': 12,
+            'depends_on': ['teams.csv'],
         },
         # League History Tables (moved league_history to load-stats due to player FKs)
         'league_history.csv': {
             'table': 'league_history',
             'primary_keys': ['league_id', 'sub_league_id', 'year'],
             'load_order': 102,  # Moved to load-stats: has player FKs (best_hitter_id, best_pitcher_id, etc.)
+            'depends_on': ['leagues.csv', 'players.csv'],
             'calculated_fields': {
                 'best_hitter_id': 'NULLIF(best_hitter_id, 0)',
                 'best_pitcher_id': 'NULLIF(best_pitcher_id, 0)',
@@ -175,17 +190,20 @@ class ReferenceLoader(BaseLoader):
             'table': 'league_history_batting_stats',
             'primary_keys': ['year', 'team_id', 'game_id', 'league_id', 'level_id', 'split_id'],
             'load_order': 14,
+            'depends_on': ['leagues.csv', 'teams.csv'],
         },
         'league_history_pitching_stats.csv': {
             'table': 'league_history_pitching_stats',
             'primary_keys': ['year', 'team_id', 'game_id', 'level_id', 'split_id'],
             'load_order': 15,
+            'depends_on': ['leagues.csv', 'teams.csv'],
         },
         # Team history tables (moved team_history to load-stats due to player FKs)
         'team_history.csv': {
             'table': 'team_history',
             'primary_keys': ['team_id', 'year'],
             'load_order': 103,  # Moved to load-stats: has player FKs (best_hitter_id, best_pitcher_id, manager_id)
+            'depends_on': ['leagues.csv', 'teams.csv', 'players.csv'],
             'calculated_fields': {
                 'best_hitter_id': 'NULLIF(best_hitter_id, 0)',
                 'best_pitcher_id': 'NULLIF(best_pitcher_id, 0)',
@@ -197,22 +215,26 @@ class ReferenceLoader(BaseLoader):
             'table': 'team_history_batting_stats',
             'primary_keys': ['team_id', 'year'],
             'load_order': 17,
+            'depends_on': ['leagues.csv', 'teams.csv'],
         },
         'team_history_pitching_stats.csv': {
             'table': 'team_history_pitching_stats',
             'primary_keys': ['team_id', 'year'],
             'load_order': 18,
+            'depends_on': ['leagues.csv', 'teams.csv'],
         },
         'team_history_record.csv': {
             'table': 'team_history_record',
             'primary_keys': ['team_id', 'year'],
             'load_order': 19,
+            'depends_on': ['leagues.csv', 'teams.csv'],
         },
         # Newspaper/transaction tables (no player FKs)
         'trade_history.csv': {
             'table': 'trade_history',
             'primary_keys': ['trade_id'],
             'load_order': 20,
+            'depends_on': ['teams.csv'],
             'load_strategy': 'incremental',  # Never delete historical trades
             'column_mapping': {
                 # Exclude trade_id - it's auto-generated SERIAL
@@ -284,6 +306,7 @@ class ReferenceLoader(BaseLoader):
             'table': 'messages',
             'primary_keys': ['message_id'],
             'load_order': 21,
+            'depends_on': [],
             'load_strategy': 'incremental',  # Never delete historical messages
             'apply_filters': True,  # Enable message filtering
             'calculated_fields': {
@@ -306,6 +329,7 @@ class ReferenceLoader(BaseLoader):
             'table': 'coaches',
             'primary_keys': ['coach_id'],
             'load_order': 99,  # Manual load only
+            'depends_on': ['nations.csv', 'cities.csv', 'teams.csv', 'players.csv'],
             'calculated_fields': {
                 'former_player_id': 'NULLIF(former_player_id, 0)'
             }
@@ -313,12 +337,14 @@ class ReferenceLoader(BaseLoader):
         'team_roster.csv': {
             'table': 'team_roster',
             'primary_keys': ['team_id', 'player_id'],
-            'load_order': 100  # Manual load only
+            'load_order': 100,  # Manual load only
+            'depends_on': ['teams.csv', 'players.csv'],
         },
         'team_roster_staff.csv': {
             'table': 'team_roster_staff',
             'primary_keys': ['team_id'],
-            'load_order': 101  # Manual load only
+            'load_order': 101,  # Manual load only
+            'depends_on': ['teams.csv'],
         }
 
     }
@@ -369,124 +395,50 @@ class ReferenceLoader(BaseLoader):
             return ['*']  # Update all columns except primary key
         return []  # Other reference tables: insert-only
 
-    def _handle_skip_strategy(self, csv_path: Path) -> bool:
-        """Override to implement checksum comparison"""
-        logger.info(f"Checking if {csv_path.name} has changed...")
-
-        # Calculate current file checksum
-        current_checksum = calculate_file_checksum(csv_path)
-
-        # Get stored checksum from metadata
-        stored_checksum = self._get_stored_checksum(csv_path.name)
-
-        if stored_checksum and current_checksum == stored_checksum:
-            logger.info(f"File {csv_path.name} unchanged (checksum: {current_checksum[:8]}...")
-            self._record_file_completion(csv_path, 'skipped')
-            return True
-
-        # File has changed or is new, perform full load
-        logger.info(f"File {csv_path.name} has changed, performing full load")
-        success = self._handle_full_load(csv_path)
+    def _get_row_filter(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Message filter mask if configured (incremental loads)"""
+        if self.config.get('apply_filters') and self.csv_filename == 'messages.csv':
+            return self._build_message_filter_mask(df)
+        return None
 
-        if success:
-            # Update stored checksum
-            self._update_stored_checksum(csv_path.name, current_checksum)
-        return success
+    def get_fk_repairs(self) -> List[Tuple[str, str]]:
+        """Orphaned references stubbed during the load, from 'fk_repairs' in REFERENCE_TABLES"""
+        return self.config.get('fk_repairs', [])
 
-    def _handle_incremental_load(self, csv_path: Path) -> bool:
-        """Handle incremental load with UPSERT - preserves historical records"""
-        target_table = self.get_target_table()
-        staging_table = f"staging_{target_table}"
-        column_mapping = self.get_column_mapping()
+    def get_required_csv_columns(self) -> List[str]:
+        """Message filters read columns that are not loaded"""
+        if self.config.get('apply_filters') and self.csv_filename == 'messages.csv':
+            return MessageFilter.COLUMNS
+        return []
 
-        logger.info(f"Performing incremental load for {target_table} (preserves all historical data)")
+    def get_dtype_overrides(self) -> Dict[str, str]:
+        """Optional per-file pandas dtypes from 'dtypes' in REFERENCE_TABLES"""
+        return self.config.get('dtypes', {})
 
-        # Read CSV
-        try:
-            df = pd.read_csv(csv_path)
-        except pd.errors.ParserError as e:
-            logger.warning(f"Malformed CSV detected, attempting to skip bad lines: {e}")
-            df = pd.read_csv(csv_path, on_bad_lines='skip', engine='python')
-            logger.info(f"Successfully loaded CSV with {len(df)} rows (skipped bad lines)")
+    def should_delete_missing_rows(self) -> bool:
+        """Tables opt in via 'delete_missing' in REFERENCE_TABLES (messages/trades keep history)"""
+        return self.config.get('delete_missing', False)
 
-        # Apply message filtering if configured
-        if self.config.get('apply_filters') and self.csv_filename == 'messages.csv':
-            df = self._apply_message_filters(df)
-
-        # Apply CSV preprocessing
-        from ..utils.csv_preprocessor import CSVPreprocessor
-        primary_keys = self.get_primary_keys()
-
-        dedup_subset = None
-        if primary_keys and column_mapping:
-            reverse_mapping = {v: k for k, v in column_mapping.items()}
-            dedup_subset = [reverse_mapping.get(pk) for pk in primary_keys if reverse_mapping.get(pk)]
-            if not dedup_subset or len(dedup_subset) != len(primary_keys):
-                dedup_subset = None
-        elif primary_keys:
-            dedup_subset = primary_keys
-
-        df = CSVPreprocessor.preprocess(df, config={
-            'clean_quoted_strings': True,
-            'deduplicate': True,
-            'dedup_subset': dedup_subset
-        })
-
-        # Filter columns based on column mapping
-        if column_mapping:
-            csv_columns = list(column_mapping.keys())
-            df_to_load = df[csv_columns].copy()
-            df_to_load = df_to_load.rename(columns=column_mapping)
-        else:
-            df_to_load = df
-
-        # Create staging table
-        columns = self._infer_column_types(df_to_load)
-        self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
-
-        # Load data into staging
-        row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df_to_load)
-        self.stats['rows_read'] = row_count
-
-        # Calculate derived fields
-        self._calculate_derived_fields(staging_table)
-
-        # Perform UPSERT from staging to target
-        upserted_count = self._upsert_from_staging(staging_table, target_table)
-        self.stats['rows_inserted'] = upserted_count
-
-        # Cleanup staging table
-        self.staging_mgr.drop_staging_table(staging_table)
-        self._record_file_completion(csv_path, 'success')
-
-        logger.info(f"Incremental load complete: {upserted_count} rows upserted (no historical data removed)")
-        return True
-
-    def _apply_message_filters(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Apply message filtering based on configuration"""
+    def _build_message_filter_mask(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Mask of the messages passing the configured filters"""
         try:
             from config.etl_config import MESSAGE_FILTERS
 
             message_filter = MessageFilter(MESSAGE_FILTERS)
             logger.info(message_filter.get_filter_summary())
-
-            filtered_df = message_filter.filter_messages(df)
-            return filtered_df
+            return message_filter.build_mask(df)
         except ImportError:
             logger.warning("Could not import MESSAGE_FILTERS from config, skipping filters")
-            return df
+            return None
         except Exception as e:
             logger.error(f"Error applying message filters: {e}")
-            return df
+            return None
 
     def _handle_full_load(self, csv_path: Path) -> bool:
         """Override to handle special pre/post-load operations"""
 
         # Pre-load operations
-        if self.csv_filename == 'teams.csv':
-            # Create stub leagues for any missing league_ids before loading teams
-            self._create_missing_leagues(csv_path)
-        elif self.csv_filename == 'sub_leagues.csv':
+        if self.csv_filename == 'sub_leagues.csv':
             # Validate sub_leagues data quality
             if not self._validate_sub_leagues(csv_path):
                 logger.error("sub_leagues.csv validation failed - skipping load")
@@ -507,9 +459,7 @@ class ReferenceLoader(BaseLoader):
         logger.info("Validating sub_leagues.csv data quality")
 
         try:
-            import pandas as pd
-
-            df = pd.read_csv(csv_path)
+            df = self._read_csv(csv_path)
 
             # Check for NULL/empty names
             null_names = df[df['name'].isna() | (df['name'] == '')]
@@ -538,66 +488,6 @@ class ReferenceLoader(BaseLoader):
             logger.error(f"Error validating sub_leagues.csv: {e}")
             return False
 
-    def _create_missing_leagues(self, csv_path: Path):
-        """Create stub league records for any league_ids in teams.csv that don't exist in leagues table"""
-        logger.info("Checking for missing leagues referenced in teams.csv")
-
-        try:
-            import pandas as pd
-
-            # Read teams.csv to get all league_ids
-            df = pd.read_csv(csv_path)
-            if 'league_id' not in df.columns:
-                logger.warning("No league_id column in teams.csv")
-                return
-
-            # Get unique league_ids from teams (excluding 0 and NULL)
-            team_league_ids = set(df['league_id'].dropna().unique())
-            team_league_ids.discard(0)
-
-            if not team_league_ids:
-                logger.info("No league_ids found in teams.csv")
-                return
-
-            # Get existing league_ids from database
-            existing_leagues_sql = text("SELECT league_id FROM leagues")
-            result = self.db.execute_sql(existing_leagues_sql)
-            existing_league_ids = {row[0] for row in result}
-
-            # Find missing league_ids
-            missing_league_ids = team_league_ids - existing_league_ids
-
-            if not missing_league_ids:
-                logger.info("All league_ids in teams.csv already exist in leagues table")
-                return
-
-            logger.warning(f"Found {len(missing_league_ids)} missing league_ids: {sorted(missing_league_ids)}")
-            logger.info("Creating stub league records for missing leagues")
-
-            # Create stub records for missing leagues
-            for league_id in sorted(missing_league_ids):
-                insert_sql = text("""
-                    INSERT INTO leagues (
-                        league_id, name, abbr, nation_id, language_id, logo_file_name,
-                        parent_league_id, league_state, season_year, league_level,
-                        game_date, current_date_year
-                    )
-                    VALUES (
-                        :league_id, 'SPECIAL', 'SPEC', 0, NULL, NULL,
-                        NULL, 0, 0, 0,
-                        NULL, 0
-                    )
-                    ON CONFLICT (league_id) DO NOTHING
-                """)
-                self.db.execute_sql(insert_sql, {'league_id': int(league_id)})
-                logger.info(f"Created stub league record for league_id={league_id}")
-
-            logger.success(f"Successfully created {len(missing_league_ids)} stub league records")
-
-        except Exception as e:
-            logger.error(f"Error creating missing leagues: {e}")
-            # Don't raise - let the load continue and fail with FK error if needed
-
     def _add_placeholder_nation(self):
         """Add nation_id=0 placeholder record"""
         logger.info("Adding nation_id=0 placeholder record")
@@ -610,34 +500,6 @@ class ReferenceLoader(BaseLoader):
         logger.info("Nation placeholder record added")
 
 
-    def _get_stored_checksum(self, filename: str) -> str:
-        """Get stored checksum from metadata table"""
-        sql = text("""
-        SELECT checksum
-        FROM etl_file_metadata
-        WHERE filename = :filename
-        """)
-
-        with self.db.get_session() as session:
-            result = session.execute(sql, {'filename': filename}).scalar()
-            return result
-
-
-    def _update_stored_checksum(self, filename: str, checksum: str):
-        """Update stored checksum in metadata table"""
-        sql = text(f"""INSERT INTO etl_file_metadata (filename, checksum, load_strategy, last_processed)
-        VALUES (:filename, :checksum, :strategy, CURRENT_TIMESTAMP)
-        ON CONFLICT (filename) DO UPDATE SET
-        checksum = EXCLUDED.checksum,
-        last_processed = EXCLUDED.last_processed""")
-
-        self.db.execute_sql(sql, {
-            'filename': filename,
-            'checksum': checksum,
-            'strategy': self.get_load_strategy()
-        })
-
-
     @classmethod
     def get_load_order(cls) -> List[str]:
         """Return CSV files in dependency order (excludes manual-load-only tables with load_order >= 99)"""
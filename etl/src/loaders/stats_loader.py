@@ -15,6 +15,10 @@ class StatsLoader(BaseLoader):
 
     def get_load_strategy(self) -> str:
         return 'incremental'
+
+    def get_calculation_type(self) -> Optional[str]:
+        """Changed seasons are queued for the league constants / advanced metrics recalculation"""
+        return 'league_constants'
     
     def should_update_calculated_fields(self) -> bool:
         """
@@ -23,23 +27,21 @@ class StatsLoader(BaseLoader):
         """
         return True
 
-    def _populate_subleague_id(self, staging_table: str):
-        """Populate sub_league_id from team_relations"""
-        logger.info(f"Populating sub_league_id in {staging_table} from team_relations")
-        # Add sub_league_id column if not exists
-        add_column_sql = text(f""" ALTER TABLE {staging_table}
-        ADD COLUMN IF NOT EXISTS sub_league_id INTEGER
-        """)
-        self.db.execute_sql(add_column_sql)
-
-        # Populate sub_league_id
-        update_sql = text(f""" UPDATE {staging_table} s
-        SET sub_league_id = tr.sub_league_id
-        FROM team_relations tr
-        WHERE s.team_id = tr.team_id""")
-
-        self.db.execute_sql(update_sql)
-        logger.info(f"sub_league_id population complete in {staging_table}")
+    def _get_team_sub_leagues(self) -> pd.Series:
+        """team_id -> sub_league_id from team_relations (read once per loader)"""
+        if 'sub_league_id' not in self._team_relations_cache:
+            result = self.db.execute_sql(text("SELECT team_id, sub_league_id FROM team_relations"))
+            rows = result.fetchall()
+            self._team_relations_cache['sub_league_id'] = pd.Series(
+                [row[1] for row in rows], index=[row[0] for row in rows], dtype='Int32')
+        return self._team_relations_cache['sub_league_id']
+
+    def _add_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """sub_league_id from team_relations (teams without a relation keep the file's value)"""
+        sub_leagues = df['team_id'].map(self._get_team_sub_leagues())
+        if 'sub_league_id' in df:
+            sub_leagues = sub_leagues.fillna(df['sub_league_id'])
+        return df.assign(sub_league_id=sub_leagues.astype('Int32'))
 
     def _handle_incremental_load(self, csv_path: Path) -> bool:
         """Stats-specific incremental load with sub_league population"""
@@ -48,32 +50,42 @@ class StatsLoader(BaseLoader):
 
         # Standard column mapping and staging load
         column_mapping = self.get_column_mapping()
-        df = pd.read_csv(csv_path)
-
-        # FILTER TO ONLY SPLIT_ID=1 (regular season totals)
-        df = df[df['split_id'] == 1]
-        logger.info(f"Filtered to split_id=1: {len(df)} rows remaining from {len(pd.read_csv(csv_path))} total")
-
-        if column_mapping:
-            df = df.rename(columns=column_mapping)
-
-        # Create staging table
-        columns = self._infer_column_types(df)
-        self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
-
-        # Load to staging
-        row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df)
-        self.stats['rows_read'] = row_count
-
-        # Add subleague BEFORE calculating stats
-        self._populate_subleague_id(staging_table)
-
-        # Calculate basic rate stats
-        self._calculate_derived_fields(staging_table)
+        with self.timer.phase('read') as phase:
+            df = self._read_csv(csv_path)
+            total_rows = len(df)
+            phase.add_rows(total_rows)
+
+        with self.timer.phase('preprocess') as phase:
+            # FILTER TO ONLY SPLIT_ID=1 (regular season totals)
+            df = df[df['split_id'] == 1]
+            logger.info(f"Filtered to split_id=1: {len(df)} rows remaining from {total_rows} total")
+
+            if column_mapping:
+                df = df.rename(columns=column_mapping)
+            phase.add_rows(len(df))
+
+        # sub_league_id and the rate stats are computed here and staged with the counting stats
+        with self.timer.phase('derived_fields'):
+            df = self._add_derived_columns(df)
+
+        with self.timer.phase('fk_check') as phase:
+            df = self._validate_foreign_keys(df)
+            phase.add_rows(len(df))
+
+        with self.timer.phase('staging_copy') as phase:
+            # Create staging table
+            columns = self._infer_column_types(df)
+            self.staging_mgr.create_staging_from_csv_structure(target_table, columns)
+
+            # Load to staging
+            row_count = self.staging_mgr.copy_csv_to_staging(str(csv_path), staging_table, df=df)
+            self.stats['rows_read'] = row_count
+            phase.add_rows(row_count)
 
         # UPSERT from staging
-        upserted = self._upsert_from_staging(staging_table, target_table)
-        self.stats['rows_inserted'] = upserted
+        with self.timer.phase('upsert') as phase:
+            self._upsert_from_staging(staging_table, target_table)
+            phase.add_rows(row_count)
 
         # Cleanup
         self.staging_mgr.drop_staging_table(staging_table)
@@ -1,9 +1,20 @@
 """Transformer for calculating league-wide constants needed for advanced metrics"""
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict
 from loguru import logger
 from sqlalchemy import text
 from ..loaders.base_loader import BaseLoader
 from ..utils.batch import generate_batch_id
+from config.etl_config import CONSTANTS_MAX_WORKERS
+
+# etl_calculation_queue entries queued by the stats loaders (StatsLoader.get_calculation_type)
+CALCULATION_TYPE = 'league_constants'
+# Failed seasons are retried by later runs up to this many times
+MAX_RETRIES = 3
+# Tables written by refresh_all_calculations, recorded as changed for the view refresh
+CALCULATED_TABLES = ['league_runs_per_out', 'run_values', 'fip_constants', 'sub_league_batting_environment',
+                     'sub_league_pitching_environment', 'players_career_batting_stats',
+                     'players_career_pitching_stats']
 
 class LeagueConstantsTransformer(BaseLoader):
     """
@@ -13,15 +24,19 @@ class LeagueConstantsTransformer(BaseLoader):
     - FIP constants
     - Sub_league batting and pitching environments
     """
-    def __init__(self, batch_id: str = None, force_all: bool = False):
+    def __init__(self, batch_id: str = None, force_all: bool = False, max_workers: int = None):
         """Initialize the transformer
         Args:
             batch_id: Batch identifier for tracking
-            force_all: If True, recalculate all years (for initial loads/rebuilds) If False, only calculate current.
-            season.
+            force_all: If True, recalculate all years (for initial loads/rebuilds). If False, only
+            the seasons whose stats changed (queued in etl_calculation_queue).
+            max_workers: Seasons calculated concurrently (default CONSTANTS_MAX_WORKERS)
         """
         super().__init__(batch_id or generate_batch_id())
         self.force_all = force_all
+        self.max_workers = max(1, max_workers or CONSTANTS_MAX_WORKERS)
+        self._claimed_ids: List[int] = []  # etl_calculation_queue rows claimed by this run
+        self._claimed_at = None  # their started_at; a stale entry reclaimed by another run gets a new one
 
     def get_load_strategy(self) -> str:
         """Return load strategy - incremental for year-specific processing"""
@@ -53,6 +68,8 @@ class LeagueConstantsTransformer(BaseLoader):
 
     def transform_constants(self) -> bool:
         """Main entry point to calculate all league constants.
+
+        Seasons are processed concurrently, each on its own connection.
         Returns:
             True if successful, False otherwise.
         """
@@ -60,27 +77,36 @@ class LeagueConstantsTransformer(BaseLoader):
             years_to_process = self._get_years_to_process()
 
             if not years_to_process:
-                logger.warning("No years found to process for constants calculation")
-                return False
-
-            logger.info(f"Processing constants for {len(years_to_process)} years")
-
-            for year in years_to_process:
-                logger.info(f"Processing year {year}")
-
-                # Validate prerequisites
-                if not self._validate_prerequisites(year):
-                    logger.error(f"Prerequisites validation failed for year {year}")
-                    return False
-
-                # Calculate constants for this year
-                if not self._calculate_year_constants(year):
-                    logger.error(f"Year constants calculation failed for year {year}")
+                if self.force_all:
+                    logger.warning("No years found to process for constants calculation")
                     return False
+                logger.info("No season changed since the last calculation, league constants are current")
+                return True
 
-                # Record metadata
-                self._record_year_calculation(year)
-
+            # Seasons count as failed until calculated, so an error still releases the claimed entries
+            failed = list(years_to_process)
+            try:
+                years = self._validate_prerequisites(years_to_process)
+                invalid = [year for year in years_to_process if year not in years]
+                results = {}
+
+                if years:
+                    workers = min(self.max_workers, len(years))
+                    logger.info(f"Processing constants for {len(years)} years with {workers} workers")
+                    with self.timer.phase('constants', table_name=self.get_target_table()) as phase:
+                        with ThreadPoolExecutor(max_workers=workers) as pool:
+                            results = dict(zip(years, pool.map(self._process_year, years)))
+                        phase.add_rows(len(years))
+                failed = invalid + [year for year, success in results.items() if not success]
+                if any(results.values()):
+                    self._record_table_changes(CALCULATED_TABLES)
+            finally:
+                self._complete_queue(failed)
+            self._save_phases()
+
+            if failed:
+                logger.error(f"Constants calculation failed for years {sorted(failed)}")
+                return False
             logger.info("All constants calculations complete")
             return True
         except Exception as e:
@@ -89,12 +115,47 @@ class LeagueConstantsTransformer(BaseLoader):
             logger.error(traceback.format_exc())
             return False
 
+    def _process_year(self, year: int) -> bool:
+        """Calculate, verify and record one season (runs in a worker thread); False if any step fails"""
+        logger.info(f"Processing year {year}")
+        try:
+            if not self._calculate_year_constants(year):
+                logger.error(f"Year constants calculation failed for year {year}")
+                return False
+
+            total_rows = self._verify_calculations(year)
+            if total_rows is None:
+                return False
+
+            # Record metadata
+            self._record_year_calculation(year, total_rows)
+            return True
+        except Exception as e:
+            logger.error(f"Constants calculation failed for year {year}: {e}")
+            return False
+
     def _get_years_to_process(self) -> List[int]:
         """
         Determine which years need to be processed.
+
+        Claims the pending (and retryable failed) 'league_constants' entries the
+        stats loaders queued for changed (year, league_id) pairs. The SQL
+        functions recalculate a whole season, so pairs are reduced to years.
         :return:
         List of years to process
         """
+        claimed = self.db.execute_sql(text("""
+            UPDATE etl_calculation_queue
+            SET status = 'processing', started_at = CURRENT_TIMESTAMP
+            WHERE calculation_type = :calculation_type
+              AND (status = 'pending'
+                   OR (status = 'failed' AND retry_count < :max_retries)
+                   OR (status = 'processing' AND started_at < CURRENT_TIMESTAMP - INTERVAL '1 hour'))
+            RETURNING queue_id, year, league_id, started_at
+        """), {'calculation_type': CALCULATION_TYPE, 'max_retries': MAX_RETRIES}).fetchall()
+        self._claimed_ids = [row[0] for row in claimed]
+        self._claimed_at = claimed[0][3] if claimed else None
+
         if self.force_all:
             sql = text("""
             SELECT DISTINCT year
@@ -108,54 +169,54 @@ class LeagueConstantsTransformer(BaseLoader):
             logger.info(f"Force all mode: Processing all {len(years)} years")
 
         else:
-            # Only current season
-            sql = text("""
-            SELECT MAX(season_year)
-            FROM leagues
-            """)
-            current_year = self.db.execute_sql(sql).scalar()
-            years = [current_year] if current_year else []
-            logger.info(f"Incremental mode: Processing current year {current_year}")
+            years = sorted({row[1] for row in claimed if row[1] is not None})
+            logger.info(f"Incremental mode: {len(claimed)} changed (year, league) pairs in "
+                        f"{len(years)} seasons {years}")
         return years
 
-    def _validate_prerequisites(self, year: int) -> bool:
+    def _complete_queue(self, failed_years: List[int]):
+        """Mark the entries this run claimed completed, or failed (retried by the next run)"""
+        if not self._claimed_ids:
+            return
+        self.db.execute_sql(text("""
+            UPDATE etl_calculation_queue
+            SET status = CASE WHEN year = ANY(CAST(:failed AS INTEGER[])) THEN 'failed' ELSE 'completed' END,
+                retry_count = retry_count + CASE WHEN year = ANY(CAST(:failed AS INTEGER[])) THEN 1 ELSE 0 END,
+                completed_at = CURRENT_TIMESTAMP
+            WHERE queue_id = ANY(CAST(:queue_ids AS INTEGER[])) AND status = 'processing'
+              AND started_at = :claimed_at
+        """), {'queue_ids': self._claimed_ids, 'claimed_at': self._claimed_at, 'failed': list(failed_years)})
+
+    def _validate_prerequisites(self, years: List[int]) -> List[int]:
         """
         Ensure required data exists before calculating constants.
-        :param year: Year to validate
-        :return: True if prerequisites validation is successful, False otherwise.
+        :param years: Years to validate
+        :return: The years whose prerequisites are present
         """
-        # Check for batting stats
-        sql = text("""
-        SELECT COUNT(*) FROM players_career_batting_stats
-        WHERE year = :year AND split_id = 1
-        """)
-
-        batting_count = self.db.execute_sql(sql, {'year': year}).scalar()
-        if batting_count == 0:
-            logger.error(f"Prerequisites validation failed for year {year} - Batting")
-            return False
-
-        # Check pitching stats
-        sql = text("""
-        SELECT COUNT(*) FROM players_career_pitching_stats
-        WHERE year = :year AND split_id = 1
-        """)
-        pitching_count = self.db.execute_sql(sql, {'year': year}).scalar()
-        if pitching_count == 0:
-            logger.error(f"Prerequisites validation failed for year {year} - Pitching")
-            return False
-
-        # Check for player positions which are needed for batting environment
-        sql = text("""
-        SELECT COUNT(*) FROM players_current_status
-        """)
-        current_status = self.db.execute_sql(sql).scalar()
-        if current_status == 0:
-            logger.error(f"Prerequisites validation failed for year {year} - Player Current Status")
-            return False
-
-        logger.debug(f"Prerequisites validated for year {year}: {batting_count} batters, {pitching_count} pitchers.")
-        return True
+        # Player positions are needed for the batting environment of every year
+        current_status = self.db.execute_sql(text("SELECT EXISTS (SELECT 1 FROM players_current_status)")).scalar()
+        if not current_status:
+            logger.error("Prerequisites validation failed - Player Current Status")
+            return []
+
+        # Batting and pitching stats for each year, in one round trip
+        result = self.db.execute_sql(text("""
+        SELECT y.year,
+               EXISTS (SELECT 1 FROM players_career_batting_stats b WHERE b.year = y.year AND b.split_id = 1),
+               EXISTS (SELECT 1 FROM players_career_pitching_stats p WHERE p.year = y.year AND p.split_id = 1)
+        FROM unnest(CAST(:years AS INTEGER[])) AS y (year)
+        """), {'years': list(years)})
+
+        valid = []
+        for year, has_batting, has_pitching in result:
+            if not has_batting:
+                logger.error(f"Prerequisites validation failed for year {year} - Batting")
+            elif not has_pitching:
+                logger.error(f"Prerequisites validation failed for year {year} - Pitching")
+            else:
+                valid.append(year)
+        logger.debug(f"Prerequisites validated for {len(valid)} of {len(years)} years")
+        return valid
 
     def _calculate_year_constants(self, year: int) -> bool:
         """
@@ -169,56 +230,38 @@ class LeagueConstantsTransformer(BaseLoader):
                 logger.debug(f"Calling refresh_all_calculations({year})")
                 session.execute(text("SELECT refresh_all_calculations(:year)"), {"year": year})
                 session.commit()
-
-                # Verify calculations succeeded
-                if not self._verify_calculations(year):
-                    raise Exception(f"Constants verification failed for year {year}")
                 return True
             except Exception as e:
                 session.rollback()
                 logger.error(f"Failed to calculate constants for year {year}: {e}")
                 return False
 
-    def _verify_calculations(self, year: int) -> bool:
+    def _verify_calculations(self, year: int) -> Optional[int]:
         """
         Verify that constants were calculated successfully
         :param year: Year to verify
-        :return: True if verification passes
+        :return: Total constants rows for the year, or None if verification fails
         """
-        # Check league_runs_per_out
         sql = text("""
-        SELECT COUNT(*) FROM league_runs_per_out WHERE year = :year
-        """)
-        count = self.db.execute_sql(sql, {"year": year}).scalar()
-        if count == 0:
-            logger.error(f"No league_runs_per_out records for year {year}")
-            return False
-
-        # Check run_values
-        sql = text("""
-        SELECT COUNT(*) FROM run_values WHERE year = :year
-        """)
-        count = self.db.execute_sql(sql, {"year": year}).scalar()
-        if count == 0:
-            logger.error(f"No run_values records for year {year}")
-            return False
-
-        # Check FIP constants
-        sql = text("""
-        SELECT COUNT(*) FROM fip_constants WHERE year = :year
+        SELECT
+            (SELECT COUNT(*) FROM league_runs_per_out WHERE year = :year),
+            (SELECT COUNT(*) FROM run_values WHERE year = :year),
+            (SELECT COUNT(*) FROM fip_constants WHERE year = :year)
         """)
-        count = self.db.execute_sql(sql, {"year": year}).scalar()
-        if count == 0:
-            logger.error(f"No fip_constants records for year {year}")
-            return False
+        counts = self.db.execute_sql(sql, {"year": year}).one()
+        for table, count in zip(('league_runs_per_out', 'run_values', 'fip_constants'), counts):
+            if count == 0:
+                logger.error(f"No {table} records for year {year}")
+                return None
 
         logger.info(f"Constants verified successfully for year {year}")
-        return True
+        return sum(counts)
 
-    def _record_year_calculation(self, year: int):
+    def _record_year_calculation(self, year: int, total_rows: int):
         """
         Record metadata about the calculation
         :param year: Year that was calculated
+        :param total_rows: Constants rows written for the year
         :return:
         """
         sql = text("""
@@ -242,15 +285,6 @@ class LeagueConstantsTransformer(BaseLoader):
         last_processed = CURRENT_TIMESTAMP
         """)
 
-        # Get total rows processed
-        count_sql = text("""
-        SELECT
-            (SELECT COUNT(*) FROM league_runs_per_out WHERE year = :year) +
-            (SELECT COUNT(*) FROM run_values WHERE year = :year) +
-            (SELECT COUNT(*) FROM fip_constants WHERE year = :year)
-            """)
-        total_rows = self.db.execute_sql(count_sql, {"year": year}).scalar()
-
         self.db.execute_sql(sql, {
             'filename': f'constants_year_{year}',
             'batch_id': self.batch_id,
@@ -0,0 +1,71 @@
+"""Basic rate stats of the career batting and pitching files, computed in pandas before COPY.
+
+Every rate is a ratio of counting stats, so it is rounded in exact integer
+arithmetic, half away from zero like PostgreSQL's ROUND(numeric). A rate whose
+denominator is not positive is 0, and a missing counting stat gives a missing
+rate, as the SQL expressions these replace did.
+"""
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+BATTING_COLUMNS = ['ab', 'h', 'd', 't', 'hr', 'bb', 'hp', 'sf', 'k']
+PITCHING_COLUMNS = ['outs', 'er', 'bb', 'ha', 'hra', 'k', 'ab', 'sf']
+
+
+def _scaled_ratio(numerator: pd.Series, denominator: pd.Series, digits: int) -> pd.Series:
+    """numerator / denominator rounded to digits decimals, times 10**digits (float, NaN where missing)"""
+    num = pd.to_numeric(numerator)
+    den = pd.to_numeric(denominator)
+    valid = (den > 0).fillna(False).to_numpy(dtype=bool)
+    n = num.fillna(0).to_numpy(dtype=np.int64)
+    d = np.where(valid, den.fillna(1).to_numpy(dtype=np.int64), 1)
+
+    scaled = (2 * np.abs(n) * 10 ** digits + d) // (2 * d) * np.sign(n)
+    result = np.where(valid, scaled, 0).astype(np.float64)
+    result[valid & num.isna().to_numpy()] = np.nan
+    return pd.Series(result, index=numerator.index)
+
+
+def rounded_ratio(numerator: pd.Series, denominator: pd.Series, digits: int) -> pd.Series:
+    """ROUND(numerator / denominator, digits), or 0 when the denominator is not positive"""
+    return _scaled_ratio(numerator, denominator, digits) / 10 ** digits
+
+
+def _counts(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Counting stats widened to Int64, so 27 * er cannot overflow a compact Int16 column"""
+    return df[columns].astype('Int64')
+
+
+def batting_rates(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """AVG, OBP, SLG, OPS, ISO and BABIP of players_career_batting_stats rows"""
+    df = _counts(df, BATTING_COLUMNS)
+    avg = _scaled_ratio(df['h'], df['ab'], 3)
+    obp = _scaled_ratio(df['h'] + df['bb'] + df['hp'], df['ab'] + df['bb'] + df['hp'] + df['sf'], 3)
+    # Total bases: singles + 2 * doubles + 3 * triples + 4 * home runs
+    slg = _scaled_ratio(df['h'] + df['d'] + 2 * df['t'] + 3 * df['hr'], df['ab'], 3)
+    return {
+        'batting_average': avg / 1000,
+        'on_base_percentage': obp / 1000,
+        'slugging_percentage': slg / 1000,
+        # Sums of already rounded rates, as ROUND(on_base_percentage + slugging_percentage, 3) was
+        'ops': (obp + slg) / 1000,
+        'iso': (slg - avg) / 1000,
+        'babip': rounded_ratio(df['h'] - df['hr'], df['ab'] - df['k'] - df['hr'] + df['sf'], 3),
+    }
+
+
+def pitching_rates(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """ERA, WHIP, K/9, BB/9, HR/9, H/9 and BABIP of players_career_pitching_stats rows (innings = outs / 3)"""
+    df = _counts(df, PITCHING_COLUMNS)
+    outs = df['outs']
+    babip = rounded_ratio(df['ha'] - df['hra'], df['ab'] - df['k'] - df['hra'] + df['sf'], 3)
+    return {
+        'era': rounded_ratio(27 * df['er'], outs, 2),
+        'whip': rounded_ratio(3 * (df['bb'] + df['ha']), outs, 2),
+        'k9': rounded_ratio(27 * df['k'], outs, 1),
+        'bb9': rounded_ratio(27 * df['bb'], outs, 1),
+        'hr9': rounded_ratio(27 * df['hra'], outs, 1),
+        'h9': rounded_ratio(27 * df['ha'], outs, 1),
+        'babip': babip.clip(upper=0.999).where((df['ha'] >= df['hra']).fillna(False), 0.0),
+    }
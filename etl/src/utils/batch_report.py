@@ -0,0 +1,95 @@
+"""Batch performance report: slowest phases, throughput per table and change from the previous batch"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+
+
+@dataclass
+class PhaseTotal:
+    """One phase of one table in a batch (rows of etl_performance_metrics added up)"""
+    phase: str
+    table_name: Optional[str]
+    seconds: float
+    rows: Optional[int] = None
+    peak_memory_mb: Optional[int] = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[str]]:
+        return self.phase, self.table_name
+
+
+def get_batches(connection, batch_id: str = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """The batch to report (default: the latest with metrics) and the one before it"""
+    result = connection.execute(text("""
+        SELECT b.batch_id::text, b.started_at, b.status, CAST(b.stats->>'wall_time_seconds' AS NUMERIC)
+        FROM etl_batch_runs b
+        WHERE EXISTS (SELECT 1 FROM etl_performance_metrics m WHERE m.batch_id = b.batch_id)
+        ORDER BY b.started_at DESC
+    """))
+    batches = [{'batch_id': row[0], 'started_at': row[1], 'status': row[2],
+                'wall_time_seconds': float(row[3]) if row[3] is not None else None} for row in result]
+    for i, batch in enumerate(batches):
+        if batch_id is None or batch['batch_id'] == batch_id:
+            return batch, batches[i + 1] if i + 1 < len(batches) else None
+    return None, None
+
+
+def get_phase_totals(connection, batch_id: str) -> List[PhaseTotal]:
+    result = connection.execute(text("""
+        SELECT metric_type, table_name, SUM(duration_seconds), SUM(rows_processed), MAX(memory_usage_mb)
+        FROM etl_performance_metrics
+        WHERE batch_id = CAST(:batch_id AS UUID)
+        GROUP BY metric_type, table_name
+    """), {'batch_id': batch_id})
+    return [PhaseTotal(row[0], row[1], float(row[2] or 0),
+                       int(row[3]) if row[3] is not None else None, row[4]) for row in result]
+
+
+def table_throughput(phases: List[PhaseTotal]) -> Dict[str, Tuple[float, int]]:
+    """(seconds over all phases, rows) per table; rows are the largest count any phase saw"""
+    tables = {}
+    for phase in phases:
+        if phase.table_name is None:
+            continue
+        seconds, rows = tables.get(phase.table_name, (0.0, 0))
+        tables[phase.table_name] = (seconds + phase.seconds, max(rows, phase.rows or 0))
+    return tables
+
+
+def _change(current: Optional[float], previous: Optional[float]) -> str:
+    if current is None or not previous:
+        return ''
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+def format_report(batch: Dict, phases: List[PhaseTotal], previous: Optional[Dict] = None,
+                  previous_phases: List[PhaseTotal] = (), top: int = 10) -> List[str]:
+    """Report lines for a batch, compared with the previous batch when there is one"""
+    before = {phase.key: phase for phase in previous_phases}
+    wall = batch.get('wall_time_seconds')
+    lines = [f"Batch {batch['batch_id']} ({batch['status']}, started {batch['started_at']:%Y-%m-%d %H:%M})"]
+    if wall is not None:
+        previous_wall = previous.get('wall_time_seconds') if previous else None
+        lines.append(f"Wall time {wall:.1f}s {_change(wall, previous_wall)}".rstrip())
+    if previous:
+        lines.append(f"Compared with batch {previous['batch_id']} (started {previous['started_at']:%Y-%m-%d %H:%M})")
+
+    lines += ['', f"Slowest phases (top {top})",
+              f"{'phase':<16}{'table':<36}{'seconds':>10}{'change':>9}{'rows':>12}{'peak MB':>9}"]
+    for phase in sorted(phases, key=lambda p: p.seconds, reverse=True)[:top]:
+        prior = before.get(phase.key)
+        lines.append(f"{phase.phase:<16}{phase.table_name or '-':<36}{phase.seconds:>10.2f}"
+                     f"{_change(phase.seconds, prior.seconds if prior else None):>9}"
+                     f"{phase.rows if phase.rows is not None else '':>12}"
+                     f"{phase.peak_memory_mb if phase.peak_memory_mb is not None else '':>9}")
+
+    previous_tables = table_throughput(list(previous_phases))
+    lines += ['', "Throughput per table",
+              f"{'table':<36}{'seconds':>10}{'rows':>12}{'rows/s':>12}{'change':>9}"]
+    for table, (seconds, rows) in sorted(table_throughput(phases).items(), key=lambda t: t[1][0], reverse=True):
+        rate = rows / seconds if seconds else None
+        prior_seconds, prior_rows = previous_tables.get(table, (0.0, 0))
+        prior_rate = prior_rows / prior_seconds if prior_seconds else None
+        lines.append(f"{table:<36}{seconds:>10.2f}{rows:>12}{f'{rate:.0f}' if rate else '':>12}"
+                     f"{_change(rate, prior_rate):>9}")
+    return lines
@@ -0,0 +1,84 @@
+"""Parse-once cache of CSV DataFrames shared by the loaders of a batch"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import pandas as pd
+from loguru import logger
+from config.etl_config import CSV_CACHE_MAX_MB
+
+
+def _file_fingerprint(csv_path: Path) -> str:
+    """Size and mtime stand-in for a checksum when none is known"""
+    stat = csv_path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class CSVFrameCache:
+    """LRU cache of parsed CSV files keyed by file path plus checksum.
+
+    Cached frames are shared between callers and must be treated as read-only:
+    filter, copy or rename into a new frame instead of assigning in place.
+    Frames larger than the whole cap are returned without being cached.
+    """
+
+    def __init__(self, max_mb: float = CSV_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._frames: 'OrderedDict[tuple, pd.DataFrame]' = OrderedDict()
+        self._sizes: Dict[tuple, int] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def read(self, csv_path: Path, checksum: Optional[str] = None,
+             reader: Callable[[Path], pd.DataFrame] = pd.read_csv, variant: Optional[str] = None) -> pd.DataFrame:
+        """Return the parsed frame for csv_path, parsing it only on a cache miss.
+
+        Without a checksum the file's size and mtime identify its content.
+        variant distinguishes differently parsed frames of the same file
+        (e.g. pruned columns), which are cached side by side.
+        """
+        csv_path = Path(csv_path)
+        key = (str(csv_path.resolve()), checksum or _file_fingerprint(csv_path), variant)
+
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            self.stats['hits'] += 1
+            logger.debug(f"CSV cache hit for {csv_path.name}")
+            return self._frames[key]
+
+        self.stats['misses'] += 1
+        df = reader(csv_path)
+        size = int(df.memory_usage(deep=True).sum())
+
+        if size > self.max_bytes:
+            logger.debug(f"{csv_path.name} ({size / 1024 / 1024:.0f} MB) exceeds the CSV cache cap, not cached")
+            return df
+
+        # A changed file replaces its stale entries
+        for stale in [k for k in self._frames if k[0] == key[0] and k[1] != key[1]]:
+            self._evict(stale)
+
+        while self._frames and self.nbytes + size > self.max_bytes:
+            self._evict(next(iter(self._frames)))
+            self.stats['evictions'] += 1
+
+        self._frames[key] = df
+        self._sizes[key] = size
+        return df
+
+    def _evict(self, key: tuple):
+        del self._frames[key]
+        del self._sizes[key]
+
+    def clear(self):
+        self._frames.clear()
+        self._sizes.clear()
+
+
+# Shared by every loader in the process (each scheduler worker gets its own copy)
+csv_cache = CSVFrameCache()
@@ -1,21 +1,51 @@
 """
 CSV Preprocessing Utilities
 Handles data cleansing for dirty CSV files
+
+preprocess() is one fused pass: row filters and deduplication are combined into
+a single boolean mask (build_mask), the surviving rows (and only the requested
+columns) are copied once, and the quoted-empty-string cleanup then rewrites only
+the text columns that actually contain ''. Frames from the shared CSV cache are
+never modified. Streaming loaders call it per chunk with a CompositeKeySet so
+duplicates are also dropped across chunks.
 """
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from loguru import logger
-from typing import Optional
+from typing import List, Optional
+
+QUOTED_EMPTY = "''"
 
 
 class CSVPreprocessor:
     """Cleans CSV files before loading into database"""
 
     @staticmethod
-    def clean_quoted_empty_strings(df: pd.DataFrame) -> pd.DataFrame:
-        """Replace quoted empty strings ('') with actual empty strings"""
+    def text_columns(df: pd.DataFrame) -> List[str]:
+        """Columns that can hold the quoted empty string (numeric columns never do)"""
+        return [col for col, dtype in df.dtypes.items()
+                if dtype == object or isinstance(dtype, pd.StringDtype)]
+
+    @staticmethod
+    def _quoted_empty(values: pd.Series) -> np.ndarray:
+        return values.eq(QUOTED_EMPTY).fillna(False).to_numpy(dtype=bool)
+
+    @classmethod
+    def clean_quoted_empty_strings(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Replace quoted empty strings ('') with actual empty strings.
+
+        Only text columns containing '' are rewritten; the input frame is left untouched.
+        """
         logger.debug("Cleaning quoted empty strings")
-        return df.replace("''", "", regex=False)
+        cleaned = None
+        for col in cls.text_columns(df):
+            hits = cls._quoted_empty(df[col])
+            if hits.any():
+                if cleaned is None:
+                    cleaned = cls._select(df, None, None)
+                cleaned[col] = df[col].mask(hits, "")
+        return df if cleaned is None else cleaned
 
     @staticmethod
     def deduplicate_rows(df: pd.DataFrame, subset: Optional[list] = None) -> pd.DataFrame:
@@ -27,6 +57,44 @@ class CSVPreprocessor:
             logger.warning(f"Removed {removed} duplicate rows")
         return df_clean
 
+    @classmethod
+    def build_mask(cls, df: pd.DataFrame, keep: Optional[np.ndarray] = None, deduplicate: bool = True,
+                   dedup_subset: Optional[list] = None, clean_quoted_strings: bool = True,
+                   seen_keys=None) -> np.ndarray:
+        """Rows to load: those in keep (default all) that are the first occurrence of their key.
+
+        Duplicates are judged among kept rows only, on the cleaned values, exactly
+        as filtering, cleaning and drop_duplicates(keep='first') in sequence would.
+        With seen_keys (a CompositeKeySet over integer key columns) keys from earlier
+        chunks count as seen.
+        """
+        mask = np.ones(len(df), dtype=bool) if keep is None else np.asarray(keep, dtype=bool).copy()
+        if not deduplicate or not mask.any():
+            return mask
+
+        subset = list(dedup_subset) if dedup_subset else list(df.columns)
+        rows = np.flatnonzero(mask)
+        if seen_keys is not None:
+            new = seen_keys.add_new(cls._select(df, rows, subset), subset)
+        else:
+            text = set(cls.text_columns(df)) if clean_quoted_strings else set()
+            keys = []
+            for col in subset:
+                values = df[col].iloc[rows]
+                if col in text:
+                    values = values.mask(cls._quoted_empty(values), "")
+                keys.append(values.reset_index(drop=True))
+            # One group id per distinct key (NaN equal to NaN, like duplicated())
+            group = pd.Series(0, index=range(len(rows))).groupby(keys, sort=False, dropna=False).ngroup()
+            new = ~group.duplicated().to_numpy()
+        mask[rows[~new]] = False
+
+        removed = int((~new).sum())
+        # Streaming callers (seen_keys) report their total once
+        if removed > 0 and seen_keys is None:
+            logger.warning(f"Removed {removed} duplicate rows")
+        return mask
+
     @staticmethod
     def fix_malformed_csv(csv_path: Path, expected_columns: int) -> pd.DataFrame:
         """
@@ -44,28 +112,47 @@ class CSVPreprocessor:
             logger.error(f"Could not fix malformed CSV: {e}")
             raise
 
+    @staticmethod
+    def _select(df: pd.DataFrame, rows: Optional[np.ndarray], columns: Optional[List[str]]) -> pd.DataFrame:
+        """New frame of the given rows (None = all, not copied) and columns.
+
+        Each column is taken once and never consolidated; replacing a column of the
+        result never touches the caller's (possibly cached) frame.
+        """
+        columns = list(df.columns) if columns is None else columns
+        if rows is None:
+            return pd.DataFrame({col: df[col] for col in columns}, copy=False)
+        return pd.DataFrame({col: df[col].take(rows) for col in columns}, copy=False)
+
     @classmethod
-    def preprocess(cls, df: pd.DataFrame, config: dict = None) -> pd.DataFrame:
+    def preprocess(cls, df: pd.DataFrame, config: dict = None, keep: Optional[np.ndarray] = None,
+                   columns: Optional[List[str]] = None, seen_keys=None) -> pd.DataFrame:
         """
-        Apply all preprocessing steps based on config
+        Apply all preprocessing steps based on config, materializing the result once
 
         Args:
-            df: DataFrame to process
+            df: DataFrame to process (not modified)
             config: Optional dict with preprocessing options:
                 - clean_quoted_strings: bool (default True)
                 - deduplicate: bool (default True)
                 - dedup_subset: list of columns for deduplication (default None = all)
+            keep: Optional boolean mask of rows that passed the loader's filters
+            columns: Optional columns to return (default all)
+            seen_keys: Optional CompositeKeySet of keys loaded from earlier chunks
         """
         if config is None:
             config = {}
+        clean = config.get('clean_quoted_strings', True)
 
-        # Default: clean quoted empty strings
-        if config.get('clean_quoted_strings', True):
-            df = cls.clean_quoted_empty_strings(df)
+        mask = cls.build_mask(df, keep=keep, deduplicate=config.get('deduplicate', True),
+                              dedup_subset=config.get('dedup_subset'), clean_quoted_strings=clean,
+                              seen_keys=seen_keys)
 
-        # Default: deduplicate rows
-        if config.get('deduplicate', True):
-            subset = config.get('dedup_subset')
-            df = cls.deduplicate_rows(df, subset=subset)
+        result = cls._select(df, None if mask.all() else np.flatnonzero(mask), columns)
 
-        return df
\ No newline at end of file
+        if clean:
+            for col in cls.text_columns(result):
+                hits = cls._quoted_empty(result[col])
+                if hits.any():
+                    result[col] = result[col].mask(hits, "")
+        return result
@@ -0,0 +1,168 @@
+"""
+CSV schemas derived from the target tables.
+
+A CSVSchema tells pandas which columns of an OOTP export to parse and with
+which compact dtype, and the resulting frame dtypes define the staging table.
+Integer columns therefore COPY straight into SMALLINT/INTEGER staging columns
+instead of BIGINT, DOUBLE PRECISION or TEXT that has to be cast on every upsert.
+"""
+import importlib.util
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Parse dtype (one step wider, so out-of-range values are caught instead of wrapping)
+# and final dtype per target column type
+INTEGER_DTYPES = {
+    'smallint': ('Int32', 'Int16'),
+    'integer': ('Int64', 'Int32'),
+    'bigint': ('Int64', 'Int64'),
+}
+FLOAT_DTYPES = {
+    'real': 'float32',
+    'double precision': 'float64',
+    'numeric': 'float64',
+}
+
+# Staging column type per frame dtype
+STAGING_TYPES = {
+    'Int16': 'SMALLINT',
+    'int16': 'SMALLINT',
+    'Int32': 'INTEGER',
+    'int32': 'INTEGER',
+    'Int64': 'BIGINT',
+    'int64': 'BIGINT',
+    'float32': 'REAL',
+    'float64': 'DOUBLE PRECISION',
+    'bool': 'BOOLEAN',
+    'boolean': 'BOOLEAN',
+    'datetime64[ns]': 'TIMESTAMP',
+}
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def pyarrow_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def resolve_engine(engine: Optional[str]) -> str:
+    """Return the pandas parser engine to use, falling back to 'c' if pyarrow is missing"""
+    if engine == 'pyarrow' and not pyarrow_available():
+        logger.warning("CSV_PARSE_ENGINE=pyarrow but pyarrow is not installed, using the C parser")
+        return 'c'
+    return engine or 'c'
+
+
+def staging_column_types(df: pd.DataFrame) -> Dict[str, str]:
+    """PostgreSQL staging column types for a frame's dtypes (TEXT for anything else)"""
+    return {col: STAGING_TYPES.get(str(dtype), 'TEXT') for col, dtype in df.dtypes.items()}
+
+
+def cast_expression(source: str, staging_type: str, target_type: str) -> str:
+    """SQL expression moving a staging column into a target column.
+
+    Typed staging columns are inserted as-is; only TEXT staging columns
+    (unparsed or unconvertible values) are cast.
+    """
+    if staging_type != 'text' or target_type == 'text':
+        return source
+    if target_type == 'date':
+        return f"NULLIF({source}, '')::DATE"
+    if target_type in ('timestamp without time zone', 'timestamp with time zone'):
+        return f"NULLIF({source}, '')::TIMESTAMP"
+    if target_type == 'numeric':
+        return f"NULLIF({source}, '')::NUMERIC"
+    if target_type in INTEGER_DTYPES:
+        return f"NULLIF({source}, '')::{target_type.upper()}"
+    return source
+
+
+@dataclass
+class CSVSchema:
+    """Columns to parse from one CSV export and their dtypes"""
+    usecols: List[str]
+    dtypes: Dict[str, str] = field(default_factory=dict)        # final (compact) dtypes
+    parse_dtypes: Dict[str, str] = field(default_factory=dict)  # dtypes handed to the parser
+
+    @property
+    def key(self) -> str:
+        """Identifies the parsed shape, so differently pruned frames are cached apart"""
+        return ','.join(f"{col}:{self.dtypes.get(col, '')}" for col in self.usecols)
+
+    @classmethod
+    def from_target(cls, header: Iterable[str], target_types: Dict[str, str],
+                    column_mapping: Optional[Dict[str, str]] = None,
+                    extra_columns: Iterable[str] = (), expressions: Iterable[str] = (),
+                    dtype_overrides: Optional[Dict[str, str]] = None) -> 'CSVSchema':
+        """Build the schema for a CSV whose rows load into a table with the given column types.
+
+        Kept columns: those mapping onto a target column, mapped source columns,
+        identifiers used in calculated-field expressions and extra_columns
+        (filters, dedup keys). Everything else is never parsed.
+        """
+        column_mapping = column_mapping or {}
+        dtype_overrides = dtype_overrides or {}
+        referenced = {name for expr in expressions for name in _IDENTIFIER.findall(expr)}
+        wanted = set(column_mapping) | set(extra_columns) | referenced | set(dtype_overrides)
+
+        usecols, dtypes, parse_dtypes = [], {}, {}
+        for col in header:
+            target_col = column_mapping.get(col, col)
+            if target_col not in target_types and col not in wanted:
+                continue
+            usecols.append(col)
+
+            if col in dtype_overrides:
+                dtypes[col] = parse_dtypes[col] = dtype_overrides[col]
+                continue
+            target_type = target_types.get(target_col)
+            if target_type in INTEGER_DTYPES:
+                parse_dtypes[col], dtypes[col] = INTEGER_DTYPES[target_type]
+            elif target_type in FLOAT_DTYPES:
+                dtypes[col] = parse_dtypes[col] = FLOAT_DTYPES[target_type]
+        return cls(usecols, dtypes, parse_dtypes)
+
+    def read_csv(self, csv_path: Path, engine: str = 'c', **kwargs) -> pd.DataFrame:
+        """Parse only the schema's columns with their declared dtypes.
+
+        If a column does not parse with its declared dtype the file is re-read
+        with inferred dtypes; coerce() then keeps such columns as inferred so
+        they reach staging as before (wider type or TEXT, cast in SQL).
+        """
+        try:
+            df = pd.read_csv(csv_path, usecols=self.usecols, dtype=self.parse_dtypes, engine=engine, **kwargs)
+        except (ValueError, TypeError, OverflowError) as e:
+            if isinstance(e, pd.errors.ParserError):
+                raise
+            logger.warning(f"{Path(csv_path).name} does not match its declared dtypes ({e}), "
+                           f"re-reading with inferred dtypes")
+            df = pd.read_csv(csv_path, usecols=self.usecols, engine=engine, **kwargs)
+        return self.coerce(df)
+
+    def coerce(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert columns to their final dtypes where every value fits.
+
+        Columns with fractional or out-of-range values keep their parsed dtype.
+        """
+        for col, dtype in self.dtypes.items():
+            if col not in df.columns or str(df[col].dtype) == dtype:
+                continue
+            series = df[col]
+            if not (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)):
+                if dtype == 'category':
+                    df[col] = series.astype('category')
+                continue
+            if dtype.startswith('Int'):
+                values = series.dropna().to_numpy(dtype=np.float64)
+                info = np.iinfo(dtype.lower())
+                if len(values) and (not np.array_equal(values, np.floor(values))
+                                    or values.min() < info.min or values.max() > info.max):
+                    logger.warning(f"Column {col} has values that do not fit {dtype}, keeping {series.dtype}")
+                    continue
+            df[col] = series.astype(dtype)
+        return df
@@ -1,43 +1,263 @@
-"""Wrapper for fetch_game_data.sh script"""
+"""
+Incremental fetch of the OOTP CSV export.
+
+The export directory on the game machine (or any local directory, e.g. for
+tests) is listed with size and mtime and compared with the manifest of the last
+fetch. Only files whose size or mtime differ are copied, several at a time, each
+to a temporary file next to its destination, hashed, and renamed into
+data/incoming/csv. A copied file whose checksum matches the last fetch is
+discarded, so re-exports that rewrite every file only hand the files whose
+content changed to the loaders (read_changed_files). Changed files stay listed
+until a load marks them loaded. Player pictures and logos are still synced by
+fetch_game_data.sh.
+"""
+import json
+import os
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, List, Optional
 from loguru import logger
+from config.etl_config import DATA_DIR, FETCH_MAX_WORKERS
+from .checksum import calculate_file_checksum
+
+FETCH_MANIFEST = '.fetch_manifest.json'
+CSV_DIR = DATA_DIR / 'incoming' / 'csv'
+
+
+class LocalSource:
+    """Export directory on this machine (or a mounted share)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def __str__(self):
+        return str(self.path)
+
+    def list_files(self, pattern: str = '*.csv') -> Dict[str, Dict]:
+        files = {}
+        for file_path in sorted(self.path.glob(pattern)):
+            stat = file_path.stat()
+            files[file_path.name] = {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+        return files
+
+    def copy(self, name: str, target: Path):
+        src = self.path / name
+        with open(src, 'rb') as f_in, open(target, 'wb') as f_out:
+            while chunk := f_in.read(1024 * 1024):
+                f_out.write(chunk)
+        stat = src.stat()
+        os.utime(target, (stat.st_atime, stat.st_mtime))
+
+
+class RsyncSource:
+    """Export directory on the game machine, listed and copied over rsync/ssh"""
+
+    def __init__(self, host: str, path: str):
+        self.host = host
+        self.path = path.rstrip('/')
+
+    def __str__(self):
+        return f"{self.host}:{self.path}"
+
+    # --protect-args sends remote paths (spaces and all) to the remote rsync verbatim, not through its shell
+    def list_files(self, pattern: str = '*.csv') -> Dict[str, Dict]:
+        # Listed times are printed in rsync's local time zone; UTC makes them exact epoch seconds
+        result = subprocess.run(
+            ['rsync', '--list-only', '--protect-args', '--no-human-readable', '--include', pattern,
+             '--exclude', '*', f"{self.host}:{self.path}/"],
+            capture_output=True, text=True, check=True, env={**os.environ, 'TZ': 'UTC'}
+        )
+        return parse_rsync_listing(result.stdout)
+
+    def copy(self, name: str, target: Path):
+        subprocess.run(['rsync', '--times', '--compress', '--protect-args', f"{self.host}:{self.path}/{name}",
+                        str(target)], capture_output=True, text=True, check=True)
+
+
+def parse_rsync_listing(listing: str) -> Dict[str, Dict]:
+    """Regular files of `rsync --list-only` output (run with TZ=UTC): name -> size and mtime (epoch seconds)"""
+    files = {}
+    for line in listing.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) < 5 or not parts[0].startswith('-'):
+            continue
+        mode, size, day, clock, name = parts
+        mtime = datetime.strptime(f"{day} {clock}", '%Y/%m/%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        files[name] = {'size': int(size.replace(',', '')), 'mtime': int(mtime.timestamp())}
+    return files
+
+
+def default_source():
+    """The export directory configured in .env; OOTP_GAME_MACHINE empty means a local path"""
+    path = os.environ.get('OOTP_REMOTE_DATA_PATH', '')
+    if not path:
+        raise ValueError("OOTP_REMOTE_DATA_PATH not set in .env file")
+    machine = os.environ.get('OOTP_GAME_MACHINE', '')
+    return RsyncSource(machine, path) if machine else LocalSource(Path(path))
+
+
+@dataclass
+class FetchResult:
+    copied: List[str] = field(default_factory=list)      # transferred (content may be unchanged)
+    changed: List[str] = field(default_factory=list)     # new or different content
+    removed: List[str] = field(default_factory=list)     # gone from the export, deleted locally
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
+
 
+def load_manifest(dest_dir: Path = CSV_DIR) -> Dict:
+    manifest_path = Path(dest_dir) / FETCH_MANIFEST
+    if not manifest_path.exists():
+        return {}
+    return json.loads(manifest_path.read_text())
 
-def fetch_game_data(dry_run=False):
-    """Execute fetch_game_data.sh script"""
+
+def read_changed_files(dest_dir: Path = CSV_DIR) -> Optional[List[str]]:
+    """Files fetched with new content and not loaded since, or None when nothing was fetched with a manifest"""
+    manifest = load_manifest(dest_dir)
+    return manifest.get('changed') if manifest else None
+
+
+def mark_files_loaded(names: List[str], dest_dir: Path = CSV_DIR):
+    """Remove successfully loaded files from the changed list"""
+    manifest = load_manifest(dest_dir)
+    if not manifest:
+        return
+    manifest['changed'] = sorted(set(manifest.get('changed', [])) - set(names))
+    _write_atomic(Path(dest_dir) / FETCH_MANIFEST, json.dumps(manifest, indent=2))
+
+
+def _write_atomic(path: Path, content: str):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def fetch_csv_files(source, dest_dir: Path = CSV_DIR, workers: int = None,
+                    dry_run: bool = False) -> FetchResult:
+    """Copy the export files that changed since the last fetch into dest_dir"""
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(dest_dir)
+    previous = manifest.get('files', {})
+    remote = source.list_files()
+
+    to_copy = [name for name, entry in remote.items()
+               if not (dest_dir / name).exists()
+               or {k: previous.get(name, {}).get(k) for k in ('size', 'mtime')} != entry]
+    result = FetchResult(removed=sorted(set(previous) - set(remote)))
+    logger.info(f"Fetching from {source}: {len(remote)} files, {len(to_copy)} new or modified, "
+                f"{len(result.removed)} removed")
+    if dry_run:
+        for name in to_copy:
+            logger.info(f"Would copy {name}")
+        result.copied = to_copy
+        return result
+
+    files = {name: previous[name] for name in remote if name in previous and name not in to_copy}
+
+    def copy(name):
+        fd, tmp = tempfile.mkstemp(dir=dest_dir, prefix=f".{name}.")
+        os.close(fd)
+        tmp = Path(tmp)
+        try:
+            source.copy(name, tmp)
+            checksum = calculate_file_checksum(tmp)
+            if checksum == previous.get(name, {}).get('checksum') and (dest_dir / name).exists():
+                tmp.unlink()                       # re-exported with the same content
+                return checksum, False
+            os.replace(tmp, dest_dir / name)
+            return checksum, True
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    with ThreadPoolExecutor(max_workers=max(1, workers or FETCH_MAX_WORKERS)) as executor:
+        futures = {name: executor.submit(copy, name) for name in to_copy}
+        for name, future in futures.items():
+            try:
+                checksum, changed = future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch {name}: {e}")
+                result.failed[name] = str(e)
+                continue
+            files[name] = {**remote[name], 'checksum': checksum}
+            result.copied.append(name)
+            if changed:
+                result.changed.append(name)
+
+    for name in result.removed:
+        (dest_dir / name).unlink(missing_ok=True)
+
+    _write_atomic(dest_dir / FETCH_MANIFEST, json.dumps({
+        'source': str(source),
+        'fetched_at': datetime.now().isoformat(),
+        'files': files,
+        # Changes not loaded yet stay listed until mark_files_loaded
+        'changed': sorted((set(manifest.get('changed', [])) - set(result.removed)) | set(result.changed)),
+        'removed': result.removed,
+        'failed': result.failed,
+    }, indent=2))
+    logger.info(f"Fetched {len(result.copied)} files, {len(result.changed)} changed"
+                f"{f', {len(result.failed)} failed' if result.failed else ''}")
+    return result
+
+
+def sync_images(dry_run: bool = False) -> bool:
+    """Run fetch_game_data.sh for pictures and logos, streaming its output"""
     script_path = Path(__file__).parent.parent.parent / "scripts" / "fetch_game_data.sh"
 
-    if not script_path.exists:
+    if not script_path.exists():
         logger.error(f"Fetch script not found at {script_path}")
         return False
+    if dry_run:
+        logger.info(f"Would run {script_path} for pictures and logos")
+        return True
 
     try:
         # Make sure the scipt is executable
         script_path.chmod(0o755)
 
         logger.info(f"Executing fetch script: {script_path}")
-        result = subprocess.run(
+        process = subprocess.Popen(
             [str(script_path)],
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             cwd=script_path.parent,
+            env={**os.environ, 'SKIP_CSV_SYNC': '1'},
         )
+        for line in process.stdout:
+            logger.info(f"FETCH: {line.rstrip()}")
+        returncode = process.wait()
 
-        if result.stdout:
-            for line in result.stdout.strip().split('\n'):
-                logger.info(f"FETCH: {line}")
-
-        if result.stderr:
-            for line in result.stderr.strip().split('\n'):
-                logger.warning(f"FETCH: {line}")
-
-        if result.returncode == 0:
+        if returncode == 0:
             logger.success("Fetch script executed successfully")
             return True
         else:
-            logger.error(f"Data fetch failed with return code {result.returncode}")
+            logger.error(f"Data fetch failed with return code {returncode}")
             return False
     except Exception as e:
         logger.error(f"Error executing fetch script: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def fetch_game_data(dry_run=False, source=None, workers: int = None,
+                    images: bool = True) -> Optional[FetchResult]:
+    """Fetch the changed CSV files, then sync pictures and logos from the game machine"""
+    try:
+        result = fetch_csv_files(source or default_source(), workers=workers, dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"Error fetching CSV files: {e}")
+        return None
+    if images and os.environ.get('OOTP_GAME_MACHINE') and not sync_images(dry_run):
+        result.failed['images'] = 'fetch_game_data.sh failed'
+    return result
@@ -0,0 +1,97 @@
+"""Compact set of composite integer keys for deduplicating across CSV chunks"""
+from typing import List, Sequence
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Bits per key column when packing (player_id, year, game_id) into one int64 (63 bits total)
+GAME_KEY_BITS = (24, 12, 27)
+
+# Number of sorted runs kept before they are merged into one
+MAX_RUNS = 8
+
+
+class CompositeKeySet:
+    """Set of composite keys stored as packed int64 values in sorted numpy runs.
+
+    Each key costs 8 bytes instead of a Python tuple (~100 bytes). If a value is
+    negative or does not fit its bit width the set falls back to Python tuples,
+    so correctness never depends on the packing assumptions.
+    """
+
+    def __init__(self, bits: Sequence[int] = GAME_KEY_BITS):
+        if sum(bits) > 63:
+            raise ValueError(f"Key bit widths {bits} do not fit in a signed int64")
+        self.bits = tuple(bits)
+        self._runs: List[np.ndarray] = []
+        self._fallback = None  # set of tuples once packing is impossible
+
+    def __len__(self) -> int:
+        if self._fallback is not None:
+            return len(self._fallback)
+        return sum(len(run) for run in self._runs)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the packed keys"""
+        return sum(run.nbytes for run in self._runs)
+
+    def _pack(self, columns: List[np.ndarray]):
+        """Pack key columns into int64, or return None if any value does not fit"""
+        packed = np.zeros(len(columns[0]), dtype=np.int64)
+        for values, width in zip(columns, self.bits):
+            if len(values) and (values.min() < 0 or values.max() >= (1 << width)):
+                return None
+            packed = (packed << width) | values
+        return packed
+
+    def _contains(self, packed: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(packed), dtype=bool)
+        for run in self._runs:
+            idx = np.searchsorted(run, packed)
+            idx[idx == len(run)] = 0
+            found |= run[idx] == packed
+        return found
+
+    def _switch_to_fallback(self):
+        logger.warning("Key values exceed packed bit widths, falling back to a tuple key set")
+        fallback = set()
+        for run in self._runs:
+            for value in run.tolist():
+                key = []
+                for width in reversed(self.bits):
+                    key.append(value & ((1 << width) - 1))
+                    value >>= width
+                fallback.add(tuple(reversed(key)))
+        self._fallback = fallback
+        self._runs = []
+
+    def add_new(self, df: pd.DataFrame, key_columns: List[str]) -> np.ndarray:
+        """Add the keys of df and return a mask of rows whose key was not seen before.
+
+        Within df only the first occurrence of a key is marked new, matching
+        drop_duplicates(keep='first').
+        """
+        columns = [df[col].to_numpy(dtype=np.int64) for col in key_columns]
+
+        if self._fallback is None:
+            packed = self._pack(columns)
+            if packed is None:
+                self._switch_to_fallback()
+            else:
+                _, first_idx = np.unique(packed, return_index=True)
+                mask = np.zeros(len(packed), dtype=bool)
+                mask[first_idx] = True
+                mask &= ~self._contains(packed)
+                if mask.any():
+                    self._runs.append(np.sort(packed[mask]))
+                if len(self._runs) > MAX_RUNS:
+                    self._runs = [np.sort(np.concatenate(self._runs))]
+                return mask
+
+        mask = np.zeros(len(df), dtype=bool)
+        for i, key in enumerate(zip(*(col.tolist() for col in columns))):
+            if key not in self._fallback:
+                self._fallback.add(key)
+                mask[i] = True
+        return mask
@@ -0,0 +1,63 @@
+"""Process memory measurement for loaders"""
+import os
+import resource
+import threading
+from loguru import logger
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        # No /proc (e.g. macOS): fall back to the lifetime peak (KB on Linux, bytes on macOS)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / (1024 * 1024) if max_rss > 1 << 32 else max_rss / 1024
+
+
+class MemoryTracker:
+    """Samples RSS in a background thread and records the peak while active.
+
+    Usage:
+        with MemoryTracker('players_game_batting.csv') as tracker:
+            ...
+        tracker.peak_mb
+    """
+
+    def __init__(self, label: str = '', interval: float = 0.05, log: bool = True):
+        self.label = label
+        self.interval = interval
+        self.log = log
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self) -> float:
+        """Take a sample now and return the current RSS"""
+        rss = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss)
+        return rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> 'MemoryTracker':
+        self.start_mb = self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        if self.log:
+            logger.info(f"Peak memory{' for ' + self.label if self.label else ''}: {self.peak_mb:.0f} MB "
+                        f"(started at {self.start_mb:.0f} MB)")
+        return False
@@ -1,4 +1,5 @@
 """Message filtering utility for ETL preprocessing"""
+import numpy as np
 import pandas as pd
 from loguru import logger
 from typing import Dict, Any
@@ -7,6 +8,9 @@ from typing import Dict, Any
 class MessageFilter:
     """Filters messages based on configured criteria"""
 
+    # CSV columns the filters read
+    COLUMNS = ['message_type', 'sender_id', 'importance', 'deleted']
+
     def __init__(self, filter_config: Dict[str, Any]):
         """
         Initialize message filter with configuration
@@ -23,56 +27,54 @@ class MessageFilter:
         self.min_importance = filter_config.get('min_importance')
         self.exclude_deleted = filter_config.get('exclude_deleted', True)
 
-    def filter_messages(self, df: pd.DataFrame) -> pd.DataFrame:
+    def build_mask(self, df: pd.DataFrame) -> np.ndarray:
         """
-        Apply all configured filters to messages DataFrame
+        Combine all configured filters into one boolean mask of messages to keep
 
         Args:
             df: DataFrame containing messages data
 
         Returns:
-            Filtered DataFrame with excluded messages removed
+            Boolean array, True for messages that pass every filter
         """
-        initial_count = len(df)
-        filtered_df = df.copy()
-
-        # Filter by message_type
+        filters = []
         if self.exclude_message_types:
-            before = len(filtered_df)
-            filtered_df = filtered_df[~filtered_df['message_type'].isin(self.exclude_message_types)]
-            excluded = before - len(filtered_df)
-            if excluded > 0:
-                logger.info(f"Filtered {excluded} messages by message_type (excluded types: {self.exclude_message_types})")
-
-        # Filter by sender_id
+            filters.append((~df['message_type'].isin(self.exclude_message_types),
+                            f"by message_type (excluded types: {self.exclude_message_types})"))
         if self.exclude_sender_ids:
-            before = len(filtered_df)
-            filtered_df = filtered_df[~filtered_df['sender_id'].isin(self.exclude_sender_ids)]
-            excluded = before - len(filtered_df)
-            if excluded > 0:
-                logger.info(f"Filtered {excluded} messages by sender_id (excluded IDs: {self.exclude_sender_ids})")
-
-        # Filter by importance threshold
+            filters.append((~df['sender_id'].isin(self.exclude_sender_ids),
+                            f"by sender_id (excluded IDs: {self.exclude_sender_ids})"))
         if self.min_importance is not None:
-            before = len(filtered_df)
-            filtered_df = filtered_df[filtered_df['importance'] >= self.min_importance]
-            excluded = before - len(filtered_df)
-            if excluded > 0:
-                logger.info(f"Filtered {excluded} messages below importance threshold {self.min_importance}")
-
-        # Filter deleted messages
-        if self.exclude_deleted and 'deleted' in filtered_df.columns:
-            before = len(filtered_df)
-            filtered_df = filtered_df[filtered_df['deleted'] == 0]
-            excluded = before - len(filtered_df)
+            filters.append((df['importance'] >= self.min_importance,
+                            f"below importance threshold {self.min_importance}"))
+        if self.exclude_deleted and 'deleted' in df.columns:
+            filters.append((df['deleted'] == 0, "deleted"))
+
+        mask = np.ones(len(df), dtype=bool)
+        for passed, description in filters:
+            passed = passed.fillna(False).to_numpy(dtype=bool)
+            excluded = int((mask & ~passed).sum())
             if excluded > 0:
-                logger.info(f"Filtered {excluded} deleted messages")
+                logger.info(f"Filtered {excluded} messages {description}")
+            mask &= passed
 
-        total_filtered = initial_count - len(filtered_df)
+        total_filtered = len(df) - int(mask.sum())
         if total_filtered > 0:
-            logger.info(f"Total messages filtered: {total_filtered} ({initial_count} -> {len(filtered_df)})")
+            logger.info(f"Total messages filtered: {total_filtered} ({len(df)} -> {len(df) - total_filtered})")
+        return mask
+
+    def filter_messages(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply all configured filters to messages DataFrame
 
-        return filtered_df
+        Args:
+            df: DataFrame containing messages data
+
+        Returns:
+            Filtered DataFrame with excluded messages removed (df itself if nothing is excluded)
+        """
+        mask = self.build_mask(df)
+        return df if mask.all() else df[mask]
 
     def get_filter_summary(self) -> str:
         """Return a human-readable summary of active filters"""
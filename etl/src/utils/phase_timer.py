@@ -0,0 +1,103 @@
+"""Per-phase timing, row counts and peak memory of a load, persisted to etl_performance_metrics"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import text
+from ..database.connection import execute_pipelined
+from .memory import MemoryTracker
+
+# One row per phase and table; metric_type is the phase name ('read', 'upsert', 'view_refresh', ...)
+INSERT_PHASE_SQL = text("""
+    INSERT INTO etl_performance_metrics (batch_id, metric_type, table_name, start_time, end_time,
+                                         rows_processed, memory_usage_mb, notes)
+    VALUES (CAST(:batch_id AS UUID), :phase, :table_name, :start_time, :end_time,
+            :rows, :peak_memory_mb, :status)
+""")
+
+
+@dataclass
+class Phase:
+    """Accumulated measurements of one phase; a phase entered repeatedly (per chunk) adds up"""
+    name: str
+    table_name: Optional[str]
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    duration_seconds: float = 0.0
+    rows: Optional[int] = None
+    peak_memory_mb: Optional[float] = None
+    status: str = 'success'
+
+    def add_rows(self, rows: int):
+        self.rows = (self.rows or 0) + int(rows)
+
+
+class PhaseTimer:
+    """Times the phases of a load.
+
+    Usage:
+        with timer.phase('read') as phase:
+            df = read(...)
+            phase.add_rows(len(df))
+        timer.save(session, batch_id)
+
+    A saved phase starts at its first entry and its end_time is start_time plus
+    the time spent inside it, so etl_performance_metrics.duration_seconds of a
+    phase entered once per chunk excludes the work between chunks.
+    """
+
+    def __init__(self, table_name: str = None):
+        self.table_name = table_name
+        self.phases: Dict[tuple, Phase] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, table_name: str = None) -> Iterator[Phase]:
+        table_name = table_name or self.table_name
+        with self._lock:
+            record = self.phases.get((name, table_name))
+            if record is None:
+                record = self.phases[(name, table_name)] = Phase(name, table_name, datetime.now())
+        start = time.perf_counter()
+        tracker = MemoryTracker(name, log=False)
+        try:
+            with tracker:
+                yield record
+        except Exception:
+            record.status = 'failed'
+            raise
+        finally:
+            with self._lock:
+                record.ended_at = datetime.now()
+                record.duration_seconds += time.perf_counter() - start
+                record.peak_memory_mb = max(record.peak_memory_mb or 0.0, tracker.peak_mb)
+
+    def clear(self):
+        with self._lock:
+            self.phases = {}
+
+    def summary(self) -> Dict[str, float]:
+        """Seconds spent per phase (summed over tables), for loader stats"""
+        totals = {}
+        for record in self.phases.values():
+            totals[record.name] = round(totals.get(record.name, 0.0) + record.duration_seconds, 3)
+        return totals
+
+    def records(self) -> List[Phase]:
+        return sorted((r for r in self.phases.values() if r.ended_at), key=lambda r: r.started_at)
+
+    def save(self, connection, batch_id: str):
+        """Insert every finished phase into etl_performance_metrics (one round trip)"""
+        params = [{
+            'batch_id': batch_id,
+            'phase': record.name,
+            'table_name': record.table_name,
+            'start_time': record.started_at,
+            'end_time': record.started_at + timedelta(seconds=record.duration_seconds),
+            'rows': record.rows,
+            'peak_memory_mb': round(record.peak_memory_mb) if record.peak_memory_mb is not None else None,
+            'status': record.status,
+        } for record in self.records()]
+        execute_pipelined(connection, [(INSERT_PHASE_SQL, params)])
@@ -0,0 +1,218 @@
+"""Dependency-aware parallel scheduler for ETL loaders"""
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Callable, Dict, List
+from loguru import logger
+from sqlalchemy import text
+from ..database.connection import db
+
+
+def _init_worker():
+    """Give each forked worker its own connection pool instead of the parent's sockets"""
+    db.engine.dispose(close=False)
+
+
+def _run_node(name: str, func: Callable, args: tuple, kwargs: dict) -> Dict:
+    """Execute one node in a worker process and time it"""
+    started_at = datetime.now()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs) or {}
+        success = bool(result.get('success', True))
+        error = result.get('error')
+        stats = result.get('stats', {})
+    except Exception as e:
+        logger.error(f"Node {name} raised: {e}")
+        success, error, stats = False, str(e), {}
+
+    return {
+        'status': 'success' if success else 'failed',
+        'started_at': started_at.isoformat(),
+        'duration_seconds': round(time.perf_counter() - start, 3),
+        'error': error,
+        'stats': stats
+    }
+
+
+class DependencyScheduler:
+    """Runs a DAG of ETL nodes, starting each node as soon as its dependencies succeed.
+
+    Independent nodes run concurrently in a process pool (one DB connection per
+    worker). Nodes sharing a resource name never run at the same time, which is
+    used to serialize TRUNCATE ... CASCADE loads whose lock sets overlap.
+    Dependencies on nodes that are not part of the graph are treated as satisfied.
+    Per-node timings are stored under stats->'nodes' in etl_batch_runs. With
+    complete_batch=False the batch run is left open for a caller that runs several
+    graphs under one batch (the load-data pipeline).
+    """
+
+    def __init__(self, batch_id: str = None, max_workers: int = 4, complete_batch: bool = True):
+        self.batch_id = batch_id
+        self.max_workers = max(1, max_workers)
+        self.complete_batch = complete_batch
+        self.nodes = {}
+
+    def add_node(self, name: str, func: Callable, *args, depends_on: List[str] = None,
+                 resources: List[str] = None, **kwargs):
+        """Register a node. func must be a module-level callable returning {'success': bool, ...}"""
+        if name in self.nodes:
+            raise ValueError(f"Duplicate scheduler node: {name}")
+        self.nodes[name] = {
+            'func': func,
+            'args': args,
+            'kwargs': kwargs,
+            'depends_on': list(depends_on or []),
+            'resources': set(resources or [])
+        }
+
+    def keep_nodes(self, names: List[str]):
+        """Drop every node not in names (dependencies on dropped nodes then count as satisfied)"""
+        self.nodes = {name: node for name, node in self.nodes.items() if name in names}
+
+    def run(self) -> Dict[str, Dict]:
+        """Run all nodes and return results keyed by node name"""
+        dependencies = {
+            name: [dep for dep in node['depends_on'] if dep in self.nodes]
+            for name, node in self.nodes.items()
+        }
+        self._check_for_cycles(dependencies)
+        self._ensure_batch_run()
+
+        results = {}
+        pending = set(self.nodes)
+        running = {}  # future -> node name
+        held_resources = set()
+        wall_start = time.perf_counter()
+
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                 initializer=_init_worker) as executor:
+            while pending or running:
+                # Skip nodes whose dependencies failed (repeat so skips propagate down the graph)
+                skipped_any = True
+                while skipped_any:
+                    skipped_any = False
+                    for name in sorted(pending):
+                        failed_deps = [dep for dep in dependencies[name]
+                                       if results.get(dep, {}).get('status') in ('failed', 'skipped')]
+                        if failed_deps:
+                            pending.discard(name)
+                            results[name] = {'status': 'skipped', 'error': f"dependencies failed: {failed_deps}"}
+                            logger.warning(f"Skipping {name} - dependencies failed: {failed_deps}")
+                            self._record_node(name, results[name])
+                            skipped_any = True
+
+                # Start every ready node that fits in the pool
+                for name in sorted(pending, key=lambda n: list(self.nodes).index(n)):
+                    if len(running) >= self.max_workers:
+                        break
+                    node = self.nodes[name]
+                    if any(results.get(dep, {}).get('status') != 'success' for dep in dependencies[name]):
+                        continue
+                    if node['resources'] & held_resources:
+                        continue
+                    pending.discard(name)
+                    held_resources |= node['resources']
+                    logger.info(f"Starting {name}")
+                    future = executor.submit(_run_node, name, node['func'], node['args'], node['kwargs'])
+                    running[future] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    held_resources -= self.nodes[name]['resources']
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        # Worker process died (e.g. killed) - the node still counts as failed
+                        results[name] = {'status': 'failed', 'error': str(e)}
+                    log = logger.success if results[name]['status'] == 'success' else logger.error
+                    log(f"Finished {name}: {results[name]['status']} "
+                        f"({results[name].get('duration_seconds', 0):.1f}s)")
+                    self._record_node(name, results[name])
+
+        wall_time = time.perf_counter() - wall_start
+        busy_time = sum(r.get('duration_seconds', 0) for r in results.values())
+        logger.info(f"Scheduler finished {len(results)} nodes in {wall_time:.1f}s "
+                    f"(serial time {busy_time:.1f}s, {self.max_workers} workers)")
+        if self.complete_batch:
+            self._complete_batch_run(results, wall_time)
+        return results
+
+    def _check_for_cycles(self, dependencies: Dict[str, List[str]]):
+        """Raise ValueError if the dependency graph has a cycle"""
+        visiting, visited = set(), set()
+
+        def visit(name, path):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in dependencies[name]:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in dependencies:
+            visit(name, [])
+
+    def _ensure_batch_run(self):
+        """Create the batch run record up front so workers can reference it"""
+        if not self.batch_id:
+            return
+        sql = text("""
+            INSERT INTO etl_batch_runs (batch_id, batch_type, environment, status, triggered_by)
+            VALUES (:batch_id, 'incremental', 'dev', 'running', 'etl_pipeline')
+            ON CONFLICT (batch_id) DO NOTHING
+        """)
+        db.execute_sql(sql, {'batch_id': self.batch_id})
+
+    def _record_node(self, name: str, result: Dict):
+        """Store a node's timing under stats->'nodes' of the batch run"""
+        if not self.batch_id:
+            return
+        sql = text("""
+            UPDATE etl_batch_runs
+            SET stats = COALESCE(stats, '{}'::jsonb) || jsonb_build_object(
+                'nodes', COALESCE(stats->'nodes', '{}'::jsonb) || jsonb_build_object(:name, CAST(:result AS jsonb))
+            )
+            WHERE batch_id = :batch_id
+        """)
+        try:
+            db.execute_sql(sql, {'batch_id': self.batch_id, 'name': name, 'result': json.dumps(result, default=str)})
+        except Exception as e:
+            logger.warning(f"Could not record timing for {name}: {e}")
+
+    def _complete_batch_run(self, results: Dict[str, Dict], wall_time: float):
+        """Mark the batch run completed (or failed if any node did not succeed)"""
+        if not self.batch_id:
+            return
+        failed = sorted(name for name, r in results.items() if r['status'] != 'success')
+        sql = text("""
+            UPDATE etl_batch_runs
+            SET status = :status,
+                completed_at = CURRENT_TIMESTAMP,
+                error_message = :error_message,
+                stats = COALESCE(stats, '{}'::jsonb) || jsonb_build_object(
+                    'wall_time_seconds', CAST(:wall_time AS numeric),
+                    'workers', CAST(:workers AS integer)
+                )
+            WHERE batch_id = :batch_id
+        """)
+        try:
+            db.execute_sql(sql, {
+                'batch_id': self.batch_id,
+                'status': 'failed' if failed else 'completed',
+                'error_message': f"Nodes not successful: {failed}" if failed else None,
+                'wall_time': round(wall_time, 3),
+                'workers': self.max_workers
+            })
+        except Exception as e:
+            logger.warning(f"Could not complete batch run {self.batch_id}: {e}")
@@ -0,0 +1,446 @@
+"""
+Deterministic synthetic OOTP export for benchmarks.
+
+SyntheticExport writes the CSV files the loaders read (the reference tables a
+league needs, players.csv, career and game-level stats) plus game_logs.csv.
+Scale 1 is an 8-team league of 320 players; scale 10 and 100 make teams,
+players and therefore every stats file ten and a hundred times larger.
+Seasons and games per team are separate knobs.
+
+The same settings and seed always write identical files. Counting stats are
+drawn so that every row is internally consistent (h <= ab, hr <= h, the
+overall split is the sum of the vs-left and vs-right splits), but game-level
+lines are not reconciled with the career totals.
+"""
+import zlib
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict
+import numpy as np
+import pandas as pd
+
+TEAMS_PER_SCALE = 8
+PLAYERS_PER_TEAM = 40
+PITCHERS_PER_TEAM = 18      # roster slots 0-17 pitch (0-4 start), 18-39 hit
+LINEUP_SIZE = 9
+LEAGUE_ID = 100
+NATION_ID = 206
+LANGUAGE_ID = 1
+SUB_LEAGUES = 2
+DIVISIONS_PER_SUB_LEAGUE = 2
+# Share of plate appearances / outs against left-handed opponents (split_id 2; split 3 is the rest)
+LEFT_SPLIT_SHARE = 0.28
+# At-bats logged per half inning in game_logs.csv
+LOG_AT_BATS_PER_HALF = 3
+
+FIRST_NAMES = np.array(['Alex', 'Ben', 'Carlos', 'Dan', 'Eli', 'Frank', 'Gabe', 'Hank', 'Ivan', 'Jack',
+                        'Kenji', 'Luis', 'Mike', 'Nate', 'Omar', 'Pete', 'Ray', 'Sam', 'Tom', 'Will'])
+LAST_NAMES = np.array(['Adams', 'Baker', 'Castro', 'Diaz', 'Evans', 'Fisher', 'Garcia', 'Hill', 'Ito', 'Jones',
+                       'King', 'Lopez', 'Miller', 'Nolan', 'Ortiz', 'Price', 'Reyes', 'Smith', 'Turner', 'Young'])
+ORDINALS = ['1st', '2nd', '3rd', '4th', '5th', '6th', '7th', '8th', '9th']
+
+CAREER_PITCHING_COLUMNS = [
+    'player_id', 'year', 'team_id', 'game_id', 'league_id', 'level_id', 'split_id', 'ip', 'ab', 'tb', 'ha',
+    'k', 'bf', 'rs', 'bb', 'r', 'er', 'gb', 'fb', 'pi', 'ipf', 'g', 'gs', 'w', 'l', 's', 'sa', 'da', 'sh',
+    'sf', 'ta', 'hra', 'bk', 'ci', 'iw', 'wp', 'hp', 'gf', 'dp', 'qs', 'svo', 'bs', 'ra', 'cg', 'sho', 'sb',
+    'cs', 'hld', 'ir', 'irs', 'wpa', 'li', 'stint', 'outs', 'war',
+]
+GAME_BATTING_COLUMNS = ['player_id', 'year', 'game_id', 'team_id', 'ab', 'h', 'd', 't', 'hr', 'r', 'rbi',
+                        'bb', 'k', 'sb', 'cs', 'sf', 'sh', 'hp', 'gdp']
+# OOTP names: ipf (innings, 6.2 = 6 2/3), ha (hits allowed), pi (pitches)
+GAME_PITCHING_COLUMNS = ['player_id', 'year', 'game_id', 'team_id', 'ipf', 'ha', 'r', 'er', 'bb', 'k', 'hr',
+                         'bf', 'pi', 'w', 'l', 'sv', 'hld', 'bs', 'cg', 'sho', 'qs']
+
+
+def batting_line(rng: np.random.Generator, pa: np.ndarray) -> pd.DataFrame:
+    """Counting stats for the given plate appearances"""
+    bb = rng.binomial(pa, 0.085)
+    hp = rng.binomial(pa - bb, 0.01)
+    sf = rng.binomial(pa - bb - hp, 0.008)
+    sh = rng.binomial(pa - bb - hp - sf, 0.005)
+    ab = pa - bb - hp - sf - sh
+    h = rng.binomial(ab, 0.25)
+    hr = rng.binomial(h, 0.13)
+    t = rng.binomial(h - hr, 0.02)
+    d = rng.binomial(h - hr - t, 0.25)
+    k = rng.binomial(ab - h, 0.3)
+    sb = rng.binomial(h - hr + bb + hp, 0.06)
+    return pd.DataFrame({
+        'pa': pa, 'ab': ab, 'h': h, 'd': d, 't': t, 'hr': hr,
+        'r': hr + rng.binomial(h - hr + bb + hp, 0.3),
+        'rbi': hr + sf + rng.binomial(h - hr, 0.3),
+        'sb': sb, 'cs': rng.binomial(sb, 0.25), 'bb': bb, 'ibb': rng.binomial(bb, 0.08), 'k': k,
+        'gdp': rng.binomial(ab - h - k, 0.04), 'sh': sh, 'sf': sf, 'hp': hp,
+    })
+
+
+def pitching_line(rng: np.random.Generator, outs: np.ndarray) -> pd.DataFrame:
+    """Counting stats for the given outs recorded"""
+    ha = rng.binomial(outs, 0.3)
+    bb = rng.binomial(outs, 0.11)
+    hp = rng.binomial(outs, 0.012)
+    hra = rng.binomial(ha, 0.12)
+    bf = outs + ha + bb + hp
+    r = hra + rng.binomial(ha - hra + bb + hp, 0.3)
+    return pd.DataFrame({
+        'outs': outs, 'ha': ha, 'bb': bb, 'hp': hp, 'hra': hra, 'bf': bf,
+        'k': rng.binomial(outs, 0.3), 'r': r, 'er': hra + rng.binomial(r - hra, 0.9),
+        'pi': bf * 3 + rng.binomial(bf * 2, 0.45),
+    })
+
+
+def innings(outs: np.ndarray) -> np.ndarray:
+    """OOTP innings notation: 20 outs -> 6.2"""
+    return outs // 3 + (outs % 3) / 10
+
+
+@dataclass
+class SyntheticExport:
+    """A synthetic league; write() produces the OOTP CSV export for it"""
+    scale: int = 1
+    seasons: int = 3
+    games_per_team: int = 40
+    first_year: int = 2021
+    seed: int = 2024
+
+    @property
+    def teams(self) -> int:
+        return TEAMS_PER_SCALE * self.scale
+
+    @property
+    def players(self) -> int:
+        return self.teams * PLAYERS_PER_TEAM
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(self.first_year, self.first_year + self.seasons)
+
+    def files(self) -> Dict[str, Callable[[], pd.DataFrame]]:
+        """CSV file name -> frame builder, parents before children"""
+        return {
+            'continents.csv': self._continents,
+            'nations.csv': self._nations,
+            'languages.csv': self._languages,
+            'cities.csv': self._cities,
+            'parks.csv': self._parks,
+            'leagues.csv': self._leagues,
+            'sub_leagues.csv': self._sub_leagues,
+            'divisions.csv': self._divisions,
+            'teams.csv': self._teams,
+            'team_relations.csv': self._team_relations,
+            'players.csv': self._players,
+            'players_career_batting_stats.csv': self._career_batting,
+            'players_career_pitching_stats.csv': self._career_pitching,
+            'players_game_batting.csv': self._game_batting,
+            'players_game_pitching_stats.csv': self._game_pitching,
+            'game_logs.csv': self._game_logs,
+        }
+
+    def frame(self, filename: str) -> pd.DataFrame:
+        return self.files()[filename]()
+
+    def write(self, out_dir: Path) -> Dict[str, int]:
+        """Write every file to out_dir and return the rows written per file"""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        rows = {}
+        for filename, build in self.files().items():
+            df = build()
+            df.to_csv(out_dir / filename, index=False)
+            rows[filename] = len(df)
+        return rows
+
+    def _rng(self, name: str) -> np.random.Generator:
+        """Independent stream per file, so a file's contents do not depend on which others were built"""
+        return np.random.default_rng([self.seed, self.scale, zlib.crc32(name.encode())])
+
+    # Reference tables
+
+    def _continents(self) -> pd.DataFrame:
+        return pd.DataFrame({'continent_id': [1], 'name': ['North America'], 'abbreviation': ['NA'],
+                             'demonym': ['North American'], 'population': [580000000],
+                             'main_language_id': [LANGUAGE_ID]})
+
+    def _nations(self) -> pd.DataFrame:
+        return pd.DataFrame({'nation_id': [NATION_ID], 'name': ['United States'], 'short_name': ['USA'],
+                             'abbreviation': ['USA'], 'demonym': ['American'], 'population': [330000000],
+                             'gender': [0], 'baseball_quality': [10], 'continent_id': [1],
+                             'main_language_id': [LANGUAGE_ID], 'quality_total': [100], 'capital_id': [1],
+                             'use_hardcoded_ml_player_origins': [0], 'this_is_the_usa': [1]})
+
+    def _languages(self) -> pd.DataFrame:
+        return pd.DataFrame({'language_id': [LANGUAGE_ID], 'name': ['English']})
+
+    def _cities(self) -> pd.DataFrame:
+        ids = np.arange(1, self.teams + 1)
+        return pd.DataFrame({'city_id': ids, 'nation_id': NATION_ID, 'state_id': 0,
+                             'name': [f"City {i}" for i in ids], 'abbreviation': [f"C{i}" for i in ids],
+                             'population': self._rng('cities').integers(100000, 5000000, len(ids)),
+                             'main_language_id': LANGUAGE_ID})
+
+    def _parks(self) -> pd.DataFrame:
+        rng = self._rng('parks')
+        ids = np.arange(1, self.teams + 1)
+        parks = pd.DataFrame({'park_id': ids, 'name': [f"Park {i}" for i in ids], 'nation_id': NATION_ID,
+                              'capacity': rng.integers(25000, 50000, len(ids)), 'type': 0,
+                              'foul_ground': 1, 'turf': 0})
+        for i, distance in enumerate([330, 375, 390, 405, 390, 375, 330]):
+            parks[f'distances{i}'] = distance + rng.integers(-15, 16, len(ids))
+        for i in range(7):
+            parks[f'wall_heights{i}'] = rng.integers(8, 16, len(ids))
+        for factor in ('avg', 'd', 't', 'hr'):
+            parks[factor] = np.round(rng.normal(1.0, 0.04, len(ids)), 4)
+        return parks
+
+    def _leagues(self) -> pd.DataFrame:
+        return pd.DataFrame({'league_id': [LEAGUE_ID], 'name': ['Synthetic Baseball League'], 'abbr': ['SBL'],
+                             'nation_id': [NATION_ID], 'language_id': [LANGUAGE_ID], 'logo_file_name': [''],
+                             'parent_league_id': [0], 'league_state': [1], 'season_year': [self.years[-1]],
+                             'league_level': [1], 'current_date': [f"{self.years[-1]}-09-30"]})
+
+    def _sub_leagues(self) -> pd.DataFrame:
+        ids = np.arange(SUB_LEAGUES)
+        return pd.DataFrame({'league_id': LEAGUE_ID, 'sub_league_id': ids,
+                             'name': [f"Conference {i + 1}" for i in ids], 'abbr': [f"C{i + 1}" for i in ids],
+                             'gender': 0, 'designated_hitter': 1})
+
+    def _divisions(self) -> pd.DataFrame:
+        sub_leagues = np.repeat(np.arange(SUB_LEAGUES), DIVISIONS_PER_SUB_LEAGUE)
+        divisions = np.tile(np.arange(DIVISIONS_PER_SUB_LEAGUE), SUB_LEAGUES)
+        return pd.DataFrame({'league_id': LEAGUE_ID, 'sub_league_id': sub_leagues, 'division_id': divisions,
+                             'name': [f"Division {s + 1}-{d + 1}" for s, d in zip(sub_leagues, divisions)],
+                             'gender': 0})
+
+    def _team_alignment(self) -> pd.DataFrame:
+        team_index = np.arange(self.teams)
+        group = team_index * SUB_LEAGUES * DIVISIONS_PER_SUB_LEAGUE // self.teams
+        return pd.DataFrame({'team_id': team_index + 1, 'league_id': LEAGUE_ID,
+                             'sub_league_id': group // DIVISIONS_PER_SUB_LEAGUE,
+                             'division_id': group % DIVISIONS_PER_SUB_LEAGUE})
+
+    def _teams(self) -> pd.DataFrame:
+        teams = self._team_alignment()
+        ids = teams['team_id']
+        return teams.assign(name=[f"City {i}" for i in ids], abbr=[f"T{i}" for i in ids],
+                            nickname=[f"Team {i}" for i in ids], logo_file_name='', city_id=ids, park_id=ids,
+                            nation_id=NATION_ID, parent_team_id=0, level=1, prevent_any_moves=0,
+                            human_team=0, human_id=0, gender=0, allstar_team=0)
+
+    def _team_relations(self) -> pd.DataFrame:
+        return self._team_alignment()
+
+    # Players and career stats
+
+    @cached_property
+    def _roster(self) -> pd.DataFrame:
+        """player_id, team_id and position of every player (rosters do not change between seasons)"""
+        slot = np.arange(self.players) % PLAYERS_PER_TEAM
+        hitter_positions = 2 + (slot - PITCHERS_PER_TEAM) % 8
+        return pd.DataFrame({
+            'player_id': np.arange(1, self.players + 1),
+            'team_id': np.arange(self.players) // PLAYERS_PER_TEAM + 1,
+            'position': np.where(slot < PITCHERS_PER_TEAM, 1, hitter_positions),
+        })
+
+    def _players(self) -> pd.DataFrame:
+        from ..loaders.players_loader import PlayersLoader
+
+        rng = self._rng('players')
+        roster = self._roster
+        n = len(roster)
+        age = rng.integers(20, 38, n)
+        birth_year = self.years[-1] - age
+        players = pd.DataFrame({
+            'player_id': roster['player_id'],
+            'first_name': rng.choice(FIRST_NAMES, n), 'last_name': rng.choice(LAST_NAMES, n), 'nick_name': '',
+            'date_of_birth': [f"{y}-{m:02d}-{d:02d}" for y, m, d in
+                              zip(birth_year, rng.integers(1, 13, n), rng.integers(1, 29, n))],
+            'city_of_birth_id': rng.integers(1, self.teams + 1, n), 'nation_id': NATION_ID,
+            'second_nation_id': None, 'height': rng.integers(170, 205, n), 'weight': rng.integers(75, 120, n),
+            'bats': rng.integers(1, 4, n), 'throws': rng.integers(1, 3, n), 'person_type': 1,
+            'language_ids0': LANGUAGE_ID, 'language_ids1': 0, 'historical_id': '', 'historical_team_id': '',
+            'college': 0, 'acquired': '', 'acquired_date': None, 'draft_year': birth_year + 21,
+            'draft_round': rng.integers(1, 21, n), 'draft_supplemental': 0, 'draft_pick': rng.integers(1, 31, n),
+            'draft_overall_pick': rng.integers(1, 601, n), 'draft_eligible': 0, 'hsc_status': 0, 'redshirt': 0,
+            'picked_in_draft': 1, 'school': '', 'commit_school': '', 'draft_league_id': None,
+            'draft_team_id': None,
+            'team_id': roster['team_id'], 'league_id': LEAGUE_ID, 'position': roster['position'],
+            'role': np.where(roster['position'] == 1, 11, 0), 'uniform_number': rng.integers(1, 100, n),
+            'age': age, 'retired': 0, 'free_agent': 0, 'hall_of_fame': 0, 'inducted': 0, 'turned_coach': 0,
+            'last_league_id': LEAGUE_ID, 'last_team_id': roster['team_id'], 'organization_id': roster['team_id'],
+            'last_organization_id': roster['team_id'], 'experience': np.maximum(age - 21, 0), 'hidden': 0,
+            'rust': 0, 'local_pop': rng.integers(0, 6, n), 'national_pop': rng.integers(0, 6, n),
+            'draft_protected': 0, 'on_loan': 0, 'loan_league_id': None, 'loan_team_id': None,
+            'best_contract_offer_id': 0, 'morale': rng.integers(0, 1000, n), 'morale_mod': 0,
+            'morale_player_performance': 0, 'morale_team_performance': 0, 'morale_team_transactions': 0,
+            'morale_team_chemistry': 0, 'morale_player_role': 0, 'expectation': 0,
+        })
+        for fields in PlayersLoader.RATING_TYPES.values():
+            for column in fields.values():
+                players[column] = rng.integers(0, 201, n)
+        return players
+
+    def _season_rows(self, positions) -> pd.DataFrame:
+        """One (player, year) row per season for the players at the given positions"""
+        roster = self._roster[self._roster['position'].isin(positions)]
+        return pd.DataFrame({
+            'player_id': np.tile(roster['player_id'].to_numpy(), self.seasons),
+            'year': np.repeat(self.years, len(roster)),
+            'team_id': np.tile(roster['team_id'].to_numpy(), self.seasons),
+            'position': np.tile(roster['position'].to_numpy(), self.seasons),
+        })
+
+    @staticmethod
+    def _with_splits(rng: np.random.Generator, keys: pd.DataFrame, volume: np.ndarray, line) -> pd.DataFrame:
+        """Overall (split 1), vs left (2) and vs right (3) rows; split 1 is the sum of 2 and 3"""
+        left = rng.binomial(volume, LEFT_SPLIT_SHARE)
+        vs_left, vs_right = line(rng, left), line(rng, volume - left)
+        splits = [(1, vs_left + vs_right), (2, vs_left), (3, vs_right)]
+        return pd.concat([pd.concat([keys.assign(split_id=split_id), stats], axis=1)
+                          for split_id, stats in splits], ignore_index=True)
+
+    def _career_batting(self) -> pd.DataFrame:
+        rng = self._rng('career_batting')
+        keys = self._season_rows(range(2, 10))
+        n = len(keys)
+        keys = keys.assign(game_id=0, league_id=LEAGUE_ID, level_id=1, stint=1)
+        df = self._with_splits(rng, keys, rng.integers(20, 700, n), batting_line)
+        g = np.minimum(np.ceil(df['pa'] / 4.2), 162).astype(int)
+        return df.assign(
+            g=g, gs=np.floor(g * 0.9).astype(int), pitches_seen=df['pa'] * 4, ci=0,
+            wpa=np.round(rng.normal(0, 1, len(df)) * df['pa'] / 600, 3),
+            ubr=np.round(rng.normal(0, 1, len(df)) * df['pa'] / 600, 3),
+            war=np.round((df['h'] + df['bb'] + 2 * df['hr'] - 0.3 * df['ab']) / 60, 3),
+        )[['player_id', 'year', 'team_id', 'game_id', 'league_id', 'level_id', 'split_id', 'position', 'ab', 'h',
+           'k', 'pa', 'pitches_seen', 'g', 'gs', 'd', 't', 'hr', 'r', 'rbi', 'sb', 'cs', 'bb', 'ibb', 'gdp', 'sh',
+           'sf', 'hp', 'ci', 'wpa', 'stint', 'ubr', 'war']]
+
+    def _career_pitching(self) -> pd.DataFrame:
+        rng = self._rng('career_pitching')
+        keys = self._season_rows([1]).drop(columns='position')
+        n = len(keys)
+        starter = np.tile((self._roster.loc[self._roster['position'] == 1, 'player_id'].to_numpy() - 1)
+                          % PLAYERS_PER_TEAM < 5, self.seasons)
+        keys = keys.assign(game_id=0, league_id=LEAGUE_ID, level_id=1, stint=1)
+        outs = np.where(starter, rng.integers(300, 600, n), rng.integers(60, 240, n))
+        df = self._with_splits(rng, keys, outs, pitching_line)
+        starter = np.tile(starter, 3)
+        g = np.where(starter, np.ceil(df['outs'] / 17), np.ceil(df['outs'] / 3.5)).astype(int)
+        decisions = rng.binomial(g, np.where(starter, 0.7, 0.12))
+        w = rng.binomial(decisions, 0.5)
+        df = df.assign(
+            ip=df['outs'] // 3, ipf=df['outs'] % 3, ab=df['bf'] - df['bb'] - df['hp'],
+            tb=df['ha'] + df['hra'] * 3, g=g, gs=np.where(starter, g, 0), w=w, l=decisions - w,
+            s=np.where(starter, 0, rng.binomial(g, 0.1)), gb=rng.binomial(df['bf'] - df['k'], 0.45),
+            fb=rng.binomial(df['bf'] - df['k'], 0.35), qs=np.where(starter, rng.binomial(g, 0.5), 0),
+            gf=np.where(starter, 0, rng.binomial(g, 0.3)), li=np.round(rng.uniform(0.5, 1.5, len(df)), 3),
+            wpa=np.round(rng.normal(0, 1, len(df)) * df['outs'] / 500, 3),
+            war=np.round((df['outs'] / 3 - 2 * df['er'] + df['k'] / 3) / 40, 3),
+        )
+        return df.reindex(columns=CAREER_PITCHING_COLUMNS, fill_value=0)
+
+    # Game-level stats and logs
+
+    @cached_property
+    def _schedule(self) -> pd.DataFrame:
+        """game_id, year, home and away team of every game: each round pairs every team once"""
+        rng = self._rng('schedule')
+        rounds = self.games_per_team * self.seasons
+        pairings = rng.permuted(np.tile(np.arange(self.teams), (rounds, 1)), axis=1)
+        games_per_round = self.teams // 2
+        return pd.DataFrame({
+            'game_id': np.arange(1, rounds * games_per_round + 1),
+            'year': np.repeat(self.years, self.games_per_team * games_per_round),
+            'home_team': pairings[:, 0::2].ravel() + 1,
+            'away_team': pairings[:, 1::2].ravel() + 1,
+        })
+
+    def _game_sides(self) -> pd.DataFrame:
+        """One row per game and team that played in it"""
+        schedule = self._schedule
+        return pd.DataFrame({
+            'game_id': np.concatenate([schedule['game_id'], schedule['game_id']]),
+            'year': np.concatenate([schedule['year'], schedule['year']]),
+            'team_id': np.concatenate([schedule['home_team'], schedule['away_team']]),
+        })
+
+    def _game_batting(self) -> pd.DataFrame:
+        rng = self._rng('game_batting')
+        sides = self._game_sides()
+        hitters = PLAYERS_PER_TEAM - PITCHERS_PER_TEAM
+        # Nine distinct hitters per side: consecutive roster slots from a random start
+        start = rng.integers(0, hitters, len(sides))
+        slots = PITCHERS_PER_TEAM + (start[:, None] + np.arange(LINEUP_SIZE)) % hitters
+        rows = sides.loc[sides.index.repeat(LINEUP_SIZE)].reset_index(drop=True)
+        rows['player_id'] = (rows['team_id'] - 1) * PLAYERS_PER_TEAM + slots.ravel() + 1
+        stats = batting_line(rng, rng.integers(3, 6, len(rows)))
+        return pd.concat([rows, stats], axis=1)[GAME_BATTING_COLUMNS].sort_values(
+            ['year', 'game_id', 'player_id'], ignore_index=True)
+
+    def _game_pitching(self) -> pd.DataFrame:
+        rng = self._rng('game_pitching')
+        sides = self._game_sides()
+        n = len(sides)
+        starter_outs = rng.integers(9, 22, n)
+        starter_slot = (sides['game_id'].to_numpy() // 2) % 5
+        reliever_slot = rng.integers(5, PITCHERS_PER_TEAM, n)
+        home_wins = rng.random(n // 2) < 0.54
+        won = np.concatenate([home_wins, ~home_wins])
+
+        rows = pd.concat([sides, sides], ignore_index=True)
+        team_base = (rows['team_id'].to_numpy() - 1) * PLAYERS_PER_TEAM
+        rows['player_id'] = team_base + np.concatenate([starter_slot, reliever_slot]) + 1
+        outs = np.concatenate([starter_outs, 27 - starter_outs])
+        stats = pitching_line(rng, outs)
+
+        is_starter = np.arange(2 * n) < n
+        team_won = np.concatenate([won, won])
+        # The starter decides the game after 5+ innings, otherwise the reliever does
+        starter_decides = np.concatenate([starter_outs >= 15, starter_outs >= 15])
+        decision = np.where(is_starter, starter_decides, ~starter_decides)
+        save = team_won & ~is_starter & starter_decides & (rng.random(2 * n) < 0.5)
+        return pd.concat([rows, stats.rename(columns={'hra': 'hr'})], axis=1).assign(
+            ipf=innings(outs), w=(decision & team_won).astype(int), l=(decision & ~team_won).astype(int),
+            sv=save.astype(int), hld=0, bs=0, cg=0, sho=0,
+            qs=(is_starter & (outs >= 18) & (stats['er'].to_numpy() <= 3)).astype(int),
+        )[GAME_PITCHING_COLUMNS].sort_values(['year', 'game_id', 'player_id'], ignore_index=True)
+
+    def _game_logs(self) -> pd.DataFrame:
+        """Play-by-play lines: per half inning a header, at-bats (batter change + play) and a summary"""
+        rng = self._rng('game_logs')
+        schedule = self._schedule
+        halves = np.arange(18)
+        inning, bottom = halves // 2, halves % 2
+        lines_per_half = 2 + 2 * LOG_AT_BATS_PER_HALF
+        line_type = np.array([1] + [2, 3] * LOG_AT_BATS_PER_HALF + [4])
+
+        games = len(schedule)
+        batting_team = np.where(bottom[None, :] == 1, schedule['home_team'].to_numpy()[:, None],
+                                schedule['away_team'].to_numpy()[:, None])          # games x halves
+        header = np.char.add(np.char.add(np.where(bottom == 1, 'Bottom of the ', 'Top of the '),
+                                         np.array(ORDINALS)[inning]), ' - ')
+        header = np.char.add(np.char.add(np.tile(header, (games, 1)), np.char.add('Team ', batting_team.astype(str))),
+                             ' batting')
+
+        slot = rng.integers(PITCHERS_PER_TEAM, PLAYERS_PER_TEAM, (games, 18, LOG_AT_BATS_PER_HALF))
+        batter = (batting_team[:, :, None] - 1) * PLAYERS_PER_TEAM + slot + 1
+        change = np.char.add(np.char.add('Batting: RHB <a href="../players/player_', batter.astype(str)),
+                             '.html">Player</a>')
+        outcome = np.array(['Strikes out swinging', 'Ground out to short', 'Fly out to center',
+                            'SINGLE to left', 'DOUBLE to right', 'Walk', 'HOME RUN to left'])
+        play = np.char.add('1-1: ', outcome[rng.integers(0, len(outcome), (games, 18, LOG_AT_BATS_PER_HALF))])
+        summary = np.full((games, 18), '0 runs, 0 hits, 0 errors')
+
+        text = np.empty((games, 18, lines_per_half), dtype=object)
+        text[:, :, 0] = header
+        text[:, :, 1:-1:2] = change
+        text[:, :, 2:-1:2] = play
+        text[:, :, -1] = summary
+        lines = 18 * lines_per_half
+        return pd.DataFrame({
+            'game_id': np.repeat(schedule['game_id'].to_numpy(), lines),
+            'type': np.tile(np.tile(line_type, 18), games),
+            'line': np.tile(np.arange(1, lines + 1), games),
+            'text': text.reshape(-1),
+        })
@@ -0,0 +1,104 @@
+"""High-water mark over a composite key of append-only tables (e.g. (year, game_id))"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class KeyWatermark:
+    """The highest key loaded so far, compared lexicographically over columns.
+
+    Stored in etl_watermarks as the comma-joined column names and values
+    ('year,game_id' / '2025,18311').
+    """
+    columns: Tuple[str, ...]
+    value: Tuple[int, ...]
+
+    @classmethod
+    def parse(cls, columns: str, value: str) -> 'KeyWatermark':
+        return cls(tuple(columns.split(',')), tuple(int(part) for part in value.split(',')))
+
+    @property
+    def column_spec(self) -> str:
+        return ','.join(self.columns)
+
+    def __str__(self) -> str:
+        return ','.join(str(part) for part in self.value)
+
+    def past(self, df: pd.DataFrame) -> np.ndarray:
+        """True for the rows whose key is greater than the watermark (rows with NULL keys are False)"""
+        if not self.value:
+            return df[list(self.columns)].notna().all(axis=1).to_numpy()
+        after = np.zeros(len(df), dtype=bool)
+        equal = np.ones(len(df), dtype=bool)
+        for column, mark in zip(self.columns, self.value):
+            values = df[column]
+            present = values.notna().to_numpy()
+            numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+            after |= equal & present & (numbers > mark)
+            equal &= present & (numbers == mark)
+        return after
+
+    def advance(self, df: pd.DataFrame) -> 'KeyWatermark':
+        """This watermark or the highest key of df, whichever is greater"""
+        top = highest_key(df, self.columns)
+        return KeyWatermark(self.columns, top) if top is not None and top > self.value else self
+
+    def capped_before(self, key: Optional[Tuple[int, ...]]) -> 'KeyWatermark':
+        """This watermark, lowered just below key if needed so that key stays past it"""
+        if key is None or not self.value or key > self.value:
+            return self
+        return KeyWatermark(self.columns, key[:-1] + (key[-1] - 1,))
+
+
+def _extreme_key(df: pd.DataFrame, columns: Tuple[str, ...], highest: bool) -> Optional[Tuple[int, ...]]:
+    keys = df[list(columns)].dropna()
+    if keys.empty:
+        return None
+    extreme = []
+    for column in columns:
+        value = keys[column].max() if highest else keys[column].min()
+        keys = keys[keys[column] == value]
+        extreme.append(int(value))
+    return tuple(extreme)
+
+
+def highest_key(df: pd.DataFrame, columns: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+    """Lexicographically greatest complete key of df, None when df has none"""
+    return _extreme_key(df, columns, highest=True)
+
+
+def lowest_key(df: pd.DataFrame, columns: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+    """Lexicographically smallest complete key of df, None when df has none"""
+    return _extreme_key(df, columns, highest=False)
+
+
+class WatermarkProgress:
+    """The watermark a load moves to: its highest key, held below rows it had to drop.
+
+    Rows dropped on the way (e.g. for a missing foreign key parent) must stay
+    past the watermark, so the next append load retries them.
+    """
+
+    def __init__(self, start: KeyWatermark):
+        self.start = start
+        self._highest = start
+        self._retry_from: Optional[Tuple[int, ...]] = None
+
+    def add(self, seen: pd.DataFrame, kept: pd.DataFrame):
+        """Rows read past the watermark (seen) and those of them that were loaded (kept, same index)"""
+        self._highest = self._highest.advance(seen)
+        if len(kept) < len(seen):
+            dropped = seen.take(np.flatnonzero(~seen.index.isin(kept.index)))
+            low = lowest_key(dropped, self.start.columns)
+            if low is not None and (self._retry_from is None or low < self._retry_from):
+                self._retry_from = low
+
+    @property
+    def watermark(self) -> KeyWatermark:
+        return self._highest.capped_before(self._retry_from)
+
+    @property
+    def moved(self) -> bool:
+        return bool(self.watermark.value) and self.watermark != self.start
@@ -0,0 +1,70 @@
+"""
+Tests for the parse-once CSV frame cache
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.csv_cache import CSVFrameCache
+
+
+class CountingReader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, csv_path):
+        self.calls += 1
+        return pd.read_csv(csv_path)
+
+
+def _write_csv(path: Path, rows: int) -> Path:
+    pd.DataFrame({'player_id': range(rows), 'team_id': [1] * rows}).to_csv(path, index=False)
+    return path
+
+
+def test_file_is_parsed_once_until_it_changes(tmp_path):
+    """Repeated reads hit the cache; a new checksum or fingerprint re-parses"""
+    csv_path = _write_csv(tmp_path / 'players.csv', 10)
+    cache = CSVFrameCache(max_mb=16)
+    reader = CountingReader()
+
+    first = cache.read(csv_path, 'abc', reader=reader)
+    assert cache.read(csv_path, 'abc', reader=reader) is first
+    assert reader.calls == 1
+
+    assert len(cache.read(csv_path, 'def', reader=reader)) == 10
+    assert reader.calls == 2
+    assert len(cache) == 1  # stale entry replaced
+
+    # Without a checksum, size and mtime identify the content
+    cache.read(csv_path, reader=reader)
+    time.sleep(0.01)
+    _write_csv(csv_path, 20)
+    assert len(cache.read(csv_path, reader=reader)) == 20
+    assert reader.calls == 4
+
+
+def test_least_recently_used_frames_are_evicted_at_the_cap(tmp_path):
+    """The cache stays under its memory cap and skips frames larger than the cap"""
+    paths = [_write_csv(tmp_path / f'file{i}.csv', 20000) for i in range(3)]
+    frame_mb = pd.read_csv(paths[0]).memory_usage(deep=True).sum() / 1024 / 1024
+    cache = CSVFrameCache(max_mb=frame_mb * 2.5)
+
+    for path in paths[:2]:
+        cache.read(path, 'x')
+    cache.read(paths[0], 'x')  # touch file0 so file1 is least recently used
+    cache.read(paths[2], 'x')
+
+    assert cache.stats['evictions'] == 1
+    assert cache.nbytes <= cache.max_bytes
+    cache.read(paths[0], 'x')
+    assert cache.stats['hits'] == 2
+
+    tiny = CSVFrameCache(max_mb=frame_mb / 2)
+    tiny.read(paths[0], 'x')
+    assert len(tiny) == 0
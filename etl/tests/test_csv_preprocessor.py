@@ -0,0 +1,67 @@
+"""
+Tests for the fused CSV cleaning pass and the message filter mask
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.csv_preprocessor import CSVPreprocessor
+from src.utils.keyset import CompositeKeySet
+from src.utils.message_filter import MessageFilter
+
+
+def _frame(rows=400, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'message_id': rng.integers(0, 150, rows),
+        'subject': rng.choice(["''", '', 'Trade', None], rows),
+        'body': rng.choice(["''", 'x', 'y'], rows),
+        'importance': rng.integers(0, 5, rows),
+    })
+
+
+def test_fused_pass_matches_filter_clean_dedup_in_sequence():
+    df = _frame()
+    original = df.copy()
+    keep = (df['importance'] >= 2).to_numpy()
+
+    for subset in (['message_id'], None):
+        expected = df[keep].replace("''", "", regex=False).drop_duplicates(subset=subset, keep='first')
+        result = CSVPreprocessor.preprocess(df, config={'dedup_subset': subset}, keep=keep)
+        pd.testing.assert_frame_equal(result, expected)
+
+    # Only the requested columns are materialized, and the input frame is untouched
+    result = CSVPreprocessor.preprocess(df, config={'dedup_subset': ['message_id']}, columns=['message_id', 'body'])
+    assert list(result.columns) == ['message_id', 'body'] and "''" not in set(result['body'])
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_numeric_columns_are_not_cleaned():
+    df = pd.DataFrame({'player_id': [1, 2], 'year': [2024, 2024], 'name': ['Smith', 'Jones']})
+    assert CSVPreprocessor.text_columns(df) == ['name']
+    assert CSVPreprocessor.clean_quoted_empty_strings(df) is df
+
+
+def test_chunks_deduplicate_across_chunks_with_a_key_set():
+    df = pd.DataFrame({'player_id': [1, 1, 2, 3, 2, 4], 'year': 2024, 'game_id': [7, 7, 7, 7, 7, 8]})
+    seen = CompositeKeySet()
+    config = {'clean_quoted_strings': False, 'dedup_subset': ['player_id', 'year', 'game_id']}
+
+    chunks = [CSVPreprocessor.preprocess(chunk, config=config, seen_keys=seen) for chunk in (df[:3], df[3:])]
+
+    pd.testing.assert_frame_equal(pd.concat(chunks), df.drop_duplicates())
+
+
+def test_message_filter_mask_combines_filters():
+    df = pd.DataFrame({'message_type': [1, 2, 3, 1, 2], 'sender_id': [5, 5, 6, 7, 7],
+                       'importance': [3, 1, 4, 5, None], 'deleted': [0, 0, 0, 1, 0]})
+    message_filter = MessageFilter({'exclude_message_types': [3], 'exclude_sender_ids': [6, 7],
+                                    'min_importance': 2, 'exclude_deleted': True})
+
+    assert message_filter.build_mask(df).tolist() == [True, False, False, False, False]
+    assert message_filter.filter_messages(df)['sender_id'].tolist() == [5]
@@ -0,0 +1,67 @@
+"""
+Tests for target-derived CSV schemas (column pruning, compact dtypes, cast plan)
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.csv_schema import CSVSchema, cast_expression, staging_column_types
+
+TARGET_TYPES = {
+    'player_id': 'integer',
+    'year': 'smallint',
+    'h': 'smallint',
+    'ip': 'numeric',
+    'war': 'double precision',
+    'name': 'character varying',
+}
+
+
+def test_schema_prunes_columns_and_declares_compact_dtypes():
+    """Only target, mapped, referenced and extra columns are kept"""
+    header = ['player_id', 'year', 'ha', 'ipf', 'war', 'name', 'unused', 'split_id']
+    schema = CSVSchema.from_target(header, TARGET_TYPES, column_mapping={'ha': 'h'},
+                                   extra_columns=['split_id'], expressions=['ipf / 3.0'])
+
+    assert schema.usecols == ['player_id', 'year', 'ha', 'ipf', 'war', 'name', 'split_id']
+    assert schema.dtypes == {'player_id': 'Int32', 'year': 'Int16', 'ha': 'Int16', 'war': 'float64'}
+    # Integers are parsed one width wider so overflow is detected rather than wrapped
+    assert schema.parse_dtypes['year'] == 'Int32'
+
+
+def test_read_csv_uses_compact_dtypes_and_falls_back_per_column(tmp_path):
+    """Columns that do not fit their dtype keep the parsed dtype and stage wider"""
+    csv_path = tmp_path / 'stats.csv'
+    csv_path.write_text("player_id,year,h,war,name,unused\n"
+                        "1,2001,150,2.5,A,x\n"
+                        "2,2001,,0.1,B,y\n"
+                        "3,2002,70000,,C,z\n")
+    schema = CSVSchema.from_target(pd.read_csv(csv_path, nrows=0).columns, TARGET_TYPES)
+
+    df = schema.read_csv(csv_path)
+
+    assert list(df.columns) == ['player_id', 'year', 'h', 'war', 'name']
+    assert str(df['player_id'].dtype) == 'Int32'
+    assert str(df['year'].dtype) == 'Int16'
+    assert df['h'].tolist()[2] == 70000  # out of SMALLINT range: not wrapped
+    assert staging_column_types(df) == {
+        'player_id': 'INTEGER', 'year': 'SMALLINT', 'h': 'INTEGER',
+        'war': 'DOUBLE PRECISION', 'name': 'TEXT'
+    }
+
+    fractional = tmp_path / 'fractional.csv'
+    fractional.write_text("player_id,year\n1.5,2001\n")
+    df = CSVSchema.from_target(['player_id', 'year'], TARGET_TYPES).read_csv(fractional)
+    assert df['player_id'].tolist() == [1.5]
+    assert str(df['year'].dtype) == 'Int16'
+
+
+def test_cast_expression_only_casts_text_staging_columns():
+    assert cast_expression('s.h', 'smallint', 'smallint') == 's.h'
+    assert cast_expression('s.h', 'text', 'smallint') == "NULLIF(s.h, '')::SMALLINT"
+    assert cast_expression('dob', 'text', 'date') == "NULLIF(dob, '')::DATE"
+    assert cast_expression('name', 'text', 'text') == 'name'
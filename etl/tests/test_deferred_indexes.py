@@ -0,0 +1,47 @@
+"""
+Tests for deferring indexes and foreign keys during bulk loads
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.deferred_indexes import FOREIGN_KEY, INDEX, DeferredObject, deferrable_indexes
+from src.database.table_swap import IndexSpec
+from src.loaders.load_graph import loaded_tables
+
+
+def test_only_non_unique_secondary_indexes_are_deferred():
+    specs = [
+        IndexSpec('players_core_pkey', 'CREATE UNIQUE INDEX players_core_pkey ON public.players_core USING btree (player_id)', 'p'),
+        IndexSpec('idx_player_name_search', "CREATE INDEX idx_player_name_search ON public.players_core USING gin "
+                                            "(to_tsvector('english'::regconfig, first_name))"),
+        IndexSpec('idx_players_core_team', 'CREATE INDEX idx_players_core_team ON public.players_core USING btree (team_id)'),
+        IndexSpec('idx_players_core_uuid', 'CREATE UNIQUE INDEX idx_players_core_uuid ON public.players_core USING btree (uuid)'),
+    ]
+
+    assert [spec.name for spec in deferrable_indexes(specs)] == ['idx_player_name_search', 'idx_players_core_team']
+
+
+def test_rebuild_statements():
+    index = DeferredObject('players_game_batting_stats', INDEX, 'idx_pgb_team',
+                           'CREATE INDEX idx_pgb_team ON ONLY public.players_game_batting_stats USING btree (team_id)')
+    foreign_key = DeferredObject('players_career_batting_stats', FOREIGN_KEY, 'fk_pcb_player',
+                                 'FOREIGN KEY (player_id) REFERENCES players_core(player_id)')
+
+    # A partitioned table's index is rebuilt on every partition
+    assert index.rebuild_sql() == ['CREATE INDEX idx_pgb_team ON public.players_game_batting_stats USING btree (team_id)']
+    assert foreign_key.rebuild_sql() == [
+        'ALTER TABLE players_career_batting_stats ADD CONSTRAINT fk_pcb_player '
+        'FOREIGN KEY (player_id) REFERENCES players_core(player_id) NOT VALID',
+        'ALTER TABLE players_career_batting_stats VALIDATE CONSTRAINT fk_pcb_player',
+    ]
+    assert index.drop_sql() == 'DROP INDEX IF EXISTS idx_pgb_team'
+
+
+def test_loaded_tables_cover_reference_and_stats_loaders():
+    tables = loaded_tables()
+
+    assert len(tables) == len(set(tables))
+    assert {'nations', 'teams', 'players_core', 'players_game_pitching_stats'} <= set(tables)
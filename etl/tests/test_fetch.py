@@ -0,0 +1,109 @@
+"""
+Tests for the incremental fetch of the OOTP CSV export
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.fetch import (LocalSource, fetch_csv_files, mark_files_loaded, parse_rsync_listing,
+                             read_changed_files)
+
+
+def _export(tmp_path):
+    export = tmp_path / 'export'
+    export.mkdir()
+    (export / 'teams.csv').write_text('team_id,name\n1,Boston\n')
+    (export / 'players.csv').write_text('player_id,team_id\n1,1\n')
+    (export / 'notes.txt').write_text('not an export file')
+    return export
+
+
+def _touch(path, offset=60):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + offset))
+
+
+def test_only_new_or_modified_files_are_copied(tmp_path):
+    export, dest = _export(tmp_path), tmp_path / 'csv'
+    first = fetch_csv_files(LocalSource(export), dest, workers=2)
+    assert sorted(first.copied) == sorted(first.changed) == ['players.csv', 'teams.csv']
+    assert (dest / 'teams.csv').read_text() == (export / 'teams.csv').read_text()
+    assert not (dest / 'notes.txt').exists()
+
+    assert fetch_csv_files(LocalSource(export), dest).copied == []
+
+    # Re-exported with identical content: transferred but not changed
+    _touch(export / 'teams.csv')
+    (export / 'players.csv').write_text('player_id,team_id\n1,2\n')
+    _touch(export / 'players.csv')
+    result = fetch_csv_files(LocalSource(export), dest)
+    assert sorted(result.copied) == ['players.csv', 'teams.csv']
+    assert result.changed == ['players.csv']
+    assert (dest / 'players.csv').read_text().endswith('1,2\n')
+    assert [p.name for p in dest.iterdir() if p.name.startswith('.') and p.name != '.fetch_manifest.json'] == []
+
+
+def test_dry_run_and_removed_files(tmp_path):
+    export, dest = _export(tmp_path), tmp_path / 'csv'
+    dry = fetch_csv_files(LocalSource(export), dest, dry_run=True)
+    assert sorted(dry.copied) == ['players.csv', 'teams.csv']
+    assert list(dest.iterdir()) == []
+
+    fetch_csv_files(LocalSource(export), dest)
+    (export / 'teams.csv').unlink()
+    result = fetch_csv_files(LocalSource(export), dest)
+    assert result.removed == ['teams.csv']
+    assert not (dest / 'teams.csv').exists()
+    assert read_changed_files(dest) == ['players.csv']
+
+
+def test_changed_files_stay_listed_until_loaded(tmp_path):
+    export, dest = _export(tmp_path), tmp_path / 'csv'
+    assert read_changed_files(dest) is None
+
+    fetch_csv_files(LocalSource(export), dest)
+    (export / 'teams.csv').write_text('team_id,name\n1,Boston\n2,New York\n')
+    fetch_csv_files(LocalSource(export), dest)
+    # A second fetch before loading keeps the first fetch's changes
+    assert read_changed_files(dest) == ['players.csv', 'teams.csv']
+
+    mark_files_loaded(['teams.csv'], dest)
+    assert read_changed_files(dest) == ['players.csv']
+
+
+def test_parse_rsync_listing():
+    listing = ("drwxr-xr-x          4096 2026/10/14 21:03:11 .\n"
+               "-rw-r--r--       1234567 2026/10/14 21:02:59 players.csv\n"
+               "-rw-r--r--            88 2026/10/14 21:03:00 team relations.csv\n")
+
+    files = parse_rsync_listing(listing)
+    assert set(files) == {'players.csv', 'team relations.csv'}
+    assert files['players.csv'] == {'size': 1234567,
+                                    'mtime': int(datetime(2026, 10, 14, 21, 2, 59, tzinfo=timezone.utc).timestamp())}
+
+
+def test_rsync_passes_remote_paths_verbatim(monkeypatch):
+    """Paths with spaces reach the remote rsync as one protected argument, listed in UTC"""
+    import subprocess
+    from src.utils.fetch import RsyncSource
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append((args, kwargs))
+        return subprocess.CompletedProcess(args, 0, stdout='', stderr='')
+
+    monkeypatch.setattr(subprocess, 'run', run)
+    source = RsyncSource('user@game', '/OOTP Baseball 25/My League.lg/import_export/csv/')
+
+    source.list_files()
+    source.copy('players.csv', Path('/tmp/players.csv'))
+
+    (listing, listing_kwargs), (copy, _) = calls
+    assert '--protect-args' in listing and '--protect-args' in copy
+    assert listing[-1] == 'user@game:/OOTP Baseball 25/My League.lg/import_export/csv/'
+    assert copy[-2] == 'user@game:/OOTP Baseball 25/My League.lg/import_export/csv/players.csv'
+    assert listing_kwargs['env']['TZ'] == 'UTC'
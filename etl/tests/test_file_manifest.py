@@ -0,0 +1,62 @@
+"""
+Tests for the checksum manifest used to skip unchanged CSV files
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.checksum import FileManifest, calculate_file_checksum, get_file_stat
+
+
+def test_manifest_hashes_every_file(tmp_path):
+    """Files without stored metadata are hashed"""
+    files = []
+    for i in range(5):
+        path = tmp_path / f"file_{i}.csv"
+        path.write_text(f"id,value\n{i},{i * 10}\n")
+        files.append(path)
+
+    manifest = FileManifest.build(files, workers=3)
+
+    for path in files:
+        entry = manifest.entries[path.name]
+        assert entry['checksum'] == calculate_file_checksum(path)
+        assert entry['file_size'] == path.stat().st_size
+        assert not entry['reused']
+
+
+def test_manifest_reuses_stored_checksum_when_size_and_mtime_match(tmp_path):
+    """Matching size+mtime trusts the stored checksum without reading the file"""
+    path = tmp_path / "players.csv"
+    path.write_text("player_id\n1\n")
+    stored = {path.name: {'checksum': 'stored-checksum', **get_file_stat(path)}}
+
+    manifest = FileManifest.build([path], stored_metadata=stored)
+    assert manifest.entries[path.name]['checksum'] == 'stored-checksum'
+    assert manifest.entries[path.name]['reused']
+
+    manifest = FileManifest.build([path], stored_metadata=stored, trust_mtime=False)
+    assert manifest.entries[path.name]['checksum'] == calculate_file_checksum(path)
+
+
+def test_manifest_rehashes_when_size_changes(tmp_path):
+    """A size mismatch forces a fresh hash"""
+    path = tmp_path / "teams.csv"
+    path.write_text("team_id\n1\n2\n")
+    stored = {path.name: {'checksum': 'stale', 'file_size': 1, 'last_modified': get_file_stat(path)['last_modified']}}
+
+    manifest = FileManifest.build([path], stored_metadata=stored)
+
+    assert manifest.entries[path.name]['checksum'] == calculate_file_checksum(path)
+
+
+def test_manifest_get_computes_missing_entries(tmp_path):
+    """Files not in the manifest are fingerprinted on demand"""
+    path = tmp_path / "coaches.csv"
+    path.write_text("coach_id\n7\n")
+
+    entry = FileManifest().get(path)
+
+    assert entry['checksum'] == calculate_file_checksum(path)
@@ -0,0 +1,43 @@
+"""
+Tests for the set-based FK stub repair
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.fk_repair import PARENT_STUBS, repair_foreign_keys
+
+
+class RecordingConnection:
+    """Captures statements and returns canned stubbed IDs per parent table"""
+
+    def __init__(self, returned):
+        self.returned = returned
+        self.statements = []
+
+    def execute(self, statement):
+        sql = str(statement)
+        self.statements.append(sql)
+        table = sql.split('INSERT INTO', 1)[1].split()[0]
+        return [(i,) for i in self.returned.get(table, [])]
+
+
+def test_one_statement_per_parent_covering_all_columns():
+    """Columns referencing the same parent are unioned into a single INSERT ... SELECT"""
+    connection = RecordingConnection({'teams': [7, -3]})
+    references = [('nation_id', 'nations'), ('team_id', 'teams'),
+                  ('second_nation_id', 'nations'), ('last_team_id', 'teams')]
+
+    repaired = repair_foreign_keys(connection, 'staging_players_fk_refs', references)
+
+    assert repaired == {'nations': [], 'teams': [-3, 7]}
+    assert len(connection.statements) == 2
+    nations_sql, teams_sql = connection.statements
+    assert 'SELECT nation_id::BIGINT' in nations_sql and 'SELECT second_nation_id::BIGINT' in nations_sql
+    assert 'k.id NOT IN (0)' in nations_sql  # nation 0 is the "Unknown" placeholder
+    assert 'WHERE NOT EXISTS (SELECT 1 FROM teams p WHERE p.team_id = k.id)' in teams_sql
+    assert 'NOT IN' not in teams_sql
+    for column in PARENT_STUBS['teams'].columns:
+        assert column in teams_sql
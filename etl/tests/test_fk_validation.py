@@ -0,0 +1,73 @@
+"""
+Tests for the pre-flight foreign key checks of incoming rows
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.catalog import catalog
+from src.database.fk_validation import ForeignKey, ParentKeyCache, parse_foreign_key
+from src.loaders import base_loader
+from src.loaders.batting_stats_loader import BattingStatsLoader
+
+TEAMS = ForeignKey('team_id', 'teams', 'team_id')
+PLAYERS = ForeignKey('player_id', 'players_core', 'player_id')
+
+
+def _cache(monkeypatch):
+    """ParentKeyCache seeded with key sets, as if read from the database"""
+    monkeypatch.setattr(catalog, 'version', 1)
+    cache = ParentKeyCache.__new__(ParentKeyCache)
+    cache._foreign_keys = {('players_career_batting_stats', 1): [PLAYERS, TEAMS]}
+    cache._keys = {('teams', 'team_id'): (None, np.array([1, 2, 3])),
+                   ('players_core', 'player_id'): (None, np.array([10, 11]))}
+    monkeypatch.setattr(cache, '_changed_at', lambda tables: {})
+    return cache
+
+
+def _frame():
+    return pd.DataFrame({'player_id': pd.array([10, 11, 12, 10], dtype='Int32'),
+                         'team_id': pd.array([1, None, 7, 9], dtype='Int16'),
+                         'h': [1, 2, 3, 4]})
+
+
+def test_orphaned_values_are_found_and_nulls_ignored(monkeypatch):
+    violations = _cache(monkeypatch).check(_frame(), 'players_career_batting_stats')
+
+    assert [(v.foreign_key.column, v.mask.tolist(), v.missing) for v in violations] == [
+        ('player_id', [False, False, True, False], [12]),
+        ('team_id', [False, False, True, True], [7, 9]),
+    ]
+    # Columns stubbed during the load and parents written by the same loader are not checked
+    assert _cache(monkeypatch).check(_frame(), 'players_career_batting_stats', skip_columns=['team_id'],
+                                     skip_parents=['players_core']) == []
+
+
+def test_loader_policies(monkeypatch):
+    monkeypatch.setattr(base_loader, 'parent_keys', _cache(monkeypatch))
+    loader = BattingStatsLoader.__new__(BattingStatsLoader)
+    loader.stats = {}
+
+    monkeypatch.setattr(loader, 'get_fk_validation_mode', lambda: 'drop')
+    kept = loader._validate_foreign_keys(_frame())
+    assert kept['player_id'].tolist() == [10, 11] and loader.stats['rows_dropped_fk'] == 2
+
+    monkeypatch.setattr(loader, 'get_fk_validation_mode', lambda: 'fail')
+    with pytest.raises(ValueError, match='teams.team_id'):
+        loader._validate_foreign_keys(_frame())
+
+    monkeypatch.setattr(loader, 'get_fk_validation_mode', lambda: 'report')
+    assert len(loader._validate_foreign_keys(_frame())) == 4
+    assert loader.stats['fk_violations'] == {'players_career_batting_stats.player_id': 1,
+                                             'players_career_batting_stats.team_id': 2}
+
+
+def test_deferred_foreign_key_definitions_are_parsed():
+    assert parse_foreign_key('FOREIGN KEY (team_id) REFERENCES teams(team_id)') == ('team_id', 'teams', 'team_id')
+    assert parse_foreign_key('FOREIGN KEY (a, b) REFERENCES t(a, b)') is None
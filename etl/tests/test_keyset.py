@@ -0,0 +1,53 @@
+"""
+Tests for the packed composite key set used to deduplicate game stats across chunks
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.keyset import CompositeKeySet
+
+KEYS = ['player_id', 'year', 'game_id']
+
+
+def _dedup_in_chunks(df, chunk_rows, keyset):
+    kept = []
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        kept.append(chunk[keyset.add_new(chunk, KEYS)])
+    return pd.concat(kept)
+
+
+def test_chunked_dedup_matches_drop_duplicates():
+    """Streaming dedup keeps exactly the rows drop_duplicates(keep='first') keeps"""
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'player_id': rng.integers(1, 50, 5000),
+        'year': rng.integers(1990, 1993, 5000),
+        'game_id': rng.integers(1, 40, 5000),
+        'h': rng.integers(0, 5, 5000),
+    })
+
+    keyset = CompositeKeySet()
+    result = _dedup_in_chunks(df, 333, keyset)
+
+    expected = df.drop_duplicates(subset=KEYS, keep='first')
+    pd.testing.assert_frame_equal(result, expected)
+    assert len(keyset) == len(expected)
+    assert keyset.nbytes == 8 * len(expected)
+
+
+def test_out_of_range_keys_fall_back_without_losing_seen_keys():
+    """Values too large to pack switch to tuples and still remember earlier keys"""
+    keyset = CompositeKeySet()
+    first = pd.DataFrame({'player_id': [1, 2], 'year': [2000, 2000], 'game_id': [10, 11]})
+    assert keyset.add_new(first, KEYS).tolist() == [True, True]
+
+    second = pd.DataFrame({'player_id': [1, 2 ** 30, 2 ** 30], 'year': [2000, 2000, 2000], 'game_id': [10, 5, 5]})
+    assert keyset.add_new(second, KEYS).tolist() == [False, True, False]
+    assert len(keyset) == 3
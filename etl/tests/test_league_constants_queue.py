@@ -0,0 +1,104 @@
+"""
+Tests for dirty-season tracking and the parallel league constants run
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.catalog import catalog
+from src.database.staging import StagingTableManager
+from src.loaders.batting_stats_loader import BattingStatsLoader
+from src.loaders.load_plan import clear_load_plans
+from src.transformers.league_constants_transformer import LeagueConstantsTransformer
+from src.utils.phase_timer import PhaseTimer
+
+
+def test_stats_upsert_queues_changed_year_league_pairs(monkeypatch):
+    """Pairs come from the upsert's RETURNING, so unchanged rows queue nothing"""
+    clear_load_plans()
+    types = {'player_id': 'integer', 'year': 'smallint', 'team_id': 'integer', 'league_id': 'integer',
+             'split_id': 'smallint', 'stint': 'smallint', 'ab': 'smallint', 'row_hash': 'character'}
+    monkeypatch.setattr(catalog, '_tables', {'players_career_batting_stats': types})
+    loader = BattingStatsLoader.__new__(BattingStatsLoader)
+    loader.staging_mgr = StagingTableManager.__new__(StagingTableManager)
+    loader.staging_mgr.column_types = {'staging_players_career_batting_stats': {
+        col: col_type for col, col_type in types.items() if col != 'row_hash'}}
+
+    plan = loader._get_upsert_plan('staging_players_career_batting_stats', 'players_career_batting_stats')
+
+    assert 'RETURNING (xmax = 0) AS inserted, year, league_id' in plan.sql
+    assert 'INSERT INTO etl_calculation_queue' in plan.sql
+    assert "'league_constants'" in plan.sql
+    assert "ON CONFLICT (calculation_type, year, league_id) WHERE status = 'pending' DO NOTHING" in plan.sql
+    clear_load_plans()
+
+
+def test_invalid_and_failed_seasons_are_marked_for_retry(monkeypatch):
+    transformer = LeagueConstantsTransformer.__new__(LeagueConstantsTransformer)
+    transformer.force_all = False
+    transformer.max_workers = 4
+    transformer.batch_id = None
+    transformer.timer = PhaseTimer()
+
+    completed = {}
+
+    monkeypatch.setattr(transformer, '_get_years_to_process', lambda: [2019, 2020, 2021, 2022])
+    monkeypatch.setattr(transformer, '_validate_prerequisites', lambda years: [y for y in years if y != 2019])
+    monkeypatch.setattr(transformer, '_process_year', lambda year: year != 2021)
+    monkeypatch.setattr(transformer, '_complete_queue', lambda failed: completed.update(failed=sorted(failed)))
+
+    assert transformer.transform_constants() is False
+    assert completed['failed'] == [2019, 2021]
+
+
+def test_nothing_queued_is_success(monkeypatch):
+    transformer = LeagueConstantsTransformer.__new__(LeagueConstantsTransformer)
+    transformer.force_all = False
+    monkeypatch.setattr(transformer, '_get_years_to_process', lambda: [])
+
+    assert transformer.transform_constants() is True
+
+
+def test_claimed_entries_are_released_when_a_season_raises(monkeypatch):
+    """A database error in one season fails that season; only the rows this run claimed are completed"""
+    claimed_at = datetime(2026, 10, 17, 6, 0)
+    statements = []
+
+    class Result(list):
+        def fetchall(self):
+            return list(self)
+
+    class QueueDB:
+        def execute_sql(self, sql, params=None):
+            statements.append((str(sql), params))
+            if 'RETURNING queue_id' in str(sql):
+                return Result([(11, 2020, 100, claimed_at), (12, 2021, 100, claimed_at)])
+            return Result()
+
+    transformer = LeagueConstantsTransformer.__new__(LeagueConstantsTransformer)
+    transformer.db = QueueDB()
+    transformer.force_all = False
+    transformer.max_workers = 2
+    transformer.batch_id = None
+    transformer.timer = PhaseTimer()
+
+    def verify(year):
+        if year == 2021:
+            raise RuntimeError("connection lost")
+        return 3
+
+    monkeypatch.setattr(transformer, '_validate_prerequisites', lambda years: years)
+    monkeypatch.setattr(transformer, '_calculate_year_constants', lambda year: True)
+    monkeypatch.setattr(transformer, '_verify_calculations', verify)
+    monkeypatch.setattr(transformer, '_record_year_calculation', lambda year, rows: None)
+    monkeypatch.setattr(transformer, '_record_table_changes', lambda tables: None)
+    monkeypatch.setattr(transformer, '_save_phases', lambda: None)
+
+    assert transformer.transform_constants() is False
+
+    sql, params = statements[-1]
+    assert 'queue_id = ANY' in sql and 'started_at = :claimed_at' in sql
+    assert params == {'queue_ids': [11, 12], 'claimed_at': claimed_at, 'failed': [2021]}
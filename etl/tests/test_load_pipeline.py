@@ -0,0 +1,59 @@
+"""
+Tests for the checkpointed load-data pipeline
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.loaders.load_graph import STATS_FILES, STATS_REFERENCE_FILES, build_stats_graph
+from src.loaders.pipeline import STAGES, STATS_STAGE_NODES, completed_stages, run_stages
+
+
+def test_stops_at_first_failure_and_checkpoints_each_stage():
+    calls, checkpoints = [], {}
+
+    def stage(name, success=True):
+        def run():
+            calls.append(name)
+            return {'success': success, 'error': None if success else 'FK violation in team_roster'}
+        return run
+
+    stages = {'fetch': stage('fetch'), 'reference': stage('reference'),
+              'history': stage('history', success=False), 'views': stage('views')}
+    results = run_stages(stages, on_stage_done=checkpoints.__setitem__)
+
+    assert calls == ['fetch', 'reference', 'history']
+    assert results['history']['status'] == 'failed'
+    assert checkpoints == results
+    assert completed_stages(checkpoints) == ['fetch', 'reference']
+
+
+def test_resume_skips_completed_stages():
+    calls = []
+    stages = {name: (lambda name=name: calls.append(name)) for name in ['fetch', 'reference', 'players']}
+    stages['stats'] = lambda: 1 / 0
+
+    results = run_stages(stages, completed=['fetch', 'reference'])
+
+    assert calls == ['players']
+    assert list(results) == ['players', 'stats']
+    assert results['stats']['status'] == 'failed' and 'division' in results['stats']['error']
+
+
+def test_stages_cover_the_stats_graph(tmp_path):
+    for csv_file in list(STATS_FILES) + STATS_REFERENCE_FILES:
+        (tmp_path / csv_file).touch()
+    scheduler = build_stats_graph(tmp_path, batch_id=None)
+    stage_nodes = [node for stage in STAGES if stage in STATS_STAGE_NODES for node in STATS_STAGE_NODES[stage]]
+
+    assert sorted(stage_nodes) == sorted(scheduler.nodes)
+
+    scheduler.keep_nodes(STATS_STAGE_NODES['constants'])
+    assert list(scheduler.nodes) == ['league_constants']
+
+
+def test_indexes_are_rebuilt_before_they_are_queried():
+    assert STAGES.index('defer_indexes') < STAGES.index('reference')
+    assert STAGES.index('history') < STAGES.index('rebuild_indexes') < STAGES.index('constants')
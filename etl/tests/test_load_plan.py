@@ -0,0 +1,124 @@
+"""
+Tests for the cached staging -> target load plans
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.catalog import catalog
+from src.database.staging import StagingTableManager
+from src.loaders.game_stats_loader import GameBattingStatsLoader
+from src.loaders.load_plan import clear_load_plans
+
+TARGET_TYPES = {
+    'player_id': 'integer', 'year': 'smallint', 'game_id': 'integer',
+    'team_id': 'integer', 'ab': 'smallint', 'h': 'smallint', 'row_hash': 'character',
+}
+
+
+def _loader(staging_types):
+    loader = GameBattingStatsLoader.__new__(GameBattingStatsLoader)
+    loader.staging_mgr = StagingTableManager.__new__(StagingTableManager)
+    loader.staging_mgr.column_types = {'staging_players_game_batting_stats': staging_types}
+    return loader
+
+
+def test_upsert_plan_is_built_once_per_staging_signature(monkeypatch):
+    """Repeated loads reuse the compiled SQL; a new staging type or schema version rebuilds it"""
+    clear_load_plans()
+    monkeypatch.setattr(catalog, '_tables', {'players_game_batting_stats': TARGET_TYPES})
+    monkeypatch.setattr(catalog, 'version', 1)
+    staging_table = 'staging_players_game_batting_stats'
+    staging_types = {'player_id': 'integer', 'year': 'smallint', 'game_id': 'integer',
+                     'team_id': 'integer', 'ab': 'text', 'h': 'smallint'}
+
+    builds = []
+    original_build = GameBattingStatsLoader._build_upsert_plan
+
+    def counting_build(self, *args):
+        builds.append(args)
+        return original_build(self, *args)
+
+    monkeypatch.setattr(GameBattingStatsLoader, '_build_upsert_plan', counting_build)
+
+    plan = _loader(staging_types)._get_upsert_plan(staging_table, 'players_game_batting_stats')
+    assert _loader(dict(staging_types))._get_upsert_plan(staging_table, 'players_game_batting_stats') is plan
+    assert len(builds) == 1
+
+    # Only the TEXT staging column is cast; row_hash is computed, not copied
+    assert "NULLIF(s.ab, '')::SMALLINT AS ab" in plan.sql
+    assert 's.h AS h' in plan.sql
+    assert 'md5(ROW(' in plan.sql and 'ON CONFLICT (player_id, year, game_id)' in plan.sql
+    assert 's.player_id = t.player_id AND s.year = t.year AND s.game_id = t.game_id' in plan.delete_sql
+    assert plan.count_missing_sql.startswith('SELECT COUNT(*) FROM players_game_batting_stats t WHERE NOT EXISTS')
+
+    widened = dict(staging_types, h='integer')
+    _loader(widened)._get_upsert_plan(staging_table, 'players_game_batting_stats')
+    monkeypatch.setattr(catalog, 'version', 2)
+    _loader(staging_types)._get_upsert_plan(staging_table, 'players_game_batting_stats')
+    assert len(builds) == 3
+    clear_load_plans()
+
+
+def test_staging_manager_tracks_added_and_altered_columns():
+    """Column types of staging tables are known without querying information_schema"""
+    executed = []
+
+    class RecordingDB:
+        def execute_sql(self, sql, params=None):
+            executed.append(str(sql))
+
+    mgr = StagingTableManager.__new__(StagingTableManager)
+    mgr.db = RecordingDB()
+    mgr.column_types = {}
+
+    mgr.create_staging_from_csv_structure('stats', {'player_id': 'INTEGER', 'note': 'TEXT'})
+    mgr.add_columns('staging_stats', {'era': 'DECIMAL(5,2)', 'last_updated': 'TIMESTAMP'})
+    mgr.alter_column_type('staging_stats', 'player_id', 'BIGINT')
+
+    assert mgr.get_column_types('staging_stats') == {
+        'player_id': 'bigint', 'note': 'text', 'era': 'numeric', 'last_updated': 'timestamp without time zone',
+    }
+    assert sum('ADD COLUMN' in sql for sql in executed) == 1
+
+    mgr.drop_staging_table('staging_stats')
+    assert 'staging_stats' not in mgr.column_types
+
+
+def test_full_load_plan_evaluates_calculated_fields_inline(monkeypatch):
+    """Calculated fields are part of the INSERT ... SELECT instead of an UPDATE of the staging table"""
+    from src.loaders.reference_loader import ReferenceLoader
+    monkeypatch.setattr(catalog, '_tables', {'messages': {'message_id': 'integer', 'trade_id': 'integer',
+                                                          'player_id_0_0': 'integer', 'all_player_ids': 'ARRAY'}})
+    loader = ReferenceLoader.__new__(ReferenceLoader)
+    loader.config = ReferenceLoader.REFERENCE_TABLES['messages.csv']
+    staging_types = {'message_id': 'integer', 'trade_id': 'integer', 'player_id_0_0': 'text'}
+
+    plan = loader._build_full_load_plan('staging_messages', 'messages', staging_types)
+
+    assert 'INSERT INTO messages (message_id, trade_id, player_id_0_0, all_player_ids)' in plan.sql
+    assert '(CASE WHEN trade_id > 0 THEN trade_id ELSE NULL END)' in plan.sql
+    assert "NULLIF(player_id_0_0, '')::INTEGER" in plan.sql
+
+
+def test_insert_only_plan_keeps_existing_rows_and_the_upsert_hash(monkeypatch):
+    """Append loads insert new keys only, hashing rows the same way the upsert does"""
+    clear_load_plans()
+    monkeypatch.setattr(catalog, '_tables', {'players_game_batting_stats': TARGET_TYPES})
+    monkeypatch.setattr(catalog, 'version', 1)
+    staging_table = 'staging_players_game_batting_stats'
+    staging_types = {'player_id': 'integer', 'year': 'smallint', 'game_id': 'integer',
+                     'team_id': 'integer', 'ab': 'smallint', 'h': 'smallint'}
+
+    upsert = _loader(staging_types)._get_upsert_plan(staging_table, 'players_game_batting_stats')
+    insert = _loader(staging_types)._get_upsert_plan(staging_table, 'players_game_batting_stats',
+                                                     insert_only=True)
+
+    assert insert is not upsert
+    assert 'ON CONFLICT (player_id, year, game_id) DO NOTHING' in insert.sql
+    assert 'DO UPDATE' in upsert.sql and 'DO UPDATE' not in insert.sql
+    hash_expr = lambda sql: sql[sql.index('md5(ROW('):].split(')', 1)[0]
+    assert hash_expr(insert.sql) == hash_expr(upsert.sql)
+    clear_load_plans()
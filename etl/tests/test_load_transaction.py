@@ -0,0 +1,87 @@
+"""
+Tests for the per-thread load transaction of DatabaseConnection (run against in-memory SQLite)
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import psycopg2
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.connection import DatabaseConnection, compile_statement
+
+
+def _sqlite_db() -> DatabaseConnection:
+    database = DatabaseConnection.__new__(DatabaseConnection)
+    database._local = threading.local()
+    database.engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    database.SessionLocal = sessionmaker(bind=database.engine)
+    database.execute_sql(text("CREATE TABLE t (a INTEGER)"))
+    return database
+
+
+def _rows(database):
+    return [row[0] for row in database.execute_sql(text("SELECT a FROM t ORDER BY rowid"))]
+
+
+def test_load_context_commits_once_with_deferred_writes_last():
+    database = _sqlite_db()
+
+    with database.load_context():
+        database.defer(text("INSERT INTO t VALUES (:a)"), {'a': 1})
+        database.execute_sql(text("INSERT INTO t VALUES (2)"))
+        # A failed session block only rolls back its savepoint
+        with pytest.raises(ValueError):
+            with database.get_session() as session:
+                session.execute(text("INSERT INTO t VALUES (3)"))
+                raise ValueError("recoverable")
+        with database.load_context():  # nested contexts join the outer transaction
+            with database.get_session() as session:
+                session.execute(text("INSERT INTO t VALUES (4)"))
+        assert _rows(database) == [2, 4]
+
+    assert _rows(database) == [2, 4, 1]
+    assert database.load_transaction is None
+
+
+def test_load_context_rolls_back_everything_on_error():
+    database = _sqlite_db()
+
+    with pytest.raises(RuntimeError):
+        with database.load_context():
+            database.execute_sql(text("INSERT INTO t VALUES (1)"))
+            database.defer(text("INSERT INTO t VALUES (2)"))
+            raise RuntimeError("load failed")
+
+    # Outside a load transaction writes are committed right away
+    database.defer(text("INSERT INTO t VALUES (3)"))
+    assert _rows(database) == [3]
+
+
+def test_commit_load_keeps_work_done_before_it():
+    """A swap's rename is committed on its own; a later failure only rolls back what followed"""
+    database = _sqlite_db()
+
+    with pytest.raises(RuntimeError):
+        with database.load_context():
+            database.defer(text("INSERT INTO t VALUES (1)"))
+            database.execute_sql(text("INSERT INTO t VALUES (2)"))
+            database.commit_load()
+            database.execute_sql(text("INSERT INTO t VALUES (3)"))
+            raise RuntimeError("load failed")
+
+    assert _rows(database) == [2]
+
+
+def test_statements_are_bound_for_the_driver():
+    sql, params = compile_statement(psycopg2.dialect(), "SELECT CAST(:batch_id AS UUID), 'a%' WHERE x = :x",
+                                    {'batch_id': 'b', 'x': 1})
+
+    assert sql == "SELECT CAST(%(batch_id)s AS UUID), 'a%%' WHERE x = %(x)s"
+    assert params == {'batch_id': 'b', 'x': 1}
@@ -0,0 +1,49 @@
+"""
+Tests for the per-season digests that let game stats loads skip unchanged seasons
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.partition_digest import PartitionDigests
+
+
+def _games():
+    return pd.DataFrame({
+        'player_id': [1, 2, 1, 2, 3],
+        'year': [2023, 2023, 2024, 2024, 2024],
+        'game_id': [10, 10, 20, 21, 21],
+        'hr': [0, 1, 2, 0, 1],
+    })
+
+
+def test_digest_ignores_row_order_and_chunking():
+    df = _games()
+    whole = PartitionDigests()
+    whole.add(df)
+
+    chunked = PartitionDigests()
+    shuffled = df.iloc[[4, 1, 3, 0, 2]]
+    chunked.add(shuffled.iloc[:2])
+    chunked.add(shuffled.iloc[2:])
+
+    assert list(whole.keys) == [2023, 2024]
+    assert whole.digests() == chunked.digests()
+    assert whole.row_count(2024) == 3
+
+
+def test_only_the_edited_season_changes():
+    before = PartitionDigests()
+    before.add(_games())
+
+    edited = _games()
+    edited.loc[4, 'hr'] = 2
+    after = PartitionDigests()
+    after.add(edited)
+
+    assert after.digest(2023) == before.digest(2023)
+    assert after.digest(2024) != before.digest(2024)
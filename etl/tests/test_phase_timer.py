@@ -0,0 +1,60 @@
+"""
+Tests for loader phase timing and the batch performance report
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.batch_report import PhaseTotal, format_report, table_throughput
+from src.utils.phase_timer import PhaseTimer
+
+
+def test_phase_entered_per_chunk_adds_up():
+    timer = PhaseTimer('players_game_batting')
+    for rows in (100, 50):
+        with timer.phase('read') as phase:
+            phase.add_rows(rows)
+    with timer.phase('upsert', table_name='players_core') as phase:
+        phase.add_rows(7)
+
+    read, upsert = timer.records()
+    assert (read.name, read.table_name, read.rows, read.status) == ('read', 'players_game_batting', 150, 'success')
+    assert upsert.table_name == 'players_core'
+    assert set(timer.summary()) == {'read', 'upsert'}
+
+    timer.clear()
+    assert timer.records() == []
+
+
+def test_failed_phase_is_recorded_and_reraised():
+    timer = PhaseTimer('teams')
+    with pytest.raises(ValueError):
+        with timer.phase('staging_copy'):
+            raise ValueError('bad row')
+
+    [record] = timer.records()
+    assert record.status == 'failed'
+    assert record.duration_seconds >= 0
+
+
+def test_report_compares_with_previous_batch():
+    batch = {'batch_id': 'b2', 'status': 'completed', 'started_at': datetime(2026, 10, 2), 'wall_time_seconds': 90.0}
+    previous = {'batch_id': 'b1', 'status': 'completed', 'started_at': datetime(2026, 10, 1), 'wall_time_seconds': 120.0}
+    phases = [PhaseTotal('read', 'players_core', 10.0, 1000), PhaseTotal('upsert', 'players_core', 30.0, 1000),
+              PhaseTotal('view_refresh', 'leaderboard_career_batting', 5.0)]
+    previous_phases = [PhaseTotal('read', 'players_core', 20.0, 1000), PhaseTotal('upsert', 'players_core', 60.0, 1000)]
+
+    assert table_throughput(phases)['players_core'] == (40.0, 1000)
+    lines = format_report(batch, phases, previous, previous_phases, top=2)
+
+    assert lines[1] == 'Wall time 90.0s -25%'
+    slowest = lines[lines.index('Slowest phases (top 2)') + 2:][:2]
+    assert slowest[0].startswith('upsert') and '-50%' in slowest[0]
+    assert slowest[1].startswith('read')
+    players = next(line for line in lines if line.startswith('players_core'))
+    assert players.split()[-2:] == ['25', '+100%']
@@ -0,0 +1,42 @@
+"""
+Tests for the set-based players_ratings payload preparation
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.loaders.players_loader import PlayersLoader
+
+
+def _players_frame():
+    columns = [col for fields in PlayersLoader.RATING_TYPES.values() for col in fields.values()]
+    df = pd.DataFrame({col: [1, 2, 3] for col in columns})
+    df.insert(0, 'player_id', [10, 11, 10])
+    df['injury_left'] = [5.0, np.nan, 7.0]
+    return df
+
+
+def test_ratings_are_single_encoded_json_objects():
+    """One row per player and rating type; JSON objects with ints and nulls, last duplicate wins"""
+    loader = PlayersLoader.__new__(PlayersLoader)
+    loader.current_season = 2024
+
+    ratings = loader._prepare_ratings_data(_players_frame())
+
+    assert len(ratings) == 2 * len(PlayersLoader.RATING_TYPES)
+    assert set(ratings['rating_type']) == set(PlayersLoader.RATING_TYPES)
+
+    injury = ratings[(ratings['player_id'] == 10) & (ratings['rating_type'] == 'injury')]
+    payload = json.loads(injury['ratings'].iloc[0])
+    assert list(payload) == list(PlayersLoader.RATING_TYPES['injury'])
+    assert payload['injury_left'] == 7 and isinstance(payload['injury_left'], int)
+    assert payload['is_injured'] == 3
+
+    nulls = ratings[(ratings['player_id'] == 11) & (ratings['rating_type'] == 'injury')]
+    assert json.loads(nulls['ratings'].iloc[0])['injury_left'] is None
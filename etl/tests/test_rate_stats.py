@@ -0,0 +1,54 @@
+"""
+Tests for the career rate stats computed before COPY
+"""
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.transformers.rate_stats import batting_rates, pitching_rates, rounded_ratio
+
+
+def test_rounding_is_exact_half_up():
+    rng = np.random.default_rng(7)
+    numerator = pd.Series(rng.integers(-50, 400, 5000))
+    denominator = pd.Series(rng.integers(-2, 600, 5000))
+
+    result = rounded_ratio(numerator, denominator, 3)
+
+    expected = [float((Decimal(int(n)) / Decimal(int(d))).quantize(Decimal('0.001'), ROUND_HALF_UP)) if d > 0 else 0.0
+                for n, d in zip(numerator, denominator)]
+    assert result.tolist() == expected
+    # 27 / 8 = 3.375: binary floating point would round this down
+    assert rounded_ratio(pd.Series([27]), pd.Series([8]), 2).tolist() == [3.38]
+
+
+def test_batting_rates():
+    df = pd.DataFrame({'ab': [8, 0, None], 'h': [3, 0, 1], 'd': [1, 0, 0], 't': [0, 0, 0], 'hr': [1, 0, 0],
+                       'bb': [1, 0, 0], 'hp': [0, 0, 0], 'sf': [0, 0, 0], 'k': [2, 0, 0]}, dtype='Int16')
+
+    rates = pd.DataFrame(batting_rates(df))
+
+    assert rates.loc[0].to_dict() == {'batting_average': 0.375, 'on_base_percentage': 0.444,
+                                      'slugging_percentage': 0.875, 'ops': 1.319, 'iso': 0.5, 'babip': 0.4}
+    # No at bats (or unknown at bats) rate as 0, like the CASE WHEN ab > 0 ... ELSE 0 it replaces
+    assert (rates.loc[1:] == 0).all().all()
+
+
+def test_pitching_rates():
+    df = pd.DataFrame({'outs': [8, 3, 600], 'er': [1, None, 1500], 'bb': [1, 0, 60], 'ha': [2, 1, 180],
+                       'hra': [0, 0, 20], 'k': [3, 0, 150], 'ab': [6, 1, 700], 'sf': [0, 0, 5]}, dtype='Int16')
+
+    rates = pd.DataFrame(pitching_rates(df))
+
+    assert rates.loc[0].to_dict() == {'era': 3.38, 'whip': 1.13, 'k9': 10.1, 'bb9': 3.4, 'hr9': 0.0,
+                                      'h9': 6.8, 'babip': 0.667}
+    assert np.isnan(rates.loc[1, 'era'])
+    assert rates.loc[1, 'babip'] == 0.999
+    # 27 * 1500 earned runs does not overflow the compact Int16 column
+    assert rates.loc[2, 'era'] == 67.5
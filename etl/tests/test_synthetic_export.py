@@ -0,0 +1,56 @@
+"""
+Tests for the synthetic OOTP export used by the ETL benchmarks
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.loaders.game_stats_loader import GamePitchingStatsLoader
+from src.loaders.players_loader import PlayersLoader
+from src.utils.synthetic_export import SyntheticExport
+
+
+def test_same_seed_writes_identical_files(tmp_path):
+    first = SyntheticExport(seasons=1, games_per_team=4).write(tmp_path / 'a')
+    second = SyntheticExport(seasons=1, games_per_team=4).write(tmp_path / 'b')
+
+    assert first == second
+    for filename in first:
+        assert (tmp_path / 'a' / filename).read_bytes() == (tmp_path / 'b' / filename).read_bytes()
+    other_seed = SyntheticExport(seasons=1, games_per_team=4, seed=7).frame('players_career_batting_stats.csv')
+    assert not other_seed.equals(SyntheticExport(seasons=1, games_per_team=4).frame('players_career_batting_stats.csv'))
+
+
+def test_stats_are_consistent_and_scale():
+    export = SyntheticExport(scale=2, seasons=2, games_per_team=4)
+    batting = export.frame('players_career_batting_stats.csv')
+
+    assert (batting['ab'] == batting['pa'] - batting['bb'] - batting['hp'] - batting['sf'] - batting['sh']).all()
+    assert ((batting['h'] <= batting['ab']) & (batting['hr'] + batting['d'] + batting['t'] <= batting['h'])).all()
+    splits = batting.pivot_table(index=['player_id', 'year'], columns='split_id', values='pa')
+    assert (splits[1] == splits[2] + splits[3]).all()
+    assert not batting.duplicated(['player_id', 'year', 'team_id', 'split_id', 'stint']).any()
+
+    game = export.frame('players_game_batting.csv')
+    assert not game.duplicated(['player_id', 'year', 'game_id']).any()
+    # Every side of every game bats nine
+    assert (game.groupby(['game_id', 'team_id']).size() == 9).all()
+    assert game['game_id'].nunique() == export.teams // 2 * export.games_per_team * export.seasons
+    assert len(export.frame('players.csv')) == 2 * len(SyntheticExport(seasons=2).frame('players.csv'))
+
+
+def test_files_have_the_columns_the_loaders_read():
+    export = SyntheticExport(seasons=1, games_per_team=2)
+    players = export.frame('players.csv')
+    rating_columns = [col for fields in PlayersLoader.RATING_TYPES.values() for col in fields.values()]
+    assert set(rating_columns + ['player_id', 'team_id', 'morale', 'draft_team_id', 'loan_team_id']) <= set(players)
+
+    pitching = export.frame('players_game_pitching_stats.csv')
+    assert set(GamePitchingStatsLoader.get_column_mapping(None)) <= set(pitching)
+    teams = export.frame('teams.csv')
+    assert set(players['team_id']) <= set(teams['team_id'])
+    assert pd.api.types.is_integer_dtype(pitching['k'])
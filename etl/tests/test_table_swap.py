@@ -0,0 +1,85 @@
+"""
+Tests for the shadow-table swap used by full loads
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.table_swap import IndexSpec, get_referencing_keys, swap_in_shadow_table
+
+
+class RecordingConnection:
+    """Captures statements and answers the catalog queries of the swap"""
+
+    def __init__(self, indexes, sequences=()):
+        self.indexes = indexes
+        self.sequences = list(sequences)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if 'pg_get_indexdef' in sql:
+            return [(spec.name, spec.definition, spec.constraint_type) for spec in self.indexes]
+        if 'pg_get_serial_sequence' in sql:
+            return self.sequences
+        return []
+
+
+def test_index_definitions_are_retargeted_to_the_shadow():
+    spec = IndexSpec('parks_pkey', 'CREATE UNIQUE INDEX parks_pkey ON public.parks USING btree (park_id)', 'p')
+
+    assert spec.create_sql('parks_shadow') == \
+        'CREATE UNIQUE INDEX parks_pkey_shadow ON parks_shadow USING btree (park_id)'
+    assert spec.attach_sql('parks_shadow') == \
+        'ALTER TABLE parks_shadow ADD CONSTRAINT parks_pkey_shadow PRIMARY KEY USING INDEX parks_pkey_shadow'
+    assert IndexSpec('idx_parks_name', 'CREATE INDEX idx_parks_name ON public.parks (name)').attach_sql('x') is None
+
+
+def test_swap_renames_tables_then_indexes_and_keeps_sequences():
+    """The old table's index names are freed before the shadow's take them over"""
+    connection = RecordingConnection(
+        [IndexSpec('parks_pkey', 'CREATE UNIQUE INDEX parks_pkey ON public.parks (park_id)', 'p')],
+        sequences=[('park_id', 'public.parks_park_id_seq')],
+    )
+
+    old = swap_in_shadow_table(connection, 'parks', 'parks_shadow', 5000)
+
+    ddl = [sql for sql in connection.statements if sql.startswith('ALTER')]
+    assert old == 'parks_old'
+    assert ddl == [
+        'ALTER TABLE parks RENAME TO parks_old',
+        'ALTER TABLE parks_shadow RENAME TO parks',
+        'ALTER INDEX parks_pkey RENAME TO parks_pkey_old',
+        'ALTER INDEX parks_pkey_shadow RENAME TO parks_pkey',
+        'ALTER SEQUENCE public.parks_park_id_seq OWNED BY parks.park_id',
+    ]
+    assert "SET LOCAL lock_timeout = '5000ms'" in connection.statements
+
+
+def test_referencing_keys_include_deferred_foreign_keys():
+    """Rows still pointed at through a dropped (deferred) foreign key are protected too"""
+
+    class Result(list):
+        def scalar(self):
+            return self[0][0]
+
+    class CatalogConnection:
+        def execute(self, statement, params=None):
+            sql = str(statement)
+            if 'FROM pg_constraint' in sql:
+                return Result([('teams', 'FOREIGN KEY (nation_id) REFERENCES nations(nation_id)')])
+            if 'to_regclass' in sql:
+                return Result([(True,)])
+            return Result([
+                ('players', 'FOREIGN KEY (nation_id) REFERENCES nations(nation_id) ON DELETE SET NULL'),
+                ('players', 'FOREIGN KEY (team_id) REFERENCES teams(team_id)'),
+                ('teams', 'FOREIGN KEY (nation_id) REFERENCES nations(nation_id)'),
+            ])
+
+    keys = get_referencing_keys(CatalogConnection(), 'nations')
+
+    assert [(key.table, key.columns) for key in keys] == [('teams', ('nation_id',)), ('players', ('nation_id',))]
+    assert keys[0].referenced_sql('t') == 'EXISTS (SELECT 1 FROM teams r WHERE r.nation_id = t.nation_id)'
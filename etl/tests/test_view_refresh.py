@@ -0,0 +1,53 @@
+"""
+Tests for the change-driven materialized view refresh
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.database.view_refresh import refresh_waves, stale_views
+from src.loaders.players_loader import PlayersLoader
+
+DEPENDENCIES = {
+    'leaderboard_career_batting': {'players_career_batting_stats', 'players_core', 'players_current_status'},
+    'leaderboard_career_pitching': {'players_career_pitching_stats', 'players_core', 'players_current_status'},
+    'leaderboard_yearly_batting': {'players_career_batting_stats', 'players_core', 'leagues'},
+    'leaderboard_batting_summary': {'leaderboard_yearly_batting'},
+}
+
+
+def test_only_views_reading_changed_tables_are_stale():
+    refreshed = {view: datetime(2026, 10, 1) for view in DEPENDENCIES}
+    changes = {
+        'players_career_batting_stats': datetime(2026, 10, 2),  # changed since the refresh
+        'players_career_pitching_stats': datetime(2026, 9, 30),
+        'leagues': datetime(2026, 9, 1),
+    }
+
+    assert stale_views(DEPENDENCIES, changes, refreshed) == [
+        'leaderboard_batting_summary', 'leaderboard_career_batting', 'leaderboard_yearly_batting']
+    # Never refreshed by the ETL
+    del refreshed['leaderboard_career_pitching']
+    assert 'leaderboard_career_pitching' in stale_views(DEPENDENCIES, changes, refreshed)
+
+
+def test_views_reading_other_views_wait_for_them():
+    waves = refresh_waves(sorted(DEPENDENCIES), DEPENDENCIES)
+
+    assert waves == [
+        ['leaderboard_career_batting', 'leaderboard_career_pitching', 'leaderboard_yearly_batting'],
+        ['leaderboard_batting_summary'],
+    ]
+
+
+def test_players_load_marks_every_written_table_and_stub_parent():
+    loader = PlayersLoader.__new__(PlayersLoader)
+    loader.stats = {'rows_inserted': 0, 'rows_updated': 0, 'rows_deleted': 0}
+    assert loader._changed_tables() == []
+
+    loader.stats.update(rows_updated=3, stubs_created={'teams': 2})
+    assert loader._changed_tables() == ['teams', 'players_core', 'players_current_status',
+                                        'players_contracts', 'players_ratings']
@@ -0,0 +1,60 @@
+"""
+Tests for the (year, game_id) watermark of the game-level stats append loads
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.watermark import KeyWatermark, WatermarkProgress, highest_key
+
+
+def test_rows_past_the_watermark_compare_year_then_game():
+    """Later seasons pass whatever their game_id; the watermark's season only past its game_id"""
+    watermark = KeyWatermark.parse('year,game_id', '2025,500')
+    chunk = pd.DataFrame({
+        'year': pd.array([2024, 2025, 2025, 2025, 2026, None], dtype='Int16'),
+        'game_id': pd.array([900, 499, 500, 501, 1, 700], dtype='Int32'),
+    })
+
+    assert watermark.past(chunk).tolist() == [False, False, False, True, True, False]
+    assert watermark.column_spec == 'year,game_id' and str(watermark) == '2025,500'
+
+
+def test_watermark_advances_to_the_highest_key():
+    chunk = pd.DataFrame({'year': [2025, 2026, 2026, np.nan], 'game_id': [900, 12, 40, 99]})
+
+    assert highest_key(chunk, ('year', 'game_id')) == (2026, 40)
+    start = KeyWatermark(('year', 'game_id'), ())
+    assert start.advance(chunk).value == (2026, 40)
+    assert start.advance(chunk.iloc[:0]) is start
+    later = KeyWatermark(('year', 'game_id'), (2027, 1))
+    assert later.advance(chunk) is later
+
+
+def test_watermark_stays_below_rows_dropped_for_a_missing_parent():
+    """A later game must not move the watermark past a row the next append should retry"""
+    start = KeyWatermark(('year', 'game_id'), (2025, 900))
+    seen = pd.DataFrame({'year': [2026, 2026, 2026, 2026], 'game_id': [12, 31, 35, 40]})
+    progress = WatermarkProgress(start)
+
+    progress.add(seen, seen.take([1, 3]))  # rows of games 12 and 35 dropped for a missing parent
+
+    assert progress.watermark.value == (2026, 11) and progress.moved
+    assert progress.watermark.past(seen).all()
+    loaded = KeyWatermark(('year', 'game_id'), (2026, 40))
+    assert loaded.capped_before((2026, 41)) is loaded and loaded.capped_before(None) is loaded
+
+
+def test_append_needs_watermark_columns():
+    """Loaders without WATERMARK_COLUMNS refuse the append strategy instead of silently reloading"""
+    from src.loaders.reference_loader import ReferenceLoader
+    loader = ReferenceLoader.__new__(ReferenceLoader)
+
+    with pytest.raises(ValueError, match='WATERMARK_COLUMNS'):
+        loader._handle_append_load(Path('parks.csv'))